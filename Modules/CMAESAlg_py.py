@@ -0,0 +1,135 @@
+#==========================================================================================
+# Realization of the CMA-ES search algorithm (covariance matrix adaptation evolution
+# strategy, N. Hansen). The same algorithm as in CMAESAlgorithm.c: the whole population
+# is evaluated in one batch, the offspring outside the bounds are repaired with the
+# quadratic penalty and the run is restarted from the random mean on the stagnation
+#==========================================================================================
+
+import numpy as np
+from Modules.SearchAlg_py import SearchAlg_py
+
+class CMAESAlg_py(SearchAlg_py):
+    """Class for CMA-ES search algorithm"""
+    def __init__(self, progress_callback, init_circularity, init_convexity,
+                 init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit,
+                 usePrecisionLimit, precisionLimit, showErrorPlot, popSize=0, sigma0=0.3,
+                 initPosition=None, rng=None, control=None):
+        super().__init__(progress_callback, init_circularity, init_convexity, init_elongation,
+                         nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit,
+                         precisionLimit, showErrorPlot, rng, control)
+        n = nVar
+        self.popSize = popSize if popSize > 0 else 4 + int(3 * np.log(n))  # Population size (lambda)
+        self.sigma0 = sigma0  # Initial step size (fraction of the variables range)
+        self.initPosition = initPosition  # Initial mean (None - random position)
+        # Strategy parameters (defaults of N. Hansen for the population size)
+        self.mu = max(self.popSize // 2, 1)  # Number of the parents
+        weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / np.sum(weights)  # Recombination weights
+        self.mueff = 1.0 / np.sum(self.weights ** 2)  # Variance effective selection mass
+        self.cc = (4.0 + self.mueff / n) / (n + 4.0 + 2.0 * self.mueff / n)  # Learning rate of pc
+        self.cs = (self.mueff + 2.0) / (n + self.mueff + 5.0)  # Learning rate of ps
+        self.c1 = 2.0 / ((n + 1.3) ** 2 + self.mueff)  # Learning rate of the rank-one update
+        self.cmu = min(1.0 - self.c1, 2.0 * (self.mueff - 2.0 + 1.0 / self.mueff) /
+                       ((n + 2.0) ** 2 + self.mueff))  # Learning rate of the rank-mu update
+        self.damps = 1.0 + self.cs + 2.0 * max(0.0, np.sqrt((self.mueff - 1.0) / (n + 1.0)) - 1.0)
+        self.chiN = np.sqrt(n) * (1.0 - 1.0 / (4.0 * n) + 1.0 / (21.0 * n * n))  # E||N(0, I)||
+        # State of the run
+        self.mean = None  # Mean of the distribution
+        self.sigma = None  # Step size
+        self.pc = None  # Evolution path of the covariance matrix
+        self.ps = None  # Evolution path of the step size
+        self.C = None  # Covariance matrix
+        self.B = None  # Eigenvectors of C (columns)
+        self.D = None  # Square roots of the eigenvalues of C
+        self.eigenAge = None  # Generations since the last eigen decomposition
+        self.generation = None  # Generation of the current run
+        self.noImprove = None  # Generations without the improvement of the best cost of the run
+        self.runBestCost = None  # Best penalized cost of the run
+        self.restartPending = False  # Flag to start the new run in the next iteration
+
+    def start_run(self, mean):
+        """Method for the start of the run: the distribution is the sphere around the mean"""
+        n = self.nVar
+        self.mean = np.array(mean, dtype='double')
+        self.sigma = self.sigma0 * (self.varMax - self.varMin)
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.C = np.eye(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.eigenAge = 0
+        self.generation = 0
+        self.noImprove = 0
+        self.runBestCost = np.inf
+        self.restartPending = False
+
+    def initialization(self):
+        """Method for the initial distribution (the initial mean is the first global best)"""
+        if self.initPosition is not None:
+            mean = np.asarray(self.initPosition[:self.nVar], dtype='double')
+        else:
+            mean = self.randomize_positions(self.nVar)
+        self.start_run(mean)
+        cost = self.calc_costs(self.mean[np.newaxis])
+        self.update_global_best(cost[0], self.mean)
+        self.arrayBestCosts.append(self.globalBestCost)
+
+    def iterate(self):
+        """Method for one generation: sampling, evaluation (one batch) and the update of the
+           distribution"""
+        if self.restartPending:
+            self.start_run(self.randomize_positions(self.nVar))
+        n = self.nVar
+
+        # Sampling x = mean + sigma * B * D * z
+        z = self.rng.standard_normal((self.popSize, n))
+        y = (z * self.D) @ self.B.T
+        costs = self.calc_penalized_costs(self.mean + self.sigma * y)
+        index = np.argsort(costs, kind='stable')
+        if costs[index[0]] < self.runBestCost:
+            self.runBestCost = costs[index[0]]
+            self.noImprove = 0
+        else:
+            self.noImprove += 1
+        self.generation += 1
+
+        # Mean and the evolution path of sigma (C^-1/2 * yw = B * zw)
+        yParents = y[index[:self.mu]]
+        yw = self.weights @ yParents
+        zw = self.weights @ z[index[:self.mu]]
+        self.mean = self.mean + self.sigma * yw
+        self.ps = (1.0 - self.cs) * self.ps + np.sqrt(self.cs * (2.0 - self.cs) * self.mueff) * (self.B @ zw)
+        normPs = np.linalg.norm(self.ps)
+
+        # Evolution path of C (stalled if the step size grows too fast)
+        hsig = float(normPs / np.sqrt(1.0 - (1.0 - self.cs) ** (2 * self.generation)) / self.chiN <
+                     1.4 + 2.0 / (n + 1.0))
+        self.pc = (1.0 - self.cc) * self.pc + hsig * np.sqrt(self.cc * (2.0 - self.cc) * self.mueff) * yw
+
+        # Covariance matrix (rank-one and rank-mu update) and the step size
+        coef = 1.0 - self.c1 - self.cmu + (1.0 - hsig) * self.c1 * self.cc * (2.0 - self.cc)
+        self.C = coef * self.C + self.c1 * np.outer(self.pc, self.pc) + \
+            self.cmu * (yParents.T * self.weights) @ yParents
+        self.sigma *= np.exp((self.cs / self.damps) * (normPs / self.chiN - 1.0))
+
+        # Eigen decomposition C = B * D^2 * B' (once in several generations)
+        self.eigenAge += 1
+        if self.eigenAge > 1.0 / ((self.c1 + self.cmu) * n * 10.0):
+            self.eigenAge = 0
+            (eigenValues, self.B) = np.linalg.eigh(self.C)
+            self.D = np.sqrt(np.maximum(eigenValues, 1e-300))
+
+        # Restart of the run on the collapse of the distribution or the stagnation
+        if ((self.sigma * self.D.max() < 1e-12 * (self.varMax - self.varMin)) or
+                (self.D.max() > 1e7 * self.D.min()) or
+                (self.noImprove > 10 + 30 * n // self.popSize)):
+            self.restartPending = True
+
+    def get_radius(self):
+        """Method for the radius of the distribution (RMS distance of the offspring to the mean)"""
+        return self.sigma * np.sqrt(np.sum(self.D ** 2))
+
+    def restart(self):
+        """Method for the restart on the stagnation found by the monitor (new run from the
+           random mean)"""
+        self.restartPending = True
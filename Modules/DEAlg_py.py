@@ -0,0 +1,77 @@
+#==========================================================================================
+# Realization of the differential evolution (DE) search algorithm (R. Storn, K. Price)
+# with the DE/current-to-best/1/bin strategy. The same algorithm as in DEAlgorithm.c:
+# all the trial vectors of the generation are evaluated in one batch
+#==========================================================================================
+
+import numpy as np
+from Modules.SearchAlg_py import SearchAlg_py
+
+class DEAlg_py(SearchAlg_py):
+    """Class for differential evolution search algorithm"""
+    def __init__(self, progress_callback, init_circularity, init_convexity,
+                 init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit,
+                 usePrecisionLimit, precisionLimit, showErrorPlot, nPop=0, F=0.6, CR=0.9,
+                 initPosition=None, rng=None, control=None):
+        super().__init__(progress_callback, init_circularity, init_convexity, init_elongation,
+                         nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit,
+                         precisionLimit, showErrorPlot, rng, control)
+        self.nPop = max(nPop if nPop > 0 else 5 * nVar, 4)  # Population size
+        self.F = F  # Differential weight
+        self.CR = CR  # Crossover probability
+        self.initPosition = initPosition  # Position of the first individual (None - random)
+        # Population is stored as (nPop, nVar) array (one row for every individual)
+        self.position = None  # Positions of the individuals
+        self.cost = None  # Costs of the individuals
+        self.best = None  # Index of the best individual
+
+    def initialization(self):
+        """Method for the initial population"""
+        self.position = self.randomize_positions((self.nPop, self.nVar))
+        if self.initPosition is not None:
+            self.position[0] = self.initPosition[:self.nVar]
+        self.cost = self.calc_costs(self.position)
+        self.best = int(np.argmin(self.cost))
+        self.update_global_best(self.cost[self.best], self.position[self.best])
+        self.arrayBestCosts.append(self.globalBestCost)
+
+    def iterate(self):
+        """Method for one generation: mutation, crossover, evaluation (one batch) and selection"""
+        NP = self.nPop
+        rows = np.arange(NP)
+        # Random individuals r1 != r2 != i
+        r1 = (rows + self.rng.randint(1, NP, NP)) % NP
+        r2 = self.rng.randint(0, NP - 2, NP)
+        r2 += r2 >= np.minimum(rows, r1)
+        r2 += r2 >= np.maximum(rows, r1)
+
+        # Mutation and crossover: u = x + F * (x_best - x) + F * (x_r1 - x_r2)
+        mutant = self.position + self.F * (self.position[self.best] - self.position) + \
+            self.F * (self.position[r1] - self.position[r2])
+        # Restrictions to the position (as in PSO). Reset to random
+        outside = (mutant > self.varMax) | (mutant < self.varMin)
+        mutant[outside] = self.randomize_positions(np.count_nonzero(outside))
+        crossover = self.rng.uniform(0.0, 1.0, (NP, self.nVar)) < self.CR
+        crossover[rows, self.rng.randint(0, self.nVar, NP)] = True
+        trial = np.where(crossover, mutant, self.position)
+
+        # Selection (the trial replaces the individual if it is not worse)
+        trialCost = self.calc_costs(trial)
+        replaced = trialCost <= self.cost
+        self.position[replaced] = trial[replaced]
+        self.cost[replaced] = trialCost[replaced]
+        self.best = int(np.argmin(self.cost))
+        self.update_global_best(self.cost[self.best], self.position[self.best])
+
+    def get_radius(self):
+        """Method for the radius of the population (RMS distance to the best individual)"""
+        return np.sqrt(np.mean(np.sum((self.position - self.position[self.best]) ** 2, axis=1)))
+
+    def restart(self):
+        """Method for the restart of the worst individuals at the random positions (the best
+           individual is kept)"""
+        n = min(max(int(self.control.restartFraction * self.nPop + 0.5), 1), self.nPop - 1)
+        order = np.argsort(-self.cost, kind='stable')
+        worst = order[order != self.best][:n]
+        self.position[worst] = self.randomize_positions((n, self.nVar))
+        self.cost[worst] = self.calc_costs(self.position[worst])
@@ -0,0 +1,15 @@
+#include "data_types.h"
+
+#ifndef FUNCTION_NMALG_RUN_SEARCH_H_
+#define FUNCTION_NMALG_RUN_SEARCH_H_
+
+	/* Function for performing the particle shape search with Nelder-Mead simplex algorithm */
+	void NMAlg_run_search(rngState_t *rng, double init_circularity, double init_convexity,
+		double init_elongation, int nVar, double varMin, double varMax, int useIterLimit,
+		int iterLimit, int usePrecisionLimit, double precisionLimit, int showErrorPlot,
+		double step, const double *initPosition, const psoControl_t *control,
+		shapeSpace_t *space, const searchProgress_t *progress, unsigned int *iteration, int *status,
+		unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+		double *arrayBestCosts);
+
+#endif /* FUNCTION_NMALG_RUN_SEARCH_H_ */
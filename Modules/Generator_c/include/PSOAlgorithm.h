@@ -1,11 +1,50 @@
+#include "data_types.h"
+
 #ifndef FUNCTION_PSOALG_RUN_SEARCH_H_
 #define FUNCTION_PSOALG_RUN_SEARCH_H_
 
+	/* Statuses of the finished search */
+	#define PSO_STATUS_PRECISION 0  /* Precision limit is reached */
+	#define PSO_STATUS_ITER_LIMIT 1  /* Iteration limit is reached */
+	#define PSO_STATUS_GAVE_UP 2  /* Search is given up by the convergence monitor */
+	#define PSO_STATUS_CANCELLED 3  /* Search is cancelled by the shared cancel flag */
+	#define PSO_STATUS_ARCHIVE 4  /* Shape is taken from the archive (no search) */
+	#define PSO_STATUS_INITIAL 5  /* Initial position is within the precision limit (no search) */
+	
+	/* Actions of the convergence monitor */
+	#define PSO_MONITOR_CONTINUE 0  /* Search continues */
+	#define PSO_MONITOR_RESTART 1  /* Population is restarted partially */
+	#define PSO_MONITOR_GIVE_UP 2  /* Search is given up */
+	
+	/* Function for filling the default settings of the convergence monitor */
+	void PSOAlg_default_control(psoControl_t *control);
+
+	/* Function for the check of the search progress by the convergence monitor */
+	int PSOAlg_monitor_check(const psoControl_t *control, double *history, int iteration, 
+		double globalBestCost, double radius, int *restarts, int *lastRestart, int useIterLimit, 
+		int iterLimit, int usePrecisionLimit, double precisionLimit);
+	
+	/* Function for the progress report of the search (returns 1 if the search is cancelled) */
+	int PSOAlg_progress_check(const searchProgress_t *progress, shapeSpace_t *space, double *lastReportMs, 
+		unsigned int iteration, unsigned long evaluations, double globalBestCost, 
+		const double *globalBestPosition);
+	
 	/* Function for performing the particle shape search with PSO algorithm */
-	void PSOAlg_run_search(double init_circularity, double init_convexity, double init_elongation,
+	void PSOAlg_run_search(rngState_t *rng, double init_circularity, double init_convexity, double init_elongation,
 		int nVar, double varMin, double varMax, int useIterLimit, int iterLimit, 
 		int usePrecisionLimit, double precisionLimit, int showErrorPlot, int nPop, double w,
-		double wDamp, double c1, double c2, int a, int b, unsigned int *iteration, double *globalBestCost, 
-		double *globalBestPosition, double *arrayBestCosts);
+		double wDamp, double c1, double c2, int a, int b, const double *initPosition,
+		const psoControl_t *control, shapeSpace_t *space, shapeArchive_t *archive,
+		const searchProgress_t *progress, unsigned int *iteration, int *status, 
+		unsigned long *evaluations, double *globalBestCost, double *globalBestPosition, 
+		double *arrayBestCosts);
+	
+	/* Function for performing the search of K particle shapes with K independent PSO swarms
+	   in lock-step (targets is K x 3 array, results are K and K x nVar arrays) */
+	void PSOAlg_run_search_batch(rngState_t *rng, int K, const double *targets, int nVar, double varMin, 
+		double varMax, int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit,
+		int nPop, double w, double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+		const psoControl_t *control, shapeSpace_t *space, shapeArchive_t *archive, unsigned int *iterations,
+		int *statuses, unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions);
 	
 #endif /* FUNCTION_PSOALG_RUN_SEARCH_H_ */
@@ -0,0 +1,43 @@
+#include "data_types.h"
+
+#ifndef FUNCTION_SEARCHALG_RUN_SEARCH_H_
+#define FUNCTION_SEARCHALG_RUN_SEARCH_H_
+
+	/* Search algorithms of the particle shape (optimizer of optSettings_t) */
+	#define OPT_PSO 0  /* Particle swarm optimization */
+	#define OPT_CMAES 1  /* Covariance matrix adaptation evolution strategy */
+	#define OPT_DE 2  /* Differential evolution */
+	#define OPT_NM 3  /* Nelder-Mead simplex */
+
+	/* Function for filling the default settings of the search algorithms (PSO is chosen) */
+	void SearchAlg_default_settings(optSettings_t *settings);
+
+	/* Function for performing the particle shape search with the chosen algorithm */
+	void SearchAlg_run_search(rngState_t *rng, const optSettings_t *settings, double init_circularity,
+		double init_convexity, double init_elongation, int nVar, double varMin, double varMax,
+		int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit,
+		int showErrorPlot, int nPop, double w, double wDamp, double c1, double c2, int a, int b,
+		const double *initPosition, const psoControl_t *control, const searchProgress_t *progress,
+		shapeArchive_t *archive, unsigned int *iteration, int *status, unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+		double *arrayBestCosts);
+
+	/* Function for performing the search of K particle shapes with the chosen algorithm
+	   (targets is K x 3 array, results are K and K x nVar arrays) */
+	void SearchAlg_run_search_batch(rngState_t *rng, const optSettings_t *settings, int K,
+		const double *targets, int nVar, double varMin, double varMax, int useIterLimit,
+		int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop, double w,
+		double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+		const psoControl_t *control, shapeArchive_t *archive, unsigned int *iterations, int *statuses,
+		unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions);
+
+	/* Function for performing the search of K particle shapes in the order of the Hilbert curve
+	   through the targets, every search starts around the shape found for its neighbour along
+	   the curve (results are in the original order of the targets) */
+	void SearchAlg_run_search_ordered(rngState_t *rng, const optSettings_t *settings, int K,
+		const double *targets, int batchSize, int nVar, double varMin, double varMax,
+		int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop,
+		double w, double wDamp, double c1, double c2, int a, int b, const psoControl_t *control,
+		shapeArchive_t *archive, unsigned int *iterations, int *statuses, unsigned long *evaluations, 
+		double *globalBestCosts, double *globalBestPositions);
+
+#endif /* FUNCTION_SEARCHALG_RUN_SEARCH_H_ */
@@ -0,0 +1,14 @@
+#ifndef FUNCTION_CONVEX_HULL_H_
+#define FUNCTION_CONVEX_HULL_H_
+
+	/* Function for determination of the convex hull coordinates of the star-shaped polygon
+	   (dims points in angular order) with Graham scan in O(n) without sorting */
+	int calc_convex_hull_coords(int nDim, double *dimsCoordMidX, double *dimsCoordMidY,
+		double *hullCoordMidX, double *hullCoordMidY);
+	
+	/* Function for determination of the convex hull coordinates of any set of points
+	   with Andrew's monotone chain algorithm in O(n log n) */
+	int calc_convex_hull_coords_monotone(int nDim, double *dimsCoordMidX, double *dimsCoordMidY,
+		double *hullCoordMidX, double *hullCoordMidY);
+	
+#endif /* FUNCTION_CONVEX_HULL_H_ */
@@ -1,3 +1,5 @@
+#include <stdint.h>
+
 #ifndef DATA_TYPES_H_
 #define DATA_TYPES_H_
 
@@ -32,9 +34,194 @@
 	    double aspectRatio;
 	    double elongation;
 	    double maxDistance;
+	    double minFeret;
+	    double rectLength;
+	    double rectWidth;
 	};
 	
 	/* Type of the paramsStruct */
 	typedef struct paramsStruct paramsStruct_t;
 	
+	/* Declare the workspace with all scratch buffers of the particle parameters calculation.
+	   It is created once for the certain nDim and reused by every call (no malloc inside) */
+	struct geomWorkspace {
+		int nDim;  /* Number of the particle dimensions (length of every buffer) */
+		double *dimsCoordMidX;  /* X coordinates of the dims points */
+		double *dimsCoordMidY;  /* Y coordinates of the dims points */
+		double *hullCoordMidX;  /* X coordinates of the convex hull points */
+		double *hullCoordMidY;  /* Y coordinates of the convex hull points */
+		double *cosTable;  /* cos of the directions of the dims points (i * 2*pi/nDim) */
+		double *sinTable;  /* sin of the directions of the dims points (i * 2*pi/nDim) */
+		double *gradScratch;  /* Derivatives of the intermediate values by the radii (8 x nDim) */
+	};
+	
+	/* Type of the geomWorkspace */
+	typedef struct geomWorkspace geomWorkspace_t;
+	
+	/* Declare the decision space of the particle shape search. The search variables are
+	   the radii (nHarmonics = 0) or the radial Fourier coefficients: mean radius and the
+	   cos/sin amplitudes of nHarmonics harmonics, all scaled to the range [0, 1]. The
+	   coefficients are expanded to nDim radii clamped to [0, 1] (see shape_space.c) */
+	struct shapeSpace {
+		int nDim;  /* Number of the particle dimensions (radii) */
+		int nHarmonics;  /* Number of the harmonics (0 - radii are the decision variables) */
+		int nVar;  /* Number of the decision variables (nDim or 1 + 2 * nHarmonics) */
+		double *basis;  /* Scaled cos/sin of the harmonics at the dims directions (2 * nHarmonics x nDim) */
+		double *dims;  /* Scratch buffer with the expanded radii (capacity x nDim) */
+		int capacity;  /* Number of the rows of the scratch buffer */
+	};
+	
+	/* Type of the shapeSpace */
+	typedef struct shapeSpace shapeSpace_t;
+	
+	/* Declare the bounded archive of the evaluated shapes. The shapes are indexed by the
+	   cells of the grid over circularity, convexity and elongation (hash table with the
+	   chains of the slots), the oldest shapes are replaced when the archive is full
+	   (ring buffer of the slots, see shape_archive.c) */
+	struct shapeArchive {
+		int nDim;  /* Number of the particle dimensions (radii) of the shapes */
+		int capacity;  /* Maximum number of the shapes */
+		int maxPerCell;  /* Maximum number of the shapes in one cell of the grid */
+		double cellSize;  /* Size of the cell in circularity, convexity and elongation */
+		int tableSize;  /* Number of the buckets of the hash table (power of 2) */
+		int tableBits;  /* Base 2 logarithm of tableSize */
+		int cursor;  /* Slot of the next inserted shape */
+		int count;  /* Number of the stored shapes */
+		unsigned long hits;  /* Number of the targets taken from the archive */
+		int *head;  /* First slot of every bucket (tableSize, -1 - empty bucket) */
+		int *next;  /* Next slot of the same bucket (capacity, -1 - last slot) */
+		long long *cell;  /* Packed grid cell of the shape in the slot (capacity, -1 - empty slot) */
+		double *params;  /* Circularity, convexity and elongation of the shapes (capacity x 3) */
+		double *dims;  /* Radii of the shapes (capacity x nDim) */
+	};
+	
+	/* Type of the shapeArchive */
+	typedef struct shapeArchive shapeArchive_t;
+	
+	/* Declare the state of K independent PSO swarms searched in lock-step. The swarms 
+	   are stored in the slots of contiguous buffers, active swarms occupy the first 
+	   slots (slot s holds the particles s*nPop ... (s+1)*nPop - 1) */
+	struct swarmBatch {
+		int K;  /* Number of the swarms (targets) */
+		int nPop;  /* Population size of every swarm */
+		int nVar;  /* Number of the decision variables (equal to nDim) */
+		int window;  /* Length of the convergence monitor window (0 - no monitor) */
+		double *position;  /* Positions of the particles (K x nPop x nVar) */
+		double *velocity;  /* Velocities of the particles (K x nPop x nVar) */
+		double *bestPosition;  /* Best positions of the particles (K x nPop x nVar) */
+		double *cost;  /* Current costs of the particles (K x nPop) */
+		double *bestCost;  /* Best costs of the particles (K x nPop) */
+		double *globalBestPosition;  /* Best positions of the swarms (K x nVar) */
+		double *globalBestCost;  /* Best costs of the swarms (K) */
+		double *w;  /* Inertia coefficients of the swarms (K) */
+		double *target;  /* Target circularity, convexity and elongation of the swarms (K x 3) */
+		int *targetIndex;  /* Index of the target solved in the slot (K) */
+		double *history;  /* Global best costs of the last window iterations (K x window, ring buffers) */
+		int *restarts;  /* Numbers of the partial restarts of the swarms (K) */
+		int *lastRestart;  /* Iterations of the last restarts of the swarms (K) */
+		double *polishedCost;  /* Global best costs after the last local polish of the swarms (K) */
+		double *polishEvaluations;  /* Cost evaluations of the local polish of the swarms (K) */
+	};
+	
+	/* Type of the swarmBatch */
+	typedef struct swarmBatch swarmBatch_t;
+	
+	/* Declare the settings of the convergence monitor of the PSO search. The monitor tracks
+	   the improvement of the global best cost over the window and the radius of the swarm,
+	   restarts the worst particles on the stagnation and gives up the search which will not
+	   reach the precision limit in the rest of the iterations */
+	struct psoControl {
+		int window;  /* Monitor window in iterations (0 - monitor is off, b resets are used) */
+		double minImprovement;  /* Minimum relative improvement of the global best cost over the window */
+		double minRadius;  /* Minimum radius of the swarm (RMS distance to the global best position) */
+		double restartFraction;  /* Fraction of the worst particles restarted on the stagnation */
+		int maxRestarts;  /* Number of the restarts before the search can be given up */
+		double polishThreshold;  /* Local polish of the global best starts below polishThreshold *
+		                            precisionLimit (0 - no polish, see local_polish.c) */
+		int polishSteps;  /* Maximum number of the Levenberg-Marquardt steps of one polish */
+	};
+	
+	/* Type of the psoControl */
+	typedef struct psoControl psoControl_t;
+	
+	/* Type of the function receiving the progress of the search (iteration, number of the
+	   cost function evaluations, global best cost and global best position) */
+	typedef void (*progressCallback_t)(unsigned int iteration, unsigned long evaluations,
+		double globalBestCost, const double *globalBestPosition);
+	
+	/* Declare the progress reporting and the cancelling of the running search. The callback
+	   is called every everyIter iterations or when everyMs milliseconds are passed since the
+	   last call (whichever is earlier). The search is stopped when the shared cancel flag is
+	   set by the other thread */
+	struct searchProgress {
+		progressCallback_t callback;  /* Function receiving the progress (NULL - no progress) */
+		volatile int *cancel;  /* Shared cancel flag (NULL - search can not be cancelled) */
+		int everyIter;  /* Call every everyIter iterations (0 - not by the iterations) */
+		double everyMs;  /* Call every everyMs milliseconds (0 - not by the time) */
+	};
+	
+	/* Type of the searchProgress */
+	typedef struct searchProgress searchProgress_t;
+
+	/* Declare the choice of the search algorithm of the particle shape and the settings of
+	   the algorithms other than PSO (the PSO settings are passed as separate arguments) */
+	struct optSettings {
+		int optimizer;  /* Search algorithm (OPT_PSO, OPT_CMAES, OPT_DE or OPT_NM) */
+		int popSize;  /* Population size of CMA-ES and DE (0 - default for the nVar) */
+		double sigma0;  /* Initial step size of CMA-ES (fraction of the variables range) */
+		double F;  /* Differential weight of DE */
+		double CR;  /* Crossover probability of DE */
+		double step;  /* Initial size of the Nelder-Mead simplex (fraction of the variables range) */
+		int nHarmonics;  /* Number of the radial Fourier harmonics searched (0 - radii are searched) */
+	};
+
+	/* Type of the optSettings */
+	typedef struct optSettings optSettings_t;
+
+	/* Declare the state of one run of the CMA-ES search (see CMAESAlgorithm.c). All the
+	   arrays are in one block of memory, the state is made again on every restart */
+	struct cmaesState {
+		int nVar;  /* Number of the decision variables (equal to nDim) */
+		int lambda;  /* Population size (number of the offspring) */
+		int mu;  /* Number of the parents (best offspring used in the recombination) */
+		double mueff;  /* Variance effective selection mass */
+		double cc;  /* Learning rate of the evolution path of C */
+		double cs;  /* Learning rate of the evolution path of sigma */
+		double c1;  /* Learning rate of the rank-one update of C */
+		double cmu;  /* Learning rate of the rank-mu update of C */
+		double damps;  /* Damping of the step size update */
+		double chiN;  /* Expected length of the standard normal vector */
+		double sigma;  /* Step size */
+		int eigenAge;  /* Generations since the last eigen decomposition of C */
+		int noImprove;  /* Generations without improvement of the best cost of the run */
+		double runBestCost;  /* Best cost of the run (since the last restart) */
+		double *weights;  /* Recombination weights (mu) */
+		double *mean;  /* Mean of the distribution (nVar) */
+		double *pc;  /* Evolution path of C (nVar) */
+		double *ps;  /* Evolution path of sigma (nVar) */
+		double *C;  /* Covariance matrix (nVar x nVar) */
+		double *B;  /* Eigenvectors of C (columns of nVar x nVar matrix) */
+		double *D;  /* Square roots of the eigenvalues of C (nVar) */
+		double *z;  /* Standard normal samples of the offspring (lambda x nVar) */
+		double *y;  /* Steps of the offspring B * D * z (lambda x nVar) */
+		double *x;  /* Offspring repaired into the bounds (lambda x nVar) */
+		double *penalty;  /* Penalties of the offspring outside the bounds (lambda) */
+		double *cost;  /* Costs of the offspring with the penalties (lambda) */
+		double *params;  /* Circularity, convexity and elongation of the offspring (lambda x 3) */
+		double *work;  /* Scratch buffer (nVar x nVar + 2 x nVar) */
+		int *index;  /* Offspring sorted by the cost (lambda) */
+	};
+
+	/* Type of the cmaesState */
+	typedef struct cmaesState cmaesState_t;
+	
+	/* Declare the state of the random number generator xoshiro256** (see rng.c). Every
+	   search or worker has its own state, so the kernels do not use the global rand() */
+	struct rngState {
+		uint64_t s[4];
+	};
+	
+	/* Type of the rngState */
+	typedef struct rngState rngState_t;
+	
 #endif /* DATA_TYPES_H_ */
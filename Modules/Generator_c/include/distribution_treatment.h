@@ -1,3 +1,5 @@
+#include "data_types.h"
+
 #ifndef FUNCTION_DISTRIBUTION_TREATMENT_H_
 #define FUNCTION_DISTRIBUTION_TREATMENT_H_
 
@@ -14,7 +16,7 @@
 	void make_distr_from_count_array(unsigned long *countArray, double *diff, double *cum);
 	
 	/* Function for generation a value from the specific distribution */
-	double get_value_from_distribution(double *normDiff, double *chLower, double *chUpper, 
+	double get_value_from_distribution(rngState_t *rng, double *normDiff, double *chLower, double *chUpper, 
 		int logScale, int leftBndChannel, int rightBndChannel);
 	
 #endif /* FUNCTION_DISTRIBUTION_TREATMENT_H_ */
@@ -3,7 +3,41 @@
 #ifndef FUNCTION_GET_PARTICLE_PARAMETERS_H_
 #define FUNCTION_GET_PARTICLE_PARAMETERS_H_
 
+	/* Function for creation of the workspace with scratch buffers for the certain nDim */
+	geomWorkspace_t* geom_workspace_create(int nDim);
+	
+	/* Function for the memory free of the workspace */
+	void geom_workspace_free(geomWorkspace_t *ws);
+	
 	/* Function for calculation of the particle parameters */
-	void get_particle_parameters(double imgScale, double *dimsValues, int nDim, paramsStruct_t *allParams);
+	void get_particle_parameters(double imgScale, const double *dimsValues, int nDim, paramsStruct_t *allParams);
+	
+	/* Function for calculation of the particle parameters with the reusable workspace (no malloc) */
+	void get_particle_parameters_ws(geomWorkspace_t *ws, double imgScale, const double *dimsValues, 
+		paramsStruct_t *allParams);
+	
+	/* Function for calculation of the parameters of n particles (dims is n x nDim array) */
+	void get_particle_parameters_batch(double imgScale[], const double *dims, int n, int nDim, 
+		paramsStruct_t *out);
+	
+	/* Function for rescaling the pixel-space result (imgScale = 1.0) to the new image scale */
+	void rescale_particle_parameters(const paramsStruct_t *pixParams, double imgScale, 
+		paramsStruct_t *allParams);
+	
+	/* Lite function for calculation of only circularity, convexity and elongation (cost function) */
+	void compute_shape_cost_params(const double *dimsValues, int nDim, double *circularity,
+		double *convexity, double *elongation);
+	
+	/* Lite function with the reusable workspace (no malloc) */
+	void compute_shape_cost_params_ws(geomWorkspace_t *ws, const double *dimsValues, 
+		double *circularity, double *convexity, double *elongation);
+	
+	/* Function for calculation of circularity, convexity and elongation and their analytic
+	   derivatives by the dims values (jacobian is 3 x nDim) */
+	void compute_shape_cost_params_grad_ws(geomWorkspace_t *ws, const double *dimsValues, 
+		double *params, double *jacobian);
+	
+	/* Function for calculation of circularity, convexity and elongation of n particles (out is n x 3) */
+	void compute_shape_cost_params_batch(const double *dims, int n, int nDim, double *out);
 	
 #endif /* FUNCTION_GET_PARTICLE_PARAMETERS_H_ */
@@ -0,0 +1,12 @@
+#ifndef FUNCTION_HILBERT_CURVE_H_
+#define FUNCTION_HILBERT_CURVE_H_
+
+	/* Function for the index of the 3D point along the Hilbert curve through the box
+	   (lower, upper), the box is divided in 2^HILBERT_BITS cells along every axis */
+	unsigned long long hilbert_index_3d(const double *point, const double *lower, const double *upper);
+
+	/* Function for ordering K 3D points (K x 3 array) along the Hilbert curve through their
+	   bounding box (order receives the indexes of the points in the order of the curve) */
+	void hilbert_order(int K, const double *points, int *order);
+
+#endif /* FUNCTION_HILBERT_CURVE_H_ */
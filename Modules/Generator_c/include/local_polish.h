@@ -0,0 +1,12 @@
+#include "data_types.h"
+
+#ifndef FUNCTION_LOCAL_POLISH_H_
+#define FUNCTION_LOCAL_POLISH_H_
+
+	/* Function for the local polish of the position with the projected Levenberg-Marquardt
+	   steps (returns the number of the cost function evaluations) */
+	unsigned long local_polish(geomWorkspace_t *ws, shapeSpace_t *space, const double *target,
+		int nVar, double varMin, double varMax, int maxSteps, double precisionLimit, 
+		double *position, double *cost);
+	
+#endif /* FUNCTION_LOCAL_POLISH_H_ */
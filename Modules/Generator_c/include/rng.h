@@ -0,0 +1,24 @@
+#include "data_types.h"
+
+#ifndef FUNCTION_RNG_H_
+#define FUNCTION_RNG_H_
+
+	/* Function for seeding the generator state (the seed is expanded with splitmix64) */
+	void rng_seed(rngState_t *rng, uint64_t seed);
+	
+	/* Function for seeding the independent stream of the generator (stream jumps by 2^128) */
+	void rng_seed_stream(rngState_t *rng, uint64_t seed, int stream);
+	
+	/* Function for the jump of the generator state by 2^128 numbers */
+	void rng_jump(rngState_t *rng);
+	
+	/* Function for generation of the next 64-bit random number */
+	uint64_t rng_next(rngState_t *rng);
+	
+	/* Function for generation random double number in range [0.0, 1.0) with 53 random bits */
+	double rng_double(rngState_t *rng);
+	
+	/* Function for generation random number with the standard normal distribution */
+	double rng_normal(rngState_t *rng);
+	
+#endif /* FUNCTION_RNG_H_ */
@@ -0,0 +1,9 @@
+#ifndef FUNCTION_ROTATING_CALIPERS_H_
+#define FUNCTION_ROTATING_CALIPERS_H_
+
+	/* Function for calculation of the max Feret diameter, min Feret width and minimum area
+	   bounding rectangle of the convex hull (counter-clockwise order) with rotating calipers */
+	void calc_feret_diameters(int hullNum, const double *hullX, const double *hullY,
+		double *maxFeret, double *minFeret, double *rectLength, double *rectWidth);
+	
+#endif /* FUNCTION_ROTATING_CALIPERS_H_ */
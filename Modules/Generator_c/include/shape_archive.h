@@ -0,0 +1,24 @@
+#include "data_types.h"
+
+#ifndef FUNCTION_SHAPE_ARCHIVE_H_
+#define FUNCTION_SHAPE_ARCHIVE_H_
+
+	/* Function for creation of the empty archive of the evaluated shapes */
+	shapeArchive_t* shape_archive_create(int nDim, int capacity, double cellSize, int maxPerCell);
+	
+	/* Function for the memory free of the archive */
+	void shape_archive_free(shapeArchive_t *archive);
+	
+	/* Function for adding the evaluated shape to the archive (skipped if its cell is full) */
+	void shape_archive_insert(shapeArchive_t *archive, const double *dims, const double *params);
+	
+	/* Function for taking the closest shape within the tolerance of the target out of the
+	   archive (returns 1 if the shape is found, dims and distance can be NULL) */
+	int shape_archive_take(shapeArchive_t *archive, const double *target, double tolerance, 
+		double *dims, double *distance);
+	
+	/* Function for removing the shape with exactly the same parameters (the found result
+	   of the search is not given to the other targets, returns 1 if the shape is removed) */
+	int shape_archive_remove(shapeArchive_t *archive, const double *params);
+	
+#endif /* FUNCTION_SHAPE_ARCHIVE_H_ */
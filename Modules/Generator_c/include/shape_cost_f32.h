@@ -0,0 +1,12 @@
+#ifndef FUNCTION_SHAPE_COST_F32_H_
+#define FUNCTION_SHAPE_COST_F32_H_
+
+	/* Function for calculation of circularity, convexity and elongation of n particles
+	   in single precision (dims is n x nDim array, out is n x 3 array) */
+	void compute_shape_cost_params_batch_f32(const float *dims, int n, int nDim, float *out);
+	
+	/* Function for comparison of the single precision kernel with the float64 kernel
+	   (report: max absolute errors of the 3 parameters, then mean absolute errors) */
+	void shape_cost_accuracy_report(const double *dims, int n, int nDim, double *report);
+	
+#endif /* FUNCTION_SHAPE_COST_F32_H_ */
@@ -0,0 +1,30 @@
+#include "data_types.h"
+
+#ifndef FUNCTION_SHAPE_SPACE_H_
+#define FUNCTION_SHAPE_SPACE_H_
+
+	/* Function for creation of the decision space (nHarmonics = 0 - radii are searched) */
+	shapeSpace_t* shape_space_create(int nDim, int nHarmonics);
+	
+	/* Function for the memory free of the decision space */
+	void shape_space_free(shapeSpace_t *space);
+	
+	/* Function for expansion of the decision variables to nDim radii (inverse transform) */
+	void shape_space_to_dims(const shapeSpace_t *space, const double *position, double *dims);
+	
+	/* Function for the decision variables of the radii (forward transform) */
+	void shape_space_from_dims(const shapeSpace_t *space, const double *dims, double *position);
+	
+	/* Function for the jacobian by the decision variables of the jacobian by the radii */
+	void shape_space_jacobian(const shapeSpace_t *space, const double *dims, const double *jacDims,
+		int nRows, int nVar, double *jacVar);
+	
+	/* Function for the radii of one position of the decision space (NULL - position is radii) */
+	const double* shape_space_dims(shapeSpace_t *space, const double *position);
+	
+	/* Function for calculation of circularity, convexity and elongation of n positions of the
+	   decision space (NULL - positions are radii, out is n x 3) */
+	void shape_space_cost_params_batch(shapeSpace_t *space, const double *positions, int n, int nVar,
+		double *out);
+	
+#endif /* FUNCTION_SHAPE_SPACE_H_ */
@@ -0,0 +1,526 @@
+/*========================================================================
+  Module with realization of the CMA-ES search algorithm (covariance matrix
+  adaptation evolution strategy, N. Hansen) for determination of the
+  particle best shape. The whole population is evaluated by one call of the
+  batch cost kernel. The offspring outside the bounds are evaluated at the
+  nearest point inside the bounds and ranked with a quadratic penalty. The
+  run is restarted from the random mean when the step size collapses or the
+  best cost of the run stagnates.
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "get_particle_parameters.h"
+#include "PSOAlgorithm.h"
+#include "shape_space.h"
+#include "CMAESAlgorithm.h"
+#include "rng.h"
+
+/* Maximum number of the sweeps of the Jacobi eigenvalue algorithm */
+#define JACOBI_MAX_SWEEPS 50
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for creation of the state of the run in one block of memory */
+static cmaesState_t* cmaes_state_create(int nVar, int lambda);
+/* Function for the memory free of the state of the run */
+static void cmaes_state_free(cmaesState_t *es);
+/* Function for the start of the run from the initial mean */
+static void cmaes_state_start(rngState_t *rng, cmaesState_t *es, const double *initPosition,
+	double varMin, double varMax, double sigma);
+/* Function for sampling of the offspring */
+static void cmaes_sample(rngState_t *rng, cmaesState_t *es, double varMin, double varMax);
+/* Function for update of the distribution by the sorted offspring */
+static void cmaes_update(cmaesState_t *es, int generation);
+/* Function for the indices of the array sorted by the ascending values */
+static void sort_by_cost(const double *cost, int *index, int n);
+/* Function for the eigen decomposition of the symmetric matrix */
+static void jacobi_eigen(int n, double *A, double *V, double *d);
+/* Function for calculation the cost from the cost function parameters */
+static double params_cost(const double *target, const double *params);
+
+
+void CMAESAlg_run_search(rngState_t *rng, double init_circularity, double init_convexity,
+	double init_elongation, int nVar, double varMin, double varMax, int useIterLimit,
+	int iterLimit, int usePrecisionLimit, double precisionLimit, int showErrorPlot,
+	int popSize, double sigma0, const double *initPosition, const psoControl_t *control,
+	shapeSpace_t *space, const searchProgress_t *progress, unsigned int *iteration, int *status,
+	unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+	double *arrayBestCosts) {
+	/* Function for performing the particle shape search with CMA-ES algorithm. One
+	   iteration is one generation of the offspring (lambda cost evaluations)
+	   rng                - State of the random number generator (seeded by the caller)
+	   init_circularity   - Target particle circularity, [-]
+	   init_convexity     - Target particle convexity, [-]
+	   init_elongation    - Target particle elongation, [-]
+	   nVar               - Number of unknown (decision) variables (nDim or space->nVar)
+	   varMin             - Lower bound of decision variables
+	   varMax             - Upper bound of decision variables
+	   useIterLimit       - (bool) using of the iteration limit
+	   iterLimit          - Iteration (generation) limit
+	   usePrecisionLimit  - (bool) using the precision limit
+	   precisionLimit     - Precision limit of the cost
+	   showErrorPlot      - (bool) save data every iteration for building error plot or not
+	   popSize            - Initial population size (0 - default 4 + 3 * ln(nVar))
+	   sigma0             - Initial step size (fraction of the variables range)
+	   initPosition       - Initial mean of the distribution (NULL - random position)
+	   control            - Settings of the convergence monitor (NULL or window 0 - only the
+	                        restarts on the collapse and the stagnation of the run)
+	   space              - Decision space of the search (NULL - decision variables are the radii)
+	   progress           - Progress callback and cancel flag of the search (NULL - none)
+	   Return:
+	   iteration          - Final number of iterations
+	   status             - Reason of the search finish (PSO_STATUS_...)
+	   evaluations        - Number of the cost function evaluations
+	   globalBestCost     - Found best cost
+	   globalBestPosition - Found best position
+	   arrayBestCosts     - Array with the cost values for every iteration (for the plot) */
+
+	double target[3] = {init_circularity, init_convexity, init_elongation};
+	double range = varMax - varMin;  /* Range of the decision variables */
+	int lambda = (popSize > 0) ? popSize : 4 + (int) (3 * log(nVar));
+	cmaesState_t *es = cmaes_state_create(nVar, lambda);
+	int useMonitor = (control != NULL) && (control->window > 0);  /* Use the convergence monitor */
+	double *history = NULL;  /* Global best costs of the last window iterations */
+	int restarts = 0;  /* Number of the restarts made by the monitor */
+	int lastRestart = 0;  /* Iteration of the last restart made by the monitor */
+	int action = PSO_MONITOR_CONTINUE;  /* Action of the convergence monitor */
+	double lastReportMs = 0.0;  /* Time of the last progress report */
+	int generation = 0;  /* Generation of the current run */
+	int doSearch = 1;
+	int restart, i, j;
+	double cost, dMin, dMax, radius;
+
+	/* ===== 1. INITIALIZATION OF THE CMA-ES ALGORITHM ===== */
+	*iteration = 1;
+	cmaes_state_start(rng, es, initPosition, varMin, varMax, sigma0 * range);
+
+	/* Cost of the initial mean is the first global best */
+	shape_space_cost_params_batch(space, es->mean, 1, nVar, es->params);
+	*evaluations = 1;
+	*globalBestCost = params_cost(target, es->params);
+	for (j = 0; j < nVar; j++) {
+		globalBestPosition[j] = es->mean[j];
+	}
+	if (showErrorPlot) {
+		arrayBestCosts[0] = *globalBestCost;
+	}
+	if (useMonitor) {
+		history = (double*) malloc (control->window * sizeof(double));
+		if (NULL == history) print_error_and_exit();
+		for (i = 0; i < control->window; i++) {
+			history[i] = *globalBestCost;
+		}
+	}
+
+	/* ===== 2. SEARCHING LOOP OF THE CMA-ES ALGORITHM ===== */
+	while (doSearch) {
+		/* Sampling and evaluation of the offspring (one batch) */
+		cmaes_sample(rng, es, varMin, varMax);
+		shape_space_cost_params_batch(space, es->x, es->lambda, nVar, es->params);
+		*evaluations += es->lambda;
+		for (i = 0; i < es->lambda; i++) {
+			cost = params_cost(target, es->params + 3 * i);
+			es->cost[i] = cost + es->penalty[i];
+			if (cost < *globalBestCost) {
+				*globalBestCost = cost;
+				for (j = 0; j < nVar; j++) {
+					globalBestPosition[j] = es->x[i * nVar + j];
+				}
+			}
+		}
+		sort_by_cost(es->cost, es->index, es->lambda);
+		if (es->cost[es->index[0]] < es->runBestCost) {
+			es->runBestCost = es->cost[es->index[0]];
+			es->noImprove = 0;
+		}
+		else {
+			es->noImprove++;
+		}
+
+		/* Update of the mean, the evolution paths, the covariance matrix and the step size */
+		generation++;
+		cmaes_update(es, generation);
+
+		/* Restart of the run on the collapse of the distribution or the stagnation */
+		dMin = dMax = es->D[0];
+		radius = 0.0;
+		for (j = 0; j < nVar; j++) {
+			if (es->D[j] < dMin) dMin = es->D[j];
+			if (es->D[j] > dMax) dMax = es->D[j];
+			radius += es->D[j] * es->D[j];
+		}
+		radius = es->sigma * sqrt(radius);  /* RMS distance of the offspring to the mean */
+		restart = (es->sigma * dMax < 1e-12 * range) || (dMax > 1e7 * dMin) ||
+			(es->noImprove > 10 + 30 * nVar / es->lambda);
+
+		/* Add the iteration best cost to the arrayBestCosts */
+		if ((showErrorPlot) && (*iteration < (unsigned int) iterLimit)) {
+			arrayBestCosts[*iteration] = *globalBestCost;
+		}
+
+		/* Convergence monitor: restart on the stagnation of the global best */
+		if (useMonitor) {
+			action = PSOAlg_monitor_check(control, history, (int) *iteration, *globalBestCost, radius,
+				&restarts, &lastRestart, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit);
+			if (action == PSO_MONITOR_RESTART) {
+				restart = 1;
+			}
+		}
+		if (restart) {
+			/* New run from the random mean (the population is not increased: the local
+			   restarts need much less evaluations than IPOP for the shape search) */
+			cmaes_state_start(rng, es, NULL, varMin, varMax, sigma0 * range);
+			generation = 0;
+		}
+
+		/* Check the search termination by iterLimit, by precisionLimit and by the monitor */
+		if ((useIterLimit) && (*iteration >= (unsigned int) iterLimit)) {
+			doSearch = 0;
+			*status = PSO_STATUS_ITER_LIMIT;
+		}
+		else if ((usePrecisionLimit) && (precisionLimit >= *globalBestCost)) {
+			doSearch = 0;
+			*status = PSO_STATUS_PRECISION;
+		}
+		else if (action == PSO_MONITOR_GIVE_UP) {
+			doSearch = 0;
+			*status = PSO_STATUS_GAVE_UP;
+		}
+		else if (PSOAlg_progress_check(progress, space, &lastReportMs, *iteration, *evaluations, 
+			*globalBestCost, globalBestPosition)) {
+			doSearch = 0;
+			*status = PSO_STATUS_CANCELLED;
+		}
+		else {
+			*iteration += 1;
+		}
+	}
+
+	free(history);
+	cmaes_state_free(es);
+} /* fcn CMAESAlg_run_search */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
+
+
+static cmaesState_t* cmaes_state_create(int nVar, int lambda) {
+	/* Function for creation of the state of the run in one block of memory. The strategy
+	   parameters are the defaults of N. Hansen for the population size lambda
+	   nVar   - number of the decision variables
+	   lambda - population size
+	   return:
+	   es     - pointer to the state (free it with cmaes_state_free) */
+
+	int i;
+	int n = nVar;
+	long nn = (long) nVar * nVar;
+	double sum = 0.0;
+	double sum2 = 0.0;
+	cmaesState_t *es = (cmaesState_t*) malloc (sizeof(cmaesState_t));
+	if (NULL == es) print_error_and_exit();
+	double *buffer = (double*) malloc ((lambda + 6 * n + 3 * nn + 3 * (long) lambda * n +
+		5 * lambda) * sizeof(double));
+	if (NULL == buffer) print_error_and_exit();
+	es->index = (int*) malloc (lambda * sizeof(int));
+	if (NULL == es->index) print_error_and_exit();
+
+	es->nVar = nVar;
+	es->lambda = lambda;
+	es->mu = (lambda / 2 > 0) ? lambda / 2 : 1;
+	es->weights = buffer;
+	es->mean = es->weights + lambda;
+	es->pc = es->mean + n;
+	es->ps = es->pc + n;
+	es->D = es->ps + n;
+	es->C = es->D + n;
+	es->B = es->C + nn;
+	es->z = es->B + nn;
+	es->y = es->z + (long) lambda * n;
+	es->x = es->y + (long) lambda * n;
+	es->penalty = es->x + (long) lambda * n;
+	es->cost = es->penalty + lambda;
+	es->params = es->cost + lambda;
+	es->work = es->params + 3 * lambda;
+
+	/* Recombination weights and learning rates */
+	for (i = 0; i < es->mu; i++) {
+		es->weights[i] = log(es->mu + 0.5) - log(i + 1.0);
+		sum += es->weights[i];
+	}
+	for (i = 0; i < es->mu; i++) {
+		es->weights[i] /= sum;
+		sum2 += es->weights[i] * es->weights[i];
+	}
+	es->mueff = 1.0 / sum2;
+	es->cc = (4.0 + es->mueff / n) / (n + 4.0 + 2.0 * es->mueff / n);
+	es->cs = (es->mueff + 2.0) / (n + es->mueff + 5.0);
+	es->c1 = 2.0 / ((n + 1.3) * (n + 1.3) + es->mueff);
+	es->cmu = 2.0 * (es->mueff - 2.0 + 1.0 / es->mueff) / ((n + 2.0) * (n + 2.0) + es->mueff);
+	if (es->cmu > 1.0 - es->c1) es->cmu = 1.0 - es->c1;
+	es->damps = 1.0 + es->cs + 2.0 * fmax(0.0, sqrt((es->mueff - 1.0) / (n + 1.0)) - 1.0);
+	es->chiN = sqrt(n) * (1.0 - 1.0 / (4.0 * n) + 1.0 / (21.0 * n * n));
+	return es;
+} /* fcn cmaes_state_create */
+
+
+static void cmaes_state_free(cmaesState_t *es) {
+	/* Function for the memory free of the state of the run
+	   es - pointer to the state created by cmaes_state_create */
+	free(es->weights);  /* Beginning of the block with all the buffers */
+	free(es->index);
+	free(es);
+} /* fcn cmaes_state_free */
+
+
+static void cmaes_state_start(rngState_t *rng, cmaesState_t *es, const double *initPosition,
+	double varMin, double varMax, double sigma) {
+	/* Function for the start of the run: the distribution is the sphere around the mean
+	   rng          - state of the random number generator
+	   es           - pointer to the state of the run
+	   initPosition - initial mean (NULL - random position)
+	   varMin       - lower bound of decision variables
+	   varMax       - upper bound of decision variables
+	   sigma        - initial step size */
+
+	int i, j;
+	int n = es->nVar;
+	for (i = 0; i < n; i++) {
+		es->mean[i] = (initPosition != NULL) ? initPosition[i] :
+			varMin + (varMax - varMin) * rng_double(rng);
+		es->pc[i] = 0.0;
+		es->ps[i] = 0.0;
+		es->D[i] = 1.0;
+		for (j = 0; j < n; j++) {
+			es->C[i * n + j] = (i == j) ? 1.0 : 0.0;
+			es->B[i * n + j] = (i == j) ? 1.0 : 0.0;
+		}
+	}
+	es->sigma = sigma;
+	es->eigenAge = 0;
+	es->noImprove = 0;
+	es->runBestCost = INFINITY;
+} /* fcn cmaes_state_start */
+
+
+static void cmaes_sample(rngState_t *rng, cmaesState_t *es, double varMin, double varMax) {
+	/* Function for sampling of the offspring x = mean + sigma * B * D * z. The offspring
+	   is repaired into the bounds and its penalty is the squared distance of the repair
+	   (in the units of the variables range)
+	   rng    - state of the random number generator
+	   es     - pointer to the state of the run
+	   varMin - lower bound of decision variables
+	   varMax - upper bound of decision variables */
+
+	int k, i, j;
+	int n = es->nVar;
+	double value, repaired, sum;
+	double *z, *y, *x;
+	double *scaled = es->work;  /* D * z */
+
+	for (k = 0; k < es->lambda; k++) {
+		z = es->z + (long) k * n;
+		y = es->y + (long) k * n;
+		x = es->x + (long) k * n;
+		for (i = 0; i < n; i++) {
+			z[i] = rng_normal(rng);
+			scaled[i] = es->D[i] * z[i];
+		}
+		es->penalty[k] = 0.0;
+		for (i = 0; i < n; i++) {
+			sum = 0.0;
+			for (j = 0; j < n; j++) {
+				sum += es->B[i * n + j] * scaled[j];
+			}
+			y[i] = sum;
+			value = es->mean[i] + es->sigma * sum;
+			repaired = (value < varMin) ? varMin : ((value > varMax) ? varMax : value);
+			es->penalty[k] += (value - repaired) * (value - repaired) /
+				((varMax - varMin) * (varMax - varMin));
+			x[i] = repaired;
+		}
+	}
+} /* fcn cmaes_sample */
+
+
+static void cmaes_update(cmaesState_t *es, int generation) {
+	/* Function for update of the distribution by the offspring sorted by the cost: new
+	   mean, evolution paths, rank-one and rank-mu update of the covariance matrix,
+	   cumulative step size adaptation and the lazy eigen decomposition of C
+	   es         - pointer to the state of the run (index is sorted)
+	   generation - number of the generation in the run (from 1) */
+
+	int i, j, k;
+	int n = es->nVar;
+	long nn = (long) n * n;
+	double *yw = es->work + nn;  /* Weighted mean of the steps of the parents */
+	double *zw = yw + n;  /* Weighted mean of the normal samples of the parents */
+	double *yk, *zk;
+	double normPs = 0.0;
+	double hsig, coef, sum;
+
+	for (i = 0; i < n; i++) {
+		yw[i] = 0.0;
+		zw[i] = 0.0;
+	}
+	for (k = 0; k < es->mu; k++) {
+		yk = es->y + (long) es->index[k] * n;
+		zk = es->z + (long) es->index[k] * n;
+		for (i = 0; i < n; i++) {
+			yw[i] += es->weights[k] * yk[i];
+			zw[i] += es->weights[k] * zk[i];
+		}
+	}
+
+	/* Mean and the evolution path of sigma (C^-1/2 * yw = B * zw) */
+	coef = sqrt(es->cs * (2.0 - es->cs) * es->mueff);
+	for (i = 0; i < n; i++) {
+		es->mean[i] += es->sigma * yw[i];
+		sum = 0.0;
+		for (j = 0; j < n; j++) {
+			sum += es->B[i * n + j] * zw[j];
+		}
+		es->ps[i] = (1.0 - es->cs) * es->ps[i] + coef * sum;
+		normPs += es->ps[i] * es->ps[i];
+	}
+	normPs = sqrt(normPs);
+
+	/* Evolution path of C (stalled if the step size grows too fast) */
+	hsig = (normPs / sqrt(1.0 - pow(1.0 - es->cs, 2.0 * generation)) / es->chiN <
+		1.4 + 2.0 / (n + 1.0)) ? 1.0 : 0.0;
+	coef = hsig * sqrt(es->cc * (2.0 - es->cc) * es->mueff);
+	for (i = 0; i < n; i++) {
+		es->pc[i] = (1.0 - es->cc) * es->pc[i] + coef * yw[i];
+	}
+
+	/* Covariance matrix (upper triangle is calculated and mirrored) */
+	coef = 1.0 - es->c1 - es->cmu + (1.0 - hsig) * es->c1 * es->cc * (2.0 - es->cc);
+	for (i = 0; i < n; i++) {
+		for (j = i; j < n; j++) {
+			sum = 0.0;
+			for (k = 0; k < es->mu; k++) {
+				yk = es->y + (long) es->index[k] * n;
+				sum += es->weights[k] * yk[i] * yk[j];
+			}
+			es->C[i * n + j] = coef * es->C[i * n + j] + es->c1 * es->pc[i] * es->pc[j] +
+				es->cmu * sum;
+			es->C[j * n + i] = es->C[i * n + j];
+		}
+	}
+
+	/* Step size */
+	es->sigma *= exp((es->cs / es->damps) * (normPs / es->chiN - 1.0));
+
+	/* Eigen decomposition C = B * D^2 * B' (once in several generations) */
+	es->eigenAge++;
+	if (es->eigenAge > 1.0 / ((es->c1 + es->cmu) * n * 10.0)) {
+		es->eigenAge = 0;
+		for (i = 0; i < nn; i++) {
+			es->work[i] = es->C[i];
+		}
+		jacobi_eigen(n, es->work, es->B, es->D);
+		for (i = 0; i < n; i++) {
+			es->D[i] = sqrt(fmax(es->D[i], 1e-300));
+		}
+	}
+} /* fcn cmaes_update */
+
+
+static void sort_by_cost(const double *cost, int *index, int n) {
+	/* Function for the indices of the array sorted by the ascending values (insertion
+	   sort, the population is small)
+	   cost  - array with the values
+	   index - output array with the sorted indices
+	   n     - number of the values */
+
+	int i, j, k;
+	for (i = 0; i < n; i++) {
+		k = i;
+		for (j = i - 1; (j >= 0) && (cost[index[j]] > cost[k]); j--) {
+			index[j + 1] = index[j];
+		}
+		index[j + 1] = k;
+	}
+} /* fcn sort_by_cost */
+
+
+static void jacobi_eigen(int n, double *A, double *V, double *d) {
+	/* Function for the eigen decomposition of the symmetric matrix with the cyclic Jacobi
+	   eigenvalue algorithm (rotations zero the off-diagonal elements one by one)
+	   n - size of the matrix
+	   A - symmetric matrix n x n (destroyed)
+	   V - output matrix with the eigenvectors in the columns
+	   d - output array with the eigenvalues */
+
+	int sweep, p, q, k;
+	double off, diag, theta, t, c, s, x, y;
+
+	for (p = 0; p < n; p++) {
+		for (q = 0; q < n; q++) {
+			V[p * n + q] = (p == q) ? 1.0 : 0.0;
+		}
+	}
+	for (sweep = 0; sweep < JACOBI_MAX_SWEEPS; sweep++) {
+		off = 0.0;
+		diag = 0.0;
+		for (p = 0; p < n; p++) {
+			diag += A[p * n + p] * A[p * n + p];
+			for (q = p + 1; q < n; q++) {
+				off += A[p * n + q] * A[p * n + q];
+			}
+		}
+		if (off <= 1e-24 * diag) break;
+
+		for (p = 0; p < n - 1; p++) {
+			for (q = p + 1; q < n; q++) {
+				if (A[p * n + q] == 0.0) continue;
+				/* Rotation angle zeroing A[p][q]: tan of the smaller root */
+				theta = (A[q * n + q] - A[p * n + p]) / (2.0 * A[p * n + q]);
+				t = ((theta >= 0) ? 1.0 : -1.0) / (fabs(theta) + sqrt(theta * theta + 1.0));
+				c = 1.0 / sqrt(t * t + 1.0);
+				s = t * c;
+				/* A = J' * A * J and V = V * J */
+				for (k = 0; k < n; k++) {
+					x = A[k * n + p];
+					y = A[k * n + q];
+					A[k * n + p] = c * x - s * y;
+					A[k * n + q] = s * x + c * y;
+				}
+				for (k = 0; k < n; k++) {
+					x = A[p * n + k];
+					y = A[q * n + k];
+					A[p * n + k] = c * x - s * y;
+					A[q * n + k] = s * x + c * y;
+				}
+				for (k = 0; k < n; k++) {
+					x = V[k * n + p];
+					y = V[k * n + q];
+					V[k * n + p] = c * x - s * y;
+					V[k * n + q] = s * x + c * y;
+				}
+			}
+		}
+	}
+	for (p = 0; p < n; p++) {
+		d[p] = A[p * n + p];
+	}
+} /* fcn jacobi_eigen */
+
+
+static double params_cost(const double *target, const double *params) {
+	/* Function for calculation the cost (distance between the target and the calculated
+	   circularity, convexity and elongation)
+	   target - target circularity, convexity and elongation
+	   params - calculated circularity, convexity and elongation */
+
+	return sqrt((target[0] - params[0]) * (target[0] - params[0]) +
+		(target[1] - params[1]) * (target[1] - params[1]) +
+		(target[2] - params[2]) * (target[2] - params[2]));
+} /* fcn params_cost */
@@ -0,0 +1,288 @@
+/*========================================================================
+  Module with realization of the differential evolution (DE) search
+  algorithm (R. Storn, K. Price) for determination of the particle best
+  shape. The strategy is DE/current-to-best/1/bin: every individual makes
+  one trial vector and is replaced by it if the trial is not worse. All the
+  trial vectors of the generation are evaluated by one call of the batch
+  cost kernel.
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "get_particle_parameters.h"
+#include "PSOAlgorithm.h"
+#include "shape_space.h"
+#include "DEAlgorithm.h"
+#include "rng.h"
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for evaluation of the costs of the rows of the array in one batch */
+static void evaluate_costs(shapeSpace_t *space, const double *target, const double *positions, int n, 
+	int nVar, double *params, double *costs);
+/* Function for calculation the cost from the cost function parameters */
+static double params_cost(const double *target, const double *params);
+/* Function for the random integer in range [0, n) */
+static int random_index(rngState_t *rng, int n);
+
+
+void DEAlg_run_search(rngState_t *rng, double init_circularity, double init_convexity,
+	double init_elongation, int nVar, double varMin, double varMax, int useIterLimit,
+	int iterLimit, int usePrecisionLimit, double precisionLimit, int showErrorPlot,
+	int nPop, double F, double CR, const double *initPosition, const psoControl_t *control,
+	shapeSpace_t *space, const searchProgress_t *progress, unsigned int *iteration, int *status,
+	unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+	double *arrayBestCosts) {
+	/* Function for performing the particle shape search with differential evolution
+	   algorithm. One iteration is one generation (nPop cost evaluations)
+	   rng                - State of the random number generator (seeded by the caller)
+	   init_circularity   - Target particle circularity, [-]
+	   init_convexity     - Target particle convexity, [-]
+	   init_elongation    - Target particle elongation, [-]
+	   nVar               - Number of unknown (decision) variables (nDim or space->nVar)
+	   varMin             - Lower bound of decision variables
+	   varMax             - Upper bound of decision variables
+	   useIterLimit       - (bool) using of the iteration limit
+	   iterLimit          - Iteration (generation) limit
+	   usePrecisionLimit  - (bool) using the precision limit
+	   precisionLimit     - Precision limit of the cost
+	   showErrorPlot      - (bool) save data every iteration for building error plot or not
+	   nPop               - Population size (0 - default 5 * nVar, at least 4)
+	   F                  - Differential weight
+	   CR                 - Crossover probability
+	   initPosition       - Position of the first individual (NULL - random position)
+	   control            - Settings of the convergence monitor (NULL or window 0 - no monitor)
+	   space              - Decision space of the search (NULL - decision variables are the radii)
+	   progress           - Progress callback and cancel flag of the search (NULL - none)
+	   Return:
+	   iteration          - Final number of iterations
+	   status             - Reason of the search finish (PSO_STATUS_...)
+	   evaluations        - Number of the cost function evaluations
+	   globalBestCost     - Found best cost
+	   globalBestPosition - Found best position
+	   arrayBestCosts     - Array with the cost values for every iteration (for the plot) */
+
+	double target[3] = {init_circularity, init_convexity, init_elongation};
+	int NP = (nPop > 0) ? nPop : 5 * nVar;
+	if (NP < 4) NP = 4;
+	long size = (long) NP * nVar;
+	double *buffer = (double*) malloc ((2 * size + 5 * NP) * sizeof(double));
+	int *index = (int*) malloc (NP * sizeof(int));
+	if ((NULL == buffer) || (NULL == index)) print_error_and_exit();
+	double *position = buffer;  /* Individuals of the population (NP x nVar) */
+	double *trial = position + size;  /* Trial vectors (NP x nVar) */
+	double *cost = trial + size;  /* Costs of the individuals (NP) */
+	double *trialCost = cost + NP;  /* Costs of the trial vectors (NP) */
+	double *params = trialCost + NP;  /* Cost function parameters of the trial vectors (NP x 3) */
+	int useMonitor = (control != NULL) && (control->window > 0);  /* Use the convergence monitor */
+	double *history = NULL;  /* Global best costs of the last window iterations */
+	int restarts = 0;  /* Number of the partial restarts */
+	int lastRestart = 0;  /* Iteration of the last restart */
+	int action = PSO_MONITOR_CONTINUE;  /* Action of the convergence monitor */
+	double lastReportMs = 0.0;  /* Time of the last progress report */
+	int doSearch = 1;
+	int best = 0;  /* Index of the best individual */
+	int i, j, k, r1, r2, jRand, nRestart;
+	double value, radius, *x, *u;
+
+	/* ===== 1. INITIALIZATION OF THE DE ALGORITHM ===== */
+	*iteration = 1;
+	for (i = 0; i < size; i++) {
+		position[i] = varMin + (varMax - varMin) * rng_double(rng);
+	}
+	if (initPosition != NULL) {
+		for (j = 0; j < nVar; j++) {
+			position[j] = initPosition[j];
+		}
+	}
+	evaluate_costs(space, target, position, NP, nVar, params, cost);
+	*evaluations = NP;
+	for (i = 1; i < NP; i++) {
+		if (cost[i] < cost[best]) best = i;
+	}
+	*globalBestCost = cost[best];
+	for (j = 0; j < nVar; j++) {
+		globalBestPosition[j] = position[best * nVar + j];
+	}
+	if (showErrorPlot) {
+		arrayBestCosts[0] = *globalBestCost;
+	}
+	if (useMonitor) {
+		history = (double*) malloc (control->window * sizeof(double));
+		if (NULL == history) print_error_and_exit();
+		for (i = 0; i < control->window; i++) {
+			history[i] = *globalBestCost;
+		}
+	}
+
+	/* ===== 2. SEARCHING LOOP OF THE DE ALGORITHM ===== */
+	while (doSearch) {
+		/* Mutation and crossover: u = x + F * (x_best - x) + F * (x_r1 - x_r2) */
+		for (i = 0; i < NP; i++) {
+			do {
+				r1 = random_index(rng, NP);
+			} while (r1 == i);
+			do {
+				r2 = random_index(rng, NP);
+			} while ((r2 == i) || (r2 == r1));
+			jRand = random_index(rng, nVar);
+			x = position + (long) i * nVar;
+			u = trial + (long) i * nVar;
+			for (j = 0; j < nVar; j++) {
+				if ((j == jRand) || (rng_double(rng) < CR)) {
+					value = x[j] + F * (position[best * nVar + j] - x[j]) +
+						F * (position[r1 * nVar + j] - position[r2 * nVar + j]);
+					/* Restrictions to the position (as in PSO). Reset to random */
+					if ((value > varMax) || (value < varMin)) {
+						value = varMin + (varMax - varMin) * rng_double(rng);
+					}
+					u[j] = value;
+				}
+				else {
+					u[j] = x[j];
+				}
+			}
+		}
+
+		/* Evaluation of all the trial vectors (one batch) and selection */
+		evaluate_costs(space, target, trial, NP, nVar, params, trialCost);
+		*evaluations += NP;
+		for (i = 0; i < NP; i++) {
+			if (trialCost[i] <= cost[i]) {
+				cost[i] = trialCost[i];
+				for (j = 0; j < nVar; j++) {
+					position[i * nVar + j] = trial[i * nVar + j];
+				}
+			}
+			if (cost[i] < cost[best]) best = i;
+		}
+		if (cost[best] < *globalBestCost) {
+			*globalBestCost = cost[best];
+			for (j = 0; j < nVar; j++) {
+				globalBestPosition[j] = position[best * nVar + j];
+			}
+		}
+
+		/* Add the iteration best cost to the arrayBestCosts */
+		if ((showErrorPlot) && (*iteration < (unsigned int) iterLimit)) {
+			arrayBestCosts[*iteration] = *globalBestCost;
+		}
+
+		/* Convergence monitor: restart of the worst individuals on the stagnation */
+		if (useMonitor) {
+			radius = 0.0;
+			for (i = 0; i < NP; i++) {
+				for (j = 0; j < nVar; j++) {
+					value = position[i * nVar + j] - position[best * nVar + j];
+					radius += value * value;
+				}
+			}
+			radius = sqrt(radius / NP);
+			action = PSOAlg_monitor_check(control, history, (int) *iteration, *globalBestCost, radius,
+				&restarts, &lastRestart, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit);
+			if (action == PSO_MONITOR_RESTART) {
+				/* Indices of the worst individuals (the best one is kept) */
+				nRestart = (int) (control->restartFraction * NP + 0.5);
+				if (nRestart > NP - 1) nRestart = NP - 1;
+				if (nRestart < 1) nRestart = 1;
+				for (k = 0; k < nRestart; k++) {
+					index[k] = -1;
+					for (i = 0; i < NP; i++) {
+						if ((i != best) && (cost[i] < INFINITY) &&
+							((index[k] < 0) || (cost[i] > cost[index[k]]))) {
+							index[k] = i;
+						}
+					}
+					cost[index[k]] = INFINITY;  /* Not chosen again */
+					for (j = 0; j < nVar; j++) {
+						trial[k * nVar + j] = varMin + (varMax - varMin) * rng_double(rng);
+					}
+				}
+				evaluate_costs(space, target, trial, nRestart, nVar, params, trialCost);
+				*evaluations += nRestart;
+				for (k = 0; k < nRestart; k++) {
+					cost[index[k]] = trialCost[k];
+					for (j = 0; j < nVar; j++) {
+						position[index[k] * nVar + j] = trial[k * nVar + j];
+					}
+				}
+			}
+		}
+
+		/* Check the search termination by iterLimit, by precisionLimit and by the monitor */
+		if ((useIterLimit) && (*iteration >= (unsigned int) iterLimit)) {
+			doSearch = 0;
+			*status = PSO_STATUS_ITER_LIMIT;
+		}
+		else if ((usePrecisionLimit) && (precisionLimit >= *globalBestCost)) {
+			doSearch = 0;
+			*status = PSO_STATUS_PRECISION;
+		}
+		else if (action == PSO_MONITOR_GIVE_UP) {
+			doSearch = 0;
+			*status = PSO_STATUS_GAVE_UP;
+		}
+		else if (PSOAlg_progress_check(progress, space, &lastReportMs, *iteration, *evaluations, 
+			*globalBestCost, globalBestPosition)) {
+			doSearch = 0;
+			*status = PSO_STATUS_CANCELLED;
+		}
+		else {
+			*iteration += 1;
+		}
+	}
+
+	free(history);
+	free(buffer);
+	free(index);
+} /* fcn DEAlg_run_search */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
+
+
+static void evaluate_costs(shapeSpace_t *space, const double *target, const double *positions, int n, 
+	int nVar, double *params, double *costs) {
+	/* Function for evaluation of the costs of the rows of the array in one batch
+	   space     - decision space of the search (NULL - positions are the radii)
+	   target    - target circularity, convexity and elongation
+	   positions - positions (n x nVar array)
+	   n         - number of the positions
+	   nVar      - number of the decision variables
+	   params    - scratch array for the cost function parameters (n x 3)
+	   costs     - output array with the costs (n) */
+
+	int i;
+	shape_space_cost_params_batch(space, positions, n, nVar, params);
+	for (i = 0; i < n; i++) {
+		costs[i] = params_cost(target, params + 3 * i);
+	}
+} /* fcn evaluate_costs */
+
+
+static double params_cost(const double *target, const double *params) {
+	/* Function for calculation the cost (distance between the target and the calculated
+	   circularity, convexity and elongation)
+	   target - target circularity, convexity and elongation
+	   params - calculated circularity, convexity and elongation */
+
+	return sqrt((target[0] - params[0]) * (target[0] - params[0]) +
+		(target[1] - params[1]) * (target[1] - params[1]) +
+		(target[2] - params[2]) * (target[2] - params[2]));
+} /* fcn params_cost */
+
+
+static int random_index(rngState_t *rng, int n) {
+	/* Function for the random integer in range [0, n)
+	   rng - state of the random number generator
+	   n   - number of the values */
+
+	int k = (int) (rng_double(rng) * n);
+	return (k < n) ? k : n - 1;
+} /* fcn random_index */
@@ -0,0 +1,347 @@
+/*========================================================================
+  Module with realization of the Nelder-Mead simplex search algorithm for
+  determination of the particle best shape (polishing of the given shape or
+  the search from the random shapes). The coefficients are adapted to the
+  dimension (F. Gao, L. Han). The reflection, the expansion and both
+  contractions of the iteration are evaluated together in one call of the
+  batch cost kernel. The vertices outside the bounds are evaluated at the
+  nearest point inside the bounds with a quadratic penalty. The collapsed
+  simplex is restarted at the random position.
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "get_particle_parameters.h"
+#include "PSOAlgorithm.h"
+#include "shape_space.h"
+#include "NMAlgorithm.h"
+#include "rng.h"
+
+/* Number of the trial points of the iteration (reflection, expansion, contractions) */
+#define NM_TRIALS 4
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for making the simplex around the position */
+static void make_simplex(double *simplex, const double *position, int nVar, double varMin,
+	double varMax, double step);
+/* Function for evaluation of the penalized costs of the points in one batch */
+static void evaluate_points(shapeSpace_t *space, const double *target, const double *points, int n, 
+	int nVar, double varMin, double varMax, double *repaired, double *params, double *costs,
+	double *bestCost, double *bestPosition);
+/* Function for the indices of the array sorted by the ascending values */
+static void sort_by_cost(const double *cost, int *index, int n);
+
+
+void NMAlg_run_search(rngState_t *rng, double init_circularity, double init_convexity,
+	double init_elongation, int nVar, double varMin, double varMax, int useIterLimit,
+	int iterLimit, int usePrecisionLimit, double precisionLimit, int showErrorPlot,
+	double step, const double *initPosition, const psoControl_t *control,
+	shapeSpace_t *space, const searchProgress_t *progress, unsigned int *iteration, int *status,
+	unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+	double *arrayBestCosts) {
+	/* Function for performing the particle shape search with Nelder-Mead simplex algorithm.
+	   One iteration is one step of the simplex (NM_TRIALS cost evaluations, nVar more on
+	   the shrink)
+	   rng                - State of the random number generator (seeded by the caller)
+	   init_circularity   - Target particle circularity, [-]
+	   init_convexity     - Target particle convexity, [-]
+	   init_elongation    - Target particle elongation, [-]
+	   nVar               - Number of unknown (decision) variables (nDim or space->nVar)
+	   varMin             - Lower bound of decision variables
+	   varMax             - Upper bound of decision variables
+	   useIterLimit       - (bool) using of the iteration limit
+	   iterLimit          - Iteration limit
+	   usePrecisionLimit  - (bool) using the precision limit
+	   precisionLimit     - Precision limit of the cost
+	   showErrorPlot      - (bool) save data every iteration for building error plot or not
+	   step               - Initial size of the simplex (fraction of the variables range)
+	   initPosition       - Position of the first simplex (NULL - random position)
+	   control            - Settings of the convergence monitor (NULL or window 0 - no monitor)
+	   space              - Decision space of the search (NULL - decision variables are the radii)
+	   progress           - Progress callback and cancel flag of the search (NULL - none)
+	   Return:
+	   iteration          - Final number of iterations
+	   status             - Reason of the search finish (PSO_STATUS_...)
+	   evaluations        - Number of the cost function evaluations
+	   globalBestCost     - Found best cost
+	   globalBestPosition - Found best position
+	   arrayBestCosts     - Array with the cost values for every iteration (for the plot) */
+
+	double target[3] = {init_circularity, init_convexity, init_elongation};
+	int n = nVar;
+	int nPoints = (n > NM_TRIALS) ? n : NM_TRIALS;  /* Maximum number of the evaluated points */
+	double alpha = 1.0;  /* Reflection coefficient */
+	double gamma = 1.0 + 2.0 / n;  /* Expansion coefficient */
+	double rho = 0.75 - 0.5 / n;  /* Contraction coefficient */
+	double sigma = 1.0 - 1.0 / n;  /* Shrink coefficient */
+	double *buffer = (double*) malloc (((long) (n + 1) * n + n + 2 * (long) nPoints * n +
+		(n + 1) + nPoints + 3 * nPoints) * sizeof(double));
+	int *index = (int*) malloc ((n + 1) * sizeof(int));
+	if ((NULL == buffer) || (NULL == index)) print_error_and_exit();
+	double *simplex = buffer;  /* Vertices of the simplex ((n + 1) x n) */
+	double *centroid = simplex + (long) (n + 1) * n;  /* Centroid of the best n vertices */
+	double *points = centroid + n;  /* Trial points (nPoints x n) */
+	double *repaired = points + (long) nPoints * n;  /* Trial points inside the bounds */
+	double *cost = repaired + (long) nPoints * n;  /* Penalized costs of the vertices (n + 1) */
+	double *pointCost = cost + n + 1;  /* Penalized costs of the trial points (nPoints) */
+	double *params = pointCost + nPoints;  /* Cost function parameters (nPoints x 3) */
+	int useMonitor = (control != NULL) && (control->window > 0);  /* Use the convergence monitor */
+	double *history = NULL;  /* Global best costs of the last window iterations */
+	int restarts = 0;  /* Number of the restarts made by the monitor */
+	int lastRestart = 0;  /* Iteration of the last restart made by the monitor */
+	int action = PSO_MONITOR_CONTINUE;  /* Action of the convergence monitor */
+	double lastReportMs = 0.0;  /* Time of the last progress report */
+	int doSearch = 1;
+	int i, j, k, w, best, chosen, restart;
+	double d, size, radius, *x;
+
+	/* ===== 1. INITIALIZATION OF THE SIMPLEX ===== */
+	*iteration = 1;
+	*globalBestCost = INFINITY;
+	for (j = 0; j < n; j++) {
+		points[j] = (initPosition != NULL) ? initPosition[j] :
+			varMin + (varMax - varMin) * rng_double(rng);
+	}
+	make_simplex(simplex, points, n, varMin, varMax, step);
+	for (i = 0; i <= n; i += nPoints) {
+		k = (n + 1 - i < nPoints) ? n + 1 - i : nPoints;
+		evaluate_points(space, target, simplex + (long) i * n, k, n, varMin, varMax, repaired, params,
+			cost + i, globalBestCost, globalBestPosition);
+	}
+	*evaluations = n + 1;
+	if (showErrorPlot) {
+		arrayBestCosts[0] = *globalBestCost;
+	}
+	if (useMonitor) {
+		history = (double*) malloc (control->window * sizeof(double));
+		if (NULL == history) print_error_and_exit();
+		for (i = 0; i < control->window; i++) {
+			history[i] = *globalBestCost;
+		}
+	}
+
+	/* ===== 2. SEARCHING LOOP OF THE NELDER-MEAD ALGORITHM ===== */
+	while (doSearch) {
+		sort_by_cost(cost, index, n + 1);
+		best = index[0];
+		w = index[n];  /* Worst vertex */
+
+		/* Trial points on the line from the worst vertex through the centroid */
+		for (j = 0; j < n; j++) {
+			centroid[j] = 0.0;
+			for (i = 0; i < n; i++) {
+				centroid[j] += simplex[index[i] * n + j] / n;
+			}
+			d = centroid[j] - simplex[w * n + j];
+			points[j] = centroid[j] + alpha * d;  /* Reflection */
+			points[n + j] = centroid[j] + alpha * gamma * d;  /* Expansion */
+			points[2 * n + j] = centroid[j] + alpha * rho * d;  /* Outside contraction */
+			points[3 * n + j] = centroid[j] - rho * d;  /* Inside contraction */
+		}
+		evaluate_points(space, target, points, NM_TRIALS, n, varMin, varMax, repaired, params, pointCost,
+			globalBestCost, globalBestPosition);
+		*evaluations += NM_TRIALS;
+
+		/* Choice of the new vertex (-1 - shrink of the simplex) */
+		if (pointCost[0] < cost[best]) {
+			chosen = (pointCost[1] < pointCost[0]) ? 1 : 0;
+		}
+		else if (pointCost[0] < cost[index[n - 1]]) {
+			chosen = 0;
+		}
+		else if (pointCost[0] < cost[w]) {
+			chosen = (pointCost[2] <= pointCost[0]) ? 2 : -1;
+		}
+		else {
+			chosen = (pointCost[3] < cost[w]) ? 3 : -1;
+		}
+		if (chosen >= 0) {
+			for (j = 0; j < n; j++) {
+				simplex[w * n + j] = points[chosen * n + j];
+			}
+			cost[w] = pointCost[chosen];
+		}
+		else {
+			/* Shrink all the vertices to the best one (n points in one batch) */
+			for (i = 1; i <= n; i++) {
+				x = simplex + (long) index[i] * n;
+				for (j = 0; j < n; j++) {
+					x[j] = simplex[best * n + j] + sigma * (x[j] - simplex[best * n + j]);
+					points[(i - 1) * n + j] = x[j];
+				}
+			}
+			evaluate_points(space, target, points, n, n, varMin, varMax, repaired, params, pointCost,
+				globalBestCost, globalBestPosition);
+			*evaluations += n;
+			for (i = 1; i <= n; i++) {
+				cost[index[i]] = pointCost[i - 1];
+			}
+		}
+
+		/* Size of the simplex (the simplex is restarted when it is collapsed) */
+		sort_by_cost(cost, index, n + 1);
+		best = index[0];
+		size = 0.0;
+		radius = 0.0;
+		for (i = 1; i <= n; i++) {
+			for (j = 0; j < n; j++) {
+				d = simplex[index[i] * n + j] - simplex[best * n + j];
+				if (fabs(d) > size) size = fabs(d);
+				radius += d * d;
+			}
+		}
+		radius = sqrt(radius / (n + 1));
+		restart = (size < 1e-9 * (varMax - varMin));
+
+		/* Add the iteration best cost to the arrayBestCosts */
+		if ((showErrorPlot) && (*iteration < (unsigned int) iterLimit)) {
+			arrayBestCosts[*iteration] = *globalBestCost;
+		}
+
+		/* Convergence monitor: restart of the simplex on the stagnation */
+		if (useMonitor) {
+			action = PSOAlg_monitor_check(control, history, (int) *iteration, *globalBestCost, radius,
+				&restarts, &lastRestart, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit);
+			if (action == PSO_MONITOR_RESTART) {
+				restart = 1;
+			}
+		}
+		if (restart) {
+			/* New simplex at the random position */
+			for (j = 0; j < n; j++) {
+				points[j] = varMin + (varMax - varMin) * rng_double(rng);
+			}
+			make_simplex(simplex, points, n, varMin, varMax, step);
+			for (i = 0; i <= n; i += nPoints) {
+				k = (n + 1 - i < nPoints) ? n + 1 - i : nPoints;
+				evaluate_points(space, target, simplex + (long) i * n, k, n, varMin, varMax, repaired,
+					params, cost + i, globalBestCost, globalBestPosition);
+			}
+			*evaluations += n + 1;
+		}
+
+		/* Check the search termination by iterLimit, by precisionLimit and by the monitor */
+		if ((useIterLimit) && (*iteration >= (unsigned int) iterLimit)) {
+			doSearch = 0;
+			*status = PSO_STATUS_ITER_LIMIT;
+		}
+		else if ((usePrecisionLimit) && (precisionLimit >= *globalBestCost)) {
+			doSearch = 0;
+			*status = PSO_STATUS_PRECISION;
+		}
+		else if (action == PSO_MONITOR_GIVE_UP) {
+			doSearch = 0;
+			*status = PSO_STATUS_GAVE_UP;
+		}
+		else if (PSOAlg_progress_check(progress, space, &lastReportMs, *iteration, *evaluations, 
+			*globalBestCost, globalBestPosition)) {
+			doSearch = 0;
+			*status = PSO_STATUS_CANCELLED;
+		}
+		else {
+			*iteration += 1;
+		}
+	}
+
+	free(history);
+	free(buffer);
+	free(index);
+} /* fcn NMAlg_run_search */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
+
+
+static void make_simplex(double *simplex, const double *position, int nVar, double varMin,
+	double varMax, double step) {
+	/* Function for making the simplex: the position and the steps along every axis
+	   (the step is made inwards if the vertex is outside the bounds)
+	   simplex  - output array with the vertices ((nVar + 1) x nVar)
+	   position - first vertex of the simplex
+	   nVar     - number of the decision variables
+	   varMin   - lower bound of decision variables
+	   varMax   - upper bound of decision variables
+	   step     - size of the simplex (fraction of the variables range) */
+
+	int i, j;
+	double h = step * (varMax - varMin);
+	for (i = 0; i <= nVar; i++) {
+		for (j = 0; j < nVar; j++) {
+			simplex[i * nVar + j] = position[j];
+		}
+		if (i > 0) {
+			j = i - 1;
+			simplex[i * nVar + j] += (position[j] + h <= varMax) ? h : -h;
+		}
+	}
+} /* fcn make_simplex */
+
+
+static void evaluate_points(shapeSpace_t *space, const double *target, const double *points, int n, 
+	int nVar, double varMin, double varMax, double *repaired, double *params, double *costs,
+	double *bestCost, double *bestPosition) {
+	/* Function for evaluation of the penalized costs of the points in one batch. The points
+	   are repaired into the bounds, the penalty is the squared distance of the repair (in
+	   the units of the variables range). The global best is updated by the repaired points
+	   space        - decision space of the search (NULL - points are the radii)
+	   target       - target circularity, convexity and elongation
+	   points       - points (n x nVar array)
+	   n            - number of the points
+	   nVar         - number of the decision variables
+	   varMin       - lower bound of decision variables
+	   varMax       - upper bound of decision variables
+	   repaired     - scratch array for the repaired points (n x nVar)
+	   params       - scratch array for the cost function parameters (n x 3)
+	   costs        - output array with the penalized costs (n)
+	   bestCost     - global best cost (updated)
+	   bestPosition - global best position (updated) */
+
+	int i, j;
+	double value, cost;
+	for (i = 0; i < n * nVar; i++) {
+		value = points[i];
+		repaired[i] = (value < varMin) ? varMin : ((value > varMax) ? varMax : value);
+	}
+	shape_space_cost_params_batch(space, repaired, n, nVar, params);
+	for (i = 0; i < n; i++) {
+		cost = sqrt((target[0] - params[3 * i]) * (target[0] - params[3 * i]) +
+			(target[1] - params[3 * i + 1]) * (target[1] - params[3 * i + 1]) +
+			(target[2] - params[3 * i + 2]) * (target[2] - params[3 * i + 2]));
+		if (cost < *bestCost) {
+			*bestCost = cost;
+			for (j = 0; j < nVar; j++) {
+				bestPosition[j] = repaired[i * nVar + j];
+			}
+		}
+		costs[i] = cost;
+		for (j = 0; j < nVar; j++) {
+			value = points[i * nVar + j] - repaired[i * nVar + j];
+			costs[i] += value * value / ((varMax - varMin) * (varMax - varMin));
+		}
+	}
+} /* fcn evaluate_points */
+
+
+static void sort_by_cost(const double *cost, int *index, int n) {
+	/* Function for the indices of the array sorted by the ascending values (insertion
+	   sort, the simplex is small)
+	   cost  - array with the values
+	   index - output array with the sorted indices
+	   n     - number of the values */
+
+	int i, j, k;
+	for (i = 0; i < n; i++) {
+		k = i;
+		for (j = i - 1; (j >= 0) && (cost[index[j]] > cost[k]); j--) {
+			index[j + 1] = index[j];
+		}
+		index[j + 1] = k;
+	}
+} /* fcn sort_by_cost */
@@ -6,15 +6,25 @@
 #include <stdio.h>
 /*#include <stdint.h>*/
 #include <stdlib.h>
+#include <string.h>
 /*#include <openssl/rand.h>*/
 #include <math.h>
+#include <time.h>
 #include "data_types.h"
 #include "get_particle_parameters.h"
+#include "PSOAlgorithm.h"
+#include "rng.h"
+#include "shape_space.h"
+#include "local_polish.h"
+#include "shape_archive.h"
+
+/* Fraction of the swarm started around the initial position (the rest is random) */
+#define PSO_SEED_FRACTION 0.5
+/* Standard deviation of the jitter around the initial position (fraction of the variables range) */
+#define PSO_SEED_SIGMA 0.05
 
 /* Function for printing the error end exiting the program */
 static void print_error_and_exit(void);
-/* Function for generation random double numbers in range [0.0, 1.0) */
-static double random_double(void); 
 /* Function for dynamic allocation of 1d array */
 static double* dynamic_1d_array_alloc(int N);
 /* Function for dynamic allocation of 2d arrays */
@@ -22,20 +32,58 @@ static double** dynamic_2d_array_alloc(int N, int M);
 /* Function for memory free of the 2d array */
 static void dynamic_2d_array_free(double **array, int N);
 /* Function for update the current particle cost */
-static double calculate_cost(double imgScale, double init_circularity, double init_convexity, 
-	double init_elongation, int nVar, double *position);
+static double calculate_cost(geomWorkspace_t *ws, shapeSpace_t *space, shapeArchive_t *archive,
+	double init_circularity, double init_convexity, double init_elongation, double *position);
+/* Function for the current time in milliseconds (for the throttling of the progress reports) */
+static double time_ms(void);
+/* Function for calculation the number of the particles restarted on the stagnation */
+static int restart_count(const psoControl_t *control, int nPop);
+/* Function for the choice of the worst particle for the restart */
+static int take_worst_particle(double *bestCost, int nPop);
+/* Function for the restart of the particle at the random position */
+static void restart_particle(rngState_t *rng, double *position, double *velocity, 
+	double *bestPosition, int nVar, double varMin, double varMax);
+/* Function for calculation the squared distance between two points */
+static double squared_distance(const double *x, const double *y, int n);
+/* Function for creation of the state of K swarms in one block of memory */
+static swarmBatch_t* swarm_batch_create(int K, int nPop, int nVar, int window);
+/* Function for the memory free of the swarms state */
+static void swarm_batch_free(swarmBatch_t *sb);
+/* Function for update the costs and the best positions of the first nActive swarms */
+static void swarm_batch_update_costs(geomWorkspace_t *ws, shapeSpace_t *space, 
+	shapeArchive_t *archive, swarmBatch_t *sb, int nActive);
+/* Function for copying the swarm from one slot to another */
+static void swarm_batch_copy_slot(swarmBatch_t *sb, int from, int to);
+
 
+void PSOAlg_default_control(psoControl_t *control) {
+	/* Function for filling the default settings of the convergence monitor
+	   control - pointer to the settings */
+	
+	control->window = 200;
+	control->minImprovement = 0.05;
+	control->minRadius = 0.01;
+	control->restartFraction = 0.5;
+	control->maxRestarts = 1;
+	control->polishThreshold = 10.0;
+	control->polishSteps = 8;
+} /* fcn PSOAlg_default_control */
 
-void PSOAlg_run_search(double init_circularity, double init_convexity, double init_elongation,
+
+void PSOAlg_run_search(rngState_t *rng, double init_circularity, double init_convexity, double init_elongation,
 	int nVar, double varMin, double varMax, int useIterLimit, int iterLimit, 
 	int usePrecisionLimit, double precisionLimit, int showErrorPlot, int nPop, double w,
-	double wDamp, double c1, double c2, int a, int b, unsigned int *iteration, double *globalBestCost, 
-	double *globalBestPosition, double *arrayBestCosts) {
+	double wDamp, double c1, double c2, int a, int b, const double *initPosition,
+	const psoControl_t *control, shapeSpace_t *space, shapeArchive_t *archive,
+	const searchProgress_t *progress, unsigned int *iteration, int *status,
+	unsigned long *evaluations, double *globalBestCost, double *globalBestPosition, 
+	double *arrayBestCosts) {
 	/* Function for performing the particle shape search with PSO algorithm 
+	   rng                - State of the random number generator (seeded by the caller)
 	   init_circularity   - Target particle circularity, [-]
 	   init_convexity     - Target particle convexity, [-]
 	   init_elongation    - Target particle elongation, [-]
-	   nVar               - Number of unknown (decision) variables (equal to nDim)
+	   nVar               - Number of unknown (decision) variables (nDim or space->nVar)
 	   varMin             - Lower bound of decision variables
 	   varMax             - Upper bound of decision variables
 	   useIterLimit       - (bool) using of the iteration limit
@@ -49,8 +97,19 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 	   c2                 - Social acceleration coefficient
 	   a                  - Additional randomization of a-th particle in swarm
 	   b                  - Additional randomization of all particles every b-th iteration
+	   initPosition       - Initial position (NULL - random swarm). The first particle starts in it,
+	                        PSO_SEED_FRACTION of the swarm starts around it with the normal jitter
+	                        of PSO_SEED_SIGMA of the variables range, the rest of the swarm is random
+	   control            - Settings of the convergence monitor (NULL or window 0 - reset of all 
+	                        particles every b-th iteration is used instead of the monitor) and 
+	                        of the local polish of the global best (NULL - no polish)
+	   space              - Decision space of the search (NULL - decision variables are the radii)
+	   archive            - Archive receiving all the evaluated shapes (NULL - no archive)
+	   progress           - Progress callback and cancel flag of the search (NULL - none)
 	   Return:
 	   iteration          - Final number of iterations
+	   status             - Reason of the search finish (PSO_STATUS_...)
+	   evaluations        - Number of the cost function evaluations (swarm and local polish)
 	   globalBestCost     - Found best cost
 	   globalBestPosition - Found best position
 	   arrayBestCosts     - Array with the cost values for every iteration (for the plot) */	
@@ -64,8 +123,22 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 	double *PSOPart_bestCost = dynamic_1d_array_alloc(nPop);
 	double *r1 = dynamic_1d_array_alloc(nVar);
 	double *r2 = dynamic_1d_array_alloc(nVar);
-	int i, j;
-	double imgScale = 1.0;
+	/* Scratch buffers of the cost function (the positions are expanded to nDim radii) */
+	geomWorkspace_t *ws = geom_workspace_create((NULL != space) ? space->nDim : nVar);
+	int i, j, n;
+	int useMonitor = (control != NULL) && (control->window > 0);  /* Use the convergence monitor */
+	double *history = useMonitor ? dynamic_1d_array_alloc(control->window) : NULL;
+	int restarts = 0;  /* Number of the partial restarts */
+	int lastRestart = 0;  /* Iteration of the last restart */
+	int action = PSO_MONITOR_CONTINUE;  /* Action of the convergence monitor */
+	double w0 = w;  /* Initial inertia coefficient (restored on the restart) */
+	double radius;  /* Radius of the swarm */
+	double lastReportMs = 0.0;  /* Time of the last progress report */
+	/* Local polish of the global best close to the precision limit (only with the limit) */
+	int usePolish = (control != NULL) && (control->polishThreshold > 0.0) && 
+		(control->polishSteps > 0) && usePrecisionLimit;
+	double polishedCost = INFINITY;  /* Global best cost after the last polish */
+	double target[3] = {init_circularity, init_convexity, init_elongation};
 	
 	/* ===== 1. INITIALIZATION OF THE PSO ALGORITHM ===== */
 	*iteration = 1;
@@ -77,10 +150,26 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 		PSOPart_bestCost[i] = INFINITY;
 	}
 	
-	/* Randomize the position */
+	/* Randomize the position and start with zero velocity (the result depends only on the rng state) */
 	for (i = 0; i < nPop; i++) {
 		for (j = 0; j < nVar; j++) {
-			PSOPart_position[i][j] = varMin + (varMax - varMin) * random_double();
+			PSOPart_position[i][j] = varMin + (varMax - varMin) * rng_double(rng);
+			PSOPart_velocity[i][j] = 0.0;
+		}
+	}
+	
+	/* Seed the part of the swarm with the initial position and its jittered variants */
+	if (NULL != initPosition) {
+		n = (int) (PSO_SEED_FRACTION * nPop);
+		if (n < 1) n = 1;
+		for (i = 0; i < n; i++) {
+			for (j = 0; j < nVar; j++) {
+				PSOPart_position[i][j] = initPosition[j];
+				if (i > 0) {
+					PSOPart_position[i][j] += PSO_SEED_SIGMA * (varMax - varMin) * rng_normal(rng);
+				}
+				PSOPart_position[i][j] = fmin(fmax(PSOPart_position[i][j], varMin), varMax);
+			}
 		}
 	}
 	
@@ -93,8 +182,8 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 		}
 		
 		/* Update the current particle cost */
-		PSOPart_cost[i] = calculate_cost(imgScale, init_circularity, init_convexity, 
-			init_elongation, nVar, position);
+		PSOPart_cost[i] = calculate_cost(ws, space, archive, init_circularity, init_convexity, 
+			init_elongation, position);
 		
 		/* Update the particle best cost so far */
 		if (PSOPart_cost[i] < PSOPart_bestCost[i]) {
@@ -113,19 +202,28 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 		}
 	}
 	
+	*evaluations = nPop;
+	
 	/* Add the first iteration cost to the arrayBestCosts */
 	if (showErrorPlot) {
 		arrayBestCosts[0] = *globalBestCost;
 	}
 	
+	/* Initial cost for the monitor window */
+	if (useMonitor) {
+		for (i = 0; i < control->window; i++) {
+			history[i] = *globalBestCost;
+		}
+	}
+	
 	/* ===== 2. SEARCHING LOOP OF THE PSO ALGORITHM ===== */
 	while(doSearch) {
 		for (i = 0; i < nPop; i++) {
 			for (j = 0; j < nVar; j++) {
 				
 				/* Randomize r1 and r2 parameters (0 - 1)*/
-				r1[j] = random_double();
-                r2[j] = random_double();
+				r1[j] = rng_double(rng);
+                r2[j] = rng_double(rng);
                 
                 /* Update the velocity */
                 PSOPart_velocity[i][j] = w * PSOPart_velocity[i][j] + 
@@ -137,10 +235,10 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
                 
                 /* Restrictions to the position (in should be in range 0.0 - 1.0). Reset to random */
                 if (PSOPart_position[i][j] > 1.0) {
-                	PSOPart_position[i][j] = varMin + (varMax - varMin) * random_double();
+                	PSOPart_position[i][j] = varMin + (varMax - varMin) * rng_double(rng);
 				}
 				if (PSOPart_position[i][j] < 0.0) {
-                	PSOPart_position[i][j] = varMin + (varMax - varMin) * random_double();
+                	PSOPart_position[i][j] = varMin + (varMax - varMin) * rng_double(rng);
 				} 
 				
 				/* IN FUTURE: Add the additioanl randomization of the vector if the geometrical distance from it
@@ -151,15 +249,16 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 			/* Additional randomization: every a-th particle will be randomized */
 			if ((i % a) == 0) {
 				for (j = 0; j < nVar; j++) {
-					PSOPart_position[i][j] = varMin + (varMax - varMin) * random_double();
+					PSOPart_position[i][j] = varMin + (varMax - varMin) * rng_double(rng);
 				}
 			}
 			
-			/* Additional randomization: reset of particles every b-th iteration */
-			if ((*iteration % b) == 0) {
+			/* Additional randomization: reset of particles every b-th iteration 
+			   (only without the convergence monitor) */
+			if (!useMonitor && ((*iteration % b) == 0)) {
 				for (j = 0; j < nVar; j++) {
-					PSOPart_position[i][j] = varMin + (varMax - varMin) * random_double();
-					w = (rand() % 32767) / (double)32767;
+					PSOPart_position[i][j] = varMin + (varMax - varMin) * rng_double(rng);
+					w = rng_double(rng);
 				}
 			}
 			
@@ -169,8 +268,8 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 			}
 			
 			/* Update the current particle cost */
-			PSOPart_cost[i] = calculate_cost(imgScale, init_circularity, init_convexity, 
-				init_elongation, nVar, position);
+			PSOPart_cost[i] = calculate_cost(ws, space, archive, init_circularity, init_convexity, 
+				init_elongation, position);
 			
 			/* Update the particle best cost so far */
 			if (PSOPart_cost[i] < PSOPart_bestCost[i]) {
@@ -191,18 +290,58 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 		
 		/* Reduce the inertia coefficient */
 		w = w * wDamp;
+		*evaluations += nPop;
+		
+		/* Local polish of the new global best close to the precision limit (the swarm is
+		   pulled to the polished position by the social term) */
+		if (usePolish && (*globalBestCost <= control->polishThreshold * precisionLimit) && 
+			(*globalBestCost < polishedCost)) {
+			*evaluations += local_polish(ws, space, target, nVar, varMin, varMax, 
+				control->polishSteps, precisionLimit, globalBestPosition, globalBestCost);
+			polishedCost = *globalBestCost;
+		}
 			
 		/* Add the iteration best cost to the arrayBestCosts */
 		if ((showErrorPlot) && (*iteration < iterLimit)) {
 			arrayBestCosts[*iteration] = *globalBestCost;
 		}
 		
-		/* Check the search termination by iterLimit and by precisionLimit*/
+		/* Convergence monitor: restart of the worst particles on the stagnation */
+		if (useMonitor) {
+			radius = 0.0;
+			for (i = 0; i < nPop; i++) {
+				radius += squared_distance(PSOPart_position[i], globalBestPosition, nVar);
+			}
+			radius = sqrt(radius / nPop);
+			action = PSOAlg_monitor_check(control, history, (int) *iteration, *globalBestCost, radius, 
+				&restarts, &lastRestart, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit);
+			if (action == PSO_MONITOR_RESTART) {
+				for (n = restart_count(control, nPop); n > 0; n--) {
+					i = take_worst_particle(PSOPart_bestCost, nPop);
+					restart_particle(rng, PSOPart_position[i], PSOPart_velocity[i], 
+						PSOPart_bestPosition[i], nVar, varMin, varMax);
+				}
+				w = w0;
+			}
+		}
+		
+		/* Check the search termination by iterLimit, by precisionLimit and by the monitor */
 		if ((useIterLimit) && (*iteration >= iterLimit)) {
 			doSearch = 0;
+			*status = PSO_STATUS_ITER_LIMIT;
 		}
 		else if ((usePrecisionLimit) && (precisionLimit >= *globalBestCost)) {
 			doSearch = 0;
+			*status = PSO_STATUS_PRECISION;
+		}
+		else if (action == PSO_MONITOR_GIVE_UP) {
+			doSearch = 0;
+			*status = PSO_STATUS_GAVE_UP;
+		}
+		else if (PSOAlg_progress_check(progress, space, &lastReportMs, *iteration, *evaluations, 
+			*globalBestCost, globalBestPosition)) {
+			doSearch = 0;
+			*status = PSO_STATUS_CANCELLED;
 		}
 		else {
 			*iteration += 1;
@@ -218,10 +357,224 @@ void PSOAlg_run_search(double init_circularity, double init_convexity, double in
 	free(PSOPart_bestCost);
 	free(r1);
 	free(r2);
+	free(history);
+	geom_workspace_free(ws);
 		
 } /* fcn PSOAlg_run_search */
 
 
+void PSOAlg_run_search_batch(rngState_t *rng, int K, const double *targets, int nVar, double varMin, 
+	double varMax, int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit,
+	int nPop, double w, double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+	const psoControl_t *control, shapeSpace_t *space, shapeArchive_t *archive, unsigned int *iterations,
+	int *statuses, unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions) {
+	/* Function for performing the search of K particle shapes with K independent PSO swarms.
+	   The swarms make the iterations in lock-step and their state is stored in contiguous
+	   buffers, so the costs of all the active swarms are calculated in one pass with one
+	   workspace. A swarm reached the precision limit is finished and the last active
+	   swarm is moved to its slot (active swarms are always in the first slots).
+	   Every swarm is updated as in PSOAlg_run_search, but the global best of the swarm
+	   is updated once per iteration (after the costs of all its particles). Every swarm
+	   has its own convergence monitor and local polish (if control is given).
+	   rng                 - State of the random number generator (seeded by the caller)
+	   K                   - Number of the targets (independent searches)
+	   targets             - Target circularity, convexity and elongation (K x 3 array)
+	   nVar                - Number of unknown (decision) variables (nDim or space->nVar)
+	   varMin              - Lower bound of decision variables
+	   varMax              - Upper bound of decision variables
+	   useIterLimit        - (bool) using of the iteration limit
+	   iterLimit           - PSO iteration limit
+	   usePrecisionLimit   - (bool) using the precision limit
+	   precisionLimit      - Precision limit of the cost
+	   nPop                - Population size (size of every swarm)
+	   w                   - Inertia coefficient
+	   wDamp               - Damping ratio of inertia coefficient
+	   c1                  - Personal acceleration coefficient
+	   c2                  - Social acceleration coefficient
+	   a                   - Additional randomization of a-th particle in swarm
+	   b                   - Additional randomization of all particles every b-th iteration
+	   initPositions       - Initial positions of the swarms (K x nVar array, NULL - random swarms),
+	                         every swarm is seeded around its position as in PSOAlg_run_search
+	   control             - Settings of the convergence monitor (NULL or window 0 - reset of all 
+	                         particles every b-th iteration is used instead of the monitor) and 
+	                         of the local polish of the global best (NULL - no polish)
+	   space               - Decision space of the search (NULL - decision variables are the radii)
+	   archive             - Archive receiving all the evaluated shapes (NULL - no archive)
+	   Return:
+	   iterations          - Final numbers of iterations (K elements)
+	   statuses            - Reasons of the searches finish (PSO_STATUS_..., K elements)
+	   evaluations         - Numbers of the cost function evaluations (K elements)
+	   globalBestCosts     - Found best costs (K elements)
+	   globalBestPositions - Found best positions (K x nVar array) */
+	
+	int useMonitor = (control != NULL) && (control->window > 0);  /* Use the convergence monitor */
+	int window = useMonitor ? control->window : 0;  /* Length of the monitor window */
+	swarmBatch_t *sb = swarm_batch_create(K, nPop, nVar, window);
+	/* Scratch buffers of the cost function (the positions are expanded to nDim radii) */
+	geomWorkspace_t *ws = geom_workspace_create((NULL != space) ? space->nDim : nVar);
+	int nActive = K;  /* Number of the swarms still searching */
+	unsigned int iteration = 1;
+	int s, i, j, n, t, status, action;
+	double radius;
+	double *position, *velocity, *bestPosition, *globalBestPosition;
+	/* Local polish of the global best close to the precision limit (only with the limit) */
+	int usePolish = (control != NULL) && (control->polishThreshold > 0.0) && 
+		(control->polishSteps > 0) && usePrecisionLimit;
+	
+	/* ===== 1. INITIALIZATION OF THE SWARMS ===== */
+	for (s = 0; s < K; s++) {
+		sb->targetIndex[s] = s;
+		sb->w[s] = w;
+		sb->globalBestCost[s] = INFINITY;
+		for (j = 0; j < 3; j++) {
+			sb->target[3 * s + j] = targets[3 * s + j];
+		}
+	}
+	for (i = 0; i < K * nPop; i++) {
+		sb->bestCost[i] = INFINITY;
+	}
+	for (i = 0; i < K * nPop * nVar; i++) {
+		sb->position[i] = varMin + (varMax - varMin) * rng_double(rng);
+		sb->velocity[i] = 0.0;
+	}
+	if (NULL != initPositions) {
+		n = (int) (PSO_SEED_FRACTION * nPop);
+		if (n < 1) n = 1;
+		for (s = 0; s < K; s++) {
+			for (i = 0; i < n; i++) {
+				position = sb->position + (s * nPop + i) * nVar;
+				for (j = 0; j < nVar; j++) {
+					position[j] = initPositions[s * nVar + j];
+					if (i > 0) {
+						position[j] += PSO_SEED_SIGMA * (varMax - varMin) * rng_normal(rng);
+					}
+					position[j] = fmin(fmax(position[j], varMin), varMax);
+				}
+			}
+		}
+	}
+	swarm_batch_update_costs(ws, space, archive, sb, nActive);
+	for (s = 0; s < K; s++) {
+		sb->restarts[s] = 0;
+		sb->lastRestart[s] = 0;
+		sb->polishedCost[s] = INFINITY;
+		sb->polishEvaluations[s] = 0.0;
+		for (i = 0; i < window; i++) {
+			sb->history[s * window + i] = sb->globalBestCost[s];
+		}
+	}
+	
+	/* ===== 2. SEARCHING LOOP OF ALL THE ACTIVE SWARMS ===== */
+	while (nActive > 0) {
+		for (s = 0; s < nActive; s++) {
+			globalBestPosition = sb->globalBestPosition + s * nVar;
+			for (i = 0; i < nPop; i++) {
+				position = sb->position + (s * nPop + i) * nVar;
+				velocity = sb->velocity + (s * nPop + i) * nVar;
+				bestPosition = sb->bestPosition + (s * nPop + i) * nVar;
+				for (j = 0; j < nVar; j++) {
+					/* Update the velocity and the position */
+					velocity[j] = sb->w[s] * velocity[j] + 
+						rng_double(rng) * c1 * (bestPosition[j] - position[j]) + 
+						rng_double(rng) * c2 * (globalBestPosition[j] - position[j]);
+					position[j] += velocity[j];
+					
+					/* Restrictions to the position (in should be in range 0.0 - 1.0). Reset to random */
+					if ((position[j] > 1.0) || (position[j] < 0.0)) {
+						position[j] = varMin + (varMax - varMin) * rng_double(rng);
+					}
+				}
+				
+				/* Additional randomization: every a-th particle will be randomized and
+				   all particles are reset every b-th iteration (b reset only without the monitor) */
+				if (((i % a) == 0) || (!useMonitor && ((iteration % b) == 0))) {
+					for (j = 0; j < nVar; j++) {
+						position[j] = varMin + (varMax - varMin) * rng_double(rng);
+					}
+				}
+			}
+			if (!useMonitor && ((iteration % b) == 0)) {
+				sb->w[s] = rng_double(rng);
+			}
+		}
+		
+		/* Costs of all the particles of the active swarms */
+		swarm_batch_update_costs(ws, space, archive, sb, nActive);
+		
+		/* Reduce the inertia coefficients and check the search termination */
+		for (s = 0; s < nActive; s++) {
+			sb->w[s] *= wDamp;
+			
+			/* Local polish of the new global best of the swarm close to the precision limit */
+			if (usePolish && (sb->globalBestCost[s] <= control->polishThreshold * precisionLimit) && 
+				(sb->globalBestCost[s] < sb->polishedCost[s])) {
+				sb->polishEvaluations[s] += local_polish(ws, space, sb->target + 3 * s, nVar, varMin, 
+					varMax, control->polishSteps, precisionLimit, sb->globalBestPosition + s * nVar, 
+					sb->globalBestCost + s);
+				sb->polishedCost[s] = sb->globalBestCost[s];
+			}
+		}
+		s = 0;
+		while (s < nActive) {
+			/* Convergence monitor: restart of the worst particles on the stagnation */
+			action = PSO_MONITOR_CONTINUE;
+			if (useMonitor) {
+				radius = 0.0;
+				for (i = 0; i < nPop; i++) {
+					radius += squared_distance(sb->position + (long) (s * nPop + i) * nVar, 
+						sb->globalBestPosition + s * nVar, nVar);
+				}
+				radius = sqrt(radius / nPop);
+				action = PSOAlg_monitor_check(control, sb->history + s * window, (int) iteration, 
+					sb->globalBestCost[s], radius, sb->restarts + s, sb->lastRestart + s, 
+					useIterLimit, iterLimit, usePrecisionLimit, precisionLimit);
+				if (action == PSO_MONITOR_RESTART) {
+					for (n = restart_count(control, nPop); n > 0; n--) {
+						i = take_worst_particle(sb->bestCost + s * nPop, nPop);
+						restart_particle(rng, sb->position + (long) (s * nPop + i) * nVar, 
+							sb->velocity + (long) (s * nPop + i) * nVar, 
+							sb->bestPosition + (long) (s * nPop + i) * nVar, nVar, varMin, varMax);
+					}
+					sb->w[s] = w;
+				}
+			}
+			
+			if (useIterLimit && (iteration >= (unsigned int) iterLimit)) {
+				status = PSO_STATUS_ITER_LIMIT;
+			}
+			else if (usePrecisionLimit && (precisionLimit >= sb->globalBestCost[s])) {
+				status = PSO_STATUS_PRECISION;
+			}
+			else if (action == PSO_MONITOR_GIVE_UP) {
+				status = PSO_STATUS_GAVE_UP;
+			}
+			else {
+				s++;
+				continue;
+			}
+			/* Save the result of the swarm and move the last active swarm to its slot */
+			t = sb->targetIndex[s];
+			iterations[t] = iteration;
+			statuses[t] = status;
+			evaluations[t] = (unsigned long) nPop * (iteration + 1) + 
+				(unsigned long) sb->polishEvaluations[s];
+			globalBestCosts[t] = sb->globalBestCost[s];
+			for (j = 0; j < nVar; j++) {
+				globalBestPositions[t * nVar + j] = sb->globalBestPosition[s * nVar + j];
+			}
+			nActive--;
+			if (s != nActive) {
+				swarm_batch_copy_slot(sb, nActive, s);
+			}
+		}
+		iteration++;
+	}
+	
+	swarm_batch_free(sb);
+	geom_workspace_free(ws);
+} /* fcn PSOAlg_run_search_batch */
+
+
 static void print_error_and_exit(void) {
 	/* Function for printing the error end exiting the program */
 	printf("Error in memory allocation!");
@@ -229,12 +582,6 @@ static void print_error_and_exit(void) {
 } /* fcn print_error_and_exit */
 
 
-static double random_double(void) {
-	/* Function for generation random double numbers in range [0.0, 1.0) */ 
-    return ((rand() % 32767) / (double)32767);
-}
-
-
 static double* dynamic_1d_array_alloc(int N) {
 	/* Function for dynamic allocation of 2d arrays 
 	   N - number of elements */
@@ -276,44 +623,329 @@ static void dynamic_2d_array_free(double **array, int N) {
 } /* fcn dynamic_2d_array_free */
 
 
-static double calculate_cost(double imgScale, double init_circularity, double init_convexity, 
-	double init_elongation, int nVar, double *position) {
+static double calculate_cost(geomWorkspace_t *ws, shapeSpace_t *space, shapeArchive_t *archive,
+	double init_circularity, double init_convexity, double init_elongation, double *position) {
 	/* Function for update the current particle cost 
-	   imgScale       - Value of the image scale
+	   ws                 - workspace of the particle parameters calculation
+	   space              - decision space of the search (NULL - position is the radii)
+	   archive            - archive receiving the evaluated shape (NULL - no archive)
 	   init_circularity   - Target particle circularity, [-]
 	   init_convexity     - Target particle convexity, [-]
 	   init_elongation    - Target particle elongation, [-]
-	   nVar               - Number of unknown (decision) variables (equal to nDim)
 	   position         - array of the particle position
 	   Return:
 	   cost             - value of the cost for the current particle position */
 	
+	double params[3];
 	double circularity;
 	double convexity;
 	double elongation;
 	double cost;
+	const double *dims = shape_space_dims(space, position);
 	
-	/* Allocate data structures in memory: */	
-	paramsStruct_t *allParams = (paramsStruct_t *) malloc (sizeof(paramsStruct_t));
-	if (NULL == allParams) print_error_and_exit();
-
-	/* Calculate the particle parameters */
-	get_particle_parameters(imgScale, position, nVar, allParams);
+	/* Calculate only the particle parameters needed for the cost (lite kernel) */
+	compute_shape_cost_params_ws(ws, dims, &circularity, &convexity, &elongation);
 	
-	/* Assign the results to the local vars */
-	circularity = allParams->circularity;
-	convexity = allParams->convexity;
-	elongation = allParams->elongation;
+	/* Keep the evaluated shape for the later targets */
+	if (NULL != archive) {
+		params[0] = circularity;
+		params[1] = convexity;
+		params[2] = elongation;
+		shape_archive_insert(archive, dims, params);
+	}
 	
 	/* Calculation the cost */
 	cost = sqrt(pow((init_circularity - circularity), 2) + 
 		        pow((init_convexity - convexity), 2) + 
 				pow((init_elongation - elongation), 2));
 	
-	/* Free allocated data structures in memory: */
-	free(allParams);
-	
 	return cost;	
 }
 
-  
+
+int PSOAlg_monitor_check(const psoControl_t *control, double *history, int iteration, 
+	double globalBestCost, double radius, int *restarts, int *lastRestart, int useIterLimit, 
+	int iterLimit, int usePrecisionLimit, double precisionLimit) {
+	/* Function for the check of the search progress by the convergence monitor (also used by
+	   the other search algorithms, radius is the spread of their population). The swarm
+	   stagnates if the global best cost is improved less than minImprovement over the window
+	   or the swarm is collapsed (radius < minRadius). The stagnated swarm is restarted
+	   partially (not more often than once per window) up to maxRestarts times, after that
+	   the search is given up if the cost extrapolated with the rate of the last window does
+	   not reach the precision limit in the rest of the iterations.
+	   control           - settings of the convergence monitor
+	   history           - ring buffer with the global best costs of the last window iterations
+	   iteration         - current iteration
+	   globalBestCost    - current global best cost
+	   radius            - RMS distance of the particles to the global best position
+	   restarts          - number of the restarts of the swarm (updated)
+	   lastRestart       - iteration of the last restart (updated)
+	   useIterLimit      - (bool) using of the iteration limit
+	   iterLimit         - PSO iteration limit
+	   usePrecisionLimit - (bool) using the precision limit
+	   precisionLimit    - precision limit of the cost
+	   return:
+	   action            - PSO_MONITOR_CONTINUE, PSO_MONITOR_RESTART or PSO_MONITOR_GIVE_UP */
+	
+	int window = control->window;
+	double costAgo = history[iteration % window];  /* Global best cost window iterations ago */
+	double rate;  /* Logarithmic rate of the cost decrease per iteration */
+	
+	history[iteration % window] = globalBestCost;
+	if ((iteration - *lastRestart < window) || (globalBestCost <= precisionLimit)) {
+		return PSO_MONITOR_CONTINUE;
+	}
+	if ((costAgo - globalBestCost >= control->minImprovement * costAgo) && 
+		(radius >= control->minRadius)) {
+		return PSO_MONITOR_CONTINUE;  /* No stagnation */
+	}
+	if (*restarts < control->maxRestarts) {
+		*restarts += 1;
+		*lastRestart = iteration;
+		return PSO_MONITOR_RESTART;
+	}
+	if (!usePrecisionLimit) {
+		return PSO_MONITOR_CONTINUE;  /* Nothing to give up: search runs to the iteration limit */
+	}
+	if (useIterLimit) {
+		rate = log(costAgo / globalBestCost) / window;
+		if (globalBestCost * exp(-rate * (iterLimit - iteration)) <= precisionLimit) {
+			return PSO_MONITOR_CONTINUE;
+		}
+	}
+	return PSO_MONITOR_GIVE_UP;
+} /* fcn PSOAlg_monitor_check */
+
+
+int PSOAlg_progress_check(const searchProgress_t *progress, shapeSpace_t *space, double *lastReportMs, 
+	unsigned int iteration, unsigned long evaluations, double globalBestCost, 
+	const double *globalBestPosition) {
+	/* Function for the progress report of the search (also used by the other search
+	   algorithms). It is called at the end of every iteration of the running search. The
+	   callback is called every everyIter iterations or everyMs milliseconds after the last
+	   call, the time is read only if the time throttling is used
+	   progress           - progress callback and cancel flag of the search (NULL - none)
+	   space              - decision space of the search (the reported position is expanded to
+	                        the radii, NULL - position is the radii)
+	   lastReportMs       - time of the last report (0.0 before the first report, updated)
+	   iteration          - current iteration
+	   evaluations        - number of the cost function evaluations so far
+	   globalBestCost     - global best cost so far
+	   globalBestPosition - global best position so far
+	   return:
+	   1 - search is cancelled by the shared cancel flag, 0 - search continues */
+
+	double nowMs;
+	int report;
+	
+	if (NULL == progress) return 0;
+	if (NULL != progress->callback) {
+		report = (progress->everyIter > 0) && (iteration % progress->everyIter == 0);
+		if ((!report) && (progress->everyMs > 0.0)) {
+			nowMs = time_ms();
+			report = (nowMs - *lastReportMs >= progress->everyMs);
+		}
+		if (report) {
+			progress->callback(iteration, evaluations, globalBestCost, 
+				shape_space_dims(space, globalBestPosition));
+			if (progress->everyMs > 0.0) {
+				*lastReportMs = time_ms();
+			}
+		}
+	}
+	return (NULL != progress->cancel) && (*progress->cancel != 0);
+} /* fcn PSOAlg_progress_check */
+
+
+static double time_ms(void) {
+	/* Function for the current time in milliseconds (wall clock time) */
+	struct timespec ts;
+	timespec_get(&ts, TIME_UTC);
+	return ts.tv_sec * 1000.0 + ts.tv_nsec / 1.0e6;
+} /* fcn time_ms */
+
+
+static int restart_count(const psoControl_t *control, int nPop) {
+	/* Function for calculation the number of the particles restarted on the stagnation
+	   (at least one particle, the best particle is kept if nPop > 1)
+	   control - settings of the convergence monitor
+	   nPop    - population size */
+	
+	int n = (int) (control->restartFraction * nPop + 0.5);
+	if (n > nPop - 1) n = nPop - 1;
+	if (n < 1) n = 1;
+	return n;
+} /* fcn restart_count */
+
+
+static int take_worst_particle(double *bestCost, int nPop) {
+	/* Function for the choice of the worst particle for the restart. The best cost of the
+	   chosen particle is set to INFINITY (it is not chosen again and its best is reset)
+	   bestCost - best costs of the particles of the swarm
+	   nPop     - population size
+	   return:
+	   worst    - index of the worst particle */
+	
+	int i;
+	int worst = -1;
+	for (i = 0; i < nPop; i++) {
+		if ((bestCost[i] < INFINITY) && ((worst < 0) || (bestCost[i] > bestCost[worst]))) {
+			worst = i;
+		}
+	}
+	if (worst < 0) worst = 0;
+	bestCost[worst] = INFINITY;
+	return worst;
+} /* fcn take_worst_particle */
+
+
+static void restart_particle(rngState_t *rng, double *position, double *velocity, 
+	double *bestPosition, int nVar, double varMin, double varMax) {
+	/* Function for the restart of the particle at the random position with zero velocity
+	   rng          - state of the random number generator
+	   position     - position of the particle
+	   velocity     - velocity of the particle
+	   bestPosition - best position of the particle (set to the new position)
+	   nVar         - number of the decision variables
+	   varMin       - lower bound of decision variables
+	   varMax       - upper bound of decision variables */
+	
+	int j;
+	for (j = 0; j < nVar; j++) {
+		position[j] = varMin + (varMax - varMin) * rng_double(rng);
+		velocity[j] = 0.0;
+		bestPosition[j] = position[j];
+	}
+} /* fcn restart_particle */
+
+
+static double squared_distance(const double *x, const double *y, int n) {
+	/* Function for calculation the squared distance between two points
+	   x, y - coordinates of the points
+	   n    - number of the coordinates */
+	
+	int j;
+	double d2 = 0.0;
+	for (j = 0; j < n; j++) {
+		d2 += (x[j] - y[j]) * (x[j] - y[j]);
+	}
+	return d2;
+} /* fcn squared_distance */
+
+
+static swarmBatch_t* swarm_batch_create(int K, int nPop, int nVar, int window) {
+	/* Function for creation of the state of K swarms in one block of memory
+	   K      - number of the swarms
+	   nPop   - population size of every swarm
+	   nVar   - number of the decision variables
+	   window - length of the monitor window (0 - no monitor)
+	   return:
+	   sb     - pointer to the state of the swarms (free it with swarm_batch_free) */
+	
+	long swarmSize = (long) nPop * nVar;
+	swarmBatch_t *sb = (swarmBatch_t*) malloc (sizeof(swarmBatch_t));
+	if (NULL == sb) print_error_and_exit();
+	double *buffer = (double*) malloc ((3 * K * swarmSize + 2 * K * nPop + K * nVar + 7 * K + 
+		(long) K * window) * sizeof(double));
+	if (NULL == buffer) print_error_and_exit();
+	sb->targetIndex = (int*) malloc (3 * K * sizeof(int));
+	if (NULL == sb->targetIndex) print_error_and_exit();
+	
+	sb->K = K;
+	sb->nPop = nPop;
+	sb->nVar = nVar;
+	sb->position = buffer;
+	sb->velocity = sb->position + K * swarmSize;
+	sb->bestPosition = sb->velocity + K * swarmSize;
+	sb->cost = sb->bestPosition + K * swarmSize;
+	sb->bestCost = sb->cost + K * nPop;
+	sb->globalBestPosition = sb->bestCost + K * nPop;
+	sb->globalBestCost = sb->globalBestPosition + K * nVar;
+	sb->w = sb->globalBestCost + K;
+	sb->target = sb->w + K;
+	sb->history = sb->target + 3 * K;
+	sb->polishedCost = sb->history + (long) K * window;
+	sb->polishEvaluations = sb->polishedCost + K;
+	sb->restarts = sb->targetIndex + K;
+	sb->lastRestart = sb->restarts + K;
+	sb->window = window;
+	return sb;
+} /* fcn swarm_batch_create */
+
+
+static void swarm_batch_free(swarmBatch_t *sb) {
+	/* Function for the memory free of the swarms state
+	   sb - pointer to the state created by swarm_batch_create */
+	free(sb->position);  /* Beginning of the block with all the buffers */
+	free(sb->targetIndex);  /* Beginning of the block with all the int buffers */
+	free(sb);
+} /* fcn swarm_batch_free */
+
+
+static void swarm_batch_update_costs(geomWorkspace_t *ws, shapeSpace_t *space, 
+	shapeArchive_t *archive, swarmBatch_t *sb, int nActive) {
+	/* Function for update the costs of all the particles of the first nActive swarms,
+	   the best costs and positions of the particles and the global best of the swarms
+	   ws      - workspace of the particle parameters calculation
+	   space   - decision space of the search (NULL - positions are the radii)
+	   archive - archive receiving the evaluated shapes (NULL - no archive)
+	   sb      - pointer to the state of the swarms
+	   nActive - number of the active swarms (first slots) */
+	
+	int s, i, j, k;
+	int nPop = sb->nPop;
+	int nVar = sb->nVar;
+	double *target;
+	
+	for (s = 0; s < nActive; s++) {
+		target = sb->target + 3 * s;
+		for (i = 0; i < nPop; i++) {
+			k = s * nPop + i;
+			sb->cost[k] = calculate_cost(ws, space, archive, target[0], target[1], target[2], 
+				sb->position + (long) k * nVar);
+			
+			/* Update the particle best cost so far */
+			if (sb->cost[k] < sb->bestCost[k]) {
+				sb->bestCost[k] = sb->cost[k];
+				for (j = 0; j < nVar; j++) {
+					sb->bestPosition[(long) k * nVar + j] = sb->position[(long) k * nVar + j];
+				}
+			}
+			
+			/* Update the global cost and global best position of the swarm */
+			if (sb->cost[k] < sb->globalBestCost[s]) {
+				sb->globalBestCost[s] = sb->cost[k];
+				for (j = 0; j < nVar; j++) {
+					sb->globalBestPosition[s * nVar + j] = sb->position[(long) k * nVar + j];
+				}
+			}
+		}
+	}
+} /* fcn swarm_batch_update_costs */
+
+
+static void swarm_batch_copy_slot(swarmBatch_t *sb, int from, int to) {
+	/* Function for copying the swarm from one slot to another
+	   sb   - pointer to the state of the swarms
+	   from - slot of the copied swarm
+	   to   - destination slot */
+	
+	long swarmSize = (long) sb->nPop * sb->nVar;
+	memcpy(sb->position + to * swarmSize, sb->position + from * swarmSize, swarmSize * sizeof(double));
+	memcpy(sb->velocity + to * swarmSize, sb->velocity + from * swarmSize, swarmSize * sizeof(double));
+	memcpy(sb->bestPosition + to * swarmSize, sb->bestPosition + from * swarmSize, 
+		swarmSize * sizeof(double));
+	memcpy(sb->cost + to * sb->nPop, sb->cost + from * sb->nPop, sb->nPop * sizeof(double));
+	memcpy(sb->bestCost + to * sb->nPop, sb->bestCost + from * sb->nPop, sb->nPop * sizeof(double));
+	memcpy(sb->globalBestPosition + to * sb->nVar, sb->globalBestPosition + from * sb->nVar, 
+		sb->nVar * sizeof(double));
+	memcpy(sb->target + 3 * to, sb->target + 3 * from, 3 * sizeof(double));
+	sb->globalBestCost[to] = sb->globalBestCost[from];
+	sb->w[to] = sb->w[from];
+	sb->targetIndex[to] = sb->targetIndex[from];
+	memcpy(sb->history + to * sb->window, sb->history + from * sb->window, sb->window * sizeof(double));
+	sb->restarts[to] = sb->restarts[from];
+	sb->lastRestart[to] = sb->lastRestart[from];
+	sb->polishedCost[to] = sb->polishedCost[from];
+	sb->polishEvaluations[to] = sb->polishEvaluations[from];
+} /* fcn swarm_batch_copy_slot */
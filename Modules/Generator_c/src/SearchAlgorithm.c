@@ -0,0 +1,518 @@
+/*========================================================================
+  Module with the common interface of the search algorithms of the particle
+  shape (solving the reverse problem): PSO, CMA-ES, differential evolution
+  and Nelder-Mead simplex. The algorithm is chosen by the optimizer field
+  of the settings, the PSO settings are passed as separate arguments (as
+  in PSOAlg_run_search). All the algorithms use the same limits, statuses
+  and convergence monitor. If nHarmonics of the settings is not zero the
+  algorithms search the radial Fourier coefficients (see shape_space.c)
+  instead of the radii, the results are always the nDim radii. If the
+  archive of the evaluated shapes is given (see shape_archive.c), the
+  target is first looked up in the archive and the search is made only
+  when there is no shape within the precision limit. PSO adds all its
+  evaluated shapes to the archive. The block of targets can be searched
+  in the order of the Hilbert curve (see hilbert_curve.c), then every
+  search starts around the shape found for its neighbour along the curve.
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "PSOAlgorithm.h"
+#include "CMAESAlgorithm.h"
+#include "DEAlgorithm.h"
+#include "NMAlgorithm.h"
+#include "SearchAlgorithm.h"
+#include "shape_space.h"
+#include "shape_archive.h"
+#include "hilbert_curve.h"
+#include "get_particle_parameters.h"
+#include "rng.h"
+
+/* Jitter of the neighbour shape seeding the search of the ordered targets (fraction of the
+   variables range, the seed is not the same shape as the neighbour) */
+#define ORDER_SEED_SIGMA 0.02
+
+/* Function for performing the search in the decision space with the chosen algorithm */
+static void run_search_in_space(rngState_t *rng, const optSettings_t *settings, shapeSpace_t *space,
+	double init_circularity, double init_convexity, double init_elongation, int nVar,
+	double varMin, double varMax, int useIterLimit, int iterLimit, int usePrecisionLimit,
+	double precisionLimit, int showErrorPlot, int nPop, double w, double wDamp, double c1,
+	double c2, int a, int b, const double *initPosition, const psoControl_t *control,
+	const searchProgress_t *progress, shapeArchive_t *archive, unsigned int *iteration, int *status,
+	unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+	double *arrayBestCosts);
+/* Function for performing the search of K particle shapes with PSO swarms in lock-step */
+static void run_pso_batch(rngState_t *rng, const optSettings_t *settings, int K,
+	const double *targets, int nVar, double varMin, double varMax, int useIterLimit,
+	int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop, double w,
+	double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+	const psoControl_t *control, shapeArchive_t *archive, unsigned int *iterations, int *statuses,
+	unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions);
+/* Function for accepting the initial position within the precision limit of the target */
+static int accept_initial_position(const double *initPosition, int nVar, const double *target,
+	double precisionLimit, double *cost);
+/* Function for removing the found shape from the archive (it is not given to the next targets) */
+static void archive_remove_result(shapeArchive_t *archive, const double *dims, int nDim);
+/* Function for creation of the decision space of the settings (NULL - radii are searched) */
+static shapeSpace_t* create_space(const optSettings_t *settings, int nDim);
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+
+
+void SearchAlg_default_settings(optSettings_t *settings) {
+	/* Function for filling the default settings of the search algorithms
+	   settings - pointer to the settings */
+
+	settings->optimizer = OPT_PSO;
+	settings->popSize = 0;
+	settings->sigma0 = 0.3;
+	settings->F = 0.6;
+	settings->CR = 0.9;
+	settings->step = 0.05;
+	settings->nHarmonics = 0;
+} /* fcn SearchAlg_default_settings */
+
+
+void SearchAlg_run_search(rngState_t *rng, const optSettings_t *settings, double init_circularity,
+	double init_convexity, double init_elongation, int nVar, double varMin, double varMax,
+	int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit,
+	int showErrorPlot, int nPop, double w, double wDamp, double c1, double c2, int a, int b,
+	const double *initPosition, const psoControl_t *control, const searchProgress_t *progress,
+	shapeArchive_t *archive, unsigned int *iteration, int *status, unsigned long *evaluations, 
+	double *globalBestCost, double *globalBestPosition, double *arrayBestCosts) {
+	/* Function for performing the particle shape search with the chosen algorithm
+	   rng                - State of the random number generator (seeded by the caller)
+	   settings           - Choice and settings of the search algorithm (NULL - PSO)
+	   init_circularity   - Target particle circularity, [-]
+	   init_convexity     - Target particle convexity, [-]
+	   init_elongation    - Target particle elongation, [-]
+	   nVar ... b         - Limits of the search and settings of PSO (see PSOAlg_run_search),
+	                        nVar is the number of the radii (nDim)
+	   initPosition       - Initial radii (NULL - random position), e.g. the prediction of the
+	                        inverse model. It is accepted without the search if it is within the
+	                        precision limit (iteration 0, status PSO_STATUS_INITIAL), otherwise
+	                        CMA-ES, DE and Nelder-Mead start from it and PSO seeds the part of
+	                        the swarm around it
+	   control            - Settings of the convergence monitor (NULL or window 0 - no monitor)
+	   progress           - Progress callback and cancel flag of the search (NULL - none)
+	   archive            - Archive of the evaluated shapes (NULL - no archive). The shape within
+	                        the precision limit is taken from it without the search (iteration 0,
+	                        status PSO_STATUS_ARCHIVE), PSO adds its evaluated shapes to it
+	   Return:
+	   iteration          - Final number of iterations
+	   status             - Reason of the search finish (PSO_STATUS_...)
+	   evaluations        - Number of the cost function evaluations
+	   globalBestCost     - Found best cost
+	   globalBestPosition - Found best position (nDim radii)
+	   arrayBestCosts     - Array with the cost values for every iteration (for the plot) */
+
+	shapeSpace_t *space;
+	double *position, *initSpace;
+	double target[3] = {init_circularity, init_convexity, init_elongation};
+	int j;
+
+	/* Take the shape from the archive (the archive of other nDim is not used) */
+	if ((NULL != archive) && (archive->nDim != nVar)) archive = NULL;
+	if ((NULL != archive) && usePrecisionLimit && 
+		shape_archive_take(archive, target, precisionLimit, globalBestPosition, globalBestCost)) {
+		*iteration = 0;
+		*status = PSO_STATUS_ARCHIVE;
+		*evaluations = 0;
+		if (showErrorPlot) {
+			arrayBestCosts[0] = *globalBestCost;
+		}
+		return;
+	}
+	
+	/* Accept the initial position within the precision limit */
+	if ((NULL != initPosition) && usePrecisionLimit &&
+		accept_initial_position(initPosition, nVar, target, precisionLimit, globalBestCost)) {
+		for (j = 0; j < nVar; j++) {
+			globalBestPosition[j] = initPosition[j];
+		}
+		*iteration = 0;
+		*status = PSO_STATUS_INITIAL;
+		*evaluations = 1;
+		if (showErrorPlot) {
+			arrayBestCosts[0] = *globalBestCost;
+		}
+		return;
+	}
+
+	space = create_space(settings, nVar);
+	if (NULL == space) {
+		run_search_in_space(rng, settings, NULL, init_circularity, init_convexity, init_elongation,
+			nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+			showErrorPlot, nPop, w, wDamp, c1, c2, a, b, initPosition, control, progress, archive,
+			iteration, status, evaluations, globalBestCost, globalBestPosition, arrayBestCosts);
+		archive_remove_result(archive, globalBestPosition, nVar);
+		return;
+	}
+	
+	/* Search the coefficients and expand the found coefficients to the radii */
+	position = (double*) malloc (2 * space->nVar * sizeof(double));
+	if (NULL == position) print_error_and_exit();
+	initSpace = NULL;
+	if (NULL != initPosition) {
+		initSpace = position + space->nVar;
+		shape_space_from_dims(space, initPosition, initSpace);
+	}
+	run_search_in_space(rng, settings, space, init_circularity, init_convexity, init_elongation,
+		space->nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+		showErrorPlot, nPop, w, wDamp, c1, c2, a, b, initSpace, control, progress, archive,
+		iteration, status, evaluations, globalBestCost, position, arrayBestCosts);
+	shape_space_to_dims(space, position, globalBestPosition);
+	archive_remove_result(archive, globalBestPosition, nVar);
+	free(position);
+	shape_space_free(space);
+} /* fcn SearchAlg_run_search */
+
+
+void SearchAlg_run_search_batch(rngState_t *rng, const optSettings_t *settings, int K,
+	const double *targets, int nVar, double varMin, double varMax, int useIterLimit,
+	int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop, double w,
+	double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+	const psoControl_t *control, shapeArchive_t *archive, unsigned int *iterations, int *statuses,
+	unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions) {
+	/* Function for performing the search of K particle shapes with the chosen algorithm.
+	   PSO searches all the targets with the swarms in lock-step (PSOAlg_run_search_batch),
+	   the other algorithms solve the targets one after another (their populations are
+	   evaluated in batches)
+	   rng                 - State of the random number generator (seeded by the caller)
+	   settings            - Choice and settings of the search algorithm (NULL - PSO)
+	   K                   - Number of the targets (independent searches)
+	   targets             - Target circularity, convexity and elongation (K x 3 array)
+	   nVar ... b          - Limits of the search and settings of PSO (see PSOAlg_run_search_batch),
+	                         nVar is the number of the radii (nDim)
+	   initPositions       - Initial radii of the searches (K x nVar array, NULL - random start),
+	                         the position within the precision limit is accepted without the
+	                         search (see SearchAlg_run_search)
+	   control             - Settings of the convergence monitor (NULL or window 0 - no monitor)
+	   archive             - Archive of the evaluated shapes (NULL - no archive, see
+	                         SearchAlg_run_search), only the targets which are not found in
+	                         the archive are searched
+	   Return:
+	   iterations          - Final numbers of iterations (K elements)
+	   statuses            - Reasons of the searches finish (PSO_STATUS_..., K elements)
+	   evaluations         - Numbers of the cost function evaluations (K elements)
+	   globalBestCosts     - Found best costs (K elements)
+	   globalBestPositions - Found best positions (K x nVar array of the radii) */
+
+	int j, k, m, nMiss;
+	int optimizer = (settings != NULL) ? settings->optimizer : OPT_PSO;
+	int *miss;  /* Targets which are not found in the archive and not accepted initially */
+	unsigned int *missIterations;
+	int *missStatuses;
+	unsigned long *missEvaluations;
+	double *missTargets, *missCosts, *missDims, *missInit;
+
+	if ((optimizer != OPT_CMAES) && (optimizer != OPT_DE) && (optimizer != OPT_NM)) {
+		if ((NULL != archive) && (archive->nDim != nVar)) archive = NULL;
+		if (((NULL == archive) && (NULL == initPositions)) || !usePrecisionLimit) {
+			run_pso_batch(rng, settings, K, targets, nVar, varMin, varMax, useIterLimit, iterLimit,
+				usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1, c2, a, b, initPositions,
+				control, archive, iterations, statuses, evaluations, globalBestCosts, 
+				globalBestPositions);
+			return;
+		}
+		
+		/* Take the shapes from the archive, accept the initial positions within the precision
+		   limit and search only the rest of the targets */
+		miss = (int*) malloc (3 * K * sizeof(int));
+		missEvaluations = (unsigned long*) malloc (K * sizeof(unsigned long));
+		missTargets = (double*) malloc ((long) K * (4 + 2 * nVar) * sizeof(double));
+		if ((NULL == miss) || (NULL == missEvaluations) || (NULL == missTargets)) print_error_and_exit();
+		missIterations = (unsigned int*) (miss + K);
+		missStatuses = miss + 2 * K;
+		missCosts = missTargets + 3 * K;
+		missDims = missCosts + K;
+		missInit = missDims + (long) K * nVar;
+		nMiss = 0;
+		for (k = 0; k < K; k++) {
+			if ((NULL != archive) && shape_archive_take(archive, targets + 3 * k, precisionLimit, 
+				globalBestPositions + (long) k * nVar, globalBestCosts + k)) {
+				iterations[k] = 0;
+				statuses[k] = PSO_STATUS_ARCHIVE;
+				evaluations[k] = 0;
+			} else if ((NULL != initPositions) && accept_initial_position(initPositions + 
+				(long) k * nVar, nVar, targets + 3 * k, precisionLimit, globalBestCosts + k)) {
+				for (j = 0; j < nVar; j++) {
+					globalBestPositions[(long) k * nVar + j] = initPositions[(long) k * nVar + j];
+				}
+				iterations[k] = 0;
+				statuses[k] = PSO_STATUS_INITIAL;
+				evaluations[k] = 1;
+			} else {
+				for (j = 0; j < 3; j++) {
+					missTargets[3 * nMiss + j] = targets[3 * k + j];
+				}
+				if (NULL != initPositions) {
+					for (j = 0; j < nVar; j++) {
+						missInit[(long) nMiss * nVar + j] = initPositions[(long) k * nVar + j];
+					}
+				}
+				miss[nMiss++] = k;
+			}
+		}
+		if (nMiss > 0) {
+			run_pso_batch(rng, settings, nMiss, missTargets, nVar, varMin, varMax, useIterLimit,
+				iterLimit, usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1, c2, a, b, 
+				(NULL != initPositions) ? missInit : NULL, control, archive, missIterations, 
+				missStatuses, missEvaluations, missCosts, missDims);
+		}
+		for (m = 0; m < nMiss; m++) {
+			k = miss[m];
+			iterations[k] = missIterations[m];
+			statuses[k] = missStatuses[m];
+			evaluations[k] = missEvaluations[m];
+			globalBestCosts[k] = missCosts[m];
+			for (j = 0; j < nVar; j++) {
+				globalBestPositions[(long) k * nVar + j] = missDims[(long) m * nVar + j];
+			}
+		}
+		free(miss);
+		free(missEvaluations);
+		free(missTargets);
+		return;
+	}
+	for (k = 0; k < K; k++) {
+		SearchAlg_run_search(rng, settings, targets[3 * k], targets[3 * k + 1], targets[3 * k + 2],
+			nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit, 0,
+			nPop, w, wDamp, c1, c2, a, b, (NULL != initPositions) ? initPositions + (long) k * nVar : NULL,
+			control, NULL, archive, iterations + k, statuses + k, evaluations + k, globalBestCosts + k,
+			globalBestPositions + (long) k * nVar, NULL);
+	}
+} /* fcn SearchAlg_run_search_batch */
+
+
+void SearchAlg_run_search_ordered(rngState_t *rng, const optSettings_t *settings, int K,
+	const double *targets, int batchSize, int nVar, double varMin, double varMax,
+	int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop,
+	double w, double wDamp, double c1, double c2, int a, int b, const psoControl_t *control,
+	shapeArchive_t *archive, unsigned int *iterations, int *statuses, unsigned long *evaluations, 
+	double *globalBestCosts, double *globalBestPositions) {
+	/* Function for performing the search of the block of K particle shapes in the order of
+	   the Hilbert curve through the targets. The targets are searched in the batches of
+	   SearchAlg_run_search_batch, so the curve is dealt to the batches: slot s of batch c
+	   is the target s * nBatches + c of the curve. The search of the target of batch c > 0
+	   starts around the shape found for the previous target of the curve (slot s of batch
+	   c - 1) jittered by ORDER_SEED_SIGMA of the variables range, the first batch starts
+	   from the random positions. The results are in the original order of the targets
+	   rng ... b           - Arguments as in SearchAlg_run_search_batch
+	   batchSize           - Maximum number of the targets searched together
+	   control, archive    - Arguments as in SearchAlg_run_search_batch
+	   Return:
+	   iterations ... globalBestPositions - Results as in SearchAlg_run_search_batch (in the 
+	                         original order of the targets) */
+
+	int c, j, m, s, t, nBatches, nSlots;
+	int *order, *batchStatuses;
+	unsigned int *batchIterations;
+	unsigned long *batchEvaluations;
+	double *batchTargets, *batchInit, *batchCosts, *batchDims, *seed;
+
+	if (K <= 0) return;
+	if (batchSize < 1) batchSize = 1;
+	nBatches = (K + batchSize - 1) / batchSize;
+	order = (int*) malloc ((K + 2 * batchSize) * sizeof(int));
+	batchEvaluations = (unsigned long*) malloc (batchSize * sizeof(unsigned long));
+	batchTargets = (double*) malloc ((long) batchSize * (4 + 2 * nVar) * sizeof(double));
+	if ((NULL == order) || (NULL == batchEvaluations) || (NULL == batchTargets)) print_error_and_exit();
+	batchIterations = (unsigned int*) (order + K);
+	batchStatuses = order + K + batchSize;
+	batchCosts = batchTargets + 3 * batchSize;
+	batchDims = batchCosts + batchSize;
+	batchInit = batchDims + (long) batchSize * nVar;
+	hilbert_order(K, targets, order);
+	
+	for (c = 0; c < nBatches; c++) {
+		/* Targets of the batch and the jittered shapes of their neighbours along the curve */
+		nSlots = 0;
+		for (t = c; t < K; t += nBatches) {
+			for (j = 0; j < 3; j++) {
+				batchTargets[3 * nSlots + j] = targets[3 * order[t] + j];
+			}
+			if (c > 0) {
+				seed = globalBestPositions + (long) order[t - 1] * nVar;
+				for (j = 0; j < nVar; j++) {
+					batchInit[(long) nSlots * nVar + j] = fmin(fmax(seed[j] + ORDER_SEED_SIGMA *
+						(varMax - varMin) * rng_normal(rng), varMin), varMax);
+				}
+			}
+			nSlots++;
+		}
+		SearchAlg_run_search_batch(rng, settings, nSlots, batchTargets, nVar, varMin, varMax, 
+			useIterLimit, iterLimit, usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1, c2, a,
+			b, (c > 0) ? batchInit : NULL, control, archive, batchIterations, batchStatuses, 
+			batchEvaluations, batchCosts, batchDims);
+		
+		/* Put the results to the original places of the targets */
+		for (s = 0; s < nSlots; s++) {
+			m = order[c + s * nBatches];
+			iterations[m] = batchIterations[s];
+			statuses[m] = batchStatuses[s];
+			evaluations[m] = batchEvaluations[s];
+			globalBestCosts[m] = batchCosts[s];
+			for (j = 0; j < nVar; j++) {
+				globalBestPositions[(long) m * nVar + j] = batchDims[(long) s * nVar + j];
+			}
+		}
+	}
+	free(order);
+	free(batchEvaluations);
+	free(batchTargets);
+} /* fcn SearchAlg_run_search_ordered */
+
+
+static void run_search_in_space(rngState_t *rng, const optSettings_t *settings, shapeSpace_t *space,
+	double init_circularity, double init_convexity, double init_elongation, int nVar,
+	double varMin, double varMax, int useIterLimit, int iterLimit, int usePrecisionLimit,
+	double precisionLimit, int showErrorPlot, int nPop, double w, double wDamp, double c1,
+	double c2, int a, int b, const double *initPosition, const psoControl_t *control,
+	const searchProgress_t *progress, shapeArchive_t *archive, unsigned int *iteration, int *status,
+	unsigned long *evaluations, double *globalBestCost, double *globalBestPosition,
+	double *arrayBestCosts) {
+	/* Function for performing the search in the decision space with the chosen algorithm
+	   (arguments as in SearchAlg_run_search, the positions are in the decision space)
+	   space   - decision space of the search (NULL - decision variables are the radii)
+	   nVar    - number of the decision variables
+	   archive - archive receiving the evaluated shapes of PSO (NULL - no archive) */
+
+	int optimizer = (settings != NULL) ? settings->optimizer : OPT_PSO;
+
+	switch (optimizer) {
+		case OPT_CMAES:
+			CMAESAlg_run_search(rng, init_circularity, init_convexity, init_elongation, nVar,
+				varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+				showErrorPlot, settings->popSize, settings->sigma0, initPosition, control,
+				space, progress, iteration, status, evaluations, globalBestCost,
+				globalBestPosition, arrayBestCosts);
+			break;
+		case OPT_DE:
+			DEAlg_run_search(rng, init_circularity, init_convexity, init_elongation, nVar,
+				varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+				showErrorPlot, settings->popSize, settings->F, settings->CR, initPosition, control,
+				space, progress, iteration, status, evaluations, globalBestCost,
+				globalBestPosition, arrayBestCosts);
+			break;
+		case OPT_NM:
+			NMAlg_run_search(rng, init_circularity, init_convexity, init_elongation, nVar,
+				varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+				showErrorPlot, settings->step, initPosition, control, space, progress, iteration,
+				status, evaluations, globalBestCost, globalBestPosition, arrayBestCosts);
+			break;
+		default:
+			PSOAlg_run_search(rng, init_circularity, init_convexity, init_elongation, nVar,
+				varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+				showErrorPlot, nPop, w, wDamp, c1, c2, a, b, initPosition, control, space, archive,
+				progress, iteration, status, evaluations, globalBestCost, globalBestPosition,
+				arrayBestCosts);
+	}
+} /* fcn run_search_in_space */
+
+
+static void run_pso_batch(rngState_t *rng, const optSettings_t *settings, int K,
+	const double *targets, int nVar, double varMin, double varMax, int useIterLimit,
+	int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop, double w,
+	double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+	const psoControl_t *control, shapeArchive_t *archive, unsigned int *iterations, int *statuses,
+	unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions) {
+	/* Function for performing the search of K particle shapes with PSO swarms in lock-step
+	   in the decision space of the settings (arguments as in SearchAlg_run_search_batch,
+	   the archive only receives the evaluated shapes, the initial radii are not checked) */
+
+	int k;
+	shapeSpace_t *space = create_space(settings, nVar);
+	double *positions = globalBestPositions;
+	double *initSpace = NULL;
+
+	if (NULL != space) {
+		positions = (double*) malloc ((long) 2 * K * space->nVar * sizeof(double));
+		if (NULL == positions) print_error_and_exit();
+		if (NULL != initPositions) {
+			initSpace = positions + (long) K * space->nVar;
+			for (k = 0; k < K; k++) {
+				shape_space_from_dims(space, initPositions + (long) k * nVar, 
+					initSpace + (long) k * space->nVar);
+			}
+		}
+	}
+	PSOAlg_run_search_batch(rng, K, targets, (NULL != space) ? space->nVar : nVar, varMin,
+		varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1,
+		c2, a, b, (NULL != space) ? initSpace : initPositions, control, space, archive, iterations,
+		statuses, evaluations, globalBestCosts, positions);
+	if (NULL != space) {
+		for (k = 0; k < K; k++) {
+			shape_space_to_dims(space, positions + (long) k * space->nVar, 
+				globalBestPositions + (long) k * nVar);
+		}
+		free(positions);
+		shape_space_free(space);
+	}
+	for (k = 0; k < K; k++) {
+		archive_remove_result(archive, globalBestPositions + (long) k * nVar, nVar);
+	}
+} /* fcn run_pso_batch */
+
+
+static int accept_initial_position(const double *initPosition, int nVar, const double *target,
+	double precisionLimit, double *cost) {
+	/* Function for accepting the initial position within the precision limit of the target
+	   initPosition   - initial radii (nVar)
+	   nVar           - number of the radii
+	   target         - target circularity, convexity and elongation
+	   precisionLimit - precision limit of the cost
+	   Return:
+	   cost           - cost of the initial position
+	   return:
+	   accepted       - 1 if the cost is within the precision limit, 0 otherwise */
+
+	double params[3];
+
+	compute_shape_cost_params(initPosition, nVar, params, params + 1, params + 2);
+	*cost = sqrt(pow(params[0] - target[0], 2) + pow(params[1] - target[1], 2) +
+		pow(params[2] - target[2], 2));
+	return *cost <= precisionLimit;
+} /* fcn accept_initial_position */
+
+
+static void archive_remove_result(shapeArchive_t *archive, const double *dims, int nDim) {
+	/* Function for removing the found shape from the archive (the global best of PSO is one
+	   of the archived shapes, the same shape is not given to the next targets)
+	   archive - archive of the evaluated shapes (NULL - nothing is done)
+	   dims    - found radii
+	   nDim    - number of the radii */
+
+	double params[3];
+	if (NULL == archive) return;
+	compute_shape_cost_params(dims, nDim, params, params + 1, params + 2);
+	shape_archive_remove(archive, params);
+} /* fcn archive_remove_result */
+
+
+static shapeSpace_t* create_space(const optSettings_t *settings, int nDim) {
+	/* Function for creation of the decision space of the settings
+	   settings - choice and settings of the search algorithm (NULL - PSO with the radii)
+	   nDim     - number of the particle dimensions
+	   Return:
+	   space    - decision space of the Fourier coefficients (NULL - radii are searched) */
+	
+	shapeSpace_t *space;
+	if ((NULL == settings) || (settings->nHarmonics <= 0)) return NULL;
+	space = shape_space_create(nDim, settings->nHarmonics);
+	if (space->nHarmonics == 0) {
+		/* nDim is too small for the harmonics */
+		shape_space_free(space);
+		return NULL;
+	}
+	return space;
+} /* fcn create_space */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
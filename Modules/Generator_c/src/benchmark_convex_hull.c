@@ -0,0 +1,119 @@
+/*================================================================================
+  Benchmark of the convex hull algorithms for the particle polygons:
+	1) Graham scan in the angular order (calc_convex_hull_coords), O(n);
+	2) Andrew's monotone chain (calc_convex_hull_coords_monotone), O(n log n).
+  Both algorithms are checked to give the same hull for every random particle.
+  Usage: benchmark_convex_hull [number of particles]
+  ================================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include <math.h>
+#include "convex_hull.h"
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+
+/* Function for generation of the random particle (coordinates of the dims points) */
+static void generate_particle(int nDim, double *dimsCoordMidX, double *dimsCoordMidY);
+
+
+int main(int argc, char *argv[]) {
+	/* Main function of the benchmark */
+	
+	int nDimList[] = {6, 12, 24, 60, 240, 1000};  /* Tested numbers of the dims */
+	int nTests = sizeof(nDimList) / sizeof(nDimList[0]);
+	int nParticles = 20000;  /* Number of the random particles for every nDim */
+	int i, j, t, nDim;
+	int nGraham, nMonotone;
+	int mismatch;
+	clock_t start;
+	double timeGraham, timeMonotone;
+	double *dimsX, *dimsY, *hullX, *hullY, *hullX2, *hullY2;
+	
+	if (argc > 1) nParticles = atoi(argv[1]);
+	srand(1);
+	
+	printf("%6s %14s %14s %9s %9s\n", "nDim", "Graham [us]", "Monotone [us]", "Speedup", "Mismatch");
+	for (t = 0; t < nTests; t++) {
+		nDim = nDimList[t];
+		dimsX = (double*) malloc (nParticles * nDim * sizeof(double));
+		dimsY = (double*) malloc (nParticles * nDim * sizeof(double));
+		hullX = (double*) malloc (nDim * sizeof(double));
+		hullY = (double*) malloc (nDim * sizeof(double));
+		hullX2 = (double*) malloc (nDim * sizeof(double));
+		hullY2 = (double*) malloc (nDim * sizeof(double));
+		if (NULL == dimsX || NULL == dimsY || NULL == hullX || NULL == hullY) print_error_and_exit();
+		if (NULL == hullX2 || NULL == hullY2) print_error_and_exit();
+		for (i = 0; i < nParticles; i++) {
+			generate_particle(nDim, &dimsX[i * nDim], &dimsY[i * nDim]);
+		}
+		
+		/* Time measurements */
+		start = clock();
+		for (i = 0; i < nParticles; i++) {
+			calc_convex_hull_coords(nDim, &dimsX[i * nDim], &dimsY[i * nDim], hullX, hullY);
+		}
+		timeGraham = (double) (clock() - start) / CLOCKS_PER_SEC;
+		start = clock();
+		for (i = 0; i < nParticles; i++) {
+			calc_convex_hull_coords_monotone(nDim, &dimsX[i * nDim], &dimsY[i * nDim], hullX, hullY);
+		}
+		timeMonotone = (double) (clock() - start) / CLOCKS_PER_SEC;
+		
+		/* Check that both algorithms give the same hull points in the same order */
+		mismatch = 0;
+		for (i = 0; i < nParticles; i++) {
+			nGraham = calc_convex_hull_coords(nDim, &dimsX[i * nDim], &dimsY[i * nDim], hullX, hullY);
+			nMonotone = calc_convex_hull_coords_monotone(nDim, &dimsX[i * nDim], &dimsY[i * nDim],
+				hullX2, hullY2);
+			if (nGraham != nMonotone) {
+				mismatch++;
+				continue;
+			}
+			for (j = 0; j < nGraham; j++) {
+				if (hullX[j] != hullX2[j] || hullY[j] != hullY2[j]) {
+					mismatch++;
+					break;
+				}
+			}
+		}
+		
+		printf("%6d %14.3f %14.3f %9.2f %9d\n", nDim, timeGraham / nParticles * 1e6,
+			timeMonotone / nParticles * 1e6, timeMonotone / timeGraham, mismatch);
+		
+		free(dimsX);
+		free(dimsY);
+		free(hullX);
+		free(hullY);
+		free(hullX2);
+		free(hullY2);
+	}
+	return 0;
+} /* fcn main */
+
+
+static void generate_particle(int nDim, double *dimsCoordMidX, double *dimsCoordMidY) {
+	/* Function for generation of the random particle (same coordinates as in the particle
+	   parameters calculation: slider starts not from the center)
+	   nDim          - number of the particle dimensions
+	   dimsCoordMidX - pointer to array of X coord of dims points
+	   dimsCoordMidY - pointer to array of Y coord of dims points */
+	int i;
+	double radius, angle;
+	double centreRadius = 5.0;  /* Radius of the central polygon */
+	for (i = 0; i < nDim; i++) {
+		radius = ((double) rand() / RAND_MAX) * (180.0 - centreRadius) + centreRadius;
+		angle = i * 2 * M_PI / nDim;
+		dimsCoordMidX[i] = (cos(angle) * radius + 180.0) - 180.0;
+		dimsCoordMidY[i] = (sin(angle) * radius + 180.0) - 180.0;
+	}
+} /* fcn generate_particle */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
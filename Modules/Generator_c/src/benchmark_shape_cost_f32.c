@@ -0,0 +1,78 @@
+/*================================================================================
+  Benchmark and accuracy report of the cost function kernels:
+	1) float64 kernel (compute_shape_cost_params_batch);
+	2) single precision kernel (compute_shape_cost_params_batch_f32).
+  Maximum and mean absolute errors of circularity, convexity and elongation of
+  the single precision kernel are reported (shape_cost_accuracy_report).
+  Usage: benchmark_shape_cost_f32 [number of particles]
+  ================================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include "get_particle_parameters.h"
+#include "shape_cost_f32.h"
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+
+
+int main(int argc, char *argv[]) {
+	/* Main function of the benchmark */
+
+	int nDimList[] = {6, 12, 24, 60, 240};  /* Tested numbers of the dims */
+	int nTests = sizeof(nDimList) / sizeof(nDimList[0]);
+	int nParticles = 100000;  /* Number of the random particles for every nDim */
+	int i, t, nDim;
+	clock_t start;
+	double timeDouble, timeFloat;
+	double report[6];
+	double *dims, *outD;
+	float *dimsF, *outF;
+
+	if (argc > 1) nParticles = atoi(argv[1]);
+	srand(1);
+
+	printf("%6s %12s %12s %8s %10s %10s %10s %10s\n", "nDim", "f64 [us]", "f32 [us]", "Speedup",
+		"maxErrCir", "maxErrCon", "maxErrElg", "meanErrElg");
+	for (t = 0; t < nTests; t++) {
+		nDim = nDimList[t];
+		dims = (double*) malloc ((long)nParticles * nDim * sizeof(double));
+		dimsF = (float*) malloc ((long)nParticles * nDim * sizeof(float));
+		outD = (double*) malloc (3 * (long)nParticles * sizeof(double));
+		outF = (float*) malloc (3 * (long)nParticles * sizeof(float));
+		if (NULL == dims || NULL == dimsF || NULL == outD || NULL == outF) print_error_and_exit();
+		for (i = 0; i < nParticles * nDim; i++) {
+			dims[i] = (double) rand() / RAND_MAX;
+			dimsF[i] = (float) dims[i];
+		}
+
+		/* Time measurements */
+		start = clock();
+		compute_shape_cost_params_batch(dims, nParticles, nDim, outD);
+		timeDouble = (double) (clock() - start) / CLOCKS_PER_SEC;
+		start = clock();
+		compute_shape_cost_params_batch_f32(dimsF, nParticles, nDim, outF);
+		timeFloat = (double) (clock() - start) / CLOCKS_PER_SEC;
+
+		/* Accuracy of the single precision kernel */
+		shape_cost_accuracy_report(dims, nParticles, nDim, report);
+
+		printf("%6d %12.3f %12.3f %8.2f %10.2e %10.2e %10.2e %10.2e\n", nDim,
+			timeDouble / nParticles * 1e6, timeFloat / nParticles * 1e6, timeDouble / timeFloat,
+			report[0], report[1], report[2], report[5]);
+
+		free(dims);
+		free(dimsF);
+		free(outD);
+		free(outF);
+	}
+	return 0;
+} /* fcn main */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
@@ -0,0 +1,217 @@
+/*========================================================================
+  Module with functions for the calculation of the convex hull of the
+  particle (polygon with dims points in angular order around the origin)
+  ========================================================================*/
+
+#include <stdlib.h>
+#include <stdio.h>
+#include "sort_array.h"
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+
+/* 2D cross product of OA and OB vectors, i.e. z-component of their 3D cross product. 
+   Returns a positive value, if OAB makes a counter-clockwise turn,
+   negative for clockwise turn, and zero if the points are collinear. */
+static double cross(double Ox, double Oy, double Ax, double Ay, double Bx, double By);
+
+/* Function for clear the array (make all elements equal to 0)  */
+static void clear_array(double *array, int nDim);
+
+/* Function to make the reverse order arrays of the coordinates */
+static void reverse_array(double *coordMidX, double *coordMidY, int nDim);
+
+
+int calc_convex_hull_coords(int nDim, double *dimsCoordMidX, double *dimsCoordMidY,
+	double *hullCoordMidX, double *hullCoordMidY) {
+	/* Function for calculation of the coordinates of the convex hull of the star-shaped
+	   polygon. The dims points are already in the counter-clockwise angular order around
+	   the origin (which is inside the polygon), so Graham scan is made in the existing
+	   order starting from the leftmost point (always a hull point). O(n) complexity,
+	   no sorting and no dynamic memory: hullCoordMid arrays are used as the stack.
+	   The hull is returned in the same order as calc_convex_hull_coords_monotone gives.
+	   nDim          - number of dimensions or length of the arrays
+	   dimsCoordMidX - pointer to array of X coord of dims points
+	   dimsCoordMidY - pointer to array of Y coord of dims points
+	   hullCoordMidX - pointer to array of X coord of convex hull (nDim elements)
+	   hullCoordMidY - pointer to array of Y coord of convex hull (nDim elements)
+	   return:
+	   ptr           - number of elements in the hullCoordMid arrays */
+	
+	int i, k;
+	int start = 0;  /* Index of the leftmost (lowest among equal) point */
+	int ptr;  /* pointer to the top element of the stack */
+	
+	for (i = 1; i < nDim; i++) {
+		if (dimsCoordMidX[i] < dimsCoordMidX[start] || (dimsCoordMidX[i] == dimsCoordMidX[start]
+			&& dimsCoordMidY[i] < dimsCoordMidY[start])) {
+			start = i;
+		}
+	}
+	
+	/* Scan all the points in the angular order, the start point can not be removed */
+	ptr = -1;
+	for (k = 0; k < nDim; k++) {
+		i = (start + k) % nDim;
+		while (ptr >= 1 && cross(hullCoordMidX[ptr - 1], hullCoordMidY[ptr - 1], 
+			hullCoordMidX[ptr], hullCoordMidY[ptr], dimsCoordMidX[i], dimsCoordMidY[i]) <= 0) {
+				ptr--;
+			}
+		ptr++;
+		hullCoordMidX[ptr] = dimsCoordMidX[i];
+		hullCoordMidY[ptr] = dimsCoordMidY[i];
+	}
+	
+	/* Close the hull: remove the last points making a non-convex turn to the start point */
+	while (ptr >= 2 && cross(hullCoordMidX[ptr - 1], hullCoordMidY[ptr - 1], 
+		hullCoordMidX[ptr], hullCoordMidY[ptr], hullCoordMidX[0], hullCoordMidY[0]) <= 0) {
+			ptr--;
+		}
+	
+	/* ptr + 1 now containt the dimension of the hullCoordMid arrays */
+	return ptr + 1;
+} /* fcn calc_convex_hull_coords */
+
+
+int calc_convex_hull_coords_monotone(int nDim, double *dimsCoordMidX, double *dimsCoordMidY,
+	double *hullCoordMidX, double *hullCoordMidY) {
+	/* Function for calculation of the coordinates of the convex hull. 
+	   Implements Andrew's monotone chain algorithm. O(n log n) complexity.	
+       nDim          - number of dimensions or length of the arrays
+	   dimsCoordMidX - pointer to array of X coord of dims points
+	   dimsCoordMidY - pointer to array of Y coord of dims points
+	   hullCoordMidX - pointer to array of X coord of convex hull
+	   hullCoordMidY - pointer to array of Y coord of convex hull
+	   return:
+	   ptr           - number of elements in the hullCoordMid arrays */
+	
+	int i;
+	int ptr, ptrLower, ptrUpper;  /* pointer to the element in array */
+	
+	/* Make the copy of dimsCoordMidX and dimsCoordMidY in the memory */
+	double *coordMidX = (double *) malloc (nDim * sizeof(double));
+	double *coordMidY = (double *) malloc (nDim * sizeof(double));
+	if (NULL == coordMidX || NULL == coordMidY) print_error_and_exit();
+	
+	for (i = 0; i < nDim; i++) {
+		coordMidX[i] = dimsCoordMidX[i];
+		coordMidY[i] = dimsCoordMidY[i];
+	}
+	
+	/* Make sort by the x coordinate of all points in array */
+	sort_array(coordMidX, coordMidY, nDim);
+
+	/* Build lower hull */
+	double *lowerX = (double *) malloc (nDim * sizeof(double));
+	double *lowerY = (double *) malloc (nDim * sizeof(double));
+	if (NULL == lowerX || NULL == lowerY) print_error_and_exit();
+	
+	clear_array(lowerX, nDim);
+	clear_array(lowerY, nDim);
+	
+	ptr = -1;
+	for (i = 0; i < nDim; i++) {
+		while (ptr >= 1 && cross(lowerX[ptr - 1], lowerY[ptr - 1], 
+			lowerX[ptr], lowerY[ptr], coordMidX[i], coordMidY[i]) <= 0) {
+				ptr--;
+			}
+		ptr++;
+		lowerX[ptr] = coordMidX[i];
+		lowerY[ptr] = coordMidY[i];
+	}
+	ptrLower = ptr;  /* save the poiner to the max elem in lower arrays */
+	
+	/* Reverse the previously sorted array */
+	reverse_array(coordMidX, coordMidY, nDim);
+	
+	/* Build upper hull */
+	double *upperX = (double *) malloc (nDim * sizeof(double));
+	double *upperY = (double *) malloc (nDim * sizeof(double));
+	if (NULL == upperX || NULL == upperY) print_error_and_exit();
+	
+	clear_array(upperX, nDim);
+	clear_array(upperY, nDim);
+	
+	ptr = -1;
+	for (i = 0; i < nDim; i++) {
+		while (ptr >= 1 && cross(upperX[ptr - 1], upperY[ptr - 1], 
+			upperX[ptr], upperY[ptr], coordMidX[i], coordMidY[i]) <= 0) {
+				ptr--;
+			}
+		ptr++;
+		upperX[ptr] = coordMidX[i];
+		upperY[ptr] = coordMidY[i];	
+	}
+	ptrUpper = ptr;  /* save the poiner to the max elem in upper arrays */
+	
+	/* Concatenation of the lower and upper hulls gives the convex hull. 
+	   Last point of each list is omitted because it is repeated at the 
+	   beginning of the other list. */
+	ptr = 0;
+	for (i = 0; i < ptrLower; i++) {
+		hullCoordMidX[ptr] = lowerX[i];
+		hullCoordMidY[ptr] = lowerY[i];
+		ptr++;
+	}
+	for (i = 0; i < ptrUpper; i++) {
+		hullCoordMidX[ptr] = upperX[i];
+		hullCoordMidY[ptr] = upperY[i];
+		ptr++;
+	}
+	
+	/* Clear the used dynamic memory */
+	free(coordMidX);
+	free(coordMidY);
+	free(lowerX);
+	free(lowerY);
+	free(upperX);
+	free(upperY);
+	
+	/* ptr now containt the dimension of the hullCoordMid arrays */
+	return ptr;
+} /* fcn calc_convex_hull_coords_monotone */
+
+
+static double cross(double Ox, double Oy, double Ax, double Ay, double Bx, double By) {
+	/* 2D cross product calculation of OA and OB vectors, i.e. z-comp of their 3D cross product.
+	   Ox, Oy - X and Y coordinates of the reference point
+	   Ax, Ay - X and Y coordinates of the vector A
+	   Bx, By - X and Y coordinates of the vector B  */
+	double z = 0;
+	z = (Ax - Ox) * (By - Oy) - (Ay - Oy) * (Bx - Ox);
+	return z;
+} /* fcn cross */
+	
+	
+static void clear_array(double *array, int nDim) {
+	/* Function for clear the array (make all elements equal to 0)  */
+	int i;
+	for (i = 0; i < nDim; i++) {
+		array[i] = 0;
+	}
+} /* fcn clear_array */
+
+
+static void reverse_array(double *coordMidX, double *coordMidY, int nDim) {
+	/* Function to make the reverse order arrays of the coordinates */
+	int i;
+	double temp;
+	for (i = 0; i < (nDim / 2); i++) {
+		/* swap coordMidX values */
+		temp = coordMidX[i];
+		coordMidX[i] = coordMidX[nDim - 1 - i];
+		coordMidX[nDim - 1 - i] = temp;
+		
+		/* swap coordMidY values */
+		temp = coordMidY[i];
+		coordMidY[i] = coordMidY[nDim - 1 - i];
+		coordMidY[nDim - 1 - i] = temp;
+	}
+} /* fcn reverse_array */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
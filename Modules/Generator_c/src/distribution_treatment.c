@@ -6,9 +6,7 @@
 #include <stdlib.h>
 #include <stdio.h>
 #include <math.h>
-
-/* Function for generation random double numbers in range [0.0, 1.0) */
-static double random_double(void);
+#include "rng.h"
 
 void calc_diff_from_cum(double *cum, double *diff) {
 	/* Function for calculation the differential disrtibution from cumulative distribution
@@ -99,9 +97,10 @@ void make_distr_from_count_array(unsigned long *countArray, double *diff, double
 	}
 }
 
-double get_value_from_distribution(double *normDiff, double *chLower, double *chUpper, 
+double get_value_from_distribution(rngState_t *rng, double *normDiff, double *chLower, double *chUpper, 
 		int logScale, int leftBndChannel, int rightBndChannel) {
 	/* Function for generation a value from the specific distribution
+	   rng             - state of the random number generator (seeded by the caller)
 	   normDiff        - pointer to the normalized differential distribution
 	   chLower         - pointer to the array of the distribution left boundaries
 	   chUpper         - pointer to the array of the distribution right boundaries
@@ -131,7 +130,7 @@ double get_value_from_distribution(double *normDiff, double *chLower, double *ch
 	/* Make search for the value from the distribution */
 	doSearch = 1;
 	while (doSearch) {
-		xTry = leftBndValue + (rightBndValue - leftBndValue) * random_double();
+		xTry = leftBndValue + (rightBndValue - leftBndValue) * rng_double(rng);
 		if (logScale) {
 			xTry = pow(10, xTry);
 		}
@@ -146,7 +145,7 @@ double get_value_from_distribution(double *normDiff, double *chLower, double *ch
 		}
 		
 		/* Accept the particle or not according to probability */
-		rndNumber = random_double();
+		rndNumber = rng_double(rng);
 		if (rndNumber < prob) {
 			value = xTry;
 			doSearch = 0;
@@ -155,7 +154,3 @@ double get_value_from_distribution(double *normDiff, double *chLower, double *ch
 	return value;	
 }
 
-static double random_double(void) {
-	/* Function for generation random double numbers in range [0.0, 1.0) */ 
-	return ((rand() % 32767) / (double)32767);
-}
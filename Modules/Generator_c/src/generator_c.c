@@ -14,7 +14,20 @@
 #include "data_types.h"
 #include "get_particle_parameters.h"
 #include "PSOAlgorithm.h"
+#include "SearchAlgorithm.h"
 #include "distribution_treatment.h"
+#include "shape_archive.h"
+#include "rng.h"
+
+/* Number of the particles searched together (PSO swarms run in lock-step) */
+#define PSO_BATCH_SIZE 64
+/* Maximum number of the evaluated shapes kept for the later targets */
+#define ARCHIVE_CAPACITY 50000
+/* Maximum number of the archived shapes in one cell (cell size is the precision limit) */
+#define ARCHIVE_PER_CELL 4
+/* Number of the particles whose targets are drawn together and searched in the order of the
+   Hilbert curve (the mode of argv[26], the block is searched in PSO_BATCH_SIZE batches) */
+#define ORDER_BLOCK_SIZE 512
 
 /* Function for printing the error end exiting the program */
 static void print_error_and_exit(void);
@@ -31,13 +44,15 @@ static void update_count_array(double value, double *chLower, double *chUpper,
 int main(int argc, char *argv[]) {
 	/* Main function of the generator */
 
-	if (argc != 18) {
+	if (argc != 18 && argc != 19 && argc != 25 && argc != 26 && argc != 27 && argc != 28) {
 		printf("Wrong number of the parameters!\n");
 		system("pause");
 		exit(1);
 	}
 	
-	/* Reading the parameters from the argv and convert them (17 items)*/
+	/* Reading the parameters from the argv and convert them (17 items + optional seed,
+	   optional settings of the search algorithm, optional ordering of the targets and
+	   optional window of the convergence monitor)*/
 	int numThread = atoi(argv[1]);
 	unsigned long particlesNum = atol(argv[2]);
 	int PSO_nVar = atoi(argv[3]);
@@ -47,7 +62,7 @@ int main(int argc, char *argv[]) {
 	int PSO_iterLimit = atoi(argv[7]);
 	int PSO_usePrecisionLimit = atoi(argv[8]);
 	double PSO_precisionLimit = atof(argv[9]);
-	int PSO_showErrorPlot = atoi(argv[10]);
+	/* argv[10] (showErrorPlot) is not used: the error plot is not saved by the generator */
 	int PSO_nPop = atoi(argv[11]);
 	double PSO_w = atof(argv[12]);
 	double PSO_wDamp = atof(argv[13]);
@@ -55,6 +70,26 @@ int main(int argc, char *argv[]) {
 	double PSO_c2 = atof(argv[15]);
 	int PSO_a = atoi(argv[16]);
 	int PSO_b = atoi(argv[17]);
+	/* Search algorithm and its settings (argv[19] - argv[24], PSO by default) and the number
+	   of the radial Fourier harmonics searched instead of the radii (argv[25], 0 by default) */
+	optSettings_t optSettings;
+	SearchAlg_default_settings(&optSettings);
+	if (argc >= 25) {
+		optSettings.optimizer = atoi(argv[19]);
+		optSettings.popSize = atoi(argv[20]);
+		optSettings.sigma0 = atof(argv[21]);
+		optSettings.F = atof(argv[22]);
+		optSettings.CR = atof(argv[23]);
+		optSettings.step = atof(argv[24]);
+	}
+	if (argc >= 26) {
+		optSettings.nHarmonics = atoi(argv[25]);
+	}
+	/* Ordering of the targets (argv[26], 0 by default): the targets of the block of particles
+	   are drawn first and searched in the order of the Hilbert curve, the search starts around
+	   the shape of the neighbour target, the particles are saved in the order of drawing */
+	int orderTargets = (argc >= 27) ? atoi(argv[26]) : 0;
+	int blockSize = orderTargets ? ORDER_BLOCK_SIZE : PSO_BATCH_SIZE;
 		
 	/* Declare different usefull rarameters */
 	unsigned long i;
@@ -71,7 +106,11 @@ int main(int argc, char *argv[]) {
 	sprintf(outputInfoFName, "./../data/generated_info_%d.txt", numThread);
 	
 	struct stat fileStat;
-	srand(time(NULL)); /* Seed the random values */	
+	/* Seed the random values: every thread uses its own stream of the same seed,
+	   so the run is reproducible when the seed is given in argv[18] */
+	unsigned long long seed = (argc >= 19) ? strtoull(argv[18], NULL, 10) : (unsigned long long)time(NULL);
+	rngState_t rng;
+	rng_seed_stream(&rng, (uint64_t)seed, numThread);
 	time_t timeStart, timeEnd; 
 	double timeDelta_d;
 	double timeValue;
@@ -137,16 +176,23 @@ int main(int argc, char *argv[]) {
 	int convex_rightBndChannel;
 	int elong_leftBndChannel;
 	int elong_rightBndChannel;
-	/* Target particle parameters (for the search) */
-	double target_CEDiameter;
-	double target_circularity;
-	double target_convexity;
-	double target_elongation;
+	/* Target particle parameters (for the search of the batch or the block of particles) */
+	int k, batchNum;
+	double *target_CEDiameter = dynamic_1d_array_alloc(blockSize, sizeof(double));
+	double *targets = dynamic_1d_array_alloc(3 * blockSize, sizeof(double));
 	/* Generated particle parameters and other data (after the search) */
-	unsigned int iteration; 
-	double globalBestCost;
-	double *arrayBestCosts = dynamic_1d_array_alloc(PSO_iterLimit, sizeof(double));
-	double *gen_dims = dynamic_1d_array_alloc(PSO_nVar, sizeof(double));
+	unsigned int *iterations = dynamic_1d_array_alloc(blockSize, sizeof(unsigned int));
+	int *statuses = dynamic_1d_array_alloc(blockSize, sizeof(int));
+	unsigned long *evaluations = dynamic_1d_array_alloc(blockSize, sizeof(unsigned long));
+	double *globalBestCosts = dynamic_1d_array_alloc(blockSize, sizeof(double));
+	psoControl_t psoControl;  /* Convergence monitor of the search (window 0 - b resets of the swarm) */
+	unsigned long gaveUpNum = 0;  /* Number of the targets given up by the monitor */
+	unsigned long initialNum = 0;  /* Number of the seeds accepted without the search */
+	shapeArchive_t *archive;  /* Archive of the evaluated shapes (targets found in it are not searched) */
+	unsigned long long evaluationsNum = 0;  /* Number of the cost function evaluations of the search */
+	double *batch_dims = dynamic_1d_array_alloc(blockSize * PSO_nVar, sizeof(double));
+	double *gen_dims;
+	geomWorkspace_t *ws = geom_workspace_create(PSO_nVar);  /* Scratch buffers of the particle parameters */
 	double gen_CEDiameter;
 	double gen_circularity;
 	double gen_convexity;
@@ -196,6 +242,14 @@ int main(int argc, char *argv[]) {
 	calc_boundaries(norm_convex_distr_diff, &convex_leftBndChannel, &convex_rightBndChannel);
 	calc_boundaries(norm_elong_distr_diff, &elong_leftBndChannel, &elong_rightBndChannel);
 	
+	/* Default settings of the convergence monitor of the search, the window is given in
+	   argv[27] (0 - no monitor, the swarm is randomized every PSO_b-th iteration) */
+	PSOAlg_default_control(&psoControl);
+	if (argc == 28) {
+		psoControl.window = atoi(argv[27]);
+	}
+	archive = shape_archive_create(PSO_nVar, ARCHIVE_CAPACITY, PSO_precisionLimit, ARCHIVE_PER_CELL);
+	
 	/* Empty the count arrays for further calc diff and cum distributions */
 	clear_distr_array(count_CEDiam_distr_diff);
 	clear_distr_array(count_circ_distr_diff);
@@ -205,7 +259,8 @@ int main(int argc, char *argv[]) {
 	
 	/* ========== Main generation loop ========== */
 	
-	printf("Starting the generation thread: %d\n", numThread);
+	printf("Starting the generation thread: %d (seed: %llu%s)\n", numThread, seed,
+		orderTargets ? ", ordered targets" : "");
 	
 	/* Create the output file for aapend the generated data */
 	if ((outputFile = fopen(outputFName, "a")) == NULL) {
@@ -218,6 +273,8 @@ int main(int argc, char *argv[]) {
 	percentComplete = 0.0;
 	sumAreaUm2 = 0.0;
 	
+	batchNum = 0;
+	k = 0;
 	for (i = 0; i < particlesNum; i++) {
 		/* Check to stop the generation */
 		if (i % 10 == 0) {
@@ -227,6 +284,39 @@ int main(int argc, char *argv[]) {
 			}
 		}
 		
+		/* Search for the shapes of the next batch (block) of particles with PSO alg. */
+		if (k == batchNum) {
+			batchNum = (particlesNum - i < blockSize) ? (int)(particlesNum - i) : blockSize;
+			for (k = 0; k < batchNum; k++) {
+				/* Generation the desired parameters from the distribution */
+				target_CEDiameter[k] = get_value_from_distribution(&rng, norm_CEDiam_distr_diff, 
+					CEDiam_chLower, CEDiam_chUpper, 1, CEDiam_leftBndChannel, CEDiam_rightBndChannel);
+				
+				targets[3 * k] = get_value_from_distribution(&rng, norm_circ_distr_diff, cirConEl_chLower,
+					cirConEl_chUpper, 0, circ_leftBndChannel, circ_rightBndChannel);
+				
+				targets[3 * k + 1] = get_value_from_distribution(&rng, norm_convex_distr_diff, cirConEl_chLower, 
+					cirConEl_chUpper, 0, convex_leftBndChannel, convex_rightBndChannel);
+				
+				targets[3 * k + 2] = get_value_from_distribution(&rng, norm_elong_distr_diff, cirConEl_chLower,
+					cirConEl_chUpper, 0, elong_leftBndChannel, elong_rightBndChannel);
+			}
+			if (orderTargets) {
+				SearchAlg_run_search_ordered(&rng, &optSettings, batchNum, targets, PSO_BATCH_SIZE,
+					PSO_nVar, PSO_varMin, PSO_varMax, PSO_useIterLimit, PSO_iterLimit, 
+					PSO_usePrecisionLimit, PSO_precisionLimit, PSO_nPop, PSO_w, PSO_wDamp, PSO_c1, 
+					PSO_c2, PSO_a, PSO_b, &psoControl, archive, iterations, statuses, evaluations, 
+					globalBestCosts, batch_dims);
+			} else {
+				SearchAlg_run_search_batch(&rng, &optSettings, batchNum, targets, PSO_nVar, PSO_varMin, 
+					PSO_varMax, PSO_useIterLimit, PSO_iterLimit, PSO_usePrecisionLimit, PSO_precisionLimit, 
+					PSO_nPop, PSO_w, PSO_wDamp, PSO_c1, PSO_c2, PSO_a, PSO_b, NULL, &psoControl, archive,
+					iterations, statuses, evaluations, globalBestCosts, batch_dims);
+			}
+			k = 0;
+		}
+		gen_dims = batch_dims + k * PSO_nVar;
+		
 		/* Calculate the elapsed time so far */
 		timeElapsedEnd = time(&timeElapsedEnd);
 		timeElapsed_ul = (unsigned long)(difftime(timeElapsedEnd, timeElapsedStart));
@@ -246,31 +336,12 @@ int main(int argc, char *argv[]) {
 			make_label_for_time(timeString, timeToFinish_ul);
 		}
 		
-		/* Generation the desired parameters from the distribution */
-		target_CEDiameter = get_value_from_distribution(norm_CEDiam_distr_diff, CEDiam_chLower, CEDiam_chUpper, 
-			1, CEDiam_leftBndChannel, CEDiam_rightBndChannel);
-		
-		target_circularity = get_value_from_distribution(norm_circ_distr_diff, cirConEl_chLower, cirConEl_chUpper,
-			0, circ_leftBndChannel, circ_rightBndChannel);
-			
-		target_convexity = get_value_from_distribution(norm_convex_distr_diff, cirConEl_chLower, cirConEl_chUpper, 
-			0, convex_leftBndChannel, convex_rightBndChannel);
-			
-		target_elongation = get_value_from_distribution(norm_elong_distr_diff, cirConEl_chLower, cirConEl_chUpper,
-			0, elong_leftBndChannel, elong_rightBndChannel);
-		
-		/* Search for the shape of particle with desired parameters with PSO alg. */	
-		PSOAlg_run_search(target_circularity, target_convexity, target_elongation,
-			PSO_nVar, PSO_varMin, PSO_varMax, PSO_useIterLimit, PSO_iterLimit, PSO_usePrecisionLimit, 
-			PSO_precisionLimit, PSO_showErrorPlot, PSO_nPop, PSO_w,	PSO_wDamp, PSO_c1, PSO_c2, PSO_a, PSO_b,
-			&iteration, &globalBestCost, gen_dims, arrayBestCosts);	
-		
-		/* Determine the found particle parameters */
-		imgScale = 1.0;
-		get_particle_parameters(imgScale, gen_dims, PSO_nVar, allParams);
+		/* Determine the found particle parameters: pixel-space result is rescaled to the
+		   image scale giving the target CE diameter (no second geometry pass) */
+		get_particle_parameters_ws(ws, 1.0, gen_dims, allParams);
 		areaPixels = allParams->areaPixels;
-		imgScale = target_CEDiameter * sqrt(M_PI /(areaPixels * 4));
-		get_particle_parameters(imgScale, gen_dims, PSO_nVar, allParams);
+		imgScale = target_CEDiameter[k] * sqrt(M_PI /(areaPixels * 4));
+		rescale_particle_parameters(allParams, imgScale, allParams);
 		
 		gen_CEDiameter = allParams->CEDiameter;
 		gen_circularity = allParams->circularity;
@@ -297,9 +368,23 @@ int main(int argc, char *argv[]) {
 		fprintf(outputFile, "\n");
 		
 		/* Print some data to the terminal */
-		printf("%d %lu %s %s | %5.1f%% | %5.2f | %5.2f | %5.2f | %5.2f\n", numThread, i, timeElapsedString,
-			timeString, percentComplete, gen_CEDiameter, gen_circularity, gen_convexity, gen_elongation);
+		printf("%d %lu %s %s | %5.1f%% | %5.2f | %5.2f | %5.2f | %5.2f%s\n", numThread, i, timeElapsedString,
+			timeString, percentComplete, gen_CEDiameter, gen_circularity, gen_convexity, gen_elongation,
+			(statuses[k] == PSO_STATUS_GAVE_UP) ? " | gave up" : "");
+		if (statuses[k] == PSO_STATUS_GAVE_UP) {
+			gaveUpNum++;
+		} else if (statuses[k] == PSO_STATUS_INITIAL) {
+			initialNum++;
+		}
+		evaluationsNum += evaluations[k];
+		k++;
+	}
+	printf("Targets given up by the search (unlikely to reach the precision limit): %lu\n", gaveUpNum);
+	printf("Targets taken from the archive of the evaluated shapes: %lu\n", archive->hits);
+	if (orderTargets) {
+		printf("Targets solved by the jittered shape of the neighbour target: %lu\n", initialNum);
 	}
+	printf("Cost function evaluations of the search: %llu\n", evaluationsNum);
 	
 	/* close the output file with the generated particles data*/
 	fclose(outputFile);
@@ -360,9 +445,16 @@ int main(int argc, char *argv[]) {
 	free(count_solid_distr_diff);
 	free(gen_solid_distr_cum);
 	free(gen_solid_distr_diff);
-	free(gen_dims);
-	free(arrayBestCosts);
+	free(target_CEDiameter);
+	free(targets);
+	free(iterations);
+	free(statuses);
+	free(evaluations);
+	free(globalBestCosts);
+	free(batch_dims);
 	free(allParams);
+	geom_workspace_free(ws);
+	shape_archive_free(archive);
 	
 	/* system("pause"); */
 	return 0;
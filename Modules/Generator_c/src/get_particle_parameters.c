@@ -6,32 +6,27 @@
 #include <stdio.h>
 #include <math.h>
 #include "data_types.h"
-#include "sort_array.h"
+#include "get_particle_parameters.h"
+#include "convex_hull.h"
+#include "rotating_calipers.h"
 
 /* Function for printing the error end exiting the program */
 static void print_error_and_exit(void);
 
+/* Function for calculation the coordinates of the dims points (0 in the middle of the particle) */
+static void calc_dims_coords(const double *dimsValues, int nDim, const double *cosTable,
+	const double *sinTable, double *dimsCoordMidX, double *dimsCoordMidY);
+
+/* Function for calculation the coordinates (X, Y) of centre of mass */
+static void calc_centre(int nDim, double *dimsCoordMidX, double *dimsCoordMidY, double areaPixels,
+	double *centreXPos, double *centreYPos);
+
 /* Function for calculation of the particle area in pixels */
 static double calc_area_pix(int nDim, double *dimsCoordMidX, double *dimsCoordMidY);
 
 /* Function for calculation of the particle perimeter in pixels */
 static double calc_perimeter_pix(int nDim, double *dimsCoordMidX, double *dimsCoordMidY);
 
-/* Function for determination of the convex hull coordinates */
-static int calc_convex_hull_coords(int nDim, double *dimsCoordMidX, double *dimsCoordMidY,
-	double *hullCoordMidX, double *hullCoordMidY);
-	
-/* 2D cross product of OA and OB vectors, i.e. z-component of their 3D cross product. 
-   Returns a positive value, if OAB makes a counter-clockwise turn,
-   negative for clockwise turn, and zero if the points are collinear. */
-static double cross(double Ox, double Oy, double Ax, double Ay, double Bx, double By);
-
-/* Function for clear the array (make all elements equal to 0)  */
-static void clear_array(double *array, int nDim);
-
-/* Function to make the reverse order arrays of the coordinates */
-static void reverse_array(double *coordMidX, double *coordMidY, int nDim);
-
 /* Function to calculate the theta angle of major axis */
 static double calc_theta(int nDim, double *dimsCoordMidX, double *dimsCoordMidY, 
 	double areaPixels, double centreXPos, double centreYPos);
@@ -43,29 +38,87 @@ static void calc_inertia(double *result, double nDim, double *dimsCoordMidX, dou
 /* Function for calculation principal moments of inertia and orientation */
 static void calc_principal(double *result, double Ixx, double Iyy, double Ixy);
 
+/* Function for adding the derivatives by the points of the edge to the derivatives by the radii */
+static void add_edge_grad(double *grad, const double *cosTable, const double *sinTable, int i, 
+	int k, double dxi, double dyi, double dxk, double dyk);
+
+/* Function for the index of the dims point with the coordinates (search from the start index) */
+static int find_dims_index(int nDim, const double *dimsCoordMidX, const double *dimsCoordMidY,
+	double x, double y, int start);
+
 /* Function for calculation the certain projection length in um  */
 static double calc_projection_length(double x1, double y1, double x2, double y2, int nDim,
 	double *dimsCoordMidX, double *dimsCoordMidY, double imgScale);
 
 
-void get_particle_parameters(double imgScale, double *dimsValues, int nDim, paramsStruct_t *allParams) {
-	/* Main function for the calculation of particle parameters
+geomWorkspace_t* geom_workspace_create(int nDim) {
+	/* Function for creation of the workspace with all scratch buffers for the certain nDim
+	   nDim   - Number of the particle dimensions (equal to the amount of sliders)
+	   return:
+	   ws     - pointer to the workspace (free it with geom_workspace_free) */
+	
+	int i;
+	double dN = 2 * M_PI / nDim;  /* How many degrees in one section */
+	geomWorkspace_t *ws = (geomWorkspace_t*) malloc (sizeof(geomWorkspace_t));
+	if (NULL == ws) print_error_and_exit();
+	/* One block of memory for all the buffers */
+	double *buffer = (double*) malloc (14 * nDim * sizeof(double));
+	if (NULL == buffer) print_error_and_exit();
+	
+	ws->nDim = nDim;
+	ws->dimsCoordMidX = buffer;
+	ws->dimsCoordMidY = buffer + nDim;
+	ws->hullCoordMidX = buffer + 2 * nDim;
+	ws->hullCoordMidY = buffer + 3 * nDim;
+	ws->cosTable = buffer + 4 * nDim;
+	ws->sinTable = buffer + 5 * nDim;
+	ws->gradScratch = buffer + 6 * nDim;
+	
+	/* Directions of the dims points are the same for all the particles with this nDim */
+	for (i = 0; i < nDim; i++) {
+		ws->cosTable[i] = cos(i * dN);
+		ws->sinTable[i] = sin(i * dN);
+	}
+	return ws;
+} /* fcn geom_workspace_create */
+
+
+void geom_workspace_free(geomWorkspace_t *ws) {
+	/* Function for the memory free of the workspace
+	   ws - pointer to the workspace created by geom_workspace_create */
+	if (NULL == ws) return;
+	free(ws->dimsCoordMidX);  /* Beginning of the block with all the buffers */
+	free(ws);
+} /* fcn geom_workspace_free */
+
+
+void get_particle_parameters(double imgScale, const double *dimsValues, int nDim, paramsStruct_t *allParams) {
+	/* Main function for the calculation of particle parameters. The workspace is created
+	   for one call only, use get_particle_parameters_ws for the repeated calls.
 	   imgScale          - Image scale (um/pix)
 	   dimsValues        - Dimensions of the particle (set of values (0.0 - 1.0))
 	   nDim              - Number of the particle dimensions (equal to the amount of sliders)
-	   full              - full version of output (1) or short (0)
-	   paramsStruct      - pointer for the structure with all particle parameters (paramsStruct_t type)
-	   paramsStructShort - pointer for the structure with limited part parameters (paramsSctuctShort_t type) */
+	   allParams         - pointer for the structure with all particle parameters (paramsStruct_t type) */
+	
+	geomWorkspace_t *ws = geom_workspace_create(nDim);
+	get_particle_parameters_ws(ws, imgScale, dimsValues, allParams);
+	geom_workspace_free(ws);
+} /* fcn get_particle_parameters */
+
+
+void get_particle_parameters_ws(geomWorkspace_t *ws, double imgScale, const double *dimsValues, 
+	paramsStruct_t *allParams) {
+	/* Function for the calculation of particle parameters without any dynamic memory
+	   ws                - workspace created for the particle nDim (geom_workspace_create)
+	   imgScale          - Image scale (um/pix)
+	   dimsValues        - Dimensions of the particle (set of values (0.0 - 1.0), ws->nDim values)
+	   allParams         - pointer for the structure with all particle parameters (paramsStruct_t type) */
 	
 	/* Define important variables: */
-	int i, j;
+	int nDim = ws->nDim;
 	double imgWidth = 360.0; /* Width of the image (pix) */
 	double realWidth; /* Real width of the image with particle */
-	double centreRadius = 5.0; /* Radius of the central polygon */
-	double dN;  /* How many degrees in one section */
-	double radius;  /* Radius to the point of polygon */
-	double angle;  /* Angle between radius and horisontal line */
-	double a, b, c;  /* Temporary double variables */
+	double a;  /* Temporary double variable */
 	double x1;  /* Temporary x coordinate */
 	double x2;  /* Temporary x coordinate */
 	double y1;  /* Temporary y coordinate */
@@ -73,26 +126,13 @@ void get_particle_parameters(double imgScale, double *dimsValues, int nDim, para
 	int hullPointsNum;  /* Number of points of the convex hull */
 	double theta; /* Angle of the particle orientation in rad */
 	
-	/* Define different arrays in dynamic memory*/
-	/* Coordinates of all dims points (0 in left top corner) */
-	double *dimsCoordX = (double*) malloc (nDim * sizeof(double));
-	double *dimsCoordY = (double*) malloc (nDim * sizeof(double));
-	if (NULL == dimsCoordX || NULL == dimsCoordY) print_error_and_exit();
+	/* Scratch arrays from the workspace */
 	/* Coordinates of all dims points (0 in the middle of the particle) */
-	double *dimsCoordMidX = (double*) malloc (nDim * sizeof(double));
-	double *dimsCoordMidY = (double*) malloc (nDim * sizeof(double));
-	if (NULL == dimsCoordMidX || NULL == dimsCoordMidY) print_error_and_exit();
+	double *dimsCoordMidX = ws->dimsCoordMidX;
+	double *dimsCoordMidY = ws->dimsCoordMidY;
 	/* Coordinates of all convex hull points (0 in the middle of the particle) */
-	double *hullCoordMidX = (double*) malloc (nDim * sizeof(double));
-	double *hullCoordMidY = (double*) malloc (nDim * sizeof(double));
-	if (NULL == hullCoordMidX || NULL == hullCoordMidY) print_error_and_exit();
-	/* majorAxisPoints, minorAxisPoints */
-	double *majorAxisPointsX = (double*) malloc (2 * sizeof(double));
-	double *majorAxisPointsY = (double*) malloc (2 * sizeof(double));
-	double *minorAxisPointsX = (double*) malloc (2 * sizeof(double));
-	double *minorAxisPointsY = (double*) malloc (2 * sizeof(double));
-	if (NULL == majorAxisPointsX || NULL == majorAxisPointsY) print_error_and_exit();
-	if (NULL == minorAxisPointsX || NULL == minorAxisPointsY) print_error_and_exit();
+	double *hullCoordMidX = ws->hullCoordMidX;
+	double *hullCoordMidY = ws->hullCoordMidY;
 	
 	/* Parameters */
 	double areaPixels;  /* Area of the particle in [pix] */
@@ -122,43 +162,24 @@ void get_particle_parameters(double imgScale, double *dimsValues, int nDim, para
 	double width;  /* Width of the particle [um] */
 	double aspectRatio;  /* Aspect ratio of the particle [-] */
 	double elongation;  /* Elongation of the particle [-] */
-	double maxDistance;  /* Max distance between points of particle */
+	double maxDistance;  /* Max distance between points of particle (max Feret diameter) [um] */
+	double minFeret;  /* Min Feret width of the particle [um] */
+	double rectLength;  /* Length of the minimum area bounding rectangle [um] */
+	double rectWidth;  /* Width of the minimum area bounding rectangle [um] */
 	
 	/* ========== Start the calculations ========== */
 	
 	/* realWidth: calculation of the real width */
 	realWidth = imgScale * imgWidth;
 	
-	/* dimsCoord, dimsCoordMid: calculation the coordinates of the particle dims points */
-	dN = 2 * M_PI / nDim;
-	for (i = 0; i < nDim; i++) {
-		radius = dimsValues[i] * (180.0 - centreRadius) + centreRadius;
-		angle = i * dN;
-		dimsCoordX[i] = cos(angle) * radius + 180.0;
-		dimsCoordY[i] = sin(angle) * radius + 180.0;			
-		dimsCoordMidX[i] = dimsCoordX[i] - 180.0;
-		dimsCoordMidY[i] = dimsCoordY[i] - 180.0;
-	}
+	/* dimsCoordMid: calculation the coordinates of the particle dims points */
+	calc_dims_coords(dimsValues, nDim, ws->cosTable, ws->sinTable, dimsCoordMidX, dimsCoordMidY);
 	
 	/* areaPixels: calculating particle area in pixels (Gerone method) */
 	areaPixels = calc_area_pix(nDim, dimsCoordMidX, dimsCoordMidY);
 
 	/* centreXPos, centreYPos: calculating coordinates (X, Y) of centre of mass */
-	a = 0.0;
-	b = 0.0;
-	for (i = 0; i < nDim; i++) {
-		if (i == (nDim - 1)) {
-			x1 = dimsCoordMidX[0];
-			y1 = dimsCoordMidY[0];
-		} else {
-			x1 = dimsCoordMidX[i + 1];
-			y1 = dimsCoordMidY[i + 1];
-		}
-		a += (dimsCoordMidX[i] + x1) * (dimsCoordMidX[i] * y1 - x1 * dimsCoordMidY[i]);
-		b += (dimsCoordMidY[i] + y1) * (dimsCoordMidX[i] * y1 - x1 * dimsCoordMidY[i]);		
-	}
-	centreXPos = a / (6.0 * areaPixels);
-	centreYPos = b / (6.0 * areaPixels);
+	calc_centre(nDim, dimsCoordMidX, dimsCoordMidY, areaPixels, &centreXPos, &centreYPos);
 	
 	/* areaUm2: calculating particle area in um^2 */
 	areaUm2 = pow(imgScale, 2) * areaPixels;
@@ -216,11 +237,12 @@ void get_particle_parameters(double imgScale, double *dimsValues, int nDim, para
     /* majorAxisDeg: calculating the angle (in degres) of major axis as in Morphologi G3*/
     majorAxisDeg = 180.0 - orientation * 180.0 / M_PI;
     
-    /* length, width: calculating the length and width of the particle */
-    length = calc_projection_length(major_x1, major_y1, major_x2, major_y2, nDim,
-		dimsCoordMidX, dimsCoordMidY, imgScale);
-	width = calc_projection_length(minor_x1, minor_y1, minor_x2, minor_y2, nDim,
-		dimsCoordMidX, dimsCoordMidY, imgScale);
+    /* length, width: calculating the length and width of the particle
+       (extreme projections are always reached at the convex hull points) */
+    length = calc_projection_length(major_x1, major_y1, major_x2, major_y2, hullPointsNum,
+		hullCoordMidX, hullCoordMidY, imgScale);
+	width = calc_projection_length(minor_x1, minor_y1, minor_x2, minor_y2, hullPointsNum,
+		hullCoordMidX, hullCoordMidY, imgScale);
 	
 	/* aspectRatio: calculation of the aspect ratio of the particle */
 	aspectRatio = width / length;
@@ -255,20 +277,13 @@ void get_particle_parameters(double imgScale, double *dimsValues, int nDim, para
 	/* elongation: calculation of the particle elongation */
 	elongation = 1.0 - aspectRatio;
 	
-	/* maxDistance: calculation of the maximum particle distance */
-	maxDistance = 0.0;
-    c = 0.0;
-    for (i = 0; i < nDim; i++) {
-    	for (j = 0; j < nDim; j++) {
-    		if (i != j) {
-    			c = sqrt(pow(dimsCoordMidX[i] - dimsCoordMidX[j], 2) + pow(dimsCoordMidY[i] - dimsCoordMidY[j], 2));
-    			if (c > maxDistance) {
-    				maxDistance = c;
-				}
-			}
-		}
-	}
+	/* maxDistance, minFeret, rectLength, rectWidth: rotating calipers on the convex hull */
+	calc_feret_diameters(hullPointsNum, hullCoordMidX, hullCoordMidY, &maxDistance, &minFeret,
+		&rectLength, &rectWidth);
 	maxDistance *= imgScale;
+	minFeret *= imgScale;
+	rectLength *= imgScale;
+	rectWidth *= imgScale;
 	
 	/* Fill the the output structure with calculated parameters (paramsStruct) */
 	allParams->nDim = nDim;
@@ -300,19 +315,338 @@ void get_particle_parameters(double imgScale, double *dimsValues, int nDim, para
     allParams->aspectRatio = aspectRatio;
 	allParams->elongation = elongation;
 	allParams->maxDistance = maxDistance;
+	allParams->minFeret = minFeret;
+	allParams->rectLength = rectLength;
+	allParams->rectWidth = rectWidth;
+} /* fcn get_particle_parameters_ws */
+
+
+void get_particle_parameters_batch(double imgScale[], const double *dims, int n, int nDim, 
+	paramsStruct_t *out) {
+	/* Function for calculation of the parameters of n particles in one call
+	   imgScale - array with the image scale (um/pix) of every particle (n elements)
+	   dims     - contiguous array of dimensions of the particles (n rows, nDim columns)
+	   n        - number of the particles
+	   nDim     - number of the particle dimensions (equal to the amount of sliders)
+	   out      - pointer to the array of n output structures (paramsStruct_t type) */
 	
-	/* Free different arrays in raw memory*/
-	free(dimsCoordX);
-	free(dimsCoordY);
-	free(dimsCoordMidX);
-	free(dimsCoordMidY);
-	free(hullCoordMidX);
-	free(hullCoordMidY);
-	free(majorAxisPointsX);
-	free(majorAxisPointsY);
-	free(minorAxisPointsX);
-	free(minorAxisPointsY);
-} /* fcn get_particle_parameters */
+	int i;
+	geomWorkspace_t *ws = geom_workspace_create(nDim);
+	
+	for (i = 0; i < n; i++) {
+		get_particle_parameters_ws(ws, imgScale[i], dims + (long)i * nDim, out + i);
+	}
+	geom_workspace_free(ws);
+} /* fcn get_particle_parameters_batch */
+
+
+void rescale_particle_parameters(const paramsStruct_t *pixParams, double imgScale, 
+	paramsStruct_t *allParams) {
+	/* Function for the rescaling of the pixel-space result to the new image scale without
+	   the second geometry pass. All um quantities are the closed-form scaling of the 
+	   pixel quantities, all the other parameters do not depend on the image scale.
+	   pixParams - pointer to the parameters calculated with imgScale = 1.0 (pixel-space result)
+	   imgScale  - new image scale (um/pix)
+	   allParams - pointer to the output structure (can be the same as pixParams) */
+	
+	double scale = imgScale / pixParams->imgScale;  /* pixParams->imgScale is 1.0 normally */
+	
+	if (allParams != pixParams) *allParams = *pixParams;
+	allParams->imgScale = imgScale;
+	allParams->realWidth = imgScale * allParams->imgWidth;
+	allParams->areaUm2 *= pow(scale, 2);
+	allParams->CEDiameter *= scale;
+	allParams->perimeter *= scale;
+	allParams->SEVolume *= pow(scale, 3);
+	allParams->length *= scale;
+	allParams->width *= scale;
+	allParams->maxDistance *= scale;
+	allParams->minFeret *= scale;
+	allParams->rectLength *= scale;
+	allParams->rectWidth *= scale;
+} /* fcn rescale_particle_parameters */
+
+
+void compute_shape_cost_params(const double *dimsValues, int nDim, double *circularity,
+	double *convexity, double *elongation) {
+	/* Lite version of the get_particle_parameters for the cost function of the search.
+	   The workspace is created for one call only, use compute_shape_cost_params_ws 
+	   for the repeated calls.
+	   dimsValues  - Dimensions of the particle (set of values (0.0 - 1.0))
+	   nDim        - Number of the particle dimensions (equal to the amount of sliders)
+	   return:
+	   circularity - Particle circularity parameter [-]
+	   convexity   - Convexity of the particle [-]
+	   elongation  - Elongation of the particle [-] */
+	
+	geomWorkspace_t *ws = geom_workspace_create(nDim);
+	compute_shape_cost_params_ws(ws, dimsValues, circularity, convexity, elongation);
+	geom_workspace_free(ws);
+} /* fcn compute_shape_cost_params */
+
+
+void compute_shape_cost_params_ws(geomWorkspace_t *ws, const double *dimsValues, 
+	double *circularity, double *convexity, double *elongation) {
+	/* Lite version of the get_particle_parameters_ws for the cost function of the search.
+	   Only circularity, convexity and elongation are calculated (they do not depend 
+	   on the image scale, so it is not needed). No dynamic memory is used.
+	   ws          - workspace created for the particle nDim (geom_workspace_create)
+	   dimsValues  - Dimensions of the particle (set of values (0.0 - 1.0), ws->nDim values)
+	   return:
+	   circularity - Particle circularity parameter [-]
+	   convexity   - Convexity of the particle [-]
+	   elongation  - Elongation of the particle [-] */
+	
+	int nDim = ws->nDim;
+	int hullPointsNum;  /* Number of points of the convex hull */
+	double areaPixels;  /* Area of the particle in [pix] */
+	double centreXPos;  /* X coordinate of the centre [pix] */
+	double centreYPos;  /* Y coordinate of the centre [pix] */
+	double CEDiameter;  /* CE Diameter of the particle [pix] */
+	double perimeter;  /* Perimeter of the particle [pix] */
+	double convexHullPerimeter;  /* Convex Hull perimeter of the particle [pix] */
+	double orientation;  /* Angle of major axis in rad from the gorizontal line */
+	double length;  /* Length of the particle [pix] */
+	double width;  /* Width of the particle [pix] */
+	
+	/* Coordinates of all dims points and convex hull points from the workspace */
+	double *dimsCoordMidX = ws->dimsCoordMidX;
+	double *dimsCoordMidY = ws->dimsCoordMidY;
+	double *hullCoordMidX = ws->hullCoordMidX;
+	double *hullCoordMidY = ws->hullCoordMidY;
+	
+	/* Area, centre of mass and perimeter in pixels */
+	calc_dims_coords(dimsValues, nDim, ws->cosTable, ws->sinTable, dimsCoordMidX, dimsCoordMidY);
+	areaPixels = calc_area_pix(nDim, dimsCoordMidX, dimsCoordMidY);
+	calc_centre(nDim, dimsCoordMidX, dimsCoordMidY, areaPixels, &centreXPos, &centreYPos);
+	perimeter = calc_perimeter_pix(nDim, dimsCoordMidX, dimsCoordMidY);
+	CEDiameter = sqrt(areaPixels * 4/ M_PI);
+	
+	/* circularity: calculating the particle circularity */
+	*circularity = 2 * sqrt(M_PI * areaPixels) / perimeter;
+	
+	/* convexity: calculating the particle convexity */
+	hullPointsNum = calc_convex_hull_coords(nDim, dimsCoordMidX, dimsCoordMidY,
+		hullCoordMidX, hullCoordMidY);
+	convexHullPerimeter = calc_perimeter_pix(hullPointsNum, hullCoordMidX, hullCoordMidY);
+	*convexity = convexHullPerimeter / perimeter;
+	
+	/* elongation: projections of the particle on the major and minor axes */
+	orientation = M_PI / 2 - calc_theta(nDim, dimsCoordMidX, dimsCoordMidY, areaPixels, 
+		centreXPos, centreYPos);
+	length = calc_projection_length(
+		centreXPos + cos(orientation) * CEDiameter / 2.0, centreYPos - sin(orientation) * CEDiameter / 2.0,
+		centreXPos - cos(orientation) * CEDiameter / 2.0, centreYPos + sin(orientation) * CEDiameter / 2.0,
+		hullPointsNum, hullCoordMidX, hullCoordMidY, 1.0);
+	width = calc_projection_length(
+		centreXPos - sin(orientation) * CEDiameter / 2.0, centreYPos - cos(orientation) * CEDiameter / 2.0,
+		centreXPos + sin(orientation) * CEDiameter / 2.0, centreYPos + cos(orientation) * CEDiameter / 2.0,
+		hullPointsNum, hullCoordMidX, hullCoordMidY, 1.0);
+	if (width > length) {  /* The axes have to be swapped */
+		*elongation = 1.0 - length / width;
+	} else {
+		*elongation = 1.0 - width / length;
+	}
+} /* fcn compute_shape_cost_params_ws */
+
+
+void compute_shape_cost_params_grad_ws(geomWorkspace_t *ws, const double *dimsValues, 
+	double *params, double *jacobian) {
+	/* Function for calculation of circularity, convexity and elongation with their analytic
+	   derivatives by the dims values (for the local polish of the search). The derivatives
+	   of the area, the perimeter, the convex hull perimeter, the centre of mass and the 
+	   moments of inertia are summed over the edges of the polygon, the projection lengths
+	   are differentiated by their extreme points and by the angle of the major axis. The
+	   derivatives are one-sided where the hull or the extreme points change (the cost 
+	   function is not smooth there) and the symmetry tricks of calc_principal are constant.
+	   ws         - workspace created for the particle nDim (geom_workspace_create)
+	   dimsValues - Dimensions of the particle (set of values (0.0 - 1.0), ws->nDim values)
+	   return:
+	   params     - circularity, convexity and elongation (same as compute_shape_cost_params_ws)
+	   jacobian   - derivatives of the params by the dims values (3 x nDim, row per param) */
+	
+	int nDim = ws->nDim;
+	int i, k, hullPointsNum;
+	int a, b;  /* Indexes of the dims points of the hull edge */
+	int iMaxL, iMinL, iMaxW, iMinW;  /* Extreme points of the projections */
+	double *X = ws->dimsCoordMidX;
+	double *Y = ws->dimsCoordMidY;
+	const double *cosTable = ws->cosTable;
+	const double *sinTable = ws->sinTable;
+	/* Derivatives by the radii in pixels */
+	double *gA = ws->gradScratch;  /* Area */
+	double *gP = gA + nDim;  /* Perimeter */
+	double *gPh = gA + 2 * nDim;  /* Convex hull perimeter */
+	double *gCx = gA + 3 * nDim;  /* Centre of mass (6 * area * centre first) */
+	double *gCy = gA + 4 * nDim;
+	double *gIxx = gA + 5 * nDim;  /* Moments and product of inertia (sums of the edges first) */
+	double *gIyy = gA + 6 * nDim;
+	double *gIxy = gA + 7 * nDim;
+	double scale = 180.0 - 5.0;  /* Derivative of the radius in pixels by the dims value */
+	double areaPixels, perimeter, hullPerimeter, centreXPos, centreYPos, Ixx, Iyy, Ixy;
+	double diff, dDiff, theta, orientation, cosO, sinO, length, width, proj;
+	double maxL, minL, maxW, minW, dTheta, dOrientation, dLength, dWidth, dLdO, dWdO;
+	double result[3];
+	double xa, ya, xb, yb, t, f, dx, dy, edge, sumX, sumY;
+	
+	/* Values of the params (the dims and hull points are left in the workspace) */
+	compute_shape_cost_params_ws(ws, dimsValues, params, params + 1, params + 2);
+	areaPixels = calc_area_pix(nDim, X, Y);
+	calc_centre(nDim, X, Y, areaPixels, &centreXPos, &centreYPos);
+	perimeter = calc_perimeter_pix(nDim, X, Y);
+	hullPointsNum = calc_convex_hull_coords(nDim, X, Y, ws->hullCoordMidX, ws->hullCoordMidY);
+	hullPerimeter = calc_perimeter_pix(hullPointsNum, ws->hullCoordMidX, ws->hullCoordMidY);
+	calc_inertia(result, nDim, X, Y, areaPixels, centreXPos, centreYPos);
+	Ixx = result[0];
+	Iyy = result[1];
+	Ixy = result[2];
+	
+	/* Derivatives of the sums over the edges of the polygon */
+	for (i = 0; i < 8 * nDim; i++) {
+		gA[i] = 0.0;
+	}
+	for (a = 0; a < nDim; a++) {
+		b = (a == nDim - 1) ? 0 : a + 1;
+		xa = X[a];
+		ya = Y[a];
+		xb = X[b];
+		yb = Y[b];
+		t = xa * yb - xb * ya;
+		add_edge_grad(gA, cosTable, sinTable, a, b, yb / 2, -xb / 2, -ya / 2, xa / 2);
+		edge = sqrt((xb - xa) * (xb - xa) + (yb - ya) * (yb - ya));
+		if (edge > 0.0) {
+			dx = (xb - xa) / edge;
+			dy = (yb - ya) / edge;
+			add_edge_grad(gP, cosTable, sinTable, a, b, -dx, -dy, dx, dy);
+		}
+		sumX = xa + xb;
+		sumY = ya + yb;
+		add_edge_grad(gCx, cosTable, sinTable, a, b, t + sumX * yb, -sumX * xb, t - sumX * ya,
+			sumX * xa);
+		add_edge_grad(gCy, cosTable, sinTable, a, b, sumY * yb, t - sumY * xb, -sumY * ya, 
+			t + sumY * xa);
+		f = ya * ya + ya * yb + yb * yb;
+		add_edge_grad(gIxx, cosTable, sinTable, a, b, f * yb, (2 * ya + yb) * t - f * xb, 
+			-f * ya, (ya + 2 * yb) * t + f * xa);
+		f = xa * xa + xa * xb + xb * xb;
+		add_edge_grad(gIyy, cosTable, sinTable, a, b, (2 * xa + xb) * t + f * yb, -f * xb, 
+			(xa + 2 * xb) * t - f * ya, f * xa);
+		f = xa * yb + 2 * xa * ya + 2 * xb * yb + xb * ya;
+		add_edge_grad(gIxy, cosTable, sinTable, a, b, (yb + 2 * ya) * t + f * yb, 
+			(2 * xa + xb) * t - f * xb, (2 * yb + ya) * t - f * ya, (xa + 2 * xb) * t + f * xa);
+	}
+	
+	/* Derivatives of the convex hull perimeter (the hull points are the dims points) */
+	a = find_dims_index(nDim, X, Y, ws->hullCoordMidX[0], ws->hullCoordMidY[0], 0);
+	for (k = 0; (k < hullPointsNum) && (a >= 0); k++) {
+		i = (k == hullPointsNum - 1) ? 0 : k + 1;
+		b = find_dims_index(nDim, X, Y, ws->hullCoordMidX[i], ws->hullCoordMidY[i], a + 1);
+		if (b < 0) break;
+		edge = sqrt((X[b] - X[a]) * (X[b] - X[a]) + (Y[b] - Y[a]) * (Y[b] - Y[a]));
+		if (edge > 0.0) {
+			dx = (X[b] - X[a]) / edge;
+			dy = (Y[b] - Y[a]) / edge;
+			add_edge_grad(gPh, cosTable, sinTable, a, b, -dx, -dy, dx, dy);
+		}
+		a = b;
+	}
+	
+	/* Centre of mass and moments of inertia about the centre */
+	for (i = 0; i < nDim; i++) {
+		gCx[i] = (gCx[i] - 6.0 * centreXPos * gA[i]) / (6.0 * areaPixels);
+		gCy[i] = (gCy[i] - 6.0 * centreYPos * gA[i]) / (6.0 * areaPixels);
+		gIxx[i] = gIxx[i] / 12 - gA[i] * centreYPos * centreYPos - 
+			2 * areaPixels * centreYPos * gCy[i];
+		gIyy[i] = gIyy[i] / 12 - gA[i] * centreXPos * centreXPos - 
+			2 * areaPixels * centreXPos * gCx[i];
+		gIxy[i] = gIxy[i] / 24 - gA[i] * centreXPos * centreYPos - 
+			areaPixels * (gCx[i] * centreYPos + centreXPos * gCy[i]);
+	}
+	
+	/* Orientation of the major axis (see calc_principal) and the extreme points of the 
+	   projections on the major (length) and minor (width) axes */
+	diff = (Ixx - Iyy) / 2;
+	dDiff = 1.0;  /* Derivative of diff by (Ixx - Iyy) / 2 (0 if diff is fixed by the trick) */
+	if (diff < 1 && diff > 0) {
+		diff = 1;
+		dDiff = 0.0;
+	}
+	if (diff > -1 && diff < 0) {
+		diff = -1;
+		dDiff = 0.0;
+	}
+	theta = atan2(-Ixy, diff) / 2;
+	orientation = M_PI / 2 - theta;
+	cosO = cos(orientation);
+	sinO = sin(orientation);
+	iMaxL = iMinL = iMaxW = iMinW = 0;
+	maxL = minL = X[0] * cosO - Y[0] * sinO;
+	maxW = minW = X[0] * sinO + Y[0] * cosO;
+	for (i = 1; i < nDim; i++) {
+		proj = X[i] * cosO - Y[i] * sinO;
+		if (proj > maxL) {
+			maxL = proj;
+			iMaxL = i;
+		}
+		if (proj < minL) {
+			minL = proj;
+			iMinL = i;
+		}
+		proj = X[i] * sinO + Y[i] * cosO;
+		if (proj > maxW) {
+			maxW = proj;
+			iMaxW = i;
+		}
+		if (proj < minW) {
+			minW = proj;
+			iMinW = i;
+		}
+	}
+	length = maxL - minL;
+	width = maxW - minW;
+	/* Derivatives of the projection lengths by the angle of the axes */
+	dLdO = -((X[iMaxL] - X[iMinL]) * sinO + (Y[iMaxL] - Y[iMinL]) * cosO);
+	dWdO = (X[iMaxW] - X[iMinW]) * cosO - (Y[iMaxW] - Y[iMinW]) * sinO;
+	
+	/* Jacobian of circularity, convexity and elongation */
+	for (i = 0; i < nDim; i++) {
+		jacobian[i] = params[0] * (gA[i] / (2 * areaPixels) - gP[i] / perimeter) * scale;
+		jacobian[nDim + i] = params[1] * (gPh[i] / hullPerimeter - gP[i] / perimeter) * scale;
+		
+		dTheta = (Ixy * dDiff * (gIxx[i] - gIyy[i]) / 2 - diff * gIxy[i]) / 
+			(2 * (diff * diff + Ixy * Ixy));
+		dOrientation = -dTheta;
+		dLength = dLdO * dOrientation;
+		dWidth = dWdO * dOrientation;
+		if (i == iMaxL) dLength += cosTable[i] * cosO - sinTable[i] * sinO;
+		if (i == iMinL) dLength -= cosTable[i] * cosO - sinTable[i] * sinO;
+		if (i == iMaxW) dWidth += cosTable[i] * sinO + sinTable[i] * cosO;
+		if (i == iMinW) dWidth -= cosTable[i] * sinO + sinTable[i] * cosO;
+		if (width > length) {
+			jacobian[2 * nDim + i] = -(dLength * width - length * dWidth) / (width * width) * scale;
+		} else {
+			jacobian[2 * nDim + i] = -(dWidth * length - width * dLength) / (length * length) * scale;
+		}
+	}
+} /* fcn compute_shape_cost_params_grad_ws */
+
+
+void compute_shape_cost_params_batch(const double *dims, int n, int nDim, double *out) {
+	/* Function for calculation of circularity, convexity and elongation of n particles
+	   dims - contiguous array of dimensions of the particles (n rows, nDim columns)
+	   n    - number of the particles
+	   nDim - number of the particle dimensions
+	   out  - output array (n rows: circularity, convexity, elongation) */
+	
+	int i;
+	geomWorkspace_t *ws = geom_workspace_create(nDim);
+	
+	for (i = 0; i < n; i++) {
+		compute_shape_cost_params_ws(ws, dims + (long)i * nDim, out + 3 * i, out + 3 * i + 1, 
+			out + 3 * i + 2);
+	}
+	geom_workspace_free(ws);
+} /* fcn compute_shape_cost_params_batch */
 
 
 static void print_error_and_exit(void) {
@@ -322,6 +656,59 @@ static void print_error_and_exit(void) {
 } /* fcn print_error_and_exit */
 
 
+static void calc_dims_coords(const double *dimsValues, int nDim, const double *cosTable,
+	const double *sinTable, double *dimsCoordMidX, double *dimsCoordMidY) {
+	/* Function for calculation the coordinates of the dims points (0 in the middle of the particle)
+	   dimsValues    - Dimensions of the particle (set of values (0.0 - 1.0))
+	   nDim          - number of dimensions or length of the arrays
+	   cosTable      - pointer to array of cos of the directions of the dims points
+	   sinTable      - pointer to array of sin of the directions of the dims points
+	   return:
+	   dimsCoordMidX - pointer to array of X coord of dims points
+	   dimsCoordMidY - pointer to array of Y coord of dims points */
+	int i;
+	double centreRadius = 5.0; /* Radius of the central polygon */
+	double radius;  /* Radius to the point of polygon */
+	
+	for (i = 0; i < nDim; i++) {
+		radius = dimsValues[i] * (180.0 - centreRadius) + centreRadius;
+		dimsCoordMidX[i] = (cosTable[i] * radius + 180.0) - 180.0;
+		dimsCoordMidY[i] = (sinTable[i] * radius + 180.0) - 180.0;
+	}
+} /* fcn calc_dims_coords */
+
+
+static void calc_centre(int nDim, double *dimsCoordMidX, double *dimsCoordMidY, double areaPixels,
+	double *centreXPos, double *centreYPos) {
+	/* Function for calculation the coordinates (X, Y) of centre of mass
+	   nDim          - number of dimensions or length of the arrays
+	   dimsCoordMidX - pointer to array of X coord of dims points
+	   dimsCoordMidY - pointer to array of Y coord of dims points
+	   areaPixels    - area of the polygon in pixels
+	   return:
+	   centreXPos    - X coordinate of the centre of mass
+	   centreYPos    - Y coordinate of the centre of mass */
+	int i;
+	double a = 0.0;
+	double b = 0.0;
+	double x1, y1;
+	
+	for (i = 0; i < nDim; i++) {
+		if (i == (nDim - 1)) {
+			x1 = dimsCoordMidX[0];
+			y1 = dimsCoordMidY[0];
+		} else {
+			x1 = dimsCoordMidX[i + 1];
+			y1 = dimsCoordMidY[i + 1];
+		}
+		a += (dimsCoordMidX[i] + x1) * (dimsCoordMidX[i] * y1 - x1 * dimsCoordMidY[i]);
+		b += (dimsCoordMidY[i] + y1) * (dimsCoordMidX[i] * y1 - x1 * dimsCoordMidY[i]);		
+	}
+	*centreXPos = a / (6.0 * areaPixels);
+	*centreYPos = b / (6.0 * areaPixels);
+} /* fcn calc_centre */
+
+
 static double calc_area_pix(int nDim, double *dimsCoordMidX, double *dimsCoordMidY) {
 	/* Function for calculation of the particle area in pixels
        nDim          - number of dimensions or length of the arrays
@@ -370,143 +757,6 @@ static double calc_perimeter_pix(int nDim, double *dimsCoordMidX, double *dimsCo
 } /* calc_perimeter_pix */
 
 
-static int calc_convex_hull_coords(int nDim, double *dimsCoordMidX, double *dimsCoordMidY,
-	double *hullCoordMidX, double *hullCoordMidY) {
-	/* Function for calculation of the coordinates of the convex hull. 
-	   Implements Andrew's monotone chain algorithm. O(n log n) complexity.	
-       nDim          - number of dimensions or length of the arrays
-	   dimsCoordMidX - pointer to array of X coord of dims points
-	   dimsCoordMidY - pointer to array of Y coord of dims points
-	   hullCoordMidX - pointer to array of X coord of convex hull
-	   hullCoordMidY - pointer to array of Y coord of convex hull
-	   return:
-	   ptr           - number of elements in the hullCoordMid arrays */
-	
-	int i;
-	int ptr, ptrLower, ptrUpper;  /* pointer to the element in array */
-	
-	/* Make the copy of dimsCoordMidX and dimsCoordMidY in the memory */
-	double *coordMidX = (double *) malloc (nDim * sizeof(double));
-	double *coordMidY = (double *) malloc (nDim * sizeof(double));
-	if (NULL == coordMidX || NULL == coordMidY) print_error_and_exit();
-	
-	for (i = 0; i < nDim; i++) {
-		coordMidX[i] = dimsCoordMidX[i];
-		coordMidY[i] = dimsCoordMidY[i];
-	}
-	
-	/* Make sort by the x coordinate of all points in array */
-	sort_array(coordMidX, coordMidY, nDim);
-
-	/* Build lower hull */
-	double *lowerX = (double *) malloc (nDim * sizeof(double));
-	double *lowerY = (double *) malloc (nDim * sizeof(double));
-	if (NULL == lowerX || NULL == lowerY) print_error_and_exit();
-	
-	clear_array(lowerX, nDim);
-	clear_array(lowerY, nDim);
-	
-	ptr = -1;
-	for (i = 0; i < nDim; i++) {
-		while (ptr >= 1 && cross(lowerX[ptr - 1], lowerY[ptr - 1], 
-			lowerX[ptr], lowerY[ptr], coordMidX[i], coordMidY[i]) <= 0) {
-				ptr--;
-			}
-		ptr++;
-		lowerX[ptr] = coordMidX[i];
-		lowerY[ptr] = coordMidY[i];
-	}
-	ptrLower = ptr;  /* save the poiner to the max elem in lower arrays */
-	
-	/* Reverse the previously sorted array */
-	reverse_array(coordMidX, coordMidY, nDim);
-	
-	/* Build upper hull */
-	double *upperX = (double *) malloc (nDim * sizeof(double));
-	double *upperY = (double *) malloc (nDim * sizeof(double));
-	if (NULL == upperX || NULL == upperY) print_error_and_exit();
-	
-	clear_array(upperX, nDim);
-	clear_array(upperY, nDim);
-	
-	ptr = -1;
-	for (i = 0; i < nDim; i++) {
-		while (ptr >= 1 && cross(upperX[ptr - 1], upperY[ptr - 1], 
-			upperX[ptr], upperY[ptr], coordMidX[i], coordMidY[i]) <= 0) {
-				ptr--;
-			}
-		ptr++;
-		upperX[ptr] = coordMidX[i];
-		upperY[ptr] = coordMidY[i];	
-	}
-	ptrUpper = ptr;  /* save the poiner to the max elem in upper arrays */
-	
-	/* Concatenation of the lower and upper hulls gives the convex hull. 
-	   Last point of each list is omitted because it is repeated at the 
-	   beginning of the other list. */
-	ptr = 0;
-	for (i = 0; i < ptrLower; i++) {
-		hullCoordMidX[ptr] = lowerX[i];
-		hullCoordMidY[ptr] = lowerY[i];
-		ptr++;
-	}
-	for (i = 0; i < ptrUpper; i++) {
-		hullCoordMidX[ptr] = upperX[i];
-		hullCoordMidY[ptr] = upperY[i];
-		ptr++;
-	}
-	
-	/* Clear the used dynamic memory */
-	free(coordMidX);
-	free(coordMidY);
-	free(lowerX);
-	free(lowerY);
-	free(upperX);
-	free(upperY);
-	
-	/* ptr now containt the dimension of the hullCoordMid arrays */
-	return ptr;
-} /* fcn calc_convex_hull_coords */
-
-
-static double cross(double Ox, double Oy, double Ax, double Ay, double Bx, double By) {
-	/* 2D cross product calculation of OA and OB vectors, i.e. z-comp of their 3D cross product.
-	   Ox, Oy - X and Y coordinates of the reference point
-	   Ax, Ay - X and Y coordinates of the vector A
-	   Bx, By - X and Y coordinates of the vector B  */
-	double z = 0;
-	z = (Ax - Ox) * (By - Oy) - (Ay - Oy) * (Bx - Ox);
-	return z;
-} /* fcn cross */
-	
-	
-static void clear_array(double *array, int nDim) {
-	/* Function for clear the array (make all elements equal to 0)  */
-	int i;
-	for (i = 0; i < nDim; i++) {
-		array[i] = 0;
-	}
-} /* fcn clear_array */
-
-
-static void reverse_array(double *coordMidX, double *coordMidY, int nDim) {
-	/* Function to make the reverse order arrays of the coordinates */
-	int i;
-	double temp;
-	for (i = 0; i < (nDim / 2); i++) {
-		/* swap coordMidX values */
-		temp = coordMidX[i];
-		coordMidX[i] = coordMidX[nDim - 1 - i];
-		coordMidX[nDim - 1 - i] = temp;
-		
-		/* swap coordMidY values */
-		temp = coordMidY[i];
-		coordMidY[i] = coordMidY[nDim - 1 - i];
-		coordMidY[nDim - 1 - i] = temp;
-	}
-} /* fcn reverse_array */
-
-
 static double calc_theta(int nDim, double *dimsCoordMidX, double *dimsCoordMidY, 
 	double areaPixels, double centreXPos, double centreYPos) {
 	/* Function to calculate the theta angle of major axis 
@@ -612,6 +862,41 @@ static void calc_principal(double *result, double Ixx, double Iyy, double Ixy) {
 } /* fcn calc_principal */
 
 
+static void add_edge_grad(double *grad, const double *cosTable, const double *sinTable, int i, 
+	int k, double dxi, double dyi, double dxk, double dyk) {
+	/* Function for adding the derivatives by the points of the edge to the derivatives by 
+	   the radii (the dims point moves along its direction when the radius is changed)
+	   grad     - derivatives by the radii (nDim values, updated)
+	   cosTable - pointer to array of cos of the directions of the dims points
+	   sinTable - pointer to array of sin of the directions of the dims points
+	   i, k     - indexes of the first and the second points of the edge
+	   dxi, dyi - derivatives by the X and Y coordinates of the first point
+	   dxk, dyk - derivatives by the X and Y coordinates of the second point */
+	grad[i] += cosTable[i] * dxi + sinTable[i] * dyi;
+	grad[k] += cosTable[k] * dxk + sinTable[k] * dyk;
+} /* fcn add_edge_grad */
+
+
+static int find_dims_index(int nDim, const double *dimsCoordMidX, const double *dimsCoordMidY,
+	double x, double y, int start) {
+	/* Function for the index of the dims point with the coordinates (the hull points are the
+	   copies of the dims points in the same cyclic order, so the search goes forward)
+	   nDim          - number of dimensions or length of the arrays
+	   dimsCoordMidX - pointer to array of X coord of dims points
+	   dimsCoordMidY - pointer to array of Y coord of dims points
+	   x, y          - coordinates of the point
+	   start         - index to start the cyclic search from
+	   return:
+	   index         - index of the dims point (-1 if there is no such point) */
+	int i, k;
+	for (k = 0; k < nDim; k++) {
+		i = (start + k) % nDim;
+		if ((dimsCoordMidX[i] == x) && (dimsCoordMidY[i] == y)) return i;
+	}
+	return -1;
+} /* fcn find_dims_index */
+
+
 static double calc_projection_length(double x1, double y1, double x2, double y2, int nDim,
 	double *dimsCoordMidX, double *dimsCoordMidY, double imgScale) {
 	/* Function for calculation the certain projection length in um
@@ -626,18 +911,19 @@ static double calc_projection_length(double x1, double y1, double x2, double y2,
 	   return:
 	   length        - projection length  */
 	
-	double *projectionsX = (double *) malloc (nDim * sizeof(double));
-	double *projectionsY = (double *) malloc (nDim * sizeof(double));
-	if (NULL == projectionsX || NULL == projectionsY) print_error_and_exit();
 	int i;
 	double a, b, c, d, x, y;
 	double length;
 	double maxX, maxY, minX, minY;
-	
-	/* Calculate projection of all points on the axis */
+	int useX = (fabs(x2 - x1) > fabs(y2 - y1));  /* use x or y coordinates to find the extreme points */
+	
+	/* Calculate projection of all points on the axis and find the minimum and 
+	   maximum points on a line (projections are not stored) */
+	maxX = maxY = -INFINITY;
+	minX = minY = INFINITY;
+	a = y2 - y1;
+	b = x2 - x1;
 	for(i = 0; i < nDim; i++) {
-		a = y2 - y1;
-		b = x2 - x1;
 		if (fabs(a) <= 0.5) {  /* Horizontal line */
 			x = dimsCoordMidX[i];
 			y = y1;
@@ -650,35 +936,23 @@ static double calc_projection_length(double x1, double y1, double x2, double y2,
 			x = ((d - c) * b * a) / (pow(a, 2) + pow(b, 2));
 			y = x * a / b + c;
 		}
-		projectionsX[i] = x;
-		projectionsY[i] = y;
-	}
-	
-	if (fabs(x2 - x1) > fabs(y2 - y1)) {
-		/* use x coordinates to find the minimum and maximum points on a line */
-		maxX = -INFINITY;
-		minX = INFINITY;
-		for (i = 0; i < nDim; i++) {
-			if (projectionsX[i] > maxX) {
-				maxX = projectionsX[i];
-				maxY = projectionsY[i];
+		if (useX) {
+			if (x > maxX) {
+				maxX = x;
+				maxY = y;
 			}
-			if (projectionsX[i] < minX) {
-				minX = projectionsX[i];
-				minY = projectionsY[i];
-			}	
-		}	
-	} else {  /* use y coordinates to find the minimum and maximum points on a line */
-		maxY = -INFINITY;
-        minY = INFINITY;
-        for (i = 0; i < nDim; i++) {
-        	if (projectionsY[i] > maxY) {
-        		maxY = projectionsY[i];
-        		maxX = projectionsX[i];
+			if (x < minX) {
+				minX = x;
+				minY = y;
 			}
-			if (projectionsY[i] < minY) {
-				minY = projectionsY[i];
-				minX = projectionsX[i];
+		} else {
+			if (y > maxY) {
+				maxY = y;
+				maxX = x;
+			}
+			if (y < minY) {
+				minY = y;
+				minX = x;
 			}
 		}
 	}
@@ -686,9 +960,5 @@ static double calc_projection_length(double x1, double y1, double x2, double y2,
 	/* Calculate the particle projection length */
 	length = sqrt(pow(maxX - minX, 2) + pow(maxY - minY, 2)) * imgScale;
 	
-	/* Clear the used dynamic memory */
-	free(projectionsX);
-	free(projectionsY);
-	
 	return length;
 } /* fcn calc_projection_length */
@@ -0,0 +1,140 @@
+/*========================================================================
+  Module with the ordering of the target particle parameters (circularity,
+  convexity and elongation) along the 3D Hilbert curve. The neighbours
+  along the curve are close in the parameters space, so the shape found
+  for one target is a good start of the search for the next target. The
+  index is calculated with the transpose algorithm of J. Skilling
+  ("Programming the Hilbert curve", AIP Conf. Proc. 707, 2004).
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include "hilbert_curve.h"
+#include "sort_array.h"
+
+/* Number of the bits of every coordinate (3 x 16 bits of the index are exact in double) */
+#define HILBERT_BITS 16
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for the transpose of the Hilbert index from the cell coordinates */
+static void axes_to_transpose(unsigned int *X, int bits, int n);
+
+
+unsigned long long hilbert_index_3d(const double *point, const double *lower, const double *upper) {
+	/* Function for the index of the 3D point along the Hilbert curve through the box
+	   point - coordinates of the point (3 elements)
+	   lower - lower corner of the box (3 elements)
+	   upper - upper corner of the box (3 elements)
+	   return:
+	   index - index of the cell of the point along the curve (3 x HILBERT_BITS bits) */
+
+	unsigned int X[3];
+	unsigned int cellMax = (1u << HILBERT_BITS) - 1;
+	unsigned long long index = 0;
+	double value;
+	int i, bit;
+
+	/* Cell coordinates of the point (the points out of the box are in the edge cells) */
+	for (i = 0; i < 3; i++) {
+		value = (upper[i] > lower[i]) ? (point[i] - lower[i]) / (upper[i] - lower[i]) : 0.0;
+		if (!(value > 0.0)) value = 0.0;
+		if (value > 1.0) value = 1.0;
+		X[i] = (unsigned int) (value * cellMax + 0.5);
+	}
+	axes_to_transpose(X, HILBERT_BITS, 3);
+
+	/* Interleave the bits of the transpose (the highest bits first) */
+	for (bit = HILBERT_BITS - 1; bit >= 0; bit--) {
+		for (i = 0; i < 3; i++) {
+			index = (index << 1) | ((X[i] >> bit) & 1u);
+		}
+	}
+	return index;
+} /* fcn hilbert_index_3d */
+
+
+void hilbert_order(int K, const double *points, int *order) {
+	/* Function for ordering the 3D points along the Hilbert curve through their bounding box
+	   K      - number of the points
+	   points - coordinates of the points (K x 3 array)
+	   Return:
+	   order  - indexes of the points in the order of the curve (K elements) */
+
+	int i, k;
+	double lower[3], upper[3];
+	double *keys, *indexes;
+
+	if (K <= 0) return;
+	keys = (double*) malloc (2 * K * sizeof(double));
+	if (NULL == keys) print_error_and_exit();
+	indexes = keys + K;
+
+	/* Bounding box of the points */
+	for (i = 0; i < 3; i++) {
+		lower[i] = points[i];
+		upper[i] = points[i];
+	}
+	for (k = 1; k < K; k++) {
+		for (i = 0; i < 3; i++) {
+			if (points[3 * k + i] < lower[i]) lower[i] = points[3 * k + i];
+			if (points[3 * k + i] > upper[i]) upper[i] = points[3 * k + i];
+		}
+	}
+
+	/* Sort the indexes of the points by the index along the curve */
+	for (k = 0; k < K; k++) {
+		keys[k] = (double) hilbert_index_3d(points + 3 * k, lower, upper);
+		indexes[k] = k;
+	}
+	sort_array(keys, indexes, K);
+	for (k = 0; k < K; k++) {
+		order[k] = (int) indexes[k];
+	}
+	free(keys);
+} /* fcn hilbert_order */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
+
+
+static void axes_to_transpose(unsigned int *X, int bits, int n) {
+	/* Function for the transpose of the Hilbert index from the cell coordinates (in place)
+	   X    - cell coordinates of the point, replaced with the transpose of the index (n elements)
+	   bits - number of the bits of every coordinate
+	   n    - number of the dimensions */
+
+	unsigned int M = 1u << (bits - 1);
+	unsigned int P, Q, t;
+	int i;
+
+	/* Inverse undo of the excess work */
+	for (Q = M; Q > 1; Q >>= 1) {
+		P = Q - 1;
+		for (i = 0; i < n; i++) {
+			if (X[i] & Q) {
+				X[0] ^= P;
+			} else {
+				t = (X[0] ^ X[i]) & P;
+				X[0] ^= t;
+				X[i] ^= t;
+			}
+		}
+	}
+
+	/* Gray encode */
+	for (i = 1; i < n; i++) {
+		X[i] ^= X[i - 1];
+	}
+	t = 0;
+	for (Q = M; Q > 1; Q >>= 1) {
+		if (X[n - 1] & Q) t ^= Q - 1;
+	}
+	for (i = 0; i < n; i++) {
+		X[i] ^= t;
+	}
+} /* fcn axes_to_transpose */
@@ -0,0 +1,146 @@
+/*========================================================================
+  Module with the local polish of the found particle shape. The residual
+  of circularity, convexity and elongation (3 values) is reduced by the
+  Levenberg-Marquardt steps with the analytic jacobian of the geometry
+  kernel (compute_shape_cost_params_grad_ws). There are more unknowns than
+  residuals, so the step is the minimum norm one: 
+  delta = -J^T (J J^T + lambda I)^-1 r (only 3 x 3 system is solved).
+  The step is projected on the bounds of the decision variables and is
+  accepted only if the cost is decreased. The polish finishes the search
+  which is already close to the precision limit: the swarm needs hundreds
+  of random iterations for the last digits, the polish needs a few steps.
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "get_particle_parameters.h"
+#include "shape_space.h"
+#include "local_polish.h"
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for the solution of the 3 x 3 linear system (returns 0 if it is singular) */
+static int solve_3x3(const double *A, const double *b, double *x);
+
+
+unsigned long local_polish(geomWorkspace_t *ws, shapeSpace_t *space, const double *target,
+	int nVar, double varMin, double varMax, int maxSteps, double precisionLimit, 
+	double *position, double *cost) {
+	/* Function for the local polish of the position with the projected Levenberg-Marquardt
+	   steps. The jacobian is calculated at the accepted positions only, the damping lambda
+	   is decreased after the accepted step and increased after the rejected one. The 
+	   calculation of the jacobian is counted as one cost function evaluation.
+	   ws             - workspace of the particle parameters calculation (nDim radii)
+	   space          - decision space of the search (NULL - position is the radii)
+	   target         - target circularity, convexity and elongation
+	   nVar           - number of the decision variables
+	   varMin         - lower bound of decision variables
+	   varMax         - upper bound of decision variables
+	   maxSteps       - maximum number of the steps (accepted and rejected)
+	   precisionLimit - polish is finished when the cost is below the limit (0 - never)
+	   position       - position to polish (replaced by the polished position)
+	   cost           - cost of the position (replaced by the polished cost)
+	   return:
+	   evaluations    - number of the cost function evaluations */
+
+	int nDim = ws->nDim;
+	int step, i, k, l;
+	int needJacobian = 1;
+	unsigned long evaluations = 0;
+	double lambda = -1.0;  /* Damping of the step (set by the first jacobian) */
+	double params[3], residual[3], z[3], A[9], JJt[9];
+	double trialCost, value;
+	double *buffer = (double*) malloc ((3 * nDim + 3 * nVar + nVar) * sizeof(double));
+	if (NULL == buffer) print_error_and_exit();
+	double *jacDims = buffer;  /* Jacobian by the radii (3 x nDim) */
+	double *jacobian = jacDims + 3 * nDim;  /* Jacobian by the decision variables (3 x nVar) */
+	double *trial = jacobian + 3 * nVar;  /* Trial position */
+	const double *dims;
+	
+	for (step = 0; (step < maxSteps) && (*cost > precisionLimit); step++) {
+		if (needJacobian) {
+			dims = shape_space_dims(space, position);
+			compute_shape_cost_params_grad_ws(ws, dims, params, jacDims);
+			shape_space_jacobian(space, dims, jacDims, 3, nVar, jacobian);
+			evaluations++;
+			for (k = 0; k < 3; k++) {
+				residual[k] = params[k] - target[k];
+				for (l = 0; l < 3; l++) {
+					value = 0.0;
+					for (i = 0; i < nVar; i++) {
+						value += jacobian[k * nVar + i] * jacobian[l * nVar + i];
+					}
+					JJt[3 * k + l] = value;
+				}
+			}
+			if (lambda < 0.0) {
+				lambda = 1e-3 * (JJt[0] + JJt[4] + JJt[8]) / 3 + 1e-12;
+			}
+			needJacobian = 0;
+		}
+		
+		/* Minimum norm step projected on the bounds */
+		for (k = 0; k < 9; k++) {
+			A[k] = JJt[k] + ((k % 4 == 0) ? lambda : 0.0);
+		}
+		if (!solve_3x3(A, residual, z)) {
+			lambda *= 10.0;
+			continue;
+		}
+		for (i = 0; i < nVar; i++) {
+			value = position[i] - (jacobian[i] * z[0] + jacobian[nVar + i] * z[1] + 
+				jacobian[2 * nVar + i] * z[2]);
+			trial[i] = (value < varMin) ? varMin : ((value > varMax) ? varMax : value);
+		}
+		compute_shape_cost_params_ws(ws, shape_space_dims(space, trial), params, params + 1, 
+			params + 2);
+		evaluations++;
+		trialCost = sqrt(pow((target[0] - params[0]), 2) + pow((target[1] - params[1]), 2) + 
+			pow((target[2] - params[2]), 2));
+		
+		/* Accept the better position or increase the damping */
+		if (trialCost < *cost) {
+			*cost = trialCost;
+			for (i = 0; i < nVar; i++) {
+				position[i] = trial[i];
+			}
+			lambda /= 3.0;
+			needJacobian = 1;
+		} else {
+			lambda *= 4.0;
+		}
+	}
+	
+	free(buffer);
+	return evaluations;
+} /* fcn local_polish */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
+
+
+static int solve_3x3(const double *A, const double *b, double *x) {
+	/* Function for the solution of the 3 x 3 linear system with the Cramer's rule
+	   A - matrix of the system (row-major)
+	   b - right side
+	   x - output solution
+	   return:
+	   1 - solved, 0 - matrix is singular */
+	
+	double det = A[0] * (A[4] * A[8] - A[5] * A[7]) - A[1] * (A[3] * A[8] - A[5] * A[6]) + 
+		A[2] * (A[3] * A[7] - A[4] * A[6]);
+	if (!(fabs(det) > 1e-300)) return 0;
+	x[0] = (b[0] * (A[4] * A[8] - A[5] * A[7]) - A[1] * (b[1] * A[8] - A[5] * b[2]) + 
+		A[2] * (b[1] * A[7] - A[4] * b[2])) / det;
+	x[1] = (A[0] * (b[1] * A[8] - A[5] * b[2]) - b[0] * (A[3] * A[8] - A[5] * A[6]) + 
+		A[2] * (A[3] * b[2] - b[1] * A[6])) / det;
+	x[2] = (A[0] * (A[4] * b[2] - b[1] * A[7]) - A[1] * (A[3] * b[2] - b[1] * A[6]) + 
+		b[0] * (A[3] * A[7] - A[4] * A[6])) / det;
+	return 1;
+} /* fcn solve_3x3 */
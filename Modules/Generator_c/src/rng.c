@@ -0,0 +1,122 @@
+/*========================================================================
+  Module with the reentrant pseudo random number generator xoshiro256**
+  (D. Blackman, S. Vigna). The state is passed to every call, so several
+  searches can run in parallel threads, and a run with the same seed is
+  reproduced bit-for-bit. Independent streams (e.g. one per worker) are
+  made by the jump of the state by 2^128 numbers.
+  ========================================================================*/
+
+#include <math.h>
+#include "rng.h"
+
+/* Rotation of the 64-bit number to the left */
+static uint64_t rotl(uint64_t x, int k);
+
+
+void rng_seed(rngState_t *rng, uint64_t seed) {
+	/* Function for seeding the generator state. The seed is expanded with splitmix64,
+	   so any seed (also 0) gives a good initial state
+	   rng  - pointer to the generator state
+	   seed - seed value */
+	
+	int i;
+	uint64_t z;
+	
+	for (i = 0; i < 4; i++) {
+		seed += 0x9e3779b97f4a7c15ULL;
+		z = seed;
+		z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+		z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+		rng->s[i] = z ^ (z >> 31);
+	}
+} /* fcn rng_seed */
+
+
+void rng_seed_stream(rngState_t *rng, uint64_t seed, int stream) {
+	/* Function for seeding the independent stream of the generator: the same seed
+	   is used by all the streams and the state is jumped by stream * 2^128 numbers
+	   rng    - pointer to the generator state
+	   seed   - seed value (common for all the streams)
+	   stream - index of the stream (e.g. number of the worker) */
+	
+	int i;
+	
+	rng_seed(rng, seed);
+	for (i = 0; i < stream; i++) {
+		rng_jump(rng);
+	}
+} /* fcn rng_seed_stream */
+
+
+void rng_jump(rngState_t *rng) {
+	/* Function for the jump of the generator state by 2^128 numbers (equivalent to
+	   2^128 calls of rng_next), used for the non-overlapping streams
+	   rng - pointer to the generator state */
+	
+	static const uint64_t JUMP[] = {0x180ec6d33cfd0abaULL, 0xd5a61266f0c9392cULL, 
+		0xa9582618e03fc9aaULL, 0x39abdc4529b1661cULL};
+	uint64_t s0 = 0;
+	uint64_t s1 = 0;
+	uint64_t s2 = 0;
+	uint64_t s3 = 0;
+	int i, b;
+	
+	for (i = 0; i < 4; i++) {
+		for (b = 0; b < 64; b++) {
+			if (JUMP[i] & ((uint64_t) 1 << b)) {
+				s0 ^= rng->s[0];
+				s1 ^= rng->s[1];
+				s2 ^= rng->s[2];
+				s3 ^= rng->s[3];
+			}
+			rng_next(rng);
+		}
+	}
+	rng->s[0] = s0;
+	rng->s[1] = s1;
+	rng->s[2] = s2;
+	rng->s[3] = s3;
+} /* fcn rng_jump */
+
+
+uint64_t rng_next(rngState_t *rng) {
+	/* Function for generation of the next 64-bit random number (xoshiro256**)
+	   rng - pointer to the generator state */
+	
+	uint64_t result = rotl(rng->s[1] * 5, 7) * 9;
+	uint64_t t = rng->s[1] << 17;
+	
+	rng->s[2] ^= rng->s[0];
+	rng->s[3] ^= rng->s[1];
+	rng->s[1] ^= rng->s[2];
+	rng->s[0] ^= rng->s[3];
+	rng->s[2] ^= t;
+	rng->s[3] = rotl(rng->s[3], 45);
+	
+	return result;
+} /* fcn rng_next */
+
+
+double rng_double(rngState_t *rng) {
+	/* Function for generation random double number in range [0.0, 1.0) 
+	   (upper 53 bits of the 64-bit number)
+	   rng - pointer to the generator state */
+	return (rng_next(rng) >> 11) * (1.0 / 9007199254740992.0);
+} /* fcn rng_double */
+
+
+double rng_normal(rngState_t *rng) {
+	/* Function for generation random number with the standard normal distribution
+	   (Box-Muller transform of two uniform numbers, the second normal number is dropped
+	   so the generator keeps no state besides rng)
+	   rng - pointer to the generator state */
+	double u1 = 1.0 - rng_double(rng);  /* (0.0, 1.0] */
+	double u2 = rng_double(rng);
+	return sqrt(-2.0 * log(u1)) * cos(2.0 * M_PI * u2);
+} /* fcn rng_normal */
+
+
+static uint64_t rotl(uint64_t x, int k) {
+	/* Rotation of the 64-bit number to the left */
+	return (x << k) | (x >> (64 - k));
+} /* fcn rotl */
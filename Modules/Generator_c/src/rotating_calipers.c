@@ -0,0 +1,145 @@
+/*========================================================================
+  Module with the rotating calipers algorithm for the convex hull of the
+  particle: max Feret diameter, min Feret width and minimum area bounding
+  rectangle in O(h) time (h - number of the convex hull points)
+  ========================================================================*/
+
+#include <math.h>
+
+/* Relative tolerance for the comparison of the bounding rectangle and triangle areas */
+#define AREA_RTOL 1e-12
+
+/* Doubled area of the triangle ABC (positive for counter-clockwise order) */
+static double area2(double Ax, double Ay, double Bx, double By, double Cx, double Cy);
+
+/* Distance between the two points */
+static double distance(double Ax, double Ay, double Bx, double By);
+
+
+void calc_feret_diameters(int hullNum, const double *hullX, const double *hullY,
+	double *maxFeret, double *minFeret, double *rectLength, double *rectWidth) {
+	/* Function for calculation of the Feret diameters and bounding rectangle of the
+	   convex polygon with rotating calipers
+	   hullNum    - number of the convex hull points (counter-clockwise order, no
+	                collinear points, as returned by calc_convex_hull_coords)
+	   hullX      - pointer to array of X coord of convex hull
+	   hullY      - pointer to array of Y coord of convex hull
+	   return:
+	   maxFeret   - maximum distance between two points of the hull (max Feret diameter)
+	   minFeret   - minimum distance between two parallel tangent lines (min Feret width)
+	   rectLength - longer side of the minimum area bounding rectangle
+	   rectWidth  - shorter side of the minimum area bounding rectangle
+	   All values are in the units of the hull coordinates. */
+
+	int i, i1;  /* Current edge (i, i1) of the hull */
+	int j;  /* Antipodal point (the farthest from the edge line) */
+	int k;  /* Point with the maximum projection on the edge direction */
+	int m;  /* Point with the minimum projection on the edge direction */
+	int steps;
+	double ux, uy;  /* Unit vector of the edge direction */
+	double edgeLength;
+	double width;  /* Distance from the edge line to the antipodal point */
+	double extent;  /* Extent of the hull along the edge direction */
+	double d;
+	double minArea = INFINITY;
+
+	*maxFeret = 0.0;
+	*minFeret = INFINITY;
+	*rectLength = 0.0;
+	*rectWidth = 0.0;
+	if (hullNum < 3) {  /* Degenerated hull (segment or point) */
+		for (i = 0; i < hullNum; i++) {
+			for (j = i + 1; j < hullNum; j++) {
+				d = distance(hullX[i], hullY[i], hullX[j], hullY[j]);
+				if (d > *maxFeret) *maxFeret = d;
+			}
+		}
+		*minFeret = 0.0;
+		*rectLength = *maxFeret;
+		return;
+	}
+
+	/* Initial positions of the calipers for the first edge (0, 1) */
+	ux = hullX[1] - hullX[0];
+	uy = hullY[1] - hullY[0];
+	j = k = m = 1;
+	for (i = 0; i < hullNum; i++) {
+		if (area2(hullX[0], hullY[0], hullX[1], hullY[1], hullX[i], hullY[i]) >
+			area2(hullX[0], hullY[0], hullX[1], hullY[1], hullX[j], hullY[j])) j = i;
+		if (ux * hullX[i] + uy * hullY[i] > ux * hullX[k] + uy * hullY[k]) k = i;
+		if (ux * hullX[i] + uy * hullY[i] < ux * hullX[m] + uy * hullY[m]) m = i;
+	}
+
+	/* Rotate the calipers around the hull: the projections on a direction are unimodal
+	   along the convex hull, so every pointer moves only forward */
+	for (i = 0; i < hullNum; i++) {
+		i1 = (i + 1) % hullNum;
+		edgeLength = distance(hullX[i], hullY[i], hullX[i1], hullY[i1]);
+		ux = (hullX[i1] - hullX[i]) / edgeLength;
+		uy = (hullY[i1] - hullY[i]) / edgeLength;
+
+		/* Antipodal point of the edge: on the ties (edge of the hull parallel to the current
+		   edge) the pointer goes to the last point, so the pairs of the parallel edges are
+		   checked with the both edges as the current one */
+		for (steps = 0; steps < hullNum; steps++) {
+			if (area2(hullX[i], hullY[i], hullX[i1], hullY[i1], hullX[(j + 1) % hullNum],
+				hullY[(j + 1) % hullNum]) >= area2(hullX[i], hullY[i], hullX[i1], hullY[i1],
+				hullX[j], hullY[j]) * (1.0 - AREA_RTOL)) {
+				j = (j + 1) % hullNum;
+			} else {
+				break;
+			}
+		}
+
+		/* Points with the maximum and minimum projections on the edge direction */
+		for (steps = 0; steps < hullNum; steps++) {
+			if (ux * hullX[(k + 1) % hullNum] + uy * hullY[(k + 1) % hullNum] >=
+				ux * hullX[k] + uy * hullY[k]) {
+				k = (k + 1) % hullNum;
+			} else {
+				break;
+			}
+		}
+		for (steps = 0; steps < hullNum; steps++) {
+			if (ux * hullX[(m + 1) % hullNum] + uy * hullY[(m + 1) % hullNum] <=
+				ux * hullX[m] + uy * hullY[m]) {
+				m = (m + 1) % hullNum;
+			} else {
+				break;
+			}
+		}
+
+		/* max Feret: the diameter is reached at one of the antipodal pairs */
+		d = distance(hullX[i], hullY[i], hullX[j], hullY[j]);
+		if (d > *maxFeret) *maxFeret = d;
+		d = distance(hullX[i1], hullY[i1], hullX[j], hullY[j]);
+		if (d > *maxFeret) *maxFeret = d;
+
+		/* min Feret: the minimum width is reached with one side flush with an edge */
+		width = area2(hullX[i], hullY[i], hullX[i1], hullY[i1], hullX[j], hullY[j]) / edgeLength;
+		if (width < *minFeret) *minFeret = width;
+
+		/* Bounding rectangle: minimum area rectangle has a side collinear with an edge.
+		   Several edges often give the same area (e.g. for triangles), in this case
+		   the rectangle with the smallest width is taken */
+		extent = (ux * hullX[k] + uy * hullY[k]) - (ux * hullX[m] + uy * hullY[m]);
+		if (extent * width < minArea * (1.0 - AREA_RTOL) || (extent * width <= minArea * 
+			(1.0 + AREA_RTOL) && ((extent > width) ? width : extent) < *rectWidth)) {
+			if (extent * width < minArea) minArea = extent * width;
+			*rectLength = (extent > width) ? extent : width;
+			*rectWidth = (extent > width) ? width : extent;
+		}
+	}
+} /* fcn calc_feret_diameters */
+
+
+static double area2(double Ax, double Ay, double Bx, double By, double Cx, double Cy) {
+	/* Doubled area of the triangle ABC (positive for counter-clockwise order) */
+	return (Bx - Ax) * (Cy - Ay) - (By - Ay) * (Cx - Ax);
+} /* fcn area2 */
+
+
+static double distance(double Ax, double Ay, double Bx, double By) {
+	/* Distance between the two points */
+	return sqrt(pow(Bx - Ax, 2) + pow(By - Ay, 2));
+} /* fcn distance */
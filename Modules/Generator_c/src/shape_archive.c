@@ -0,0 +1,279 @@
+/*========================================================================
+  Module with the archive of the evaluated particle shapes. Every search
+  evaluates thousands of shapes and keeps only the global best, but many
+  of the discarded shapes are good answers for the later targets drawn
+  from the same distribution. The archive keeps the radii and the
+  circularity, convexity and elongation of the evaluated shapes in the
+  cells of the grid (cell size is usually the precision limit) indexed by
+  the hash table, so the shape within the tolerance of the target is
+  found by checking the neighbouring cells only. The archive is bounded:
+  the slots are reused as the ring buffer (the oldest shape is replaced)
+  and the number of the shapes in one cell is limited, so the shapes
+  close to the current target do not push all the other shapes out.
+  The found shape is taken out of the archive (it is used only once).
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "shape_archive.h"
+
+/* Maximum grid index of one parameter (21 bits of the packed cell) */
+#define ARCHIVE_MAX_INDEX 2097151
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for the grid index of the value */
+static long long grid_index(double value, double cellSize);
+/* Function for packing the grid indexes of the cell */
+static long long pack_cell(long long ic, long long iv, long long ie);
+/* Function for the bucket of the packed cell */
+static int bucket_of(const shapeArchive_t *archive, long long cell);
+/* Function for unlinking the slot from its bucket and making the slot empty */
+static void remove_slot(shapeArchive_t *archive, int slot);
+/* Function for the slot of the closest shape within the tolerance of the target (-1 - none) */
+static int find_closest(const shapeArchive_t *archive, const double *target, double tolerance,
+	double *distance);
+
+
+shapeArchive_t* shape_archive_create(int nDim, int capacity, double cellSize, int maxPerCell) {
+	/* Function for creation of the empty archive (the hash table has at least 2 x capacity
+	   buckets, so the chains are short)
+	   nDim       - number of the particle dimensions (radii) of the shapes
+	   capacity   - maximum number of the shapes
+	   cellSize   - size of the grid cell in circularity, convexity and elongation
+	   maxPerCell - maximum number of the shapes in one cell
+	   return:
+	   archive    - pointer to the archive (free it with shape_archive_free) */
+
+	int i;
+	shapeArchive_t *archive = (shapeArchive_t*) malloc (sizeof(shapeArchive_t));
+	if (NULL == archive) print_error_and_exit();
+
+	archive->nDim = nDim;
+	archive->capacity = (capacity > 0) ? capacity : 1;
+	archive->maxPerCell = (maxPerCell > 0) ? maxPerCell : 1;
+	archive->cellSize = (cellSize > 0.0) ? cellSize : 0.01;
+	archive->tableBits = 1;
+	while ((1 << archive->tableBits) < 2 * archive->capacity) {
+		archive->tableBits++;
+	}
+	archive->tableSize = 1 << archive->tableBits;
+	archive->cursor = 0;
+	archive->count = 0;
+	archive->hits = 0;
+
+	archive->head = (int*) malloc ((archive->tableSize + archive->capacity) * sizeof(int));
+	archive->cell = (long long*) malloc (archive->capacity * sizeof(long long));
+	archive->params = (double*) malloc ((long) archive->capacity * (3 + nDim) * sizeof(double));
+	if ((NULL == archive->head) || (NULL == archive->cell) || (NULL == archive->params)) {
+		print_error_and_exit();
+	}
+	archive->next = archive->head + archive->tableSize;
+	archive->dims = archive->params + 3 * archive->capacity;
+	for (i = 0; i < archive->tableSize; i++) {
+		archive->head[i] = -1;
+	}
+	for (i = 0; i < archive->capacity; i++) {
+		archive->next[i] = -1;
+		archive->cell[i] = -1;
+	}
+	return archive;
+} /* fcn shape_archive_create */
+
+
+void shape_archive_free(shapeArchive_t *archive) {
+	/* Function for the memory free of the archive
+	   archive - pointer to the archive (NULL is allowed) */
+
+	if (NULL == archive) return;
+	free(archive->head);
+	free(archive->cell);
+	free(archive->params);
+	free(archive);
+} /* fcn shape_archive_free */
+
+
+void shape_archive_insert(shapeArchive_t *archive, const double *dims, const double *params) {
+	/* Function for adding the evaluated shape to the archive. The shape is skipped if its
+	   cell already has maxPerCell shapes, otherwise it replaces the shape in the oldest slot
+	   archive - pointer to the archive
+	   dims    - radii of the shape (nDim)
+	   params  - circularity, convexity and elongation of the shape */
+
+	int i, slot, bucket, inCell;
+	long long cell = pack_cell(grid_index(params[0], archive->cellSize),
+		grid_index(params[1], archive->cellSize), grid_index(params[2], archive->cellSize));
+
+	/* Count the shapes of the cell */
+	bucket = bucket_of(archive, cell);
+	inCell = 0;
+	for (slot = archive->head[bucket]; slot >= 0; slot = archive->next[slot]) {
+		if (archive->cell[slot] == cell) inCell++;
+	}
+	if (inCell >= archive->maxPerCell) return;
+
+	/* Replace the oldest slot */
+	slot = archive->cursor;
+	archive->cursor = (archive->cursor + 1) % archive->capacity;
+	if (archive->cell[slot] >= 0) {
+		remove_slot(archive, slot);
+	}
+	for (i = 0; i < 3; i++) {
+		archive->params[3 * slot + i] = params[i];
+	}
+	for (i = 0; i < archive->nDim; i++) {
+		archive->dims[(long) slot * archive->nDim + i] = dims[i];
+	}
+	archive->cell[slot] = cell;
+	archive->next[slot] = archive->head[bucket];
+	archive->head[bucket] = slot;
+	archive->count++;
+} /* fcn shape_archive_insert */
+
+
+int shape_archive_take(shapeArchive_t *archive, const double *target, double tolerance,
+	double *dims, double *distance) {
+	/* Function for taking the closest shape within the tolerance of the target out of the
+	   archive. The cells within the tolerance in every parameter are checked
+	   archive   - pointer to the archive
+	   target    - target circularity, convexity and elongation
+	   tolerance - maximum distance from the target (usually the precision limit)
+	   Return:
+	   dims      - radii of the found shape (nDim, NULL - not needed)
+	   distance  - distance of the found shape to the target (NULL - not needed)
+	   return:
+	   found     - 1 if the shape is found and taken out, 0 otherwise */
+
+	int i;
+	double bestDistance;
+	int best = find_closest(archive, target, tolerance, &bestDistance);
+	
+	if (best < 0) return 0;
+	if (NULL != dims) {
+		for (i = 0; i < archive->nDim; i++) {
+			dims[i] = archive->dims[(long) best * archive->nDim + i];
+		}
+	}
+	if (NULL != distance) {
+		*distance = bestDistance;
+	}
+	remove_slot(archive, best);
+	archive->hits++;
+	return 1;
+} /* fcn shape_archive_take */
+
+
+int shape_archive_remove(shapeArchive_t *archive, const double *params) {
+	/* Function for removing the shape with exactly the same parameters. The global best of
+	   the search is one of the archived shapes, it is removed when the search is finished,
+	   so the same shape is not given to the next target
+	   archive - pointer to the archive
+	   params  - circularity, convexity and elongation of the shape
+	   return:
+	   removed - 1 if the shape is removed, 0 if there is no such shape */
+
+	int slot = find_closest(archive, params, 0.0, NULL);
+	if (slot < 0) return 0;
+	remove_slot(archive, slot);
+	return 1;
+} /* fcn shape_archive_remove */
+
+
+static int find_closest(const shapeArchive_t *archive, const double *target, double tolerance,
+	double *distance) {
+	/* Function for the slot of the closest shape within the tolerance of the target. The
+	   cells within the tolerance in every parameter are checked
+	   archive   - pointer to the archive
+	   target    - target circularity, convexity and elongation
+	   tolerance - maximum distance from the target
+	   Return:
+	   distance  - distance of the found shape to the target (NULL - not needed)
+	   return:
+	   slot      - slot of the found shape (-1 - no shape within the tolerance) */
+
+	int slot, best = -1;
+	long long ic, iv, ie, cell;
+	long long r = (long long) ceil(tolerance / archive->cellSize);
+	long long c0 = grid_index(target[0], archive->cellSize);
+	long long v0 = grid_index(target[1], archive->cellSize);
+	long long e0 = grid_index(target[2], archive->cellSize);
+	double value, bestValue = tolerance * tolerance;
+	const double *params;
+
+	if (archive->count == 0) return -1;
+	for (ic = c0 - r; ic <= c0 + r; ic++) {
+		for (iv = v0 - r; iv <= v0 + r; iv++) {
+			for (ie = e0 - r; ie <= e0 + r; ie++) {
+				if ((ic < 0) || (iv < 0) || (ie < 0) || (ic > ARCHIVE_MAX_INDEX) ||
+					(iv > ARCHIVE_MAX_INDEX) || (ie > ARCHIVE_MAX_INDEX)) continue;
+				cell = pack_cell(ic, iv, ie);
+				for (slot = archive->head[bucket_of(archive, cell)]; slot >= 0; slot = archive->next[slot]) {
+					if (archive->cell[slot] != cell) continue;
+					params = archive->params + 3 * slot;
+					value = pow(params[0] - target[0], 2) + pow(params[1] - target[1], 2) +
+						pow(params[2] - target[2], 2);
+					if (value <= bestValue) {
+						bestValue = value;
+						best = slot;
+					}
+				}
+			}
+		}
+	}
+	if ((best >= 0) && (NULL != distance)) {
+		*distance = sqrt(bestValue);
+	}
+	return best;
+} /* fcn find_closest */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
+
+
+static long long grid_index(double value, double cellSize) {
+	/* Function for the grid index of the value (clamped to the range of the packed cell)
+	   value    - circularity, convexity or elongation
+	   cellSize - size of the grid cell
+	   return:
+	   index    - grid index */
+
+	double index = floor(value / cellSize);
+	if (!(index > 0.0)) return 0;
+	if (index > ARCHIVE_MAX_INDEX) return ARCHIVE_MAX_INDEX;
+	return (long long) index;
+} /* fcn grid_index */
+
+
+static long long pack_cell(long long ic, long long iv, long long ie) {
+	/* Function for packing the grid indexes of the cell (21 bits for every index) */
+	return (ic << 42) | (iv << 21) | ie;
+} /* fcn pack_cell */
+
+
+static int bucket_of(const shapeArchive_t *archive, long long cell) {
+	/* Function for the bucket of the packed cell (multiplicative hash) */
+	return (int) (((unsigned long long) cell * 0x9E3779B97F4A7C15ULL) >> (64 - archive->tableBits));
+} /* fcn bucket_of */
+
+
+static void remove_slot(shapeArchive_t *archive, int slot) {
+	/* Function for unlinking the slot from its bucket and making the slot empty
+	   archive - pointer to the archive
+	   slot    - occupied slot */
+
+	int bucket = bucket_of(archive, archive->cell[slot]);
+	int *link = archive->head + bucket;
+	while (*link != slot) {
+		link = archive->next + *link;
+	}
+	*link = archive->next[slot];
+	archive->next[slot] = -1;
+	archive->cell[slot] = -1;
+	archive->count--;
+} /* fcn remove_slot */
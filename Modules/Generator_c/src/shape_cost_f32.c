@@ -0,0 +1,291 @@
+/*========================================================================
+  Module with the single precision (float) batch kernel of the cost
+  function parameters: circularity, convexity and elongation of many
+  particles. The particles are processed in blocks of SHAPE_COST_LANES
+  and the coordinates are stored as structure of arrays (all the lanes of
+  one dims point are contiguous), so the loops over the lanes can be
+  auto-vectorized by the compiler. Errors are about 1e-7 for circularity
+  and convexity; elongation of the shapes with an ill-conditioned
+  orientation (Ixx close to Iyy) can differ up to about 1e-3, which is
+  enough to compare the candidates of the search. The float64 kernel
+  (compute_shape_cost_params_batch) stays the reference.
+  ========================================================================*/
+
+#include <stdlib.h>
+#include <stdio.h>
+#include <math.h>
+#include "get_particle_parameters.h"
+#include "shape_cost_f32.h"
+
+/* Number of the particles processed together (lanes of the vectorized loops) */
+#define SHAPE_COST_LANES 64
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+
+/* Function for calculation of the convex hull perimeter of one particle (one lane) */
+static float calc_hull_perimeter_f32(int nDim, const float *X, const float *Y, int lane,
+	float *hullX, float *hullY);
+
+
+void compute_shape_cost_params_batch_f32(const float *dims, int n, int nDim, float *out) {
+	/* Function for calculation of circularity, convexity and elongation of n particles
+	   in single precision (same definitions as in compute_shape_cost_params_ws)
+	   dims - contiguous array of dimensions of the particles (n rows, nDim columns)
+	   n    - number of the particles
+	   nDim - number of the particle dimensions
+	   out  - output array (n rows: circularity, convexity, elongation) */
+
+	int i, i1, l, lanes, start;
+	float centreRadius = 5.0f;  /* Radius of the central polygon */
+	float x0, y0, x1, y1, cr, p, c, s, r, cos2, sin2, diff;
+	double dN = 2 * M_PI / nDim;  /* How many degrees in one section */
+
+	/* One block of memory: cos/sin tables, coordinates of the dims points
+	   (nDim x lanes), hull stack of one lane and the per-lane accumulators */
+	float *buffer = (float*) malloc ((2 * nDim + 2 * nDim * SHAPE_COST_LANES + 2 * nDim +
+		15 * SHAPE_COST_LANES) * sizeof(float));
+	if (NULL == buffer) print_error_and_exit();
+	float *cosTable = buffer;
+	float *sinTable = cosTable + nDim;
+	float *X = sinTable + nDim;
+	float *Y = X + nDim * SHAPE_COST_LANES;
+	float *hullX = Y + nDim * SHAPE_COST_LANES;
+	float *hullY = hullX + nDim;
+	float *area = hullY + nDim;  /* Doubled area of the polygon */
+	float *cx = area + SHAPE_COST_LANES;  /* Centre of mass */
+	float *cy = cx + SHAPE_COST_LANES;
+	float *perimeter = cy + SHAPE_COST_LANES;
+	float *sxx = perimeter + SHAPE_COST_LANES;  /* Second moments about the centre of mass */
+	float *syy = sxx + SHAPE_COST_LANES;
+	float *sxy = syy + SHAPE_COST_LANES;
+	float *ux = sxy + SHAPE_COST_LANES;  /* Unit direction of the length projection */
+	float *uy = ux + SHAPE_COST_LANES;
+	float *wx = uy + SHAPE_COST_LANES;  /* Unit direction of the width projection */
+	float *wy = wx + SHAPE_COST_LANES;
+	float *pMax = wy + SHAPE_COST_LANES;  /* Extreme projections on the length direction */
+	float *pMin = pMax + SHAPE_COST_LANES;
+	float *qMax = pMin + SHAPE_COST_LANES;  /* Extreme projections on the width direction */
+	float *qMin = qMax + SHAPE_COST_LANES;
+
+	for (i = 0; i < nDim; i++) {
+		cosTable[i] = (float) cos(i * dN);
+		sinTable[i] = (float) sin(i * dN);
+	}
+
+	for (start = 0; start < n; start += SHAPE_COST_LANES) {
+		lanes = (n - start < SHAPE_COST_LANES) ? n - start : SHAPE_COST_LANES;
+
+		/* Coordinates of the dims points (transposed to the structure of arrays).
+		   Unused lanes of the last block are filled with the regular polygon */
+		for (i = 0; i < nDim; i++) {
+			for (l = 0; l < SHAPE_COST_LANES; l++) {
+				r = (l < lanes) ? dims[(long)(start + l) * nDim + i] : 1.0f;
+				r = r * (180.0f - centreRadius) + centreRadius;
+				X[i * SHAPE_COST_LANES + l] = cosTable[i] * r;
+				Y[i * SHAPE_COST_LANES + l] = sinTable[i] * r;
+			}
+		}
+
+		/* Area, centre of mass and perimeter */
+		for (l = 0; l < SHAPE_COST_LANES; l++) {
+			area[l] = cx[l] = cy[l] = perimeter[l] = 0.0f;
+		}
+		for (i = 0; i < nDim; i++) {
+			i1 = (i + 1 == nDim) ? 0 : i + 1;
+			for (l = 0; l < SHAPE_COST_LANES; l++) {
+				x0 = X[i * SHAPE_COST_LANES + l];
+				y0 = Y[i * SHAPE_COST_LANES + l];
+				x1 = X[i1 * SHAPE_COST_LANES + l];
+				y1 = Y[i1 * SHAPE_COST_LANES + l];
+				cr = x0 * y1 - x1 * y0;
+				area[l] += cr;
+				cx[l] += (x0 + x1) * cr;
+				cy[l] += (y0 + y1) * cr;
+				perimeter[l] += sqrtf((x1 - x0) * (x1 - x0) + (y1 - y0) * (y1 - y0));
+			}
+		}
+		for (l = 0; l < SHAPE_COST_LANES; l++) {
+			cx[l] /= 3.0f * area[l];
+			cy[l] /= 3.0f * area[l];
+			sxx[l] = syy[l] = sxy[l] = 0.0f;
+		}
+
+		/* Moments of inertia with the coordinates relative to the centre of mass
+		   (no cancellation of the big terms in single precision) */
+		for (i = 0; i < nDim; i++) {
+			i1 = (i + 1 == nDim) ? 0 : i + 1;
+			for (l = 0; l < SHAPE_COST_LANES; l++) {
+				x0 = X[i * SHAPE_COST_LANES + l] - cx[l];
+				y0 = Y[i * SHAPE_COST_LANES + l] - cy[l];
+				x1 = X[i1 * SHAPE_COST_LANES + l] - cx[l];
+				y1 = Y[i1 * SHAPE_COST_LANES + l] - cy[l];
+				cr = x0 * y1 - x1 * y0;
+				sxx[l] += (y0 * y0 + y0 * y1 + y1 * y1) * cr;
+				syy[l] += (x0 * x0 + x0 * x1 + x1 * x1) * cr;
+				sxy[l] += (x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * cr;
+			}
+		}
+
+		/* Orientation of the major axis: theta = atan2(-Ixy, diff) / 2 is replaced by the
+		   half-angle formulas, the length direction is (sin(theta), -cos(theta)) and the
+		   width direction is (cos(theta), sin(theta)). If the axis is almost horizontal
+		   or vertical, the projection on X or Y axis is taken as in calc_projection_length */
+		for (l = 0; l < SHAPE_COST_LANES; l++) {
+			diff = (sxx[l] - syy[l]) / 24.0f;  /* (Ixx - Iyy) / 2 */
+			if (diff < 1 && diff > 0) diff = 1;  /* Same tricks as in calc_principal */
+			if (diff > -1 && diff < 0) diff = -1;
+			r = sqrtf(diff * diff + sxy[l] * sxy[l] / 576.0f);
+			cos2 = (r > 0) ? diff / r : 1.0f;
+			sin2 = (r > 0) ? -sxy[l] / (24.0f * r) : 0.0f;
+			c = sqrtf(fmaxf(0.0f, (1.0f + cos2) / 2));  /* cos(theta) >= 0 */
+			s = copysignf(sqrtf(fmaxf(0.0f, (1.0f - cos2) / 2)), sin2);
+			p = sqrtf(area[l] * 2 / (float) M_PI);  /* CE diameter */
+			if (fabsf(c) * p <= 0.5f) {  /* Horizontal length axis */
+				ux[l] = 1.0f;
+				uy[l] = 0.0f;
+			} else if (fabsf(s) * p <= 0.5f) {  /* Vertical length axis */
+				ux[l] = 0.0f;
+				uy[l] = 1.0f;
+			} else {
+				ux[l] = s;
+				uy[l] = -c;
+			}
+			if (fabsf(s) * p <= 0.5f) {  /* Horizontal width axis */
+				wx[l] = 1.0f;
+				wy[l] = 0.0f;
+			} else if (fabsf(c) * p <= 0.5f) {  /* Vertical width axis */
+				wx[l] = 0.0f;
+				wy[l] = 1.0f;
+			} else {
+				wx[l] = c;
+				wy[l] = s;
+			}
+			pMax[l] = qMax[l] = -INFINITY;
+			pMin[l] = qMin[l] = INFINITY;
+		}
+
+		/* Extents of the particle on the length and width directions (extreme projections
+		   of all the dims points are the same as for the convex hull points) */
+		for (i = 0; i < nDim; i++) {
+			for (l = 0; l < SHAPE_COST_LANES; l++) {
+				x0 = X[i * SHAPE_COST_LANES + l];
+				y0 = Y[i * SHAPE_COST_LANES + l];
+				p = ux[l] * x0 + uy[l] * y0;
+				pMax[l] = (p > pMax[l]) ? p : pMax[l];
+				pMin[l] = (p < pMin[l]) ? p : pMin[l];
+				p = wx[l] * x0 + wy[l] * y0;
+				qMax[l] = (p > qMax[l]) ? p : qMax[l];
+				qMin[l] = (p < qMin[l]) ? p : qMin[l];
+			}
+		}
+
+		/* Output of the parameters (convex hull is calculated lane by lane) */
+		for (l = 0; l < lanes; l++) {
+			p = (pMax[l] - pMin[l]);  /* Length */
+			r = (qMax[l] - qMin[l]);  /* Width */
+			out[3 * (start + l)] = 2 * sqrtf((float) M_PI * area[l] / 2) / perimeter[l];
+			out[3 * (start + l) + 1] = calc_hull_perimeter_f32(nDim, X, Y, l, hullX, hullY) /
+				perimeter[l];
+			out[3 * (start + l) + 2] = (r > p) ? 1.0f - p / r : 1.0f - r / p;
+		}
+	}
+	free(buffer);
+} /* fcn compute_shape_cost_params_batch_f32 */
+
+
+void shape_cost_accuracy_report(const double *dims, int n, int nDim, double *report) {
+	/* Function for comparison of the single precision kernel with the float64 kernel
+	   dims   - contiguous array of dimensions of the particles (n rows, nDim columns)
+	   n      - number of the particles
+	   nDim   - number of the particle dimensions
+	   report - output array with 6 values: maximum absolute errors of circularity,
+	            convexity and elongation, then mean absolute errors of them */
+
+	int i, k;
+	double err;
+	float *dimsF = (float*) malloc ((long)n * nDim * sizeof(float));
+	float *outF = (float*) malloc (3 * (long)n * sizeof(float));
+	double *outD = (double*) malloc (3 * (long)n * sizeof(double));
+	if (NULL == dimsF || NULL == outF || NULL == outD) print_error_and_exit();
+
+	for (i = 0; i < n * nDim; i++) {
+		dimsF[i] = (float) dims[i];
+	}
+	compute_shape_cost_params_batch(dims, n, nDim, outD);
+	compute_shape_cost_params_batch_f32(dimsF, n, nDim, outF);
+
+	for (k = 0; k < 6; k++) {
+		report[k] = 0.0;
+	}
+	for (i = 0; i < n; i++) {
+		for (k = 0; k < 3; k++) {
+			err = fabs((double) outF[3 * i + k] - outD[3 * i + k]);
+			if (err > report[k]) report[k] = err;
+			report[3 + k] += err / n;
+		}
+	}
+	free(dimsF);
+	free(outF);
+	free(outD);
+} /* fcn shape_cost_accuracy_report */
+
+
+static float calc_hull_perimeter_f32(int nDim, const float *X, const float *Y, int lane,
+	float *hullX, float *hullY) {
+	/* Function for calculation of the convex hull perimeter of one particle: Graham scan
+	   in the angular order starting from the leftmost point (as calc_convex_hull_coords)
+	   nDim  - number of the particle dimensions
+	   X     - pointer to array of X coord of dims points (nDim x SHAPE_COST_LANES)
+	   Y     - pointer to array of Y coord of dims points (nDim x SHAPE_COST_LANES)
+	   lane  - index of the particle in the block
+	   hullX - pointer to array of X coord of convex hull (nDim elements, stack)
+	   hullY - pointer to array of Y coord of convex hull (nDim elements, stack)
+	   return:
+	   perimeter of the convex hull */
+
+	int i, k;
+	int start = 0;
+	int ptr = -1;  /* pointer to the top element of the stack */
+	float x, y;
+	float perimeter = 0.0f;
+
+	for (i = 1; i < nDim; i++) {
+		if (X[i * SHAPE_COST_LANES + lane] < X[start * SHAPE_COST_LANES + lane] ||
+			(X[i * SHAPE_COST_LANES + lane] == X[start * SHAPE_COST_LANES + lane] &&
+			Y[i * SHAPE_COST_LANES + lane] < Y[start * SHAPE_COST_LANES + lane])) {
+			start = i;
+		}
+	}
+	for (k = 0; k < nDim; k++) {
+		i = (start + k) % nDim;
+		x = X[i * SHAPE_COST_LANES + lane];
+		y = Y[i * SHAPE_COST_LANES + lane];
+		while (ptr >= 1 && (hullX[ptr] - hullX[ptr - 1]) * (y - hullY[ptr - 1]) -
+			(hullY[ptr] - hullY[ptr - 1]) * (x - hullX[ptr - 1]) <= 0) {
+			ptr--;
+		}
+		ptr++;
+		hullX[ptr] = x;
+		hullY[ptr] = y;
+	}
+	/* Close the hull: remove the last points making a non-convex turn to the start point */
+	while (ptr >= 2 && (hullX[ptr] - hullX[ptr - 1]) * (hullY[0] - hullY[ptr - 1]) -
+		(hullY[ptr] - hullY[ptr - 1]) * (hullX[0] - hullX[ptr - 1]) <= 0) {
+		ptr--;
+	}
+
+	for (i = 0; i <= ptr; i++) {
+		k = (i == ptr) ? 0 : i + 1;
+		perimeter += sqrtf((hullX[k] - hullX[i]) * (hullX[k] - hullX[i]) +
+			(hullY[k] - hullY[i]) * (hullY[k] - hullY[i]));
+	}
+	return perimeter;
+} /* fcn calc_hull_perimeter_f32 */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
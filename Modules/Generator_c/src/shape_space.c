@@ -0,0 +1,238 @@
+/*========================================================================
+  Module with the decision space of the particle shape search. Instead of
+  nDim radii the search can optimize a few radial Fourier coefficients:
+  r(phi) = a0 + sum_k (a_k * cos(k * phi) + b_k * sin(k * phi)) / k
+  The mean radius a0 is the first variable, the amplitudes a_k and b_k
+  are the next variables shifted by 0.5 (so all variables are in the
+  range [0, 1]), the amplitude of the k-th harmonic is damped by 1 / k.
+  The radii are calculated at the directions i * 2*pi/nDim and clamped to
+  [0, 1]. The number of the variables does not depend on nDim and the
+  shapes are smoother than with the independent radii.
+  ========================================================================*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include "data_types.h"
+#include "get_particle_parameters.h"
+#include "shape_space.h"
+
+/* Function for printing the error end exiting the program */
+static void print_error_and_exit(void);
+/* Function for growing the scratch buffer of the space to n rows of the radii */
+static void shape_space_reserve(shapeSpace_t *space, int n);
+
+
+shapeSpace_t* shape_space_create(int nDim, int nHarmonics) {
+	/* Function for creation of the decision space. The number of the harmonics is limited
+	   by (nDim - 1) / 2 (higher harmonics are not resolved by nDim radii)
+	   nDim       - number of the particle dimensions
+	   nHarmonics - number of the harmonics (0 - radii are the decision variables)
+	   return:
+	   space      - pointer to the decision space (free it with shape_space_free) */
+
+	int i, k;
+	double phi;
+	shapeSpace_t *space = (shapeSpace_t*) malloc (sizeof(shapeSpace_t));
+	if (NULL == space) print_error_and_exit();
+
+	if (nHarmonics > (nDim - 1) / 2) nHarmonics = (nDim - 1) / 2;
+	if (nHarmonics < 0) nHarmonics = 0;
+	space->nDim = nDim;
+	space->nHarmonics = nHarmonics;
+	space->nVar = (nHarmonics > 0) ? 1 + 2 * nHarmonics : nDim;
+	space->basis = NULL;
+	space->dims = NULL;
+	space->capacity = 0;
+	if (nHarmonics > 0) {
+		space->basis = (double*) malloc (2 * nHarmonics * nDim * sizeof(double));
+		if (NULL == space->basis) print_error_and_exit();
+		for (k = 1; k <= nHarmonics; k++) {
+			for (i = 0; i < nDim; i++) {
+				phi = k * i * 2.0 * M_PI / nDim;
+				space->basis[(2 * k - 2) * nDim + i] = cos(phi) / k;
+				space->basis[(2 * k - 1) * nDim + i] = sin(phi) / k;
+			}
+		}
+	}
+	return space;
+} /* fcn shape_space_create */
+
+
+void shape_space_free(shapeSpace_t *space) {
+	/* Function for the memory free of the decision space
+	   space - pointer to the decision space (NULL - nothing to free) */
+	if (NULL == space) return;
+	free(space->basis);
+	free(space->dims);
+	free(space);
+} /* fcn shape_space_free */
+
+
+void shape_space_to_dims(const shapeSpace_t *space, const double *position, double *dims) {
+	/* Function for expansion of the decision variables to nDim radii (inverse transform,
+	   the radii are clamped to [0, 1])
+	   space    - pointer to the decision space
+	   position - decision variables (nVar)
+	   dims     - output array with the radii (nDim) */
+
+	int i, j;
+	int nDim = space->nDim;
+	double amplitude;
+
+	if (space->nHarmonics == 0) {
+		for (i = 0; i < nDim; i++) {
+			dims[i] = position[i];
+		}
+		return;
+	}
+	for (i = 0; i < nDim; i++) {
+		dims[i] = position[0];
+	}
+	for (j = 0; j < 2 * space->nHarmonics; j++) {
+		amplitude = position[j + 1] - 0.5;
+		for (i = 0; i < nDim; i++) {
+			dims[i] += amplitude * space->basis[j * nDim + i];
+		}
+	}
+	for (i = 0; i < nDim; i++) {
+		dims[i] = (dims[i] < 0.0) ? 0.0 : ((dims[i] > 1.0) ? 1.0 : dims[i]);
+	}
+} /* fcn shape_space_to_dims */
+
+
+void shape_space_from_dims(const shapeSpace_t *space, const double *dims, double *position) {
+	/* Function for the decision variables of the radii (forward transform: the first
+	   harmonics of the discrete Fourier transform, clamped to [0, 1])
+	   space    - pointer to the decision space
+	   dims     - radii (nDim)
+	   position - output array with the decision variables (nVar) */
+
+	int i, j, k;
+	int nDim = space->nDim;
+	double sum;
+
+	if (space->nHarmonics == 0) {
+		for (i = 0; i < nDim; i++) {
+			position[i] = dims[i];
+		}
+		return;
+	}
+	sum = 0.0;
+	for (i = 0; i < nDim; i++) {
+		sum += dims[i];
+	}
+	position[0] = sum / nDim;
+	for (j = 0; j < 2 * space->nHarmonics; j++) {
+		k = j / 2 + 1;
+		sum = 0.0;
+		for (i = 0; i < nDim; i++) {
+			sum += dims[i] * space->basis[j * nDim + i];
+		}
+		position[j + 1] = 2.0 * k * k * sum / nDim + 0.5;  /* basis is damped by 1 / k */
+	}
+	for (j = 0; j < space->nVar; j++) {
+		position[j] = (position[j] < 0.0) ? 0.0 : ((position[j] > 1.0) ? 1.0 : position[j]);
+	}
+} /* fcn shape_space_from_dims */
+
+
+void shape_space_jacobian(const shapeSpace_t *space, const double *dims, const double *jacDims,
+	int nRows, int nVar, double *jacVar) {
+	/* Function for the jacobian by the decision variables of the jacobian by the radii (chain
+	   rule through the inverse transform, the clamped radii do not depend on the variables)
+	   space   - pointer to the decision space (NULL - decision variables are the radii)
+	   dims    - radii of the position (nDim)
+	   jacDims - jacobian by the radii (nRows x nDim)
+	   nRows   - number of the rows of the jacobian
+	   nVar    - number of the decision variables
+	   jacVar  - output jacobian by the decision variables (nRows x nVar) */
+
+	int i, j, k;
+	int nDim;
+	double value;
+
+	if ((NULL == space) || (space->nHarmonics == 0)) {
+		for (i = 0; i < nRows * nVar; i++) {
+			jacVar[i] = jacDims[i];
+		}
+		return;
+	}
+	nDim = space->nDim;
+	for (k = 0; k < nRows; k++) {
+		value = 0.0;
+		for (i = 0; i < nDim; i++) {
+			if ((dims[i] > 0.0) && (dims[i] < 1.0)) value += jacDims[k * nDim + i];
+		}
+		jacVar[k * nVar] = value;
+		for (j = 0; j < 2 * space->nHarmonics; j++) {
+			value = 0.0;
+			for (i = 0; i < nDim; i++) {
+				if ((dims[i] > 0.0) && (dims[i] < 1.0)) {
+					value += jacDims[k * nDim + i] * space->basis[j * nDim + i];
+				}
+			}
+			jacVar[k * nVar + j + 1] = value;
+		}
+	}
+} /* fcn shape_space_jacobian */
+
+
+const double* shape_space_dims(shapeSpace_t *space, const double *position) {
+	/* Function for the radii of one position of the decision space (the position is
+	   expanded to the first row of the scratch buffer of the space)
+	   space    - pointer to the decision space (NULL - position is the radii)
+	   position - decision variables (nVar)
+	   Return:
+	   dims     - pointer to the radii (valid till the next call with this space) */
+	
+	if ((NULL == space) || (space->nHarmonics == 0)) return position;
+	shape_space_reserve(space, 1);
+	shape_space_to_dims(space, position, space->dims);
+	return space->dims;
+} /* fcn shape_space_dims */
+
+
+void shape_space_cost_params_batch(shapeSpace_t *space, const double *positions, int n, int nVar,
+	double *out) {
+	/* Function for calculation of circularity, convexity and elongation of n positions of
+	   the decision space. The positions are expanded to the radii in the scratch buffer of
+	   the space (it grows to the largest n) and evaluated in one batch
+	   space     - pointer to the decision space (NULL - positions are the radii)
+	   positions - decision variables (n x nVar array)
+	   n         - number of the positions
+	   nVar      - number of the decision variables
+	   out       - output array with circularity, convexity and elongation (n x 3) */
+
+	int i;
+
+	if ((NULL == space) || (space->nHarmonics == 0)) {
+		compute_shape_cost_params_batch(positions, n, nVar, out);
+		return;
+	}
+	shape_space_reserve(space, n);
+	for (i = 0; i < n; i++) {
+		shape_space_to_dims(space, positions + (long) i * nVar, space->dims + (long) i * space->nDim);
+	}
+	compute_shape_cost_params_batch(space->dims, n, space->nDim, out);
+} /* fcn shape_space_cost_params_batch */
+
+
+static void shape_space_reserve(shapeSpace_t *space, int n) {
+	/* Function for growing the scratch buffer of the space to n rows of the radii
+	   space - pointer to the decision space
+	   n     - number of the rows */
+	
+	if (n <= space->capacity) return;
+	free(space->dims);
+	space->dims = (double*) malloc ((long) n * space->nDim * sizeof(double));
+	if (NULL == space->dims) print_error_and_exit();
+	space->capacity = n;
+} /* fcn shape_space_reserve */
+
+
+static void print_error_and_exit(void) {
+	/* Function for printing the error end exiting the program */
+	printf("Error in memory allocation!");
+	exit(1);
+} /* fcn print_error_and_exit */
@@ -3,7 +3,8 @@
 from PyQt5.QtWidgets import QLabel
 from PyQt5.QtGui import (QPainter, QPolygon, QColor, QPen, QBrush)
 from PyQt5.QtCore import Qt, QPoint
-import math as m
+import numpy as np
+from Modules.TrigTable import TrigTable
 
 class ImageLabel(QLabel):
     def __init__(self, parent=None, N=12, smallRadius=20, drawParticle=False):
@@ -39,31 +40,13 @@ class ImageLabel(QLabel):
     
     def calc_corners_coordinates(self):
         """Method for determination the small and big polygon corners coordinates"""
-        # Empty the arrays
-        self.bigPolCorners = []
-        self.smallPolCorners = []
-        # Calculate the coordinates
-        for i in range(self.N):
-            angle = i * 2 * m.pi/self.N
-            x = int(round(180 + self.smallRadius * m.cos(angle)))
-            y = int(round(180 + self.smallRadius * m.sin(angle)))
-            self.smallPolCorners.append((x, y))
-            
-            x = int(round(180 + self.bigRadius * m.cos(angle)))
-            y = int(round(180 + self.bigRadius * m.sin(angle)))
-            self.bigPolCorners.append((x, y))
+        self.smallPolCorners = TrigTable.get_int_vertices([self.smallRadius] * self.N, 180)
+        self.bigPolCorners = TrigTable.get_int_vertices([self.bigRadius] * self.N, 180)
             
     def calc_particle_corner_coordinates(self):
         """Method for determination the particle polygon corners coordinates"""
-        # Empty the array
-        self.partPolCorners = []
-        # Calculate the coordinates
-        for i in range(self.N):
-            angle = i * 2 * m.pi/self.N
-            radius = self.dimsValues[i] * (self.bigRadius - self.smallRadius)
-            x = int(round(180 + (self.smallRadius + radius) * m.cos(angle)))
-            y = int(round(180 + (self.smallRadius + radius) * m.sin(angle)))
-            self.partPolCorners.append((x, y))     
+        radius = np.asarray(self.dimsValues[:self.N]) * (self.bigRadius - self.smallRadius)
+        self.partPolCorners = TrigTable.get_int_vertices(self.smallRadius + radius, 180)
         
     def paintEvent(self, event):
         """Method override of the painting on th elabel""" 
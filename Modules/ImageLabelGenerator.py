@@ -3,7 +3,8 @@
 from PyQt5.QtWidgets import QLabel
 from PyQt5.QtGui import (QPainter, QPolygon, QColor, QPen, QBrush, QPixmap)
 from PyQt5.QtCore import Qt, QPoint
-import math as m
+import numpy as np
+from Modules.TrigTable import TrigTable
 
 class ImageLabelGenerator(QLabel):
     def __init__(self, parent = None, drawFlag = "None"):
@@ -26,15 +27,8 @@ class ImageLabelGenerator(QLabel):
             
     def calc_particle_corner_coordinates(self):
         """Method for determination the particle polygon corners coordinates"""
-        # Empty the array
-        self.partPolCorners = []
-        # Calculate the coordinates
-        for i in range(self.N):
-            angle = i * 2 * m.pi/self.N
-            radius = self.dimsValues[i] * self.bigRadius
-            x = int(round(120 + radius * m.cos(angle)))
-            y = int(round(120 + radius * m.sin(angle)))
-            self.partPolCorners.append((x, y))     
+        radius = np.asarray(self.dimsValues[:self.N]) * self.bigRadius
+        self.partPolCorners = TrigTable.get_int_vertices(radius, 120)
         
     def paintEvent(self, event):
         """Method override of the painting on th elabel""" 
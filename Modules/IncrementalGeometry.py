@@ -0,0 +1,216 @@
+#================================================================================
+# Incremental geometry of the particle polygon. When only one axis (slider)
+# changes, only two shoelace terms, two perimeter edges and two inertia terms
+# change, and the convex hull changes only locally around the moved vertex.
+# The state is updated in O(1) amortized time instead of the full calculation.
+# The parameters derived from the state still need the NumPy projections and
+# Feret diameters of the hull, so for a single particle the compiled full
+# calculation (Particle.get_particle_parameters) is faster and is used by the
+# tester; the state is for the coordinate-wise moves in Python.
+#================================================================================
+
+from math import sqrt
+import numpy as np
+from Modules.ParticleBatch import ParticleBatch, paramsDtype
+from Modules.TrigTable import TrigTable
+
+
+class IncrementalGeometry():
+    """Class with the geometry state of the particle polygon updated axis by axis"""
+
+    def __init__(self, dimsValues, resyncPeriod=None):
+        """Constructor of the class
+           dimsValues: Dimensions of the particle (set of values (0.0 - 1.0))
+           resyncPeriod: Number of the updates after which all the sums are recalculated
+                         from scratch to avoid the accumulation of the rounding errors
+                         (nDim by default, which keeps the update O(1) amortized)
+        """
+        self.centreRadius = 5.0  # Radius of the central polygon
+        self.particleBatch = ParticleBatch()  # Calculation of the parameters from the geometry
+        self.resyncPeriod = resyncPeriod
+        self.reset(dimsValues)
+
+    def reset(self, dimsValues):
+        """Function for the full calculation of the geometry state (O(nDim))"""
+        self.nDim = len(dimsValues)
+        self.dimsValues = [float(value) for value in dimsValues]
+        (cosA, sinA) = TrigTable.get(self.nDim)
+        self.cosA = cosA.tolist()
+        self.sinA = sinA.tolist()
+        self.X = [0.0] * self.nDim  # Coordinates of the dims points (0 in the middle)
+        self.Y = [0.0] * self.nDim
+        for i in range(self.nDim):
+            self.set_point(i)
+
+        # Terms of every polygon edge (i, i + 1) and their sums
+        self.edgeTerms = [self.calc_edge_terms(i) for i in range(self.nDim)]
+        self.sums = [sum(terms[k] for terms in self.edgeTerms) for k in range(7)]
+
+        # Convex hull as the doubly linked list of the hull vertices
+        self.calc_convex_hull()
+        self.updatesNum = 0
+
+    def set_point(self, i):
+        """Function for calculation the coordinates of the i-th dims point"""
+        radius = self.dimsValues[i] * (180.0 - self.centreRadius) + self.centreRadius
+        self.X[i] = (self.cosA[i] * radius + 180.0) - 180.0
+        self.Y[i] = (self.sinA[i] * radius + 180.0) - 180.0
+
+    def calc_edge_terms(self, i):
+        """Function for calculation the terms of the polygon edge (i, i + 1):
+           shoelace cross term, centroid terms, perimeter and inertia terms"""
+        j = (i + 1) % self.nDim
+        (x0, y0, x1, y1) = (self.X[i], self.Y[i], self.X[j], self.Y[j])
+        cross = x0 * y1 - x1 * y0
+        return (cross,
+                (x0 + x1) * cross,
+                (y0 + y1) * cross,
+                sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2),
+                (y0 ** 2 + y0 * y1 + y1 ** 2) * cross,
+                (x0 ** 2 + x0 * x1 + x1 ** 2) * cross,
+                (x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * cross)
+
+    def update_axis(self, i, value):
+        """Function for the update of the geometry state when only the i-th axis changes
+           i: index of the axis (dims point)
+           value: new value of the dimension (0.0 - 1.0)
+        """
+        self.dimsValues[i] = float(value)
+        self.set_point(i)
+
+        # Replace the terms of the two edges with the moved vertex
+        for edge in ((i - 1) % self.nDim, i):
+            newTerms = self.calc_edge_terms(edge)
+            self.sums = [s - old + new for (s, old, new) in zip(self.sums, self.edgeTerms[edge], newTerms)]
+            self.edgeTerms[edge] = newTerms
+
+        # Local update of the convex hull between the nearest hull vertices around i
+        self.update_convex_hull(i)
+
+        # Periodical recalculation of all the sums (rounding errors do not accumulate)
+        self.updatesNum += 1
+        if self.updatesNum >= (self.resyncPeriod or self.nDim):
+            self.reset(self.dimsValues)
+
+    def cross(self, o, a, b):
+        """2D cross product of OA and OB vectors (o, a, b are the indices of the points).
+           Positive for the counter-clockwise turn, negative for clockwise, zero if collinear"""
+        return (self.X[a] - self.X[o]) * (self.Y[b] - self.Y[o]) - \
+               (self.Y[a] - self.Y[o]) * (self.X[b] - self.X[o])
+
+    def calc_convex_hull(self):
+        """Function for the full calculation of the convex hull: Graham scan in the angular
+           order starting from the leftmost point (same as in the particle library)"""
+        n = self.nDim
+        start = min(range(n), key=lambda k: (self.X[k], self.Y[k]))
+        stack = []
+        for k in range(n):
+            i = (start + k) % n
+            while len(stack) >= 2 and self.cross(stack[-2], stack[-1], i) <= 0:
+                stack.pop()
+            stack.append(i)
+        while len(stack) >= 3 and self.cross(stack[-2], stack[-1], stack[0]) <= 0:
+            stack.pop()
+
+        self.onHull = [False] * n
+        self.nextHull = [0] * n
+        self.prevHull = [0] * n
+        self.hullEdge = [(0.0, 0.0)] * n  # Cross term and length of the hull edge (i, nextHull[i])
+        self.link_chain(stack + [stack[0]])
+        self.hullArea2 = sum(self.hullEdge[i][0] for i in stack)  # Doubled area of the hull
+        self.hullPerimeter = sum(self.hullEdge[i][1] for i in stack)
+
+    def link_chain(self, chain):
+        """Function for the linking of the chain of the hull vertices (with calculation
+           of the hull edges terms). Returns the sums of the terms of the new edges"""
+        (area2, perimeter) = (0.0, 0.0)
+        for (u, v) in zip(chain[:-1], chain[1:]):
+            self.onHull[u] = self.onHull[v] = True
+            self.nextHull[u] = v
+            self.prevHull[v] = u
+            self.hullEdge[u] = (self.X[u] * self.Y[v] - self.X[v] * self.Y[u],
+                                sqrt((self.X[v] - self.X[u]) ** 2 + (self.Y[v] - self.Y[u]) ** 2))
+            area2 += self.hullEdge[u][0]
+            perimeter += self.hullEdge[u][1]
+        return area2, perimeter
+
+    def scan_range(self, p, q):
+        """Function for Graham scan of the points from p to q (indices in the angular order)
+           return: convex chain from p to q"""
+        chain = [p]
+        i = p
+        while i != q:
+            i = (i + 1) % self.nDim
+            while len(chain) >= 2 and self.cross(chain[-2], chain[-1], i) <= 0:
+                chain.pop()
+            chain.append(i)
+        return chain
+
+    def update_convex_hull(self, i):
+        """Function for the local update of the convex hull after the move of the i-th point.
+           The chain between the nearest hull vertices p and q around i is rebuilt. If p (q)
+           becomes a reflex vertex, the range is extended to its previous (next) hull vertex."""
+        n = self.nDim
+        p = (i - 1) % n
+        while not self.onHull[p] or p == i:
+            p = (p - 1) % n
+        q = (i + 1) % n
+        while not self.onHull[q] or q == i:
+            q = (q + 1) % n
+        while True:
+            if p == q or (q - p) % n >= n - 2:  # Range covers (almost) all the points
+                self.calc_convex_hull()
+                return
+            chain = self.scan_range(p, q)
+            if self.cross(self.prevHull[p], p, chain[1]) <= 0:
+                p = self.prevHull[p]
+            elif self.cross(chain[-2], q, self.nextHull[q]) <= 0:
+                q = self.nextHull[q]
+            else:
+                break
+
+        # Remove the old hull edges from p to q and link the new chain
+        u = p
+        while u != q:
+            self.hullArea2 -= self.hullEdge[u][0]
+            self.hullPerimeter -= self.hullEdge[u][1]
+            v = self.nextHull[u]
+            if u != p:
+                self.onHull[u] = False
+            u = v
+        (area2, perimeter) = self.link_chain(chain)
+        self.hullArea2 += area2
+        self.hullPerimeter += perimeter
+
+    def get_hull_indices(self):
+        """Function for getting the indices of the convex hull vertices (CCW order)"""
+        start = self.onHull.index(True)
+        hull = [start]
+        i = self.nextHull[start]
+        while i != start:
+            hull.append(i)
+            i = self.nextHull[i]
+        return hull
+
+    def get_particle_parameters(self, imgScale):
+        """Function for the calculation of all the particle parameters from the current state.
+           Sums are used directly, projections and Feret diameters need only the hull points.
+           imgScale: Image scale (um/pix)
+           return: structured array of paramsDtype type with 1 element
+        """
+        (cross, cx, cy, perimeterPix, sxx, syy, sxy) = self.sums
+        areaPixels = cross / 2
+        centreXPos = cx / (6.0 * areaPixels)
+        centreYPos = cy / (6.0 * areaPixels)
+        theta = self.particleBatch.calc_theta_from_sums(sxx, syy, sxy, areaPixels, centreXPos, centreYPos)
+
+        hull = self.get_hull_indices()
+        hullX = np.array([[self.X[k] for k in hull]])
+        hullY = np.array([[self.Y[k] for k in hull]])
+        result = np.empty(1, dtype=paramsDtype)
+        self.particleBatch.fill_params(
+            result, np.array([float(imgScale)]), self.nDim, np.array([areaPixels]),
+            np.array([centreXPos]), np.array([centreYPos]), np.array([perimeterPix]),
+            np.array([self.hullArea2 / 2]), np.array([self.hullPerimeter]), np.array([theta]),
+            hullX, hullY)
+        return result
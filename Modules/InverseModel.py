@@ -0,0 +1,204 @@
+#================================================================================
+# Learned inverse model of the particle shape: the regression from the target
+# circularity, convexity and elongation to the dims vector of one nDim. The
+# model is trained on the shapes already produced by the generator (the
+# GenPartSystems/*.txt files), its prediction seeds the shape search and is
+# accepted without the search if it is within the precision limit. The model
+# is the ridge regression on the random Fourier features of the standardized
+# targets (one forward pass is a few small matrix products). The cyclic shift
+# and the mirror of the dims do not change circularity, convexity and
+# elongation, so the training dims are brought to the canonical orientation
+# (largest radius first) and the predicted dims are turned randomly.
+#================================================================================
+
+import os
+import numpy as np
+from Modules.Particle import Particle
+from Modules.ParticleBackend import new_random_state
+
+# Folder with the generated particles systems (training data)
+GEN_FOLDER = './GenPartSystems/'
+
+# Folder with the trained models
+MODEL_FOLDER = './InverseModels/'
+
+
+def model_file_name(nDim, folder=MODEL_FOLDER):
+    """Function for getting the name of the model file of nDim"""
+    return os.path.join(folder, 'inverse_model_{0:d}.npz'.format(nDim))
+
+
+def read_generated_dims(nDim, folder=GEN_FOLDER):
+    """Function for reading the dims of the generated particles of nDim from the particles
+       systems files (4 header lines: onlySpherical, nDim, picturesNum, partPerPicture, then
+       the lines 'number,imgScale,dims' and the total area in the last line)
+       return: (N, nDim) array with the dims (N = 0 if there are no files of nDim)"""
+    dimsList = []
+    fileNames = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+    for fileName in fileNames:
+        if not fileName.endswith('.txt'):
+            continue
+        try:
+            with open(os.path.join(folder, fileName)) as infile:
+                lines = infile.read().split('\n')
+            if int(lines[0]) != 0 or int(lines[1]) != nDim:
+                continue  # Spherical particles or other nDim
+            for line in lines[4:]:
+                values = line.split(',')
+                if len(values) == nDim + 2:
+                    dimsList.append([float(value) for value in values[2:]])
+        except (OSError, ValueError, IndexError):
+            continue  # Broken file is skipped
+    return np.array(dimsList, dtype=np.float64).reshape(-1, nDim)
+
+
+def canonical_dims(dimsArray):
+    """Function for the canonical orientation of the dims (cyclic shift putting the largest
+       radius first and the mirror making the second radius not less than the last one)
+       dimsArray: (N, nDim) array with the dims
+       return: (N, nDim) array with the dims in the canonical orientation"""
+    dimsArray = np.asarray(dimsArray, dtype=np.float64)
+    nDim = dimsArray.shape[1]
+    index = (np.argmax(dimsArray, axis=1)[:, np.newaxis] + np.arange(nDim)) % nDim
+    result = np.take_along_axis(dimsArray, index, axis=1)
+    mirror = result[:, 1] < result[:, -1]
+    result[mirror, 1:] = result[mirror, :0:-1]
+    return result
+
+
+class InverseModel():
+    """Ridge regression on the random Fourier features from (circularity, convexity,
+       elongation) to the dims of one nDim"""
+
+    def __init__(self, nDim, nFeatures=512, gamma=1.0, ridge=1e-4, seed=0):
+        """Constructor of the class
+           nDim: Number of the particle dimensions
+           nFeatures: Number of the random Fourier features
+           gamma: Scale of the random frequencies (for the standardized targets)
+           ridge: Regularization of the regression (relative to the number of the samples)
+           seed: Seed of the random features
+        """
+        self.nDim = nDim  # Number of the particle dimensions
+        self.nFeatures = nFeatures  # Number of the random features
+        self.gamma = gamma  # Scale of the random frequencies
+        self.ridge = ridge  # Regularization of the regression
+        self.seed = seed  # Seed of the random features
+        self.mean = np.zeros(3)  # Mean of the training targets
+        self.std = np.ones(3)  # Standard deviation of the training targets
+        rng = new_random_state(seed)
+        self.freq = gamma * rng.standard_normal((3, nFeatures))  # Random frequencies
+        self.phase = rng.uniform(0.0, 2 * np.pi, nFeatures)  # Random phases
+        self.coef = np.zeros((nFeatures, nDim))  # Weights of the features
+        self.intercept = np.zeros(nDim)  # Mean of the training dims
+        self.report = {}  # Validation of the trained model
+
+    def get_features(self, params):
+        """Function for the random Fourier features of the (N, 3) array of the targets"""
+        x = (np.atleast_2d(params) - self.mean) / self.std
+        return np.sqrt(2.0 / self.nFeatures) * np.cos(x @ self.freq + self.phase)
+
+    def fit(self, params, dimsArray):
+        """Function for fitting the regression (closed form solution of the ridge regression)
+           params: (N, 3) array with circularity, convexity and elongation of the shapes
+           dimsArray: (N, nDim) array with the dims of the shapes"""
+        params = np.asarray(params, dtype=np.float64)
+        dimsArray = canonical_dims(dimsArray)
+        self.mean = params.mean(axis=0)
+        self.std = np.maximum(params.std(axis=0), 1e-6)
+        features = self.get_features(params)
+        self.intercept = dimsArray.mean(axis=0)
+        gram = features.T @ features + self.ridge * len(params) * np.eye(self.nFeatures)
+        self.coef = np.linalg.solve(gram, features.T @ (dimsArray - self.intercept))
+
+    def predict(self, params, rng=None):
+        """Function for the prediction of the dims (forward pass)
+           params: (3,) or (N, 3) array with target circularity, convexity and elongation
+           rng: RandomState turning the dims by the random cyclic shift and mirror (None -
+                canonical orientation)
+           return: (nDim,) or (N, nDim) array with the dims in the range [0, 1]"""
+        single = np.ndim(params) == 1
+        dimsArray = np.clip(self.get_features(params) @ self.coef + self.intercept, 0.0, 1.0)
+        if rng is not None:
+            for k in range(len(dimsArray)):
+                if rng.randint(2):
+                    dimsArray[k] = dimsArray[k, ::-1]
+                dimsArray[k] = np.roll(dimsArray[k], rng.randint(self.nDim))
+        return dimsArray[0] if single else dimsArray
+
+    def validate(self, params, particle, precisionLimit):
+        """Function for the validation of the model on the shapes which were not used in the fit
+           params: (N, 3) array with the targets
+           particle: Particle for the calculation of the shape parameters of the predictions
+           precisionLimit: Precision limit of the search
+           return: dictionary with the median cost of the predictions and the fraction of the
+                   predictions within the precision limit"""
+        predicted = particle.get_shape_cost_params_batch(self.predict(params))
+        costs = np.sqrt(np.sum((predicted - params) ** 2, axis=1))
+        return {'medianCost': float(np.median(costs)),
+                'acceptedRate': float(np.mean(costs <= precisionLimit))}
+
+    def save(self, folder=MODEL_FOLDER):
+        """Function for saving the model (file of nDim is replaced)"""
+        os.makedirs(folder, exist_ok=True)
+        np.savez(model_file_name(self.nDim, folder), mean=self.mean, std=self.std, freq=self.freq,
+                 phase=self.phase, coef=self.coef, intercept=self.intercept,
+                 settings=np.array([self.gamma, self.ridge, self.seed]),
+                 report=np.array([self.report.get(key, np.nan) for key in
+                                  ('nSamples', 'medianCost', 'acceptedRate')]))
+
+    @classmethod
+    def load(cls, nDim, folder=MODEL_FOLDER):
+        """Function for loading the model of nDim
+           return: InverseModel object or None (there is no valid model)"""
+        fileName = model_file_name(nDim, folder)
+        if not os.path.isfile(fileName):
+            return None
+        try:
+            data = np.load(fileName)
+            (gamma, ridge, seed) = data['settings']
+            model = cls(nDim, data['coef'].shape[0], float(gamma), float(ridge), int(seed))
+            for name in ('mean', 'std', 'freq', 'phase', 'coef', 'intercept'):
+                setattr(model, name, data[name])
+            model.report = dict(zip(('nSamples', 'medianCost', 'acceptedRate'),
+                                    data['report'].tolist()))
+        except (OSError, ValueError, KeyError):
+            return None
+        if model.coef.shape != (model.nFeatures, nDim):
+            return None
+        return model
+
+
+def train_inverse_model(nDim, precisionLimit, folder=GEN_FOLDER, maxSamples=50000,
+                        gammas=(0.5, 1.0, 2.0, 4.0), seed=0):
+    """Function for training the inverse model of nDim on the generated particles. The scale
+       of the random frequencies is chosen by the median cost on the validation part (10 %
+       of the shapes), the chosen model is fitted on all the shapes
+       precisionLimit: Precision limit of the search (for the validation report)
+       folder: Folder with the generated particles systems
+       maxSamples: Maximum number of the shapes used (random subset)
+       gammas: Candidate scales of the random frequencies
+       return: InverseModel object or None (there are too few shapes of nDim)"""
+    dimsArray = read_generated_dims(nDim, folder)
+    if len(dimsArray) < 50:
+        return None
+    rng = new_random_state(seed)
+    dimsArray = dimsArray[rng.permutation(len(dimsArray))[:maxSamples]]
+    particle = Particle()
+    params = particle.get_shape_cost_params_batch(dimsArray)
+    nValid = max(len(dimsArray) // 10, 1)
+
+    # Choose the scale of the frequencies on the validation part
+    best = None
+    for gamma in gammas:
+        model = InverseModel(nDim, gamma=gamma, seed=seed)
+        model.fit(params[nValid:], dimsArray[nValid:])
+        report = model.validate(params[:nValid], particle, precisionLimit)
+        if best is None or report['medianCost'] < best[1]['medianCost']:
+            best = (gamma, report)
+
+    # Fit the chosen model on all the shapes
+    (gamma, report) = best
+    model = InverseModel(nDim, gamma=gamma, seed=seed)
+    model.fit(params, dimsArray)
+    model.report = dict(report, nSamples=len(dimsArray))
+    return model
@@ -0,0 +1,96 @@
+#==========================================================================================
+# Realization of the Nelder-Mead simplex search algorithm with the coefficients adapted
+# to the dimension (F. Gao, L. Han). The same algorithm as in NMAlgorithm.c: the trial
+# points of the iteration are evaluated in one batch, the collapsed simplex is restarted
+# at the random position. With the given initial position it polishes the found shape
+#==========================================================================================
+
+import numpy as np
+from Modules.SearchAlg_py import SearchAlg_py
+
+class NMAlg_py(SearchAlg_py):
+    """Class for Nelder-Mead simplex search algorithm"""
+    def __init__(self, progress_callback, init_circularity, init_convexity,
+                 init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit,
+                 usePrecisionLimit, precisionLimit, showErrorPlot, step=0.05,
+                 initPosition=None, rng=None, control=None):
+        super().__init__(progress_callback, init_circularity, init_convexity, init_elongation,
+                         nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit,
+                         precisionLimit, showErrorPlot, rng, control)
+        n = nVar
+        self.step = step  # Initial size of the simplex (fraction of the variables range)
+        self.initPosition = initPosition  # Position of the first simplex (None - random)
+        self.alpha = 1.0  # Reflection coefficient
+        self.gamma = 1.0 + 2.0 / n  # Expansion coefficient
+        self.rho = 0.75 - 0.5 / n  # Contraction coefficient
+        self.sigma = 1.0 - 1.0 / n  # Shrink coefficient
+        self.simplex = None  # Vertices of the simplex ((nVar + 1, nVar) array)
+        self.cost = None  # Penalized costs of the vertices
+        self.restartPending = False  # Flag to make the new simplex in the next iteration
+
+    def make_simplex(self, position):
+        """Method for making the simplex: the position and the steps along every axis (the
+           step is made inwards if the vertex is outside the bounds)"""
+        h = self.step * (self.varMax - self.varMin)
+        steps = np.where(position + h <= self.varMax, h, -h)
+        self.simplex = np.tile(np.asarray(position, dtype='double'), (self.nVar + 1, 1))
+        self.simplex[1:] += np.diag(steps)
+        self.cost = self.calc_penalized_costs(self.simplex)
+        self.restartPending = False
+
+    def initialization(self):
+        """Method for the initial simplex"""
+        if self.initPosition is not None:
+            self.make_simplex(np.asarray(self.initPosition[:self.nVar], dtype='double'))
+        else:
+            self.make_simplex(self.randomize_positions(self.nVar))
+        self.arrayBestCosts.append(self.globalBestCost)
+
+    def iterate(self):
+        """Method for one step of the simplex (the reflection, the expansion and both
+           contractions are evaluated in one batch)"""
+        if self.restartPending:
+            self.make_simplex(self.randomize_positions(self.nVar))
+        n = self.nVar
+        order = np.argsort(self.cost, kind='stable')
+        (best, worst) = (order[0], order[n])
+
+        # Trial points on the line from the worst vertex through the centroid
+        centroid = np.mean(self.simplex[order[:n]], axis=0)
+        d = centroid - self.simplex[worst]
+        coefs = np.array([self.alpha, self.alpha * self.gamma, self.alpha * self.rho, -self.rho])
+        points = centroid + coefs[:, np.newaxis] * d
+        pointCost = self.calc_penalized_costs(points)
+
+        # Choice of the new vertex (-1 - shrink of the simplex)
+        if pointCost[0] < self.cost[best]:
+            chosen = 1 if pointCost[1] < pointCost[0] else 0
+        elif pointCost[0] < self.cost[order[n - 1]]:
+            chosen = 0
+        elif pointCost[0] < self.cost[worst]:
+            chosen = 2 if pointCost[2] <= pointCost[0] else -1
+        else:
+            chosen = 3 if pointCost[3] < self.cost[worst] else -1
+        if chosen >= 0:
+            self.simplex[worst] = points[chosen]
+            self.cost[worst] = pointCost[chosen]
+        else:
+            # Shrink all the vertices to the best one (n points in one batch)
+            others = order[1:]
+            self.simplex[others] = self.simplex[best] + self.sigma * (self.simplex[others] - self.simplex[best])
+            self.cost[others] = self.calc_penalized_costs(self.simplex[others])
+
+        # Restart of the collapsed simplex
+        best = np.argmin(self.cost)
+        if np.max(np.abs(self.simplex - self.simplex[best])) < 1e-9 * (self.varMax - self.varMin):
+            self.restartPending = True
+
+    def get_radius(self):
+        """Method for the radius of the simplex (RMS distance to the best vertex)"""
+        best = np.argmin(self.cost)
+        return np.sqrt(np.sum((self.simplex - self.simplex[best]) ** 2) / (self.nVar + 1))
+
+    def restart(self):
+        """Method for the restart on the stagnation found by the monitor (new simplex at the
+           random position)"""
+        self.restartPending = True
@@ -1,57 +1,32 @@
 #================================================================================
-# Wrapping of the dll library pso_algorithm.dll for searching the particle
-# shape with PSO algorithm
+# Wrapping of the library pso_algorithm.dll (pso_algorithm.so on Linux) for
+# searching the particle shape with PSO algorithm
 #================================================================================
 
-import ctypes
-import struct
+from Modules.ParticleBackend import select_backend
 
 class PSOAlg_dll():
-    """Wrapper class for dll with PSO searching algorithm"""
+    """Wrapper class for the backend with PSO searching algorithm"""
     
     def __init__(self):
         """Constructor of the class"""
-        self.dll = ctypes.WinDLL('./Modules/Generator_c/build/pso_algorithm.dll')  # Loading the dll library
-
-        # Function in dll is the following:
-        # void PSOAlg_run_search(double init_circularity, double init_convexity, double init_elongation,
-        # int nVar, double varMin, double varMax, int useIterLimit, int iterLimit, 
-        # int usePrecisionLimit, double precisionLimit, int showErrorPlot, int nPop, double w,
-        # double wDamp, double c1, double c2, int a, int b, unsigned int *iteration, double *globalBestCost, 
-        # double *globalBestPosition, double *arrayBestCosts)
-
-        # Define the function return type:
-        self.dll.PSOAlg_run_search.restype = None
-        
-        # Define the function parameters:
-        self.dll.PSOAlg_run_search.argtypes = [
-            ctypes.c_double,  # init_circularity
-            ctypes.c_double,  # init_convexity
-            ctypes.c_double,  # init_elongation
-            ctypes.c_int,  # nVar
-            ctypes.c_double,  # varMin
-            ctypes.c_double,  # varMax
-            ctypes.c_int,  # useIterLimit
-            ctypes.c_int,  # iterLimit
-            ctypes.c_int,  # usePrecisionLimit
-            ctypes.c_double,  # precisionLimit
-            ctypes.c_int,  # showErrorPlot
-            ctypes.c_int,  # nPop
-            ctypes.c_double,  # w
-            ctypes.c_double,  # wDamp
-            ctypes.c_double,  # c1
-            ctypes.c_double,  # c2
-            ctypes.c_int,  # a
-            ctypes.c_int,  # b
-            ctypes.POINTER(ctypes.c_uint),  # pointer to iteration
-            ctypes.POINTER(ctypes.c_double),  # pointer to globalBestCost
-            ctypes.POINTER(ctypes.c_double),  # pointer to globalBestPosition
-            ctypes.POINTER(ctypes.c_double)]  # pointer to arrayBestCosts
+        self.backend = select_backend()  # Fastest available backend (compiled library or NumPy)
             
     def run_search(self, init_circularity, init_convexity, init_elongation, nVar, varMin,
                    varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
-                   showErrorPlot, nPop, w, wDamp, c1, c2, a, b):
-        """Method for main searching loop"""
+                   showErrorPlot, nPop, w, wDamp, c1, c2, a, b, seed=None, stream=0, control=None,
+                   settings=None, initPosition=None, progress_callback=None, cancel=None,
+                   progressIter=0, progressMs=0.0, archive=None):
+        """Method for main searching loop (the same seed and stream reproduce the search,
+           None - random seed). control: psoControl_t with the settings of the convergence
+           monitor (None - b resets of the swarm are used). settings: optSettings_t with the
+           search algorithm (None - PSO). initPosition: initial radii, e.g. the prediction of
+           the inverse model (None - random position), accepted without the search if it is
+           within the precision limit, otherwise the search starts around it. progress_callback: function receiving the
+           progress dictionary every progressIter iterations or progressMs milliseconds (None -
+           no progress). cancel: ctypes.c_int shared flag, the search is stopped when it is set.
+           archive: archive of the evaluated shapes made by make_archive (None - no archive), the
+           shape within the precision limit is taken from it without the search"""
         
         # Create additional parameters for the function
         if(useIterLimit):
@@ -64,55 +39,47 @@ class PSOAlg_dll():
         else:
             usePrecisionLimit = 0  # Prepare for c function (false -> 0)
         
-        iteration_t = ctypes.c_uint  # Type
-        iteration = iteration_t()  # L-value
-        iteration_p = ctypes.byref(iteration)  # Pointer
-        
-        globalBestCost_t = ctypes.c_double
-        globalBestCost = globalBestCost_t()
-        globalBestCost_p = ctypes.byref(globalBestCost)
-        
-        globalBestPosition_t = ctypes.c_double * nVar
-        globalBestPosition = globalBestPosition_t()
-        globalBestPosition_p = ctypes.cast(globalBestPosition, ctypes.POINTER(ctypes.c_double))    
-        
         if(showErrorPlot):
             showErrorPlot = 1  # Prepare for c function (true -> 1)
-            arrayBestCosts_t = ctypes.c_double * iterLimit   
-            arrayBestCosts = arrayBestCosts_t()
-            arrayBestCosts_p = ctypes.cast(arrayBestCosts, ctypes.POINTER(ctypes.c_double)) 
         else:
             showErrorPlot = 0  # Prepare for c function (false -> 0)
-            arrayBestCosts_t = ctypes.c_double
-            arrayBestCosts_p = arrayBestCosts_t()
         
-        # Call the function from pso_algorithm.dll (Wrapped function)
-        ret = self.dll.PSOAlg_run_search(init_circularity, init_convexity, init_elongation, 
+        # Call the search function of the backend. Output dictionary contains
+        # 'iteration', 'status', 'evaluations', 'globalBestCost', 'globalBestPosition' and 'arrayBestCosts'
+        CalculatedParams = self.backend.run_search(init_circularity, init_convexity, init_elongation, 
             nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
-            showErrorPlot, nPop, w, wDamp, c1, c2, a, b, iteration_p, globalBestCost_p, 
-            globalBestPosition_p, arrayBestCosts_p)
-            
-        # Prepare the calculated parameters suitable for python use
-        iteration = iteration.value
-        globalBestCost = globalBestCost.value
-        
-        globalBestPositionList = [0.0] * nVar
-        for i in range(nVar):
-            globalBestPositionList[i] = globalBestPosition[i]
-            
-        if(showErrorPlot):
-            arrayBestCostsList = [0.0] * iterLimit
-            for i in range(iterLimit):
-                arrayBestCostsList[i] = arrayBestCosts[i]
-        else:
-            arrayBestCostsList = []
-        
-        # Prepare the output dictionary CalculatedParams
-        CalculatedParams = \
-            {'iteration': iteration,
-             'globalBestCost': globalBestCost,
-             'globalBestPosition': globalBestPositionList,
-             'arrayBestCosts': arrayBestCostsList}
+            showErrorPlot, nPop, w, wDamp, c1, c2, a, b, seed, stream, control, settings, initPosition,
+            progress_callback, cancel, progressIter, progressMs, archive)
         
         # Return the calculated particle parameters
-        return CalculatedParams
\ No newline at end of file
+        return CalculatedParams
+
+    def run_search_batch(self, targets, nVar, varMin, varMax, useIterLimit, iterLimit,
+                         usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1, c2, a, b,
+                         seed=None, stream=0, control=None, settings=None, archive=None,
+                         initPositions=None):
+        """Method for the search of many shapes at once (independent swarms in lock-step)
+           targets: (K, 3) array with target circularity, convexity and elongation
+           seed, stream: seed and stream of the random number generator (None - random seed)
+           control: psoControl_t with the settings of the convergence monitor (None - b resets of the swarm)
+           settings: optSettings_t with the search algorithm (None - PSO)
+           archive: archive of the evaluated shapes made by make_archive (None - no archive)
+           initPositions: (K, nVar) array with the initial radii of the searches (None - random
+                          start), the radii within the precision limit are accepted without the search
+           return: dictionary with 'iterations' (K), 'statuses' (K), 'evaluations' (K),
+                   'globalBestCosts' (K) and 'globalBestPositions' (K, nVar) arrays
+        """
+        return self.backend.run_search_batch(targets, nVar, varMin, varMax, int(bool(useIterLimit)),
+            iterLimit, int(bool(usePrecisionLimit)), precisionLimit, nPop, w, wDamp, c1, c2, a, b, seed, stream,
+            control, settings, archive, initPositions)
+
+    def make_archive(self, nDim, capacity=50000, cellSize=0.01, maxPerCell=4):
+        """Method for making the empty archive of the evaluated shapes of the backend. The
+           shapes evaluated by PSO are kept in the archive and the next targets are first
+           looked up in it
+           nDim: Number of the particle dimensions
+           capacity: Maximum number of the shapes (the oldest shapes are replaced)
+           cellSize: Size of the grid cell (usually the precision limit)
+           maxPerCell: Maximum number of the shapes in one cell
+           return: archive object with 'count' and 'hits' attributes"""
+        return self.backend.make_archive(nDim, capacity, cellSize, maxPerCell)
@@ -3,70 +3,22 @@
 #==========================================================================================
 
 import numpy as np
-np.random.seed()  # Seed the generator
-import math as m
-from Modules.Particle import Particle
+from Modules.SearchAlg_py import SearchAlg_py
 
-class PSOParticle():
-    """Class for single particle of the algorithm"""
-    def __init__(self, nVar, varMin, varMax, init_circularity, init_convexity,
-                 init_elongation, particle):
-        self.nVar = nVar  # Number of unknown (decision) variables (equal to nDim + realWidth)
-        self.varMin = varMin  # Lower bound of decision variables
-        self.varMax = varMax  # Upper bound of decision variables
-        self.init_circularity = init_circularity
-        self.init_convexity = init_convexity
-        self.init_elongation = init_elongation
-        self.imgScale = 1.0  # Image scale (during the search it is constant)
-        self.position = None  # Curent position in hyperspace
-        self.bestPosition = None # Best found position by the particle
-        self.velocity = None  # Current particle velocity
-        self.cost = np.inf  # Current value of the cost function
-        self.bestCost = np.inf  # Best value (lowest) of the cost function found by particle
-        self.geomParticle = particle
+# Fraction of the swarm started around the initial position (the rest is random)
+PSO_SEED_FRACTION = 0.5
+# Standard deviation of the jitter around the initial position (fraction of the variables range)
+PSO_SEED_SIGMA = 0.05
 
-    def initialize(self):
-        """Method for initialization of the searching particle"""
-        self.position = np.random.uniform(self.varMin, self.varMax, self.nVar).astype('double')
-        self.velocity = np.zeros(self.nVar, dtype='double')
-        self.update_cost()
-
-    def update_cost(self):
-        """Method for update the current cost value"""
-        particleData = self.geomParticle.get_particle_parameters(self.imgScale, self.position, self.nVar)
-        
-        # Take only important parameters
-        circularity = particleData['circularity']
-        convexity = particleData['convexity']
-        elongation = particleData['elongation']
-        
-        self.cost = m.sqrt(m.pow((self.init_circularity - circularity), 2) + \
-                           m.pow((self.init_convexity - convexity), 2) + \
-                           m.pow((self.init_elongation - elongation), 2))
-        # Update self best cost
-        if self.cost < self.bestCost:
-            self.bestCost = self.cost
-            self.bestPosition = self.position
-
-
-class PSOAlg_py():
+class PSOAlg_py(SearchAlg_py):
     """Class for particle swarm optimization algorithm"""
     def __init__(self, progress_callback, init_circularity, init_convexity,
                  init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit, 
                  usePrecisionLimit, precisionLimit, showErrorPlot, nPop, w,
-                 wDamp, c1, c2, a, b):
-        self.progress_callback = progress_callback  # Link to the main window class
-        self.init_circularity = init_circularity  # Initial (target) circularity 
-        self.init_convexity = init_convexity  # Initial (target) convexity
-        self.init_elongation = init_elongation  # Initial (target) elongation
-        self.nVar = nVar  # Number of unknown (decision) variables (equal to nDim + realWidth)
-        self.varMin = varMin  # Lower bound of decision variables
-        self.varMax = varMax  # Upper bound of decision variables
-        self.useIterLimit = useIterLimit  # Flag to use iteration limit
-        self.iterLimit = iterLimit  # Maximum number of iterations
-        self.usePrecisionLimit = usePrecisionLimit  # Flag to use precise limit
-        self.precisionLimit = precisionLimit  # Minimum precise limit
-        self.showErrorPlot = showErrorPlot  # Save or not progress data for plot
+                 wDamp, c1, c2, a, b, rng=None, control=None, initPosition=None):
+        super().__init__(progress_callback, init_circularity, init_convexity, init_elongation,
+                         nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit,
+                         precisionLimit, showErrorPlot, rng, control)
         self.nPop = nPop  # Population size (swarm size)
         self.w = w  # Inertia coefficient
         self.wDamp = wDamp  # Damping ratio of inertia coefficient
@@ -74,101 +26,152 @@ class PSOAlg_py():
         self.c2 = c2  # Social acceleration coefficient
         self.a = a  # Additional randomization of a-th particle in swarm
         self.b = b  # Additional randomization of all particles every b-th iteration   
-        self.swarm = []  # List of individual searching particles
-        self.doSearch = None  # Flag to run or stop the search
-        self.iteration = None  # Current search iteration
-        
-        self.globalBestPosition = None  # Best position (solution)
-        self.globalBestCost = np.inf  # The least value of the cost function 
-        self.arrayBestCosts = []  # Array to see the progress of searching process
+        self.initPosition = initPosition  # Position seeding the part of the swarm (None - random swarm)
+        # Convergence monitor replaces the b resets of the swarm
+        self.w0 = w  # Initial inertia coefficient (restored on the restart)
+        # Swarm is stored as (nPop, nVar) arrays (one row for every searching particle)
+        self.position = None  # Current positions in hyperspace
+        self.velocity = None  # Current velocities of the particles
+        self.cost = None  # Current values of the cost function
+        self.bestPosition = None  # Best positions found by the particles
+        self.bestCost = None  # Best (lowest) values of the cost function found by the particles
         self.r1 = None  # Parameter used in equation
         self.r2 = None  # Parameter used in equation
-        
-        self.particle = Particle()  # Construct particle for determination of its parameters
+        # Local polish of the global best close to the precision limit (only with the limit)
+        self.usePolish = (control is not None and getattr(control, 'polishThreshold', 0.0) > 0.0 and
+                          getattr(control, 'polishSteps', 0) > 0 and bool(usePrecisionLimit))
+        self.polishedCost = np.inf  # Global best cost after the last polish
         
     def initialization(self):
         """Method for the initial generation of all the particles in the swarm"""
-        self.swarm = []
-        for i in range(self.nPop):
-            particle = PSOParticle(self.nVar, self.varMin, self.varMax, self.init_circularity, 
-                                   self.init_convexity, self.init_elongation, self.particle)
-            particle.initialize()
-            self.swarm.append(particle)
-            self.update_global_best(self.swarm[i].bestCost, self.swarm[i].bestPosition)
+        self.position = self.randomize_positions((self.nPop, self.nVar))
+        if self.initPosition is not None:
+            # The first particle starts in the initial position, the part of the swarm around it
+            n = max(int(PSO_SEED_FRACTION * self.nPop), 1)
+            jitter = PSO_SEED_SIGMA * (self.varMax - self.varMin) * self.rng.standard_normal((n, self.nVar))
+            jitter[0] = 0.0
+            self.position[:n] = np.clip(np.asarray(self.initPosition[:self.nVar]) + jitter,
+                                        self.varMin, self.varMax)
+        self.velocity = np.zeros((self.nPop, self.nVar), dtype='double')
+        self.bestPosition = self.position.copy()
+        self.bestCost = np.full(self.nPop, np.inf)
+        self.update_costs()
         self.arrayBestCosts.append(self.globalBestCost)
-        
-    def update_global_best(self, bestCost, bestPosition):
-        """Method for update the global best"""
-        if bestCost < self.globalBestCost:
-            self.globalBestCost = bestCost
-            self.globalBestPosition = bestPosition
-    
+
+    def update_costs(self):
+        """Method for update the current cost values of the whole swarm (one batched
+           evaluation), the personal best and the global best"""
+        self.cost = self.calc_costs(self.position)
+
+        # Update personal best costs
+        improved = self.cost < self.bestCost
+        self.bestCost[improved] = self.cost[improved]
+        self.bestPosition[improved] = self.position[improved]
+
+        # Update the global best
+        i = np.argmin(self.bestCost)
+        self.update_global_best(self.bestCost[i], self.bestPosition[i])
+
+    def get_radius(self):
+        """Method for the radius of the swarm (RMS distance to the global best position)"""
+        return np.sqrt(np.mean(np.sum((self.position - self.globalBestPosition) ** 2, axis=1)))
+
+    def restart(self):
+        """Method for the restart on the stagnation found by the monitor"""
+        self.restart_worst_particles()
+
+    def restart_worst_particles(self):
+        """Method for the restart of the worst particles at the random positions (the best
+           particle is kept if nPop > 1)"""
+        n = min(int(self.control.restartFraction * self.nPop + 0.5), self.nPop - 1)
+        worst = np.argsort(-self.bestCost, kind='stable')[:max(n, 1)]
+        self.position[worst] = self.randomize_positions((len(worst), self.nVar))
+        self.velocity[worst] = 0.0
+        self.bestPosition[worst] = self.position[worst]
+        self.bestCost[worst] = np.inf
+        self.w = self.w0
+
     def randomize_vector(self):
-        """Method for randomization of the vector"""
-        return np.random.uniform(0.0, 1.0, self.nVar).astype('double')
+        """Method for randomization of the (nPop, nVar) array of coefficients"""
+        return self.rng.uniform(0.0, 1.0, (self.nPop, self.nVar)).astype('double')
     
-    def run_search(self):
-        """Method for main searching loop"""
-        # Initialization
-        self.initialization()
+    def iterate(self):
+        """Method for one search iteration (all the particles are updated together)"""
+        # Randomize r1 and r2 parameters
+        self.r1 = self.randomize_vector()
+        self.r2 = self.randomize_vector()
+        # Update the velocity
+        self.velocity = self.w * self.velocity + \
+            self.r1*self.c1*(self.bestPosition - self.position) + \
+            self.r2*self.c2*(self.globalBestPosition - self.position)
+        # Update the particle position
+        self.position = self.position + self.velocity
+        # Restrictions to the position (in should be in range 0.0 - 1.0). Reset to random
+        outside = (self.position > 1.0) | (self.position < 0.0)
+        self.position[outside] = self.randomize_positions(np.count_nonzero(outside))
+        
+        # Every a-th particle will be randomized
+        self.position[::self.a] = self.randomize_positions(self.position[::self.a].shape)
+
+        # Aditional randomization - reset of particles every k-th iteration (only without the monitor)
+        if not self.useMonitor and self.iteration % self.b == 0:
+            self.position = self.randomize_positions((self.nPop, self.nVar))
+            self.w = self.rng.uniform(0.0, 1.0)
         
-        # Search
-        self.doSearch = True
-        self.iteration = 1
-        self.arrayBestCosts = []
-        while self.doSearch:
-            # One search iteration
-            for i in range(self.nPop):
-                # Randomize r1 and r2 parameters
-                self.r1 = self.randomize_vector()
-                self.r2 = self.randomize_vector()
-                # Update the velocity         
-                self.swarm[i].velocity = self.w * self.swarm[i].velocity + \
-                    self.r1*self.c1*(self.swarm[i].bestPosition - self.swarm[i].position) + \
-                    self.r2*self.c2*(self.globalBestPosition - self.swarm[i].position)
-                # Update the particle position
-                self.swarm[i].position = self.swarm[i].position + self.swarm[i].velocity
-                # Restrictions to the position (in should be in range 0.0 - 1.0). Reset to random
-                for j in range(self.swarm[i].position.shape[0]):
-                    if self.swarm[i].position[j] > 1.0:
-                        self.swarm[i].position[j] = np.random.uniform(self.varMin, self.varMax, 1)[0]
-                    if self.swarm[i].position[j] < 0.0:
-                        self.swarm[i].position[j] = np.random.uniform(self.varMin, self.varMax, 1)[0]
-                
-                # Every a-th particle will be randomized
-                if i % self.a == 0:
-                    self.swarm[i].position = np.random.uniform(self.varMin, self.varMax, self.nVar).astype('double')
+        # Update particles costs and global best cost
+        self.update_costs()
+             
+        # Reduce the inertia coefficient
+        self.w = self.w * self.wDamp
+
+        # Local polish of the new global best close to the precision limit
+        if (self.usePolish and self.globalBestCost <= self.control.polishThreshold * self.precisionLimit
+                and self.globalBestCost < self.polishedCost):
+            self.local_polish()
+            self.polishedCost = self.globalBestCost
+
+    def calc_residuals(self, positions):
+        """Method for the residuals of circularity, convexity and elongation of the (n, nVar)
+           array of positions (one batched evaluation)
+           return: (n, 3) array with the residuals"""
+        params = self.particle.get_shape_cost_params_batch(self.get_dims(positions))
+        target = np.array([self.init_circularity, self.init_convexity, self.init_elongation])
+        self.evaluations += len(positions)
+        return params - target
 
-                # Aditional randomization - reset of particles every k-th iteration
-                if self.iteration % self.b == 0:
-                    self.swarm[i].position = np.random.uniform(self.varMin, self.varMax, self.nVar).astype('double')
-                    self.w = np.random.uniform(0.0, 1.0, 1)[0]
-                
-                # Update particle cost and global best cost
-                self.swarm[i].update_cost()
-                self.update_global_best(self.swarm[i].bestCost, self.swarm[i].bestPosition)
-                 
-            # Reduce the inertia coefficient
-            self.w = self.w * self.wDamp
-            
-            # Save the best global cost to the array
-            if self.showErrorPlot:
-                self.arrayBestCosts.append(self.globalBestCost)
-            
-            if self.useIterLimit and (self.iteration >= self.iterLimit):
-                self.doSearch = False
-            if self.usePrecisionLimit and (self.precisionLimit >= self.globalBestCost):
-                self.doSearch = False
-            
-            # Make the data and return it as a progress callback
-            progressData = {}
-            progressData = {'iteration'         : self.iteration,
-                            'globalBestPosition': self.globalBestPosition,
-                            'globalBestCost'    : self.globalBestCost,
-                            'arrayBestCosts'    : self.arrayBestCosts,
-                            'doSearch'          : self.doSearch}            
-            
-            # Send the callback
-            self.progress_callback.emit(progressData)       
-            self.iteration += 1
-                
\ No newline at end of file
+    def local_polish(self, h=1e-6):
+        """Method for the local polish of the global best with the projected Levenberg-Marquardt
+           steps (the same rules as local_polish.c). There is no analytic kernel in NumPy, so
+           the jacobian is the forward difference of one batched evaluation of nVar + 1 shapes
+           (counted as nVar + 1 evaluations)
+           h: step of the forward difference"""
+        position = self.globalBestPosition.copy()
+        cost = self.globalBestCost
+        lam = None
+        needJacobian = True
+        for _ in range(self.control.polishSteps):
+            if cost <= self.precisionLimit:
+                break
+            if needJacobian:
+                points = np.vstack((position, position + h * np.eye(self.nVar)))
+                residuals = self.calc_residuals(points)
+                residual = residuals[0]
+                jacobian = ((residuals[1:] - residual) / h).T  # (3, nVar)
+                JJt = jacobian @ jacobian.T
+                if lam is None:
+                    lam = 1e-3 * np.trace(JJt) / 3 + 1e-12
+                needJacobian = False
+            try:
+                z = np.linalg.solve(JJt + lam * np.eye(3), residual)
+            except np.linalg.LinAlgError:
+                lam *= 10.0
+                continue
+            trial = np.clip(position - jacobian.T @ z, self.varMin, self.varMax)
+            trialCost = float(np.sqrt(np.sum(self.calc_residuals(trial[np.newaxis])[0] ** 2)))
+            if trialCost < cost:
+                position, cost = trial, trialCost
+                lam /= 3.0
+                needJacobian = True
+            else:
+                lam *= 4.0
+        self.update_global_best(cost, position)
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 
 from PyQt5.QtWidgets import (QMainWindow, QDesktopWidget, QLabel, QLineEdit,
-                             QPushButton, QMessageBox)
+                             QPushButton, QMessageBox, QComboBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import (QIcon, QFont, QPixmap)
 
 from functools import partial
 from .AdvancedQSpinBox import AdvancedQSpinBox
+from .ParticleBackend import optSettings_t, psoControl_t, OPT_PSO, OPT_CMAES, OPT_DE, OPT_NM
+from .SearchAlgorithms import SEARCH_ALGORITHMS, choose_search_algorithm
 
 class PSOSettingsWindow(QMainWindow):
     """Class for creating a new settings window for the Ptester tool""" 
@@ -22,15 +24,19 @@ class PSOSettingsWindow(QMainWindow):
         self.PSO_a = self.parentTool.PSO_a
         self.PSO_b = self.parentTool.PSO_b
         self.iterLimit = self.parentTool.iterLimit
+        # Current choice and settings of the search algorithm (copy of the parent settings)
+        self.optSettings = optSettings_t.from_buffer_copy(self.parentTool.optSettings)
+        # Current settings of the convergence monitor (copy of the parent settings)
+        self.PSO_control = psoControl_t.from_buffer_copy(self.parentTool.PSO_control)
         
         self.init_ui()  # Initialize the user interface elements
 
     def init_ui(self):
         """Method for the initialization of the UI"""
-        self.setFixedSize(302, 218)  # Window size
+        self.setFixedSize(302, 402)  # Window size
         self.center_window() #  Center the window on desktop
         self.setWindowIcon(QIcon('Resources/icon.png'))
-        self.setWindowTitle('PSO algorithm settings')  # Window title
+        self.setWindowTitle('Search algorithm settings')  # Window title
         self.center_window() #  Center the window on desktop
 
         dct = {'PSO_nPop' : 'Population size:',
@@ -39,13 +45,32 @@ class PSOSettingsWindow(QMainWindow):
                'PSO_c1'   : 'Personal acceleration:',
                'PSO_c2'   : 'Social acceleration:',
                'PSO_a'    : 'Particle randomization:',
-               'PSO_b'    : 'Swarm randomization:'}
+               'PSO_b'    : 'Swarm randomization:',
+               'OPT_window' : 'Monitor window:',
+               'OPT_popSize': 'ES/DE population:',
+               'OPT_sigma0' : 'Initial step (ES):',
+               'OPT_F'      : 'Differential weight:',
+               'OPT_CR'     : 'Crossover rate:',
+               'OPT_step'   : 'Simplex size:',
+               'OPT_nHarmonics': 'Fourier harmonics:'}
         
         self.paramsLabels = {} # Dictionary with parameters labels
         self.paramsEdits = {}  # Dictionary with parameters edits
         self.paramResetBtn = {} # Dictionary with defaults buttons
         
-        y = 10
+        # Choice of the search algorithm
+        self.lbl_optimizer = QLabel('Algorithm:', self)
+        self.lbl_optimizer.setAlignment(Qt.AlignLeft)
+        self.lbl_optimizer.setGeometry(10, 10, 95, 21)
+        self.lbl_optimizer.setFont(QFont('Arial', 11))
+        self.cmb_optimizer = QComboBox(self)
+        self.cmb_optimizer.setGeometry(110, 10, 181, 21)
+        self.cmb_optimizer.setFont(QFont('Arial', 11))
+        for optimizer in SEARCH_ALGORITHMS:
+            self.cmb_optimizer.addItem(SEARCH_ALGORITHMS[optimizer], optimizer)
+        self.cmb_optimizer.currentIndexChanged.connect(self.optimizer_changed)
+        
+        y = 33
         for item in dct:
             # Labels:
             self.paramsLabels[item] = QLabel(dct[item], self)
@@ -75,6 +100,32 @@ class PSOSettingsWindow(QMainWindow):
                 self.paramsEdits[item].setFont(QFont('Arial', 11))
                 self.paramsEdits[item].setRange(1, self.iterLimit)
                 self.paramsEdits[item].valueChanged.connect(self.val_changed_spb_b)                                
+            elif item == 'OPT_window':  # Window of the convergence monitor is a spin box (0 - off)
+                self.paramsEdits[item] = AdvancedQSpinBox(self)
+                self.paramsEdits[item].setAlignment(Qt.AlignRight)
+                self.paramsEdits[item].setGeometry(167, y, 90, 21)
+                self.paramsEdits[item].setFont(QFont('Arial', 11))
+                self.paramsEdits[item].setRange(0, self.iterLimit)
+                self.paramsEdits[item].setToolTip('Iterations of the convergence monitor restarting the '
+                                                  'stagnated search (0 - monitor is off, the swarm is '
+                                                  'randomized every b-th iteration)')
+                self.paramsEdits[item].valueChanged.connect(self.val_changed_spb_window)
+            elif item == 'OPT_popSize':  # Population of CMA-ES and DE is a spin box (0 - default)
+                self.paramsEdits[item] = AdvancedQSpinBox(self)
+                self.paramsEdits[item].setAlignment(Qt.AlignRight)
+                self.paramsEdits[item].setGeometry(167, y, 90, 21)
+                self.paramsEdits[item].setFont(QFont('Arial', 11))
+                self.paramsEdits[item].setRange(0, 5000)
+                self.paramsEdits[item].valueChanged.connect(self.val_changed_spb_popSize)
+            elif item == 'OPT_nHarmonics':  # Harmonics of the decision space is a spin box (0 - radii)
+                self.paramsEdits[item] = AdvancedQSpinBox(self)
+                self.paramsEdits[item].setAlignment(Qt.AlignRight)
+                self.paramsEdits[item].setGeometry(167, y, 90, 21)
+                self.paramsEdits[item].setFont(QFont('Arial', 11))
+                self.paramsEdits[item].setRange(0, 12)
+                self.paramsEdits[item].setToolTip('Search the radial Fourier coefficients of the shape '
+                                                  'instead of the radii (0 - radii are searched)')
+                self.paramsEdits[item].valueChanged.connect(self.val_changed_spb_nHarmonics)
             else:
                 self.paramsEdits[item] = QLineEdit(self)
                 self.paramsEdits[item].setAlignment(Qt.AlignRight)
@@ -91,6 +142,12 @@ class PSOSettingsWindow(QMainWindow):
         
         # Buttons
         y += 10
+        self.btn_fastest = QPushButton('Fastest', self)
+        self.btn_fastest.setGeometry(10, y, 70, 27)
+        self.btn_fastest.setToolTip('Choose the algorithm, which needs the least cost evaluations '
+                                    'to reach the precision limit')
+        self.btn_fastest.clicked.connect(self.choose_fastest)
+        
         self.btn_OK = QPushButton('OK', self)
         self.btn_OK.setGeometry(141, y, 70, 27)
         self.btn_OK.clicked.connect(self.set_settings)
@@ -113,6 +170,59 @@ class PSOSettingsWindow(QMainWindow):
         self.paramsEdits['PSO_c2'].setText('{0:.2f}'.format(self.PSO_c2))
         self.paramsEdits['PSO_a'].setValue(self.PSO_a)
         self.paramsEdits['PSO_b'].setValue(self.PSO_b)
+        self.paramsEdits['OPT_window'].setValue(self.PSO_control.window)
+        self.paramsEdits['OPT_popSize'].setValue(self.optSettings.popSize)
+        self.paramsEdits['OPT_sigma0'].setText('{0:.2f}'.format(self.optSettings.sigma0))
+        self.paramsEdits['OPT_F'].setText('{0:.2f}'.format(self.optSettings.F))
+        self.paramsEdits['OPT_CR'].setText('{0:.2f}'.format(self.optSettings.CR))
+        self.paramsEdits['OPT_step'].setText('{0:.2f}'.format(self.optSettings.step))
+        self.paramsEdits['OPT_nHarmonics'].setValue(self.optSettings.nHarmonics)
+        self.cmb_optimizer.setCurrentIndex(self.cmb_optimizer.findData(self.optSettings.optimizer))
+        self.optimizer_changed()
+    
+    def optimizer_changed(self):
+        """Method for enabling the parameters of the chosen search algorithm"""
+        self.optSettings.optimizer = self.cmb_optimizer.currentData()
+        self.enable_params()
+    
+    def enable_params(self):
+        """Method for enabling the parameters used by the chosen algorithm and monitor"""
+        optimizer = self.optSettings.optimizer
+        for item in self.paramsEdits:
+            if item == 'PSO_b':  # Swarm is not randomized when the monitor is on
+                enabled = optimizer == OPT_PSO and self.PSO_control.window == 0
+            elif item.startswith('PSO_'):
+                enabled = optimizer == OPT_PSO
+            elif item == 'OPT_popSize':
+                enabled = optimizer in (OPT_CMAES, OPT_DE)
+            elif item == 'OPT_sigma0':
+                enabled = optimizer == OPT_CMAES
+            elif item in ('OPT_F', 'OPT_CR'):
+                enabled = optimizer == OPT_DE
+            elif item in ('OPT_nHarmonics', 'OPT_window'):
+                enabled = True  # Decision space and monitor are used by all the algorithms
+            else:
+                enabled = optimizer == OPT_NM
+            self.paramsLabels[item].setEnabled(enabled)
+            self.paramsEdits[item].setEnabled(enabled)
+            self.paramResetBtn[item].setEnabled(enabled)
+    
+    def choose_fastest(self):
+        """Method for choosing the algorithm which needs the least cost evaluations to reach
+           the precision limit for the current number of the particle dimensions"""
+        (optimizer, medians) = choose_search_algorithm(self.parentTool.psoAlg_dll,
+            self.parentTool.PSO_nVar, self.parentTool.precisionLimit, self.PSO_nPop, self.PSO_w,
+            self.PSO_wDamp, self.PSO_c1, self.PSO_c2, self.PSO_a, self.PSO_b,
+            control=self.PSO_control, nHarmonics=self.optSettings.nHarmonics)
+        self.cmb_optimizer.setCurrentIndex(self.cmb_optimizer.findData(optimizer))
+        
+    def val_changed_spb_popSize(self):
+        """Method for updating the population size of CMA-ES and DE after changing the spin box"""
+        self.optSettings.popSize = self.paramsEdits['OPT_popSize'].value()
+        
+    def val_changed_spb_nHarmonics(self):
+        """Method for updating the number of the Fourier harmonics after changing the spin box"""
+        self.optSettings.nHarmonics = self.paramsEdits['OPT_nHarmonics'].value()
         
     def val_changed_spb_nPop(self):
         """Method for updating the nPop value after changind the spin box"""
@@ -127,6 +237,12 @@ class PSOSettingsWindow(QMainWindow):
     def val_changed_spb_b(self):
         value = self.paramsEdits['PSO_b'].value()
         self.PSO_b = value   
+    
+    def val_changed_spb_window(self):
+        """Method for updating the monitor window after changing the spin box (b is used
+           only without the monitor)"""
+        self.PSO_control.window = self.paramsEdits['OPT_window'].value()
+        self.enable_params()
         
     def update_parameter_value(self, item):
         """Method for updating the parameter value after finish editing in edit box"""   
@@ -143,6 +259,18 @@ class PSOSettingsWindow(QMainWindow):
         elif item == 'PSO_c2':
             oldValue = self.PSO_c2
             message = 'Social acceleration'      
+        elif item == 'OPT_sigma0':
+            oldValue = self.optSettings.sigma0
+            message = 'Initial step'
+        elif item == 'OPT_F':
+            oldValue = self.optSettings.F
+            message = 'Differential weight'
+        elif item == 'OPT_CR':
+            oldValue = self.optSettings.CR
+            message = 'Crossover rate'
+        elif item == 'OPT_step':
+            oldValue = self.optSettings.step
+            message = 'Simplex size'
         
         # Treat the new value
         newValueStr = self.paramsEdits[item].text()  # Get the raw string
@@ -166,6 +294,10 @@ class PSOSettingsWindow(QMainWindow):
             if item == 'PSO_wDamp': self.PSO_wDamp = newValue
             if item == 'PSO_c1': self.PSO_c1 = newValue
             if item == 'PSO_c2': self.PSO_c2 = newValue
+            if item == 'OPT_sigma0': self.optSettings.sigma0 = newValue
+            if item == 'OPT_F': self.optSettings.F = newValue
+            if item == 'OPT_CR': self.optSettings.CR = newValue
+            if item == 'OPT_step': self.optSettings.step = newValue
       
     def show_error_window(self, text):
         """Method to show the window with error message"""
@@ -199,9 +331,25 @@ class PSOSettingsWindow(QMainWindow):
             self.paramsEdits['PSO_a'].setValue(5)
         elif item == 'PSO_b':
             self.paramsEdits['PSO_b'].setValue(200)
+        elif item == 'OPT_window':
+            self.paramsEdits['OPT_window'].setValue(psoControl_t().window)
+        elif item == 'OPT_popSize':
+            self.paramsEdits['OPT_popSize'].setValue(0)
+        elif item == 'OPT_sigma0':
+            self.paramsEdits['OPT_sigma0'].setText('0.30')
+        elif item == 'OPT_F':
+            self.paramsEdits['OPT_F'].setText('0.60')
+        elif item == 'OPT_CR':
+            self.paramsEdits['OPT_CR'].setText('0.90')
+        elif item == 'OPT_step':
+            self.paramsEdits['OPT_step'].setText('0.05')
+        elif item == 'OPT_nHarmonics':
+            self.paramsEdits['OPT_nHarmonics'].setValue(0)
+        if isinstance(self.paramsEdits[item], QLineEdit):
+            self.update_parameter_value(item)  # Save the default value of the edit
     
     def set_settings(self):
-        """Method for save the chosen PSO algorithm settings"""
+        """Method for save the chosen search algorithm settings"""
         # Create the dictionary with the settings data 
         settingsData = {'PSO_nPop' : self.PSO_nPop,
                         'PSO_w'    : self.PSO_w,
@@ -209,7 +357,9 @@ class PSOSettingsWindow(QMainWindow):
                         'PSO_c1'   : self.PSO_c1,
                         'PSO_c2'   : self.PSO_c2,
                         'PSO_a'    : self.PSO_a,
-                        'PSO_b'    : self.PSO_b}
+                        'PSO_b'    : self.PSO_b,
+                        'PSO_control': self.PSO_control,
+                        'optSettings': self.optSettings}
         
         # Send settings data to ParticleTester
         self.parentTool.set_PSO_settings_data(settingsData)
@@ -0,0 +1,221 @@
+#================================================================================
+# Autotuner of the PSO settings (nPop, w, wDamp, c1, c2, a, b) for one number
+# of the particle dimensions. Representative targets are drawn from the loaded
+# circularity, convexity and elongation distributions, the candidate settings
+# are compared by the mean wall time of the search to the precision limit on
+# the same targets and seeds (common random numbers) and the candidates with
+# the success rate below the floor are rejected. The search over the settings
+# is the successive halving: all the candidates are run on a part of the
+# targets, the best of them are run on all the targets. The winning profile is
+# saved per nDim (.json file) and is loaded by the generator and the finder.
+#================================================================================
+
+import os
+import json
+from time import perf_counter, strftime, localtime
+import numpy as np
+from Modules.ParticleBackend import new_random_state, new_seed, PSO_STATUS_PRECISION
+
+# Folder with the profiles of the PSO settings
+PROFILE_FOLDER = './PSOProfiles/'
+
+# Names of the tuned PSO settings
+PSO_PARAM_NAMES = ('nPop', 'w', 'wDamp', 'c1', 'c2', 'a', 'b')
+
+
+def profile_file_name(nDim, folder=PROFILE_FOLDER):
+    """Function for getting the name of the profile file of nDim"""
+    return os.path.join(folder, 'pso_profile_{0:d}.json'.format(nDim))
+
+
+def load_profile(nDim, folder=PROFILE_FOLDER):
+    """Function for loading the profile of the PSO settings of nDim
+       return: dictionary with the profile or None (there is no valid profile)"""
+    fileName = profile_file_name(nDim, folder)
+    if not os.path.isfile(fileName):
+        return None
+    try:
+        with open(fileName) as json_file:
+            profile = json.load(json_file)
+    except (OSError, ValueError):
+        return None
+    if profile.get('nDim') != nDim or not all(name in profile.get('params', {}) for name in PSO_PARAM_NAMES):
+        return None
+    return profile
+
+
+def save_profile(profile, folder=PROFILE_FOLDER):
+    """Function for saving the profile of the PSO settings (file of profile['nDim'] is replaced)"""
+    os.makedirs(folder, exist_ok=True)
+    with open(profile_file_name(profile['nDim'], folder), 'w') as outfile:
+        json.dump(profile, outfile, indent=4)
+
+
+def predict_run_time(profile, particlesNum, numThreads=1):
+    """Function for the prediction of the total search time of the particles by the profile
+       (the mean time per target was measured on this computer by the tuner)
+       profile: dictionary with the profile (None - no prediction)
+       particlesNum: Number of the particles to generate
+       numThreads: Number of the parallel searches
+       return: predicted time in seconds or None"""
+    if profile is None or profile.get('meanTime') is None:
+        return None
+    return profile['meanTime'] * particlesNum / max(numThreads, 1)
+
+
+class PSOTuner():
+    """Autotuner of the PSO settings for one number of the particle dimensions"""
+
+    def __init__(self, nDim, psoAlg, iterLimit, precisionLimit, minSuccessRate=0.9,
+                 control=None, settings=None, seed=None):
+        """Constructor of the class
+           nDim: Number of the particle dimensions (nVar of the search)
+           psoAlg: object with run_search method (PSOAlg_dll)
+           iterLimit: Maximum number of iterations of one search
+           precisionLimit: Precision limit which has to be reached by the search
+           minSuccessRate: Minimum fraction of the targets solved to the precision limit
+           control: psoControl_t with the convergence monitor settings (None - b resets of the swarm)
+           settings: optSettings_t with the decision space of the search (None - radii)
+           seed: Seed of the targets and of the searches (None - random seed)
+        """
+        self.nDim = nDim  # Number of the particle dimensions
+        self.psoAlg = psoAlg  # Searching object
+        self.iterLimit = iterLimit  # Maximum number of iterations
+        self.precisionLimit = precisionLimit  # Precision limit of the search
+        self.minSuccessRate = minSuccessRate  # Floor of the success rate
+        self.control = control  # Settings of the convergence monitor
+        self.settings = settings  # Settings of the search algorithm (decision space)
+        self.seed = new_seed(seed)  # Seed of the searches (the same for all the candidates)
+        self.rng = new_random_state(self.seed)  # Generator of the targets and of the candidates
+
+    def sample_targets(self, normCirc, normConvex, normElong, chLower, chUpper, n):
+        """Function for drawing the representative targets from the distributions (the channel
+           is chosen by its probability, the value is uniform inside the channel as in the generator)
+           normCirc, normConvex, normElong: normalized differential distributions (100 channels)
+           chLower, chUpper: Boundaries of the 100 circularity, convexity and elongation channels
+           n: Number of the targets
+           return: (n, 3) array with target circularity, convexity and elongation"""
+        chLower = np.asarray(chLower, dtype=np.float64)
+        chUpper = np.asarray(chUpper, dtype=np.float64)
+        targets = np.empty((n, 3))
+        for (j, distr) in enumerate((normCirc, normConvex, normElong)):
+            prob = np.asarray(distr, dtype=np.float64)
+            channels = self.rng.choice(len(prob), size=n, p=prob / prob.sum())
+            targets[:, j] = self.rng.uniform(chLower[channels], chUpper[channels])
+        return targets
+
+    def random_candidate(self, defaults):
+        """Function for the random candidate of the PSO settings (ranges around the defaults
+           of the generator, the swarm size is log-uniform)
+           defaults: dictionary with the current PSO settings (b is kept when the convergence
+                     monitor is on, the swarm is not randomized every b-th iteration then)
+           return: dictionary with the PSO settings"""
+        nPop = int(round(np.exp(self.rng.uniform(np.log(3), np.log(40)))))
+        candidate = {'nPop': nPop,
+                     'w': float(self.rng.uniform(0.4, 1.2)),
+                     'wDamp': float(self.rng.uniform(0.95, 1.0)),
+                     'c1': float(self.rng.uniform(0.5, 2.5)),
+                     'c2': float(self.rng.uniform(0.5, 2.5)),
+                     'a': int(self.rng.randint(2, max(nPop, 2) + 1)),
+                     'b': defaults['b']}
+        if self.control is None or self.control.window == 0:
+            candidate['b'] = int(self.rng.randint(50, 501))
+        return candidate
+
+    def evaluate(self, candidate, targets, stop_check=None):
+        """Function for the run of the candidate on the targets (target k is searched with
+           the stream k of the tuner seed for every candidate)
+           candidate: dictionary with the PSO settings
+           targets: (n, 3) array with target circularity, convexity and elongation
+           stop_check: function returning True to interrupt the evaluation
+           return: dictionary with 'meanTime' (s), 'successRate' and 'meanEvaluations'
+                   (None if the evaluation was interrupted)"""
+        times = np.empty(len(targets))
+        solved = np.zeros(len(targets), dtype=bool)
+        evaluations = np.empty(len(targets))
+        for (k, target) in enumerate(targets):
+            if stop_check is not None and stop_check():
+                return None
+            startTime = perf_counter()
+            results = self.psoAlg.run_search(target[0], target[1], target[2], self.nDim, 0.0, 1.0,
+                True, self.iterLimit, True, self.precisionLimit, False, candidate['nPop'],
+                candidate['w'], candidate['wDamp'], candidate['c1'], candidate['c2'],
+                candidate['a'], candidate['b'], seed=self.seed, stream=k, control=self.control,
+                settings=self.settings)
+            times[k] = perf_counter() - startTime
+            solved[k] = results['status'] == PSO_STATUS_PRECISION
+            evaluations[k] = results['evaluations']
+        return {'meanTime': float(times.mean()),
+                'successRate': float(solved.mean()),
+                'meanEvaluations': float(evaluations.mean())}
+
+    def get_score(self, result):
+        """Function for the score of the candidate result (lower is better): the feasible
+           candidates are compared by the mean time, the infeasible ones are after them and
+           are compared by the success rate"""
+        if result['successRate'] >= self.minSuccessRate:
+            return (0, result['meanTime'])
+        return (1, -result['successRate'], result['meanTime'])
+
+    def tune(self, targets, defaults, nCandidates=24, keepFraction=0.25, stop_check=None,
+             progress_callback=None):
+        """Function for the search of the best PSO settings by the successive halving
+           targets: (n, 3) array with the representative targets
+           defaults: dictionary with the current PSO settings (the first candidate)
+           nCandidates: Number of the candidates (including the defaults)
+           keepFraction: Fraction of the candidates run on all the targets
+           stop_check: function returning True to interrupt the tuning
+           progress_callback: function receiving the fraction of the done runs (None - no progress)
+           return: dictionary with the profile (None if the tuning was interrupted)"""
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+        nFirst = max(1, len(targets) // 4)
+        nKeep = max(1, int(round(keepFraction * nCandidates)))
+        candidates = [{name: defaults[name] for name in PSO_PARAM_NAMES}]
+        candidates += [self.random_candidate(defaults) for _ in range(nCandidates - 1)]
+        totalRuns = nCandidates * nFirst + nKeep * (len(targets) - nFirst)
+        doneRuns = 0
+
+        # Warm-up of the library (the first call includes the loading and the allocations)
+        self.evaluate(candidates[0], targets[:1])
+
+        # Stage 1: all the candidates on the first part of the targets
+        results = []
+        for candidate in candidates:
+            result = self.evaluate(candidate, targets[:nFirst], stop_check)
+            if result is None:
+                return None
+            results.append(result)
+            doneRuns += nFirst
+            if progress_callback is not None:
+                progress_callback(doneRuns / totalRuns)
+
+        # Stage 2: the best candidates on all the targets (the first part is not repeated)
+        order = sorted(range(nCandidates), key=lambda i: self.get_score(results[i]))[:nKeep]
+        best = None
+        for i in order:
+            result = results[i]
+            if len(targets) > nFirst:
+                rest = self.evaluate(candidates[i], targets[nFirst:], stop_check)
+                if rest is None:
+                    return None
+                n = len(targets) - nFirst
+                result = {key: (result[key] * nFirst + rest[key] * n) / len(targets) for key in result}
+                doneRuns += n
+                if progress_callback is not None:
+                    progress_callback(doneRuns / totalRuns)
+            if best is None or self.get_score(result) < self.get_score(best[1]):
+                best = (candidates[i], result)
+
+        (candidate, result) = best
+        return {'nDim': self.nDim,
+                'params': candidate,
+                'meanTime': result['meanTime'],
+                'successRate': result['successRate'],
+                'meanEvaluations': result['meanEvaluations'],
+                'feasible': result['successRate'] >= self.minSuccessRate,
+                'minSuccessRate': self.minSuccessRate,
+                'precisionLimit': self.precisionLimit,
+                'iterLimit': self.iterLimit,
+                'nHarmonics': 0 if self.settings is None else self.settings.nHarmonics,
+                'nTargets': len(targets),
+                'date': strftime('%d.%m.%Y %H:%M', localtime())}
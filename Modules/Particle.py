@@ -1,141 +1,135 @@
 #================================================================================
-# Wrapping of the dll library particle.dll for determination of the particle 
-# parameters. 
+# Wrapping of the particle library (particle.dll/particle.so or its NumPy
+# analogue) for determination of the particle parameters. 
 #================================================================================
 
-import ctypes
-import struct
-from math import pi, sin, cos
-
-# Define the c structure with output particle parameters
-class paramsStruct_t(ctypes.Structure):
-    _fields_ = \
-        [('nDim', ctypes.c_int),  # Number of the particle dimensions (equal to the amount of sliders)
-         ('imgScale', ctypes.c_double),  # Image scale (um/pix)
-         ('imgWidth', ctypes.c_int),  # Width of the image (pix)
-         ('realWidth', ctypes.c_double),  # Real width of the image with particle
-         ('centreXPos', ctypes.c_double),  # X coordinate of the centre [pix]
-         ('centreYPos', ctypes.c_double),  # Y coordinate of the centre [pix]
-         ('areaPixels', ctypes.c_double),  # Area of the particle in [pix]
-         ('areaUm2', ctypes.c_double),  # Area of the particle in [um^2]
-         ('CEDiameter', ctypes.c_double),  # CE Diameter of the particle [um]
-         ('perimeter', ctypes.c_double),  # Perimeter of the particle [um]
-         ('circularity', ctypes.c_double),  # Particle circularity parameter [-]
-         ('HSCircularity', ctypes.c_double),  # Hi sensitivity (HS) circularity [-]
-         ('convexity', ctypes.c_double),  # Convexity of the particle [-]
-         ('solidity', ctypes.c_double),  # Particle solidity [-]
-         ('SEVolume', ctypes.c_double),  # Spherical equivalent (SE) volume of the particle
-         ('major_x1', ctypes.c_double),  # Major x1 coord
-         ('major_y1', ctypes.c_double),  # Major y1 coord
-         ('major_x2', ctypes.c_double),  # Major x2 coord
-         ('major_y2', ctypes.c_double),  # Major y2 coord
-         ('minor_x1', ctypes.c_double),  # Minor x1 coord
-         ('minor_y1', ctypes.c_double),  # Minor y1 coord
-         ('minor_x2', ctypes.c_double),  # Minor x2 coord
-         ('minor_y2', ctypes.c_double),  # Minor y2 coord
-         ('majorAxisDeg', ctypes.c_double),  # Angle of the major axis in degres
-         ('length', ctypes.c_double),  # Length of the particle [um]
-         ('width', ctypes.c_double),  # Width of the particle [um]
-         ('aspectRatio', ctypes.c_double),  # Aspect ratio of the particle [-]
-         ('elongation', ctypes.c_double),  # Elongation of the particle [-]
-         ('maxDistance', ctypes.c_double)]  # Max distance between points of particle
+from collections import OrderedDict
+import numpy as np
+from Modules.ParticleBackend import paramsStruct_t, select_backend
+from Modules.ParticleBatch import paramsDtype, PixelSpaceResult
+from Modules.ParticleParams import ParticleParams
 
 class Particle():
-    """Wrapper class for dll with particle parameters calculation routins"""
+    """Wrapper class for the backend with particle parameters calculation routins"""
     
     def __init__(self):
         """Constructor of the class"""
-        self.dll = ctypes.WinDLL('./Modules/Generator_c/build/particle.dll')  # Loading the dll library
-        
-        # Function in dll is the following:
-        # void get_particle_parameters(double imgScale, double *dimsValues, int nDim, paramsStruct_t *allParams)
-                
-        # Define the function return type:
-        self.dll.get_particle_parameters.restype = None
-        
-        # Define the function parameters:
-        self.dll.get_particle_parameters.argtypes = \
-            [ctypes.c_double,  # imgScale
-             ctypes.POINTER(ctypes.c_double),  # dimsValues
-             ctypes.c_int,  # nDim
-             ctypes.POINTER(paramsStruct_t)]  # allParams
-
-        # Creating empty structure for dll function
+        self.backend = select_backend()  # Fastest available backend (compiled library or NumPy)
+
+        # Creating empty structure for the backend function
         self.paramsStruct = paramsStruct_t();
 
+        # LRU memo of the results: key is (imgScale, nDim, bytes of the dims values)
+        self.memo = OrderedDict()
+        self.memoSize = 256  # Max number of the memoized results
+
 
     def get_particle_parameters(self, imgScale, dimsValues, nDim):  
-        """Function for the calculation of particle parameters
+        """Function for the calculation of particle parameters (results are memoized)
            imgScale: Image scale (um/pix)
            dimsValues: Dimensions of the particle (set of values (0.0 - 1.0))
            nDim: Number of the particle dimensions (equal to the amount of sliders)
+           return: ParticleParams object (dictionary-style access by key)
+        """
+        key = self.make_memo_key(imgScale, dimsValues, nDim)
+        result = self.memo_get(key)
+        if result is None:
+            # Call the function from the backend (compiled library or NumPy)
+            self.backend.get_particle_parameters(imgScale, dimsValues, nDim, self.paramsStruct)
+            
+            # Same memory layout: the structure is viewed as record of paramsDtype type
+            params = np.frombuffer(self.paramsStruct, dtype=paramsDtype)[0]
+            result = self.memo_put(key, self.make_params(params, dimsValues, nDim))
+        return result
+
+    def get_pixel_space_parameters(self, dimsValues, nDim):
+        """Function for the calculation of particle parameters in pixel space (imgScale = 1.0).
+           Result can be rescaled to any image scale with rescale_parameters (both memoized)
+           dimsValues: Dimensions of the particle (set of values (0.0 - 1.0))
+           nDim: Number of the particle dimensions (equal to the amount of sliders)
+           return: ParticleParams object
+        """
+        return self.get_particle_parameters(1.0, dimsValues, nDim)
+
+    def rescale_parameters(self, pixParams, imgScale):
+        """Function for the rescaling of the pixel space parameters to the image scale
+           pixParams: ParticleParams object calculated with imgScale = 1.0
+           imgScale: Image scale (um/pix)
+           return: ParticleParams object
+        """
+        key = self.make_memo_key(imgScale, pixParams.dimsValues, pixParams.nDim)
+        result = self.memo_get(key)
+        if result is None:
+            params = PixelSpaceResult(pixParams.record.reshape(1)).rescale(imgScale)[0]
+            result = self.memo_put(key, self.make_params(params, pixParams.dimsValues, pixParams.nDim))
+        return result
+
+    def make_params(self, params, dimsValues, nDim):
+        """Function for the preparation of the result with particle parameters
+           params: record of paramsDtype type (e.g. element of the batch or rescaled result)
+           dimsValues: Dimensions of the particle (set of values (0.0 - 1.0))
+           nDim: Number of the particle dimensions (equal to the amount of sliders)
+           return: ParticleParams object (coordinates of the points are calculated lazily)
+        """
+        return ParticleParams(params, dimsValues, nDim)
+
+    def make_memo_key(self, imgScale, dimsValues, nDim):
+        """Function for the preparation of the memo key (exact values of the dimensions)"""
+        return (float(imgScale), nDim, np.asarray(dimsValues[:nDim], dtype=np.float64).tobytes())
+
+    def memo_get(self, key):
+        """Function for getting the memoized result (None if absent)"""
+        result = self.memo.get(key)
+        if result is not None:
+            self.memo.move_to_end(key)  # Most recently used
+        return result
+
+    def memo_put(self, key, result):
+        """Function for saving the result in the memo (least recently used are removed)"""
+        self.memo[key] = result
+        if len(self.memo) > self.memoSize:
+            self.memo.popitem(last=False)
+        return result
+
+    def get_particle_parameters_batch(self, imgScale, dimsArray):
+        """Function for the calculation of parameters of many particles in one call
+           imgScale: Image scale (um/pix), scalar or array with one value per particle
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: NumPy structured array (fields are the same as in paramsStruct_t)
+        """
+        return self.backend.get_particle_parameters_batch(imgScale, dimsArray)
+
+    def get_pixel_space_result(self, dimsArray):
+        """Function for the calculation of parameters of many particles in pixel space
+           (imgScale = 1.0). Result can be rescaled to any image scale with its rescale method.
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: PixelSpaceResult object
+        """
+        return PixelSpaceResult(self.backend.get_particle_parameters_batch(1.0, dimsArray))
+
+    def get_shape_cost_params_batch(self, dimsArray):
+        """Function for the calculation of only circularity, convexity and elongation
+           of many particles (parameters used by the cost function of the search)
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: (N, 3) array with circularity, convexity and elongation
+        """
+        return self.backend.get_shape_cost_params_batch(dimsArray)
+
+    def get_shape_cost_params_batch_f32(self, dimsArray):
+        """Function for the calculation of circularity, convexity and elongation of many
+           particles in single precision (screening of the big sets of candidates, e.g.
+           PSO swarms: the candidates are compared at about 1e-3 resolution)
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: (N, 3) float32 array with circularity, convexity and elongation
+        """
+        return self.backend.get_shape_cost_params_batch_f32(dimsArray)
+
+    def get_shape_cost_accuracy_report(self, dimsArray):
+        """Function for the accuracy report of the single precision calculation against
+           the float64 one on the given particles
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: dictionary {parameter: (max absolute error, mean absolute error)}
         """
-        # Creation dimsValues array for the dll function
-        dimsValues_t = ctypes.c_double * nDim
-        dimsValuesArr = dimsValues_t();
-        
-        for i in range(nDim):
-            dimsValuesArr[i] = dimsValues[i]
-        
-        # Call the function from particle.dll (Wrapped function)
-        ret = self.dll.get_particle_parameters(imgScale, dimsValuesArr, nDim, 
-            ctypes.byref(self.paramsStruct))
-        
-        # Additional calculation of the coordinates
-        # dimsCoord, dimsCoordMid: calculation the coordinates of the particle dims points
-        centreRadius = 5  # Radius of the central polygon
-        imgWidth = 360  # Width of the image (pix)
-        
-        dN = 2 * pi / nDim
-        array = [0] * nDim
-        arrayMid = [0] * nDim
-        for i in range(nDim):
-            radius = dimsValues[i] * (180 - centreRadius) + centreRadius  # Slider starts not from the center!
-            angle = i * dN
-            x = int(round(cos(angle) * radius + imgWidth/2))
-            y = int(round(sin(angle) * radius + imgWidth/2))
-            array[i] = (x, y)
-            arrayMid[i] = (x - imgWidth/2, y - imgWidth/2)
-        dimsCoord = tuple(array)
-        dimsCoordMid = tuple(arrayMid)       
-        
-        majorAxisPoints = ((self.paramsStruct.major_x1, 
-                            self.paramsStruct.major_y1),
-                           (self.paramsStruct.major_x2,
-                            self.paramsStruct.major_y2))
-        minorAxisPoints = ((self.paramsStruct.minor_x1, 
-                            self.paramsStruct.minor_y1),
-                           (self.paramsStruct.minor_x2,
-                            self.paramsStruct.minor_y2))
-        
-        # Prepare the output dictionary CalculatedParams
-        CalculatedParams = \
-            {'nDim': self.paramsStruct.nDim,
-             'dimsValues': dimsValues,
-             'imgScale': imgScale,
-             'imgWidth': self.paramsStruct.imgWidth,
-             'realWidth': self.paramsStruct.realWidth,
-             'dimsCoord' : dimsCoord,
-             'dimsCoordMid': dimsCoordMid,
-             'areaPixels': self.paramsStruct.areaPixels,
-             'areaUm2': self.paramsStruct.areaUm2,
-             'CEDiameter': self.paramsStruct.CEDiameter,
-             'centreXPos': self.paramsStruct.centreXPos,
-             'centreYPos': self.paramsStruct.centreYPos,
-             'perimeter': self.paramsStruct.perimeter,
-             'circularity': self.paramsStruct.circularity,
-             'convexity': self.paramsStruct.convexity,
-             'solidity': self.paramsStruct.solidity,
-             'HSCircularity': self.paramsStruct.HSCircularity,
-             'SEVolume': self.paramsStruct.SEVolume,
-             'majorAxisPoints': majorAxisPoints,
-             'minorAxisPoints': minorAxisPoints,
-             'majorAxisDeg': self.paramsStruct.majorAxisDeg,
-             'length': self.paramsStruct.length,
-             'width': self.paramsStruct.width,
-             'aspectRatio': self.paramsStruct.aspectRatio,
-             'elongation': self.paramsStruct.elongation,
-             'maxDistance': self.paramsStruct.maxDistance}
-        
-        # Return the calculated particle parameters
-        return CalculatedParams
\ No newline at end of file
+        report = self.backend.get_shape_cost_accuracy_report(dimsArray)
+        return {name: (report[0, k], report[1, k])
+                for (k, name) in enumerate(('circularity', 'convexity', 'elongation'))}
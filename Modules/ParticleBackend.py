@@ -0,0 +1,790 @@
+#================================================================================
+# Registry of the computational backends for the particle parameters and the
+# shape search (PSO, CMA-ES, differential evolution and Nelder-Mead). The
+# compiled backend loads the libraries built from Modules/Generator_c/src
+# (particle.dll/pso_algorithm.dll on Windows, particle.so/pso_algorithm.so on
+# Linux), the NumPy backend is a pure Python fallback. A startup self-check
+# chooses the fastest backend which gives correct results.
+#================================================================================
+
+import ctypes
+import os
+import sys
+from time import perf_counter
+import numpy as np
+from Modules.ParticleBatch import ParticleBatch, paramsDtype
+from Modules.ShapeArchive import ShapeArchive
+
+# Define the c structure with output particle parameters
+class paramsStruct_t(ctypes.Structure):
+    _fields_ = \
+        [('nDim', ctypes.c_int),  # Number of the particle dimensions (equal to the amount of sliders)
+         ('imgScale', ctypes.c_double),  # Image scale (um/pix)
+         ('imgWidth', ctypes.c_int),  # Width of the image (pix)
+         ('realWidth', ctypes.c_double),  # Real width of the image with particle
+         ('centreXPos', ctypes.c_double),  # X coordinate of the centre [pix]
+         ('centreYPos', ctypes.c_double),  # Y coordinate of the centre [pix]
+         ('areaPixels', ctypes.c_double),  # Area of the particle in [pix]
+         ('areaUm2', ctypes.c_double),  # Area of the particle in [um^2]
+         ('CEDiameter', ctypes.c_double),  # CE Diameter of the particle [um]
+         ('perimeter', ctypes.c_double),  # Perimeter of the particle [um]
+         ('circularity', ctypes.c_double),  # Particle circularity parameter [-]
+         ('HSCircularity', ctypes.c_double),  # Hi sensitivity (HS) circularity [-]
+         ('convexity', ctypes.c_double),  # Convexity of the particle [-]
+         ('solidity', ctypes.c_double),  # Particle solidity [-]
+         ('SEVolume', ctypes.c_double),  # Spherical equivalent (SE) volume of the particle
+         ('major_x1', ctypes.c_double),  # Major x1 coord
+         ('major_y1', ctypes.c_double),  # Major y1 coord
+         ('major_x2', ctypes.c_double),  # Major x2 coord
+         ('major_y2', ctypes.c_double),  # Major y2 coord
+         ('minor_x1', ctypes.c_double),  # Minor x1 coord
+         ('minor_y1', ctypes.c_double),  # Minor y1 coord
+         ('minor_x2', ctypes.c_double),  # Minor x2 coord
+         ('minor_y2', ctypes.c_double),  # Minor y2 coord
+         ('majorAxisDeg', ctypes.c_double),  # Angle of the major axis in degres
+         ('length', ctypes.c_double),  # Length of the particle [um]
+         ('width', ctypes.c_double),  # Width of the particle [um]
+         ('aspectRatio', ctypes.c_double),  # Aspect ratio of the particle [-]
+         ('elongation', ctypes.c_double),  # Elongation of the particle [-]
+         ('maxDistance', ctypes.c_double),  # Max distance between points of particle (max Feret) [um]
+         ('minFeret', ctypes.c_double),  # Min Feret width of the particle [um]
+         ('rectLength', ctypes.c_double),  # Length of the minimum area bounding rectangle [um]
+         ('rectWidth', ctypes.c_double)]  # Width of the minimum area bounding rectangle [um]
+
+# Define the c structure with the state of the random number generator (xoshiro256**)
+class rngState_t(ctypes.Structure):
+    _fields_ = [('s', ctypes.c_uint64 * 4)]  # 256-bit state of the generator
+
+
+# Define the c structure with the settings of the convergence monitor and the local polish of the PSO search
+class psoControl_t(ctypes.Structure):
+    _fields_ = \
+        [('window', ctypes.c_int),  # Monitor window in iterations (0 - monitor is off, b resets are used)
+         ('minImprovement', ctypes.c_double),  # Minimum relative improvement of the global best cost over the window
+         ('minRadius', ctypes.c_double),  # Minimum radius of the swarm (RMS distance to the global best position)
+         ('restartFraction', ctypes.c_double),  # Fraction of the worst particles restarted on the stagnation
+         ('maxRestarts', ctypes.c_int),  # Number of the restarts before the search can be given up
+         ('polishThreshold', ctypes.c_double),  # Polish starts below polishThreshold * precisionLimit (0 - off)
+         ('polishSteps', ctypes.c_int)]  # Maximum number of the Levenberg-Marquardt steps of one polish
+
+    def __init__(self, window=200, minImprovement=0.05, minRadius=0.01, restartFraction=0.5, maxRestarts=1,
+                 polishThreshold=10.0, polishSteps=8):
+        """Constructor of the structure (defaults are the same as in PSOAlg_default_control)"""
+        super().__init__(window, minImprovement, minRadius, restartFraction, maxRestarts,
+                         polishThreshold, polishSteps)
+
+
+# Define the c structure with the choice and the settings of the search algorithm
+class optSettings_t(ctypes.Structure):
+    _fields_ = \
+        [('optimizer', ctypes.c_int),  # Search algorithm (OPT_PSO, OPT_CMAES, OPT_DE or OPT_NM)
+         ('popSize', ctypes.c_int),  # Population size of CMA-ES and DE (0 - default for the nVar)
+         ('sigma0', ctypes.c_double),  # Initial step size of CMA-ES (fraction of the variables range)
+         ('F', ctypes.c_double),  # Differential weight of DE
+         ('CR', ctypes.c_double),  # Crossover probability of DE
+         ('step', ctypes.c_double),  # Initial size of the Nelder-Mead simplex (fraction of the variables range)
+         ('nHarmonics', ctypes.c_int)]  # Number of the radial Fourier harmonics searched (0 - radii are searched)
+
+    def __init__(self, optimizer=0, popSize=0, sigma0=0.3, F=0.6, CR=0.9, step=0.05, nHarmonics=0):
+        """Constructor of the structure (defaults are the same as in SearchAlg_default_settings)"""
+        super().__init__(optimizer, popSize, sigma0, F, CR, step, nHarmonics)
+
+
+# Type of the c function receiving the progress of the search (progressCallback_t):
+# void callback(unsigned int iteration, unsigned long evaluations, double globalBestCost,
+# const double *globalBestPosition)
+progressCallback_t = ctypes.CFUNCTYPE(None, ctypes.c_uint, ctypes.c_ulong, ctypes.c_double,
+                                      ctypes.POINTER(ctypes.c_double))
+
+
+# Define the c structure with the progress reporting and the cancelling of the running search
+class searchProgress_t(ctypes.Structure):
+    _fields_ = \
+        [('callback', progressCallback_t),  # Function receiving the progress (NULL - no progress)
+         ('cancel', ctypes.POINTER(ctypes.c_int)),  # Shared cancel flag (NULL - search can not be cancelled)
+         ('everyIter', ctypes.c_int),  # Call every everyIter iterations (0 - not by the iterations)
+         ('everyMs', ctypes.c_double)]  # Call every everyMs milliseconds (0 - not by the time)
+
+
+# Define the c structure with the bounded archive of the evaluated shapes (shapeArchive_t)
+class shapeArchive_t(ctypes.Structure):
+    _fields_ = \
+        [('nDim', ctypes.c_int),  # Number of the particle dimensions (radii) of the shapes
+         ('capacity', ctypes.c_int),  # Maximum number of the shapes
+         ('maxPerCell', ctypes.c_int),  # Maximum number of the shapes in one cell of the grid
+         ('cellSize', ctypes.c_double),  # Size of the cell in circularity, convexity and elongation
+         ('tableSize', ctypes.c_int),  # Number of the buckets of the hash table
+         ('tableBits', ctypes.c_int),  # Base 2 logarithm of tableSize
+         ('cursor', ctypes.c_int),  # Slot of the next inserted shape
+         ('count', ctypes.c_int),  # Number of the stored shapes
+         ('hits', ctypes.c_ulong),  # Number of the targets taken from the archive
+         ('head', ctypes.POINTER(ctypes.c_int)),  # First slot of every bucket
+         ('next', ctypes.POINTER(ctypes.c_int)),  # Next slot of the same bucket
+         ('cell', ctypes.POINTER(ctypes.c_longlong)),  # Packed grid cell of the shape in the slot
+         ('params', ctypes.POINTER(ctypes.c_double)),  # Circularity, convexity and elongation of the shapes
+         ('dims', ctypes.POINTER(ctypes.c_double))]  # Radii of the shapes
+
+
+# Search algorithms (OPT_... in SearchAlgorithm.h)
+OPT_PSO = 0  # Particle swarm optimization
+OPT_CMAES = 1  # Covariance matrix adaptation evolution strategy
+OPT_DE = 2  # Differential evolution
+OPT_NM = 3  # Nelder-Mead simplex
+
+
+# Statuses of the finished search (PSO_STATUS_... in PSOAlgorithm.h)
+PSO_STATUS_PRECISION = 0  # Precision limit is reached
+PSO_STATUS_ITER_LIMIT = 1  # Iteration limit is reached
+PSO_STATUS_GAVE_UP = 2  # Search is given up by the convergence monitor
+PSO_STATUS_CANCELLED = 3  # Search is cancelled by the shared cancel flag
+PSO_STATUS_ARCHIVE = 4  # Shape within the precision limit is taken from the archive (no search)
+PSO_STATUS_INITIAL = 5  # Initial position is within the precision limit (no search)
+
+
+def new_seed(seed=None):
+    """Function for preparation the seed of the random number generator
+       seed: integer seed or None (random seed from the operating system)
+       return: seed as an unsigned 64-bit integer"""
+    if seed is None:
+        return int.from_bytes(os.urandom(8), 'little')
+    return int(seed) & 0xFFFFFFFFFFFFFFFF
+
+
+def new_random_state(seed=None, stream=0):
+    """Function for making the independent numpy generator for the seed and the stream
+       (the Python counterpart of rng_seed_stream, but not the same sequence of numbers)
+       seed: integer seed, None (random seed) or the existing RandomState (returned as is)
+       return: np.random.RandomState object"""
+    if isinstance(seed, np.random.RandomState):
+        return seed
+    seed = new_seed(seed)
+    return np.random.RandomState([seed & 0xFFFFFFFF, seed >> 32, int(stream)])
+
+
+# Folder with the compiled libraries
+LIB_FOLDER = './Modules/Generator_c/build/'
+
+
+def load_library(name):
+    """Function for loading the compiled library (name without extension)
+       suitable for the current platform"""
+    if sys.platform.startswith('win'):
+        return ctypes.WinDLL(LIB_FOLDER + name + '.dll')
+    return ctypes.CDLL(LIB_FOLDER + name + '.so')
+
+
+class CompiledBackend():
+    """Backend with the compiled particle and pso_algorithm libraries"""
+    name = 'compiled'
+
+    def __init__(self):
+        """Constructor of the class (raises OSError if the libraries are not built)"""
+        self.particleLib = load_library('particle')
+        self.psoLib = load_library('pso_algorithm')
+        self.workspaces = {}  # Workspaces of the particle library (one for every nDim)
+
+        # Functions in library are the following:
+        # geomWorkspace_t* geom_workspace_create(int nDim)
+        # void geom_workspace_free(geomWorkspace_t *ws)
+        self.particleLib.geom_workspace_create.restype = ctypes.c_void_p
+        self.particleLib.geom_workspace_create.argtypes = [ctypes.c_int]  # nDim
+        self.particleLib.geom_workspace_free.restype = None
+        self.particleLib.geom_workspace_free.argtypes = [ctypes.c_void_p]  # ws
+
+        # Function in library is the following:
+        # void get_particle_parameters_ws(geomWorkspace_t *ws, double imgScale, const double *dimsValues,
+        # paramsStruct_t *allParams)
+        self.particleLib.get_particle_parameters_ws.restype = None
+        self.particleLib.get_particle_parameters_ws.argtypes = \
+            [ctypes.c_void_p,  # ws
+             ctypes.c_double,  # imgScale
+             ctypes.POINTER(ctypes.c_double),  # dimsValues
+             ctypes.POINTER(paramsStruct_t)]  # allParams
+
+        # Function in library is the following:
+        # void get_particle_parameters(double imgScale, double *dimsValues, int nDim, paramsStruct_t *allParams)
+        self.particleLib.get_particle_parameters.restype = None
+        self.particleLib.get_particle_parameters.argtypes = \
+            [ctypes.c_double,  # imgScale
+             ctypes.POINTER(ctypes.c_double),  # dimsValues
+             ctypes.c_int,  # nDim
+             ctypes.POINTER(paramsStruct_t)]  # allParams
+
+        # Function in library is the following:
+        # void get_particle_parameters_batch(double imgScale[], const double *dims, int n, int nDim,
+        # paramsStruct_t *out)
+        self.particleLib.get_particle_parameters_batch.restype = None
+        self.particleLib.get_particle_parameters_batch.argtypes = \
+            [ctypes.POINTER(ctypes.c_double),  # imgScale
+             ctypes.POINTER(ctypes.c_double),  # dims
+             ctypes.c_int,  # n
+             ctypes.c_int,  # nDim
+             ctypes.POINTER(paramsStruct_t)]  # out
+
+        # Function in library is the following:
+        # void compute_shape_cost_params_batch(const double *dims, int n, int nDim, double *out)
+        self.particleLib.compute_shape_cost_params_batch.restype = None
+        self.particleLib.compute_shape_cost_params_batch.argtypes = \
+            [ctypes.POINTER(ctypes.c_double),  # dims
+             ctypes.c_int,  # n
+             ctypes.c_int,  # nDim
+             ctypes.POINTER(ctypes.c_double)]  # out
+
+        # Function in library is the following:
+        # void compute_shape_cost_params_batch_f32(const float *dims, int n, int nDim, float *out)
+        self.particleLib.compute_shape_cost_params_batch_f32.restype = None
+        self.particleLib.compute_shape_cost_params_batch_f32.argtypes = \
+            [ctypes.POINTER(ctypes.c_float),  # dims
+             ctypes.c_int,  # n
+             ctypes.c_int,  # nDim
+             ctypes.POINTER(ctypes.c_float)]  # out
+
+        # Function in library is the following:
+        # void shape_cost_accuracy_report(const double *dims, int n, int nDim, double *report)
+        self.particleLib.shape_cost_accuracy_report.restype = None
+        self.particleLib.shape_cost_accuracy_report.argtypes = \
+            [ctypes.POINTER(ctypes.c_double),  # dims
+             ctypes.c_int,  # n
+             ctypes.c_int,  # nDim
+             ctypes.POINTER(ctypes.c_double)]  # report
+
+        # shapeArchive_t* shape_archive_create(int nDim, int capacity, double cellSize, int maxPerCell)
+        self.psoLib.shape_archive_create.restype = ctypes.POINTER(shapeArchive_t)
+        self.psoLib.shape_archive_create.argtypes = [
+            ctypes.c_int,  # nDim
+            ctypes.c_int,  # capacity
+            ctypes.c_double,  # cellSize
+            ctypes.c_int]  # maxPerCell
+        # void shape_archive_free(shapeArchive_t *archive)
+        self.psoLib.shape_archive_free.restype = None
+        self.psoLib.shape_archive_free.argtypes = [ctypes.POINTER(shapeArchive_t)]  # archive
+
+        # void rng_seed_stream(rngState_t *rng, uint64_t seed, int stream)
+        self.psoLib.rng_seed_stream.restype = None
+        self.psoLib.rng_seed_stream.argtypes = [
+            ctypes.POINTER(rngState_t),  # rng
+            ctypes.c_uint64,  # seed
+            ctypes.c_int]  # stream
+
+        # Function in library is the following:
+        # void SearchAlg_run_search(rngState_t *rng, const optSettings_t *settings, double init_circularity,
+        # double init_convexity, double init_elongation, int nVar, double varMin, double varMax,
+        # int useIterLimit, int iterLimit, int usePrecisionLimit, double precisionLimit,
+        # int showErrorPlot, int nPop, double w, double wDamp, double c1, double c2, int a, int b,
+        # const double *initPosition, const psoControl_t *control, const searchProgress_t *progress,
+        # shapeArchive_t *archive, unsigned int *iteration, int *status, unsigned long *evaluations,
+        # double *globalBestCost, double *globalBestPosition, double *arrayBestCosts)
+        self.psoLib.SearchAlg_run_search.restype = None
+        self.psoLib.SearchAlg_run_search.argtypes = [
+            ctypes.POINTER(rngState_t),  # rng
+            ctypes.POINTER(optSettings_t),  # settings (None - PSO)
+            ctypes.c_double,  # init_circularity
+            ctypes.c_double,  # init_convexity
+            ctypes.c_double,  # init_elongation
+            ctypes.c_int,  # nVar
+            ctypes.c_double,  # varMin
+            ctypes.c_double,  # varMax
+            ctypes.c_int,  # useIterLimit
+            ctypes.c_int,  # iterLimit
+            ctypes.c_int,  # usePrecisionLimit
+            ctypes.c_double,  # precisionLimit
+            ctypes.c_int,  # showErrorPlot
+            ctypes.c_int,  # nPop
+            ctypes.c_double,  # w
+            ctypes.c_double,  # wDamp
+            ctypes.c_double,  # c1
+            ctypes.c_double,  # c2
+            ctypes.c_int,  # a
+            ctypes.c_int,  # b
+            ctypes.POINTER(ctypes.c_double),  # initPosition (None - random position)
+            ctypes.POINTER(psoControl_t),  # control (None - b resets of the swarm)
+            ctypes.POINTER(searchProgress_t),  # progress (None - no progress and no cancelling)
+            ctypes.POINTER(shapeArchive_t),  # archive (None - no archive)
+            ctypes.POINTER(ctypes.c_uint),  # pointer to iteration
+            ctypes.POINTER(ctypes.c_int),  # pointer to status
+            ctypes.POINTER(ctypes.c_ulong),  # pointer to evaluations
+            ctypes.POINTER(ctypes.c_double),  # pointer to globalBestCost
+            ctypes.POINTER(ctypes.c_double),  # pointer to globalBestPosition
+            ctypes.POINTER(ctypes.c_double)]  # pointer to arrayBestCosts
+
+        # Function in library is the following:
+        # void SearchAlg_run_search_batch(rngState_t *rng, const optSettings_t *settings, int K,
+        # const double *targets, int nVar, double varMin, double varMax, int useIterLimit,
+        # int iterLimit, int usePrecisionLimit, double precisionLimit, int nPop, double w,
+        # double wDamp, double c1, double c2, int a, int b, const double *initPositions,
+        # const psoControl_t *control, shapeArchive_t *archive, unsigned int *iterations, int *statuses,
+        # unsigned long *evaluations, double *globalBestCosts, double *globalBestPositions)
+        self.psoLib.SearchAlg_run_search_batch.restype = None
+        self.psoLib.SearchAlg_run_search_batch.argtypes = [
+            ctypes.POINTER(rngState_t),  # rng
+            ctypes.POINTER(optSettings_t),  # settings (None - PSO)
+            ctypes.c_int,  # K
+            ctypes.POINTER(ctypes.c_double),  # targets
+            ctypes.c_int,  # nVar
+            ctypes.c_double,  # varMin
+            ctypes.c_double,  # varMax
+            ctypes.c_int,  # useIterLimit
+            ctypes.c_int,  # iterLimit
+            ctypes.c_int,  # usePrecisionLimit
+            ctypes.c_double,  # precisionLimit
+            ctypes.c_int,  # nPop
+            ctypes.c_double,  # w
+            ctypes.c_double,  # wDamp
+            ctypes.c_double,  # c1
+            ctypes.c_double,  # c2
+            ctypes.c_int,  # a
+            ctypes.c_int,  # b
+            ctypes.POINTER(ctypes.c_double),  # initPositions (None - random start)
+            ctypes.POINTER(psoControl_t),  # control (None - b resets of the swarm)
+            ctypes.POINTER(shapeArchive_t),  # archive (None - no archive)
+            ctypes.POINTER(ctypes.c_uint),  # iterations
+            ctypes.POINTER(ctypes.c_int),  # statuses
+            ctypes.POINTER(ctypes.c_ulong),  # evaluations
+            ctypes.POINTER(ctypes.c_double),  # globalBestCosts
+            ctypes.POINTER(ctypes.c_double)]  # globalBestPositions
+
+    def __del__(self):
+        """Destructor of the class (frees the workspaces of the library)"""
+        for ws in getattr(self, 'workspaces', {}).values():
+            self.particleLib.geom_workspace_free(ws)
+
+    def get_workspace(self, nDim):
+        """Function for getting the workspace of the particle library for the certain nDim
+           (created at the first call and reused by all the next calls)"""
+        if nDim not in self.workspaces:
+            self.workspaces[nDim] = self.particleLib.geom_workspace_create(nDim)
+        return self.workspaces[nDim]
+
+    def get_particle_parameters(self, imgScale, dimsValues, nDim, allParams):
+        """Function for the calculation of particle parameters (fills allParams structure)"""
+        dimsValuesArr = (ctypes.c_double * nDim)(*dimsValues[:nDim])
+        self.particleLib.get_particle_parameters_ws(self.get_workspace(nDim), imgScale, dimsValuesArr,
+                                                    ctypes.byref(allParams))
+
+    def get_particle_parameters_batch(self, imgScale, dimsArray):
+        """Function for the calculation of parameters of N particles in one call. The NumPy
+           buffers are passed to the library directly (no copy for contiguous float64 data)
+           imgScale: Image scale (um/pix), scalar or array with one value per particle
+           dimsArray: (N, nDim) array with dimensions of the particles
+           return: structured array of paramsDtype type with N elements"""
+        dimsArray = np.ascontiguousarray(np.atleast_2d(dimsArray), dtype=np.float64)
+        (N, nDim) = dimsArray.shape
+        imgScale = np.ascontiguousarray(np.broadcast_to(np.asarray(imgScale, dtype=np.float64), (N,)))
+        result = np.empty(N, dtype=paramsDtype)
+        self.particleLib.get_particle_parameters_batch(
+            imgScale.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            dimsArray.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), N, nDim,
+            result.ctypes.data_as(ctypes.POINTER(paramsStruct_t)))
+        return result
+
+    def get_shape_cost_params_batch(self, dimsArray):
+        """Function for the calculation of only circularity, convexity and elongation
+           of N particles (lite kernel of the cost function)
+           return: (N, 3) array with circularity, convexity and elongation"""
+        dimsArray = np.ascontiguousarray(np.atleast_2d(dimsArray), dtype=np.float64)
+        (N, nDim) = dimsArray.shape
+        result = np.empty((N, 3))
+        self.particleLib.compute_shape_cost_params_batch(
+            dimsArray.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), N, nDim,
+            result.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+        return result
+
+    def get_shape_cost_params_batch_f32(self, dimsArray):
+        """Function for the calculation of circularity, convexity and elongation of N particles
+           with the single precision kernel (for screening of the big sets of candidates)
+           return: (N, 3) float32 array with circularity, convexity and elongation"""
+        dimsArray = np.ascontiguousarray(np.atleast_2d(dimsArray), dtype=np.float32)
+        (N, nDim) = dimsArray.shape
+        result = np.empty((N, 3), dtype=np.float32)
+        self.particleLib.compute_shape_cost_params_batch_f32(
+            dimsArray.ctypes.data_as(ctypes.POINTER(ctypes.c_float)), N, nDim,
+            result.ctypes.data_as(ctypes.POINTER(ctypes.c_float)))
+        return result
+
+    def get_shape_cost_accuracy_report(self, dimsArray):
+        """Function for comparison of the single precision kernel with the float64 kernel
+           return: (2, 3) array: max and mean absolute errors of circularity, convexity, elongation"""
+        dimsArray = np.ascontiguousarray(np.atleast_2d(dimsArray), dtype=np.float64)
+        (N, nDim) = dimsArray.shape
+        report = np.empty((2, 3))
+        self.particleLib.shape_cost_accuracy_report(
+            dimsArray.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), N, nDim,
+            report.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+        return report
+
+    def make_rng(self, seed, stream):
+        """Function for making the seeded state of the library random number generator"""
+        rng = rngState_t()
+        self.psoLib.rng_seed_stream(ctypes.byref(rng), new_seed(seed), stream)
+        return rng
+
+    def make_archive(self, nDim, capacity=50000, cellSize=0.01, maxPerCell=4):
+        """Function for making the empty archive of the evaluated shapes of the library
+           (see ShapeArchive for the parameters)
+           return: CompiledArchive object (freed with the object)"""
+        return CompiledArchive(self.psoLib, nDim, capacity, cellSize, maxPerCell)
+
+    def make_progress(self, nVar, progress_callback, cancel, progressIter, progressMs):
+        """Function for making the progress structure of the library search (None - no
+           progress and no cancelling). The callback of the library is converted to the
+           progress dictionary passed to progress_callback"""
+        if (progress_callback is None) and (cancel is None):
+            return None
+        def callback(iteration, evaluations, globalBestCost, globalBestPosition):
+            progress_callback(make_progress_data(iteration, evaluations, globalBestCost,
+                                                 globalBestPosition[:nVar]))
+        return searchProgress_t(progressCallback_t(callback) if progress_callback is not None
+                                else progressCallback_t(),
+                                ctypes.pointer(cancel) if cancel is not None else None,
+                                progressIter, progressMs)
+
+    def run_search(self, init_circularity, init_convexity, init_elongation, nVar, varMin,
+                   varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+                   showErrorPlot, nPop, w, wDamp, c1, c2, a, b, seed=None, stream=0, control=None,
+                   settings=None, initPosition=None, progress_callback=None, cancel=None,
+                   progressIter=0, progressMs=0.0, archive=None):
+        """Method for main searching loop (flags are integers 0/1). The search is
+           reproduced bit-for-bit with the same seed and stream (None - random seed).
+           control: psoControl_t with the convergence monitor settings (None - b resets of the swarm)
+           settings: optSettings_t with the search algorithm (None - PSO)
+           initPosition: initial radii (None - random position), accepted without the search
+                         if it is within the precision limit (PSO_STATUS_INITIAL), otherwise CMA-ES,
+                         DE and Nelder-Mead start from it and PSO seeds the part of the swarm around it
+           progress_callback: function receiving the progress dictionary of the running search
+                              every progressIter iterations or progressMs milliseconds (None - no progress)
+           cancel: ctypes.c_int shared cancel flag, the search is stopped with PSO_STATUS_CANCELLED
+                   when its value is set by the other thread (None - search can not be cancelled)
+           archive: CompiledArchive of the evaluated shapes (None - no archive), the shape within
+                    the precision limit is taken from it without the search (PSO_STATUS_ARCHIVE)"""
+        rng = self.make_rng(seed, stream)
+        progress = self.make_progress(nVar, progress_callback, cancel, progressIter, progressMs)
+        iteration = ctypes.c_uint()
+        status = ctypes.c_int()
+        evaluations = ctypes.c_ulong()
+        globalBestCost = ctypes.c_double()
+        globalBestPosition = (ctypes.c_double * nVar)()
+        if showErrorPlot:
+            arrayBestCosts = (ctypes.c_double * iterLimit)()
+        else:
+            arrayBestCosts = (ctypes.c_double * 1)()
+        if initPosition is not None:
+            initPosition = (ctypes.c_double * nVar)(*initPosition[:nVar])
+
+        # Call the function from pso_algorithm library (Wrapped function)
+        self.psoLib.SearchAlg_run_search(ctypes.byref(rng), settings, init_circularity, init_convexity,
+            init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit,
+            precisionLimit, showErrorPlot, nPop, w, wDamp, c1, c2, a, b, initPosition, control,
+            progress, archive.pointer if archive is not None else None, ctypes.byref(iteration),
+            ctypes.byref(status), ctypes.byref(evaluations), ctypes.byref(globalBestCost),
+            globalBestPosition, arrayBestCosts)
+
+        # Prepare the output dictionary CalculatedParams
+        CalculatedParams = \
+            {'iteration': iteration.value,
+             'status': status.value,
+             'evaluations': evaluations.value,
+             'globalBestCost': globalBestCost.value,
+             'globalBestPosition': list(globalBestPosition),
+             'arrayBestCosts': list(arrayBestCosts) if showErrorPlot else []}
+        return CalculatedParams
+
+    def run_search_batch(self, targets, nVar, varMin, varMax, useIterLimit, iterLimit,
+                         usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1, c2, a, b,
+                         seed=None, stream=0, control=None, settings=None, archive=None,
+                         initPositions=None):
+        """Method for the search of K shapes in one call (PSO runs K independent swarms in
+           lock-step, the other algorithms solve the targets one after another)
+           targets: (K, 3) array with target circularity, convexity and elongation
+           seed, stream: seed and stream of the random number generator (None - random seed)
+           control: psoControl_t with the convergence monitor settings (None - b resets of the swarm)
+           settings: optSettings_t with the search algorithm (None - PSO)
+           archive: CompiledArchive of the evaluated shapes (None - no archive)
+           initPositions: (K, nVar) array with the initial radii (None - random start), the
+                          radii within the precision limit are accepted without the search
+           return: dictionary with 'iterations' (K), 'statuses' (K), 'evaluations' (K),
+                   'globalBestCosts' (K) and 'globalBestPositions' (K, nVar) arrays"""
+        rng = self.make_rng(seed, stream)
+        targets = np.ascontiguousarray(np.atleast_2d(targets), dtype=np.float64)
+        K = targets.shape[0]
+        iterations = np.zeros(K, dtype=np.uintc)
+        statuses = np.zeros(K, dtype=np.intc)
+        evaluations = np.zeros(K, dtype=ctypes.c_ulong)
+        globalBestCosts = np.empty(K)
+        globalBestPositions = np.empty((K, nVar))
+        if initPositions is not None:
+            initPositions = np.ascontiguousarray(np.reshape(initPositions, (K, -1))[:, :nVar],
+                                                 dtype=np.float64)
+            initPositions = initPositions.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+        self.psoLib.SearchAlg_run_search_batch(ctypes.byref(rng), settings, K,
+            targets.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            nVar, varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+            nPop, w, wDamp, c1, c2, a, b, initPositions, control,
+            archive.pointer if archive is not None else None,
+            iterations.ctypes.data_as(ctypes.POINTER(ctypes.c_uint)),
+            statuses.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+            evaluations.ctypes.data_as(ctypes.POINTER(ctypes.c_ulong)),
+            globalBestCosts.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            globalBestPositions.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+        return {'iterations': iterations,
+                'statuses': statuses,
+                'evaluations': evaluations,
+                'globalBestCosts': globalBestCosts,
+                'globalBestPositions': globalBestPositions}
+
+
+class CompiledArchive():
+    """Archive of the evaluated shapes of the compiled library (see shape_archive.c)"""
+
+    def __init__(self, psoLib, nDim, capacity, cellSize, maxPerCell):
+        """Constructor of the class (the archive is freed with the object)"""
+        self.psoLib = psoLib  # Library with the archive functions
+        self.nDim = nDim  # Number of the particle dimensions
+        self.pointer = psoLib.shape_archive_create(nDim, capacity, cellSize, maxPerCell)
+
+    def __del__(self):
+        """Destructor of the class (frees the archive of the library)"""
+        if getattr(self, 'pointer', None):
+            self.psoLib.shape_archive_free(self.pointer)
+            self.pointer = None
+
+    @property
+    def count(self):
+        """Number of the stored shapes"""
+        return self.pointer.contents.count
+
+    @property
+    def hits(self):
+        """Number of the targets taken from the archive"""
+        return self.pointer.contents.hits
+
+
+class NumpyBackend():
+    """Pure Python backend based on the vectorized ParticleBatch routines"""
+    name = 'numpy'
+
+    def __init__(self):
+        """Constructor of the class"""
+        self.particleBatch = ParticleBatch()
+
+    def get_particle_parameters(self, imgScale, dimsValues, nDim, allParams):
+        """Function for the calculation of particle parameters (fills allParams structure)"""
+        result = self.particleBatch.get_particle_parameters(imgScale, [dimsValues[:nDim]])[0]
+        for (field, _) in paramsStruct_t._fields_:
+            setattr(allParams, field, result[field].item())
+
+    def get_particle_parameters_batch(self, imgScale, dimsArray):
+        """Function for the calculation of parameters of N particles in one call
+           return: structured array of paramsDtype type with N elements"""
+        return self.particleBatch.get_particle_parameters(imgScale, dimsArray)
+
+    def get_shape_cost_params_batch(self, dimsArray):
+        """Function for the calculation of only circularity, convexity and elongation
+           of N particles (lite kernel of the cost function)
+           return: (N, 3) array with circularity, convexity and elongation"""
+        return self.particleBatch.get_shape_cost_params(dimsArray)
+
+    def get_shape_cost_params_batch_f32(self, dimsArray):
+        """Function for the calculation of circularity, convexity and elongation of N particles
+           in single precision (no separate kernel: float64 result is rounded to float32)
+           return: (N, 3) float32 array with circularity, convexity and elongation"""
+        return self.particleBatch.get_shape_cost_params(dimsArray).astype(np.float32)
+
+    def get_shape_cost_accuracy_report(self, dimsArray):
+        """Function for comparison of the single precision result with the float64 result
+           return: (2, 3) array: max and mean absolute errors of circularity, convexity, elongation"""
+        result = self.particleBatch.get_shape_cost_params(dimsArray)
+        errors = np.abs(result.astype(np.float32) - result)
+        return np.array([errors.max(axis=0), errors.mean(axis=0)])
+
+    def make_archive(self, nDim, capacity=50000, cellSize=0.01, maxPerCell=4):
+        """Function for making the empty archive of the evaluated shapes
+           return: ShapeArchive object"""
+        return ShapeArchive(nDim, capacity, cellSize, maxPerCell)
+
+    def run_search(self, init_circularity, init_convexity, init_elongation, nVar, varMin,
+                   varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+                   showErrorPlot, nPop, w, wDamp, c1, c2, a, b, seed=None, stream=0, control=None,
+                   settings=None, initPosition=None, progress_callback=None, cancel=None,
+                   progressIter=0, progressMs=0.0, archive=None):
+        """Method for main searching loop (runs the Python search algorithm chosen by settings,
+           the progress, the cancelling and the archive are the same as in the compiled backend)"""
+        from Modules.SearchAlgorithms import make_search_alg  # Imported here to avoid the circular import
+
+        # Take the shape from the archive (the archive of other nDim is not used)
+        if archive is not None and archive.nDim != nVar:
+            archive = None
+        found = archive.take((init_circularity, init_convexity, init_elongation),
+                             precisionLimit) if archive is not None and usePrecisionLimit else None
+        if found is not None:
+            (dims, distance) = found
+            return {'iteration': 0,
+                    'status': PSO_STATUS_ARCHIVE,
+                    'evaluations': 0,
+                    'globalBestCost': distance,
+                    'globalBestPosition': list(dims),
+                    'arrayBestCosts': [distance] if showErrorPlot else []}
+
+        # Accept the initial position within the precision limit
+        if initPosition is not None and usePrecisionLimit:
+            params = self.get_shape_cost_params_batch(np.asarray(initPosition[:nVar], dtype=np.float64))[0]
+            cost = float(np.sqrt(np.sum((params - (init_circularity, init_convexity, init_elongation)) ** 2)))
+            if cost <= precisionLimit:
+                return {'iteration': 0,
+                        'status': PSO_STATUS_INITIAL,
+                        'evaluations': 1,
+                        'globalBestCost': cost,
+                        'globalBestPosition': list(initPosition[:nVar]),
+                        'arrayBestCosts': [cost] if showErrorPlot else []}
+
+        progress = LastProgress(progress_callback, progressIter, progressMs)
+        searchAlg_py = make_search_alg(progress, settings, init_circularity, init_convexity,
+                                       init_elongation, nVar, varMin, varMax, useIterLimit,
+                                       iterLimit, usePrecisionLimit, precisionLimit, showErrorPlot,
+                                       nPop, w, wDamp, c1, c2, a, b, initPosition,
+                                       new_random_state(seed, stream), control)
+        searchAlg_py.cancel = cancel
+        if settings is None or settings.optimizer == OPT_PSO:
+            searchAlg_py.archive = archive  # Only PSO adds its evaluated shapes to the archive
+        searchAlg_py.run_search()
+
+        # The found shape is not given to the next targets
+        if archive is not None:
+            archive.remove(self.get_shape_cost_params_batch(progress.data['globalBestPosition'])[0])
+
+        # Prepare the output dictionary CalculatedParams
+        CalculatedParams = \
+            {'iteration': progress.data['iteration'],
+             'status': progress.data['status'],
+             'evaluations': progress.data['evaluations'],
+             'globalBestCost': progress.data['globalBestCost'],
+             'globalBestPosition': list(progress.data['globalBestPosition']),
+             'arrayBestCosts': list(progress.data['arrayBestCosts']) if showErrorPlot else []}
+        return CalculatedParams
+
+    def run_search_batch(self, targets, nVar, varMin, varMax, useIterLimit, iterLimit,
+                         usePrecisionLimit, precisionLimit, nPop, w, wDamp, c1, c2, a, b,
+                         seed=None, stream=0, control=None, settings=None, archive=None,
+                         initPositions=None):
+        """Method for the search of K shapes (the targets are solved one after another
+           with one generator for the whole batch, archive: ShapeArchive or None,
+           initPositions: (K, nVar) array with the initial radii or None)
+           return: dictionary with 'iterations' (K), 'statuses' (K), 'evaluations' (K),
+                   'globalBestCosts' (K) and 'globalBestPositions' (K, nVar) arrays"""
+        targets = np.atleast_2d(targets)
+        K = targets.shape[0]
+        rng = new_random_state(seed, stream)
+        result = {'iterations': np.zeros(K, dtype=np.uintc),
+                  'statuses': np.zeros(K, dtype=np.intc),
+                  'evaluations': np.zeros(K, dtype=ctypes.c_ulong),
+                  'globalBestCosts': np.empty(K),
+                  'globalBestPositions': np.empty((K, nVar))}
+        for k in range(K):
+            data = self.run_search(targets[k, 0], targets[k, 1], targets[k, 2], nVar, varMin,
+                                   varMax, useIterLimit, iterLimit, usePrecisionLimit,
+                                   precisionLimit, 0, nPop, w, wDamp, c1, c2, a, b, rng,
+                                   control=control, settings=settings, archive=archive,
+                                   initPosition=None if initPositions is None else initPositions[k])
+            result['iterations'][k] = data['iteration']
+            result['statuses'][k] = data['status']
+            result['evaluations'][k] = data['evaluations']
+            result['globalBestCosts'][k] = data['globalBestCost']
+            result['globalBestPositions'][k] = data['globalBestPosition']
+        return result
+
+
+class LastProgress():
+    """Replacement of the progress signal, which keeps only the last emitted data and passes
+       the data of the running search to the callback every everyIter iterations or every
+       everyMs milliseconds (the same throttling as PSOAlg_progress_check)"""
+    def __init__(self, callback=None, everyIter=0, everyMs=0.0):
+        self.data = None
+        self.callback = callback  # Function receiving the progress (None - no progress)
+        self.everyIter = everyIter  # Call every everyIter iterations (0 - not by the iterations)
+        self.everyMs = everyMs  # Call every everyMs milliseconds (0 - not by the time)
+        self.lastReportMs = -np.inf  # Time of the last call
+
+    def emit(self, data):
+        self.data = data
+        if self.callback is None or not data['doSearch']:
+            return
+        report = self.everyIter > 0 and data['iteration'] % self.everyIter == 0
+        if not report and self.everyMs > 0.0:
+            report = perf_counter() * 1000.0 - self.lastReportMs >= self.everyMs
+        if report:
+            self.callback(data)
+            self.lastReportMs = perf_counter() * 1000.0
+
+
+def make_progress_data(iteration, evaluations, globalBestCost, globalBestPosition):
+    """Function for making the progress dictionary of the running search (the same keys as
+       the progress data of the Python search algorithms)"""
+    return {'iteration': iteration,
+            'globalBestPosition': list(globalBestPosition),
+            'globalBestCost': globalBestCost,
+            'arrayBestCosts': [],
+            'doSearch': True,
+            'status': None,
+            'evaluations': evaluations}
+
+
+# List of the registered backends in the order of preference
+BACKENDS = [CompiledBackend, NumpyBackend]
+
+# Backend chosen by the self-check (shared by all the Particle and PSOAlg_dll instances)
+selectedBackend = None
+
+
+def check_backend(backend, reference):
+    """Function for checking the backend results against the reference backend
+       return: True if the parameters of the test particles are the same"""
+    rng = np.random.RandomState(0)
+    for nDim in (5, 12, 24):
+        dimsValues = list(rng.uniform(0.0, 1.0, nDim))
+        params = paramsStruct_t()
+        refParams = paramsStruct_t()
+        backend.get_particle_parameters(1.5, dimsValues, nDim, params)
+        reference.get_particle_parameters(1.5, dimsValues, nDim, refParams)
+        for (field, _) in paramsStruct_t._fields_:
+            value = getattr(params, field)
+            refValue = getattr(refParams, field)
+            if not abs(value - refValue) <= 1e-6 * max(1.0, abs(refValue)):
+                return False
+    return True
+
+
+def benchmark_backend(backend, repeats=200):
+    """Function for measuring the time (s) of one particle parameters calculation"""
+    dimsValues = [0.5] * 12
+    params = paramsStruct_t()
+    startTime = perf_counter()
+    for i in range(repeats):
+        backend.get_particle_parameters(1.0, dimsValues, 12, params)
+    return (perf_counter() - startTime) / repeats
+
+
+def select_backend(name=None):
+    """Function for choosing the backend. If name is None, all the available
+       backends are checked and the fastest one is used (the choice is made once)
+       name: name of the desired backend ('compiled' or 'numpy')"""
+    global selectedBackend
+    if (name is None) and (selectedBackend is not None):
+        return selectedBackend
+
+    reference = NumpyBackend()
+    candidates = []
+    for backendClass in BACKENDS:
+        if (name is not None) and (backendClass.name != name):
+            continue
+        try:
+            backend = reference if backendClass is NumpyBackend else backendClass()
+        except (OSError, AttributeError):  # The library is not built for this platform (or outdated)
+            continue
+        if check_backend(backend, reference):
+            candidates.append((benchmark_backend(backend), backend))
+
+    if not candidates:
+        raise RuntimeError('Particle backend "{0}" is not available!'.format(name))
+    backend = min(candidates, key=lambda item: item[0])[1]
+    if name is None:
+        selectedBackend = backend
+    return backend
@@ -0,0 +1,437 @@
+#================================================================================
+# Vectorized (NumPy) calculation of the particle parameters for the whole
+# population of particles at once. Analogue of the particle.dll routines,
+# but every step (shoelace sums, convex hull, inertia tensor, projections)
+# is done for all the particles of the batch simultaneously.
+#================================================================================
+
+import numpy as np
+from Modules.TrigTable import TrigTable
+
+# Structured type of the output particle parameters (same fields as paramsStruct_t)
+paramsDtype = np.dtype(
+    [('nDim', np.int32),  # Number of the particle dimensions (equal to the amount of sliders)
+     ('imgScale', np.float64),  # Image scale (um/pix)
+     ('imgWidth', np.int32),  # Width of the image (pix)
+     ('realWidth', np.float64),  # Real width of the image with particle
+     ('centreXPos', np.float64),  # X coordinate of the centre [pix]
+     ('centreYPos', np.float64),  # Y coordinate of the centre [pix]
+     ('areaPixels', np.float64),  # Area of the particle in [pix]
+     ('areaUm2', np.float64),  # Area of the particle in [um^2]
+     ('CEDiameter', np.float64),  # CE Diameter of the particle [um]
+     ('perimeter', np.float64),  # Perimeter of the particle [um]
+     ('circularity', np.float64),  # Particle circularity parameter [-]
+     ('HSCircularity', np.float64),  # Hi sensitivity (HS) circularity [-]
+     ('convexity', np.float64),  # Convexity of the particle [-]
+     ('solidity', np.float64),  # Particle solidity [-]
+     ('SEVolume', np.float64),  # Spherical equivalent (SE) volume of the particle
+     ('major_x1', np.float64),  # Major x1 coord
+     ('major_y1', np.float64),  # Major y1 coord
+     ('major_x2', np.float64),  # Major x2 coord
+     ('major_y2', np.float64),  # Major y2 coord
+     ('minor_x1', np.float64),  # Minor x1 coord
+     ('minor_y1', np.float64),  # Minor y1 coord
+     ('minor_x2', np.float64),  # Minor x2 coord
+     ('minor_y2', np.float64),  # Minor y2 coord
+     ('majorAxisDeg', np.float64),  # Angle of the major axis in degres
+     ('length', np.float64),  # Length of the particle [um]
+     ('width', np.float64),  # Width of the particle [um]
+     ('aspectRatio', np.float64),  # Aspect ratio of the particle [-]
+     ('elongation', np.float64),  # Elongation of the particle [-]
+     ('maxDistance', np.float64),  # Max distance between points of particle (max Feret) [um]
+     ('minFeret', np.float64),  # Min Feret width of the particle [um]
+     ('rectLength', np.float64),  # Length of the minimum area bounding rectangle [um]
+     ('rectWidth', np.float64)],  # Width of the minimum area bounding rectangle [um]
+    align=True)
+
+
+class PixelSpaceResult():
+    """Class for the pixel-space result of the particle parameters calculation
+       (parameters calculated with imgScale = 1.0). All the um quantities are the
+       closed-form scaling of the pixel quantities, so the result can be rescaled to
+       any image scale without the second geometry pass."""
+
+    # Power of the image scale for every um field (all the other fields do not depend on it)
+    scaledFields = {'areaUm2': 2, 'CEDiameter': 1, 'perimeter': 1, 'SEVolume': 3, 'length': 1,
+                    'width': 1, 'maxDistance': 1, 'minFeret': 1, 'rectLength': 1, 'rectWidth': 1}
+
+    def __init__(self, pixParams):
+        """Constructor of the class
+           pixParams: structured array of paramsDtype type calculated with imgScale = 1.0
+        """
+        self.pixParams = pixParams
+
+    def __len__(self):
+        return len(self.pixParams)
+
+    def __getitem__(self, field):
+        """Access to the fields of the pixel-space result (e.g. result['areaPixels'])"""
+        return self.pixParams[field]
+
+    def rescale(self, imgScale):
+        """Function for the rescaling of the result to the new image scale
+           imgScale: Image scale (um/pix), scalar or array with one value per particle
+           return: structured array of paramsDtype type (same as calculated with imgScale)
+        """
+        imgScale = np.broadcast_to(np.asarray(imgScale, dtype=np.float64), (len(self.pixParams),))
+        scale = imgScale / self.pixParams['imgScale']  # pixParams['imgScale'] is 1.0 normally
+        result = self.pixParams.copy()
+        result['imgScale'] = imgScale
+        result['realWidth'] = imgScale * result['imgWidth']
+        for (field, power) in self.scaledFields.items():
+            result[field] *= scale ** power
+        return result
+
+
+class ParticleBatch():
+    """Class for the vectorized calculation of parameters of many particles"""
+
+    def __init__(self, chunkSize=65536):
+        """Constructor of the class
+           chunkSize: Maximum number of particles treated in one vectorized pass
+                      (limits the size of the temporary arrays)
+        """
+        self.imgWidth = 360  # Width of the image (pix)
+        self.centreRadius = 5.0  # Radius of the central polygon
+        self.chunkSize = chunkSize
+        self.feretBlockSize = 2 ** 18  # Max size of the temporary arrays of the Feret diameters
+
+    def get_particle_parameters(self, imgScale, dimsArray):
+        """Function for the calculation of parameters of all the particles
+           imgScale: Image scale (um/pix), scalar or array with one value per particle
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: structured array of paramsDtype type with N elements
+        """
+        dimsArray = np.atleast_2d(np.asarray(dimsArray, dtype=np.float64))
+        (N, nDim) = dimsArray.shape
+        imgScale = np.broadcast_to(np.asarray(imgScale, dtype=np.float64), (N,))
+
+        result = np.empty(N, dtype=paramsDtype)
+        for start in range(0, N, self.chunkSize):
+            stop = min(start + self.chunkSize, N)
+            self.calc_chunk(imgScale[start:stop], dimsArray[start:stop], result[start:stop])
+        return result
+
+    def get_shape_cost_params(self, dimsArray):
+        """Lite function for the calculation of only circularity, convexity and elongation
+           of all the particles (parameters used by the cost function of the search)
+           dimsArray: (N, nDim) array with dimensions of the particles (values 0.0 - 1.0)
+           return: (N, 3) array with circularity, convexity and elongation
+        """
+        dimsArray = np.atleast_2d(np.asarray(dimsArray, dtype=np.float64))
+        result = np.empty((dimsArray.shape[0], 3))
+        for start in range(0, dimsArray.shape[0], self.chunkSize):
+            stop = min(start + self.chunkSize, dimsArray.shape[0])
+            result[start:stop] = self.calc_cost_chunk(dimsArray[start:stop])
+        return result
+
+    def get_dims_coords(self, dimsArray):
+        """Function for calculation the coordinates of the particle dims points
+           (0 in the middle of the particle) for all the particles
+           dimsArray: (N, nDim) array with dimensions of the particles
+           return: tuple (X, Y) of (N, nDim) arrays
+        """
+        radius = dimsArray * (180.0 - self.centreRadius) + self.centreRadius  # Slider starts not from the center!
+        (X, Y) = TrigTable.get_vertices(radius, 180.0)
+        return X - 180.0, Y - 180.0
+
+    def calc_chunk(self, imgScale, dimsArray, out):
+        """Function for the calculation of parameters of one chunk of particles
+           imgScale: (n,) array with image scales
+           dimsArray: (n, nDim) array with dimensions of the particles
+           out: structured array (view) to be filled with the results
+        """
+        nDim = dimsArray.shape[1]
+        (X, Y) = self.get_dims_coords(dimsArray)
+        X1 = np.roll(X, -1, axis=1)  # Coordinates of the next point of the polygon
+        Y1 = np.roll(Y, -1, axis=1)
+
+        # areaPixels: calculating particle area in pixels (shoelace formula)
+        crossTerm = X * Y1 - X1 * Y
+        areaPixels = crossTerm.sum(axis=1) / 2
+
+        # centreXPos, centreYPos: calculating coordinates (X, Y) of centre of mass
+        centreXPos = ((X + X1) * crossTerm).sum(axis=1) / (6.0 * areaPixels)
+        centreYPos = ((Y + Y1) * crossTerm).sum(axis=1) / (6.0 * areaPixels)
+
+        # Perimeter and convex hull parameters in pixels
+        perimeterPix = np.hypot(X1 - X, Y1 - Y).sum(axis=1)
+        (areaConvexHullPix, convexHullPerimeter) = self.calc_convex_hull_params(X, Y)
+
+        # theta: angle of the major axis from the moments of inertia
+        theta = self.calc_theta(X, Y, X1, Y1, crossTerm, areaPixels, centreXPos, centreYPos)
+
+        self.fill_params(out, imgScale, nDim, areaPixels, centreXPos, centreYPos, perimeterPix,
+                         areaConvexHullPix, convexHullPerimeter, theta, X, Y)
+
+    def fill_params(self, out, imgScale, nDim, areaPixels, centreXPos, centreYPos, perimeterPix,
+                    areaConvexHullPix, convexHullPerimeter, theta, X, Y):
+        """Function for the calculation of all the particle parameters from the geometry
+           of the polygons (shared by the batch and the incremental calculations)
+           out: structured array (view) to be filled with the results
+           imgScale: (n,) array with image scales
+           nDim: number of the particle dimensions
+           areaPixels, centreXPos, centreYPos, perimeterPix: (n,) arrays (pixels)
+           areaConvexHullPix, convexHullPerimeter: (n,) arrays for the convex hull (pixels)
+           theta: (n,) array with the angle of the major axis from the inertia
+           X, Y: (n, m) arrays with the points used for the projections and Feret diameters
+                 (dims points or only the convex hull points)
+        """
+        # areaUm2, CEDiameter: calculating particle area in um^2 and the CE Diameter
+        areaUm2 = imgScale ** 2 * areaPixels
+        CEDiameter = np.sqrt(areaUm2 * 4 / np.pi)
+
+        # perimeter, circularity, HSCircularity
+        perimeter = perimeterPix * imgScale
+        circularity = 2 * np.sqrt(np.pi * areaUm2) / perimeter
+        HSCircularity = (4 * np.pi * areaUm2) / perimeter ** 2
+
+        # Convex hull parameters: convexity and solidity
+        convexity = convexHullPerimeter * imgScale / perimeter
+        solidity = areaPixels / areaConvexHullPix
+
+        # SEVolume: calculating the spherical equivalent (SE) volume
+        SEVolume = (np.pi * CEDiameter ** 3) / 6
+
+        # orientation: angle of major axis in rad from the horizontal line
+        orientation = np.pi / 2 - theta
+
+        # minorAxisPoints, majorAxisPoints: points on a circle with the CE diameter
+        halfCE = CEDiameter / (2 * imgScale)
+        cosO = np.cos(orientation) * halfCE
+        sinO = np.sin(orientation) * halfCE
+        major_x1 = centreXPos + cosO
+        major_y1 = centreYPos - sinO
+        major_x2 = centreXPos - cosO
+        major_y2 = centreYPos + sinO
+        minor_x1 = centreXPos - sinO
+        minor_y1 = centreYPos - cosO
+        minor_x2 = centreXPos + sinO
+        minor_y2 = centreYPos + cosO
+
+        # majorAxisDeg: calculating the angle (in degres) of major axis as in Morphologi G3
+        majorAxisDeg = 180.0 - orientation * 180.0 / np.pi
+
+        # length, width: calculating the length and width of the particle
+        length = self.calc_projection_length(major_x1, major_y1, major_x2, major_y2, X, Y) * imgScale
+        width = self.calc_projection_length(minor_x1, minor_y1, minor_x2, minor_y2, X, Y) * imgScale
+
+        # aspectRatio: swap the axes of the particles where width > length
+        swap = width > length
+        (major_x1, minor_x1) = (np.where(swap, minor_x1, major_x1), np.where(swap, major_x1, minor_x1))
+        (major_y1, minor_y1) = (np.where(swap, minor_y1, major_y1), np.where(swap, major_y1, minor_y1))
+        (major_x2, minor_x2) = (np.where(swap, minor_x2, major_x2), np.where(swap, major_x2, minor_x2))
+        (major_y2, minor_y2) = (np.where(swap, minor_y2, major_y2), np.where(swap, major_y2, minor_y2))
+        (length, width) = (np.where(swap, width, length), np.where(swap, length, width))
+        majorAxisDeg = np.where(swap, np.where(majorAxisDeg > 90.0, majorAxisDeg - 90.0,
+                                               majorAxisDeg + 90.0), majorAxisDeg)
+        aspectRatio = width / length
+
+        # elongation: calculation of the particle elongation
+        elongation = 1.0 - aspectRatio
+
+        # maxDistance, minFeret, rectLength, rectWidth: Feret diameters and bounding rectangle
+        (maxDistance, minFeret, rectLength, rectWidth) = self.calc_feret_diameters(X, Y)
+        maxDistance *= imgScale
+        minFeret *= imgScale
+        rectLength *= imgScale
+        rectWidth *= imgScale
+
+        # Fill the output structured array
+        out['nDim'] = nDim
+        out['imgScale'] = imgScale
+        out['imgWidth'] = self.imgWidth
+        out['realWidth'] = imgScale * self.imgWidth
+        out['centreXPos'] = centreXPos
+        out['centreYPos'] = centreYPos
+        out['areaPixels'] = areaPixels
+        out['areaUm2'] = areaUm2
+        out['CEDiameter'] = CEDiameter
+        out['perimeter'] = perimeter
+        out['circularity'] = circularity
+        out['HSCircularity'] = HSCircularity
+        out['convexity'] = convexity
+        out['solidity'] = solidity
+        out['SEVolume'] = SEVolume
+        out['major_x1'] = major_x1
+        out['major_y1'] = major_y1
+        out['major_x2'] = major_x2
+        out['major_y2'] = major_y2
+        out['minor_x1'] = minor_x1
+        out['minor_y1'] = minor_y1
+        out['minor_x2'] = minor_x2
+        out['minor_y2'] = minor_y2
+        out['majorAxisDeg'] = majorAxisDeg
+        out['length'] = length
+        out['width'] = width
+        out['aspectRatio'] = aspectRatio
+        out['elongation'] = elongation
+        out['maxDistance'] = maxDistance
+        out['minFeret'] = minFeret
+        out['rectLength'] = rectLength
+        out['rectWidth'] = rectWidth
+
+    def calc_cost_chunk(self, dimsArray):
+        """Function for the calculation of circularity, convexity and elongation of one chunk
+           of particles (image scale is not needed for these parameters)"""
+        (X, Y) = self.get_dims_coords(dimsArray)
+        X1 = np.roll(X, -1, axis=1)
+        Y1 = np.roll(Y, -1, axis=1)
+        crossTerm = X * Y1 - X1 * Y
+        areaPixels = crossTerm.sum(axis=1) / 2
+        centreXPos = ((X + X1) * crossTerm).sum(axis=1) / (6.0 * areaPixels)
+        centreYPos = ((Y + Y1) * crossTerm).sum(axis=1) / (6.0 * areaPixels)
+        perimeter = np.hypot(X1 - X, Y1 - Y).sum(axis=1)
+
+        result = np.empty((X.shape[0], 3))
+        result[:, 0] = 2 * np.sqrt(np.pi * areaPixels) / perimeter
+        result[:, 1] = self.calc_convex_hull_params(X, Y)[1] / perimeter
+
+        # Projections on the major and minor axes (points on a circle with the CE diameter)
+        orientation = np.pi / 2 - self.calc_theta(X, Y, X1, Y1, crossTerm, areaPixels,
+                                                  centreXPos, centreYPos)
+        halfCE = np.sqrt(areaPixels * 4 / np.pi) / 2
+        cosO = np.cos(orientation) * halfCE
+        sinO = np.sin(orientation) * halfCE
+        length = self.calc_projection_length(centreXPos + cosO, centreYPos - sinO,
+                                             centreXPos - cosO, centreYPos + sinO, X, Y)
+        width = self.calc_projection_length(centreXPos - sinO, centreYPos - cosO,
+                                            centreXPos + sinO, centreYPos + cosO, X, Y)
+        result[:, 2] = 1.0 - np.minimum(length, width) / np.maximum(length, width)
+        return result
+
+    def calc_convex_hull_mask(self, X, Y):
+        """Function for determination of the convex hull vertices of all the particles.
+           The vertices are in angular order around the origin (star-shaped polygons),
+           so reflex vertices are removed iteratively until every polygon is convex.
+           Analogue of the radial Graham scan of the C library: no sorting is needed and
+           the number of passes is small (about 5 for 12 dims, 10 for 240 dims).
+           X, Y: (n, nDim) arrays with coordinates of the dims points
+           return: (n, nDim) boolean array (True for the convex hull vertices)
+        """
+        rows = np.arange(X.shape[0])[:, None]
+        onHull = np.ones(X.shape, dtype=bool)
+        while True:
+            prv = self.prev_on_hull(onHull)
+            nxt = self.next_on_hull(onHull)
+            cross = (X - X[rows, prv]) * (Y[rows, nxt] - Y[rows, prv]) - \
+                    (Y - Y[rows, prv]) * (X[rows, nxt] - X[rows, prv])
+            reflex = onHull & (cross <= 0)  # Clockwise turn or collinear points
+            if not reflex.any():
+                return onHull
+            onHull &= ~reflex
+
+    def calc_convex_hull_params(self, X, Y):
+        """Function for calculation of the area and perimeter (in pixels) of the convex hull
+           X, Y: (n, nDim) arrays with coordinates of the dims points
+           return: tuple (areaConvexHullPix, convexHullPerimeter) of (n,) arrays
+        """
+        rows = np.arange(X.shape[0])[:, None]
+        onHull = self.calc_convex_hull_mask(X, Y)
+        nxt = self.next_on_hull(onHull)
+        Xn = X[rows, nxt]
+        Yn = Y[rows, nxt]
+        areaConvexHullPix = np.where(onHull, X * Yn - Xn * Y, 0.0).sum(axis=1) / 2
+        convexHullPerimeter = np.where(onHull, np.hypot(Xn - X, Yn - Y), 0.0).sum(axis=1)
+        return areaConvexHullPix, convexHullPerimeter
+
+    def calc_feret_diameters(self, X, Y):
+        """Function for calculation of the Feret diameters and the minimum area bounding
+           rectangle (in pixels). Analogue of the rotating calipers: the min width and the
+           bounding rectangle have one side flush with a convex hull edge, so only the hull
+           edges are checked. Points inside the hull never give the extreme projections,
+           so the projections of all the points are used without masking.
+           X, Y: (n, nDim) arrays with coordinates of the dims points
+           return: tuple (maxFeret, minFeret, rectLength, rectWidth) of (n,) arrays
+        """
+        (n, nDim) = X.shape
+        rows = np.arange(n)[:, None]
+        onHull = self.calc_convex_hull_mask(X, Y)
+        nxt = self.next_on_hull(onHull)
+        Ux = X[rows, nxt] - X  # Edge vectors (i, next(i)) of the hull
+        Uy = Y[rows, nxt] - Y
+        edgeLength = np.hypot(Ux, Uy)
+        edgeLength[~onHull] = 1.0  # Vertices inside the hull are not used
+        Ux /= edgeLength
+        Uy /= edgeLength
+
+        # Extreme projections of the points on the edge directions and their normals.
+        # Points are treated in blocks (the whole block at once for the small batches)
+        maxFeret = np.zeros(n)
+        along = X * Ux + Y * Uy
+        (alongMax, alongMin) = (along.copy(), along.copy())
+        across = np.zeros((n, nDim))
+        kBlock = max(1, self.feretBlockSize // (n * nDim))
+        (X3, Y3, Ux3, Uy3) = (X[:, :, None], Y[:, :, None], Ux[:, :, None], Uy[:, :, None])
+        for kStart in range(0, nDim, kBlock):
+            xk = X[:, None, kStart:kStart + kBlock]
+            yk = Y[:, None, kStart:kStart + kBlock]
+            maxFeret = np.maximum(maxFeret, np.hypot(X3 - xk, Y3 - yk).max(axis=(1, 2)))
+            proj = xk * Ux3 + yk * Uy3
+            np.maximum(alongMax, proj.max(axis=2), out=alongMax)
+            np.minimum(alongMin, proj.min(axis=2), out=alongMin)
+            np.maximum(across, (Ux3 * (yk - Y3) - Uy3 * (xk - X3)).max(axis=2), out=across)
+        extent = alongMax - alongMin
+
+        # min Feret and the bounding rectangle with minimum area among all the hull edges
+        minFeret = np.where(onHull, across, np.inf).min(axis=1)
+        area = np.where(onHull, extent * across, np.inf)
+        minArea = area.min(axis=1, keepdims=True)
+        # Several edges often give the same area (e.g. for triangles): the smallest width is taken
+        sides = np.where(area <= minArea * (1.0 + 1e-12), np.minimum(extent, across), np.inf)
+        best = sides.argmin(axis=1)
+        rectLength = np.maximum(extent, across)[rows[:, 0], best]
+        rectWidth = sides[rows[:, 0], best]
+        return maxFeret, minFeret, rectLength, rectWidth
+
+    @staticmethod
+    def next_on_hull(onHull):
+        """Function for determination the index of the next (cyclic) hull vertex for every vertex"""
+        nDim = onHull.shape[1]
+        idx = np.where(np.tile(onHull, 2), np.arange(2 * nDim), 2 * nDim)
+        nxt = np.minimum.accumulate(idx[:, ::-1], axis=1)[:, ::-1]
+        return nxt[:, 1:nDim + 1] % nDim
+
+    @staticmethod
+    def prev_on_hull(onHull):
+        """Function for determination the index of the previous (cyclic) hull vertex for every vertex"""
+        nDim = onHull.shape[1]
+        idx = np.where(np.tile(onHull, 2), np.arange(2 * nDim), -1)
+        prv = np.maximum.accumulate(idx, axis=1)
+        return prv[:, nDim - 1:2 * nDim - 1] % nDim
+
+    @classmethod
+    def calc_theta(cls, X, Y, X1, Y1, crossTerm, areaPixels, centreXPos, centreYPos):
+        """Function to calculate the theta angle of major axis from the
+           moments and product of inertia about centroid"""
+        sxx = ((Y ** 2 + Y * Y1 + Y1 ** 2) * crossTerm).sum(axis=1)
+        syy = ((X ** 2 + X * X1 + X1 ** 2) * crossTerm).sum(axis=1)
+        sxy = ((X * Y1 + 2 * X * Y + 2 * X1 * Y1 + X1 * Y) * crossTerm).sum(axis=1)
+        return cls.calc_theta_from_sums(sxx, syy, sxy, areaPixels, centreXPos, centreYPos)
+
+    @staticmethod
+    def calc_theta_from_sums(sxx, syy, sxy, areaPixels, centreXPos, centreYPos):
+        """Function to calculate the theta angle of major axis from the shoelace
+           sums of the second moments (sxx, syy, sxy)"""
+        Ixx = sxx / 12 - areaPixels * centreYPos ** 2
+        Iyy = syy / 12 - areaPixels * centreXPos ** 2
+        Ixy = sxy / 24 - areaPixels * centreXPos * centreYPos
+
+        # Principal orientation. Some tricks to avoid symmetry and strange theta calculation
+        diff = (Ixx - Iyy) / 2
+        diff = np.where((diff < 1) & (diff > 0), 1.0, diff)
+        diff = np.where((diff > -1) & (diff < 0), -1.0, diff)
+        return np.arctan2(-Ixy, diff) / 2
+
+    @staticmethod
+    def calc_projection_length(x1, y1, x2, y2, X, Y):
+        """Function for calculation the projection length (in pixels) of all points
+           on the axis given by points (x1, y1) and (x2, y2)"""
+        a = (y2 - y1)[:, None]
+        b = (x2 - x1)[:, None]
+        horizontal = np.abs(a) <= 0.5
+        vertical = ~horizontal & (np.abs(b) <= 0.5)
+        norm = np.sqrt(a ** 2 + b ** 2)
+        proj = (X * b + Y * a) / norm  # Signed distance along the axis
+        proj = np.where(horizontal, X, np.where(vertical, Y, proj))
+        return (proj.max(axis=1) - proj.min(axis=1))
@@ -0,0 +1,79 @@
+#================================================================================
+# Compact result of the particle parameters calculation. Numerical parameters
+# are stored in one record of paramsDtype type; derived fields (coordinates of
+# the dims points and the axes points) are calculated only when accessed.
+#================================================================================
+
+import numpy as np
+from Modules.ParticleBatch import paramsDtype
+from Modules.TrigTable import TrigTable
+
+
+class ParticleParams():
+    """Read-only result with the particle parameters (dictionary-style access by key)"""
+
+    __slots__ = ('record', 'dimsValues', 'nDim', '_dimsCoord', '_dimsCoordMid',
+                 '_majorAxisPoints', '_minorAxisPoints')
+
+    # Keys of the derived fields (all the other keys are the fields of paramsDtype)
+    derivedKeys = ('dimsValues', 'dimsCoord', 'dimsCoordMid', 'majorAxisPoints', 'minorAxisPoints')
+
+    def __init__(self, record, dimsValues, nDim):
+        """Constructor of the class
+           record: record of paramsDtype type with the calculated parameters
+           dimsValues: Dimensions of the particle (set of values (0.0 - 1.0))
+           nDim: Number of the particle dimensions (equal to the amount of sliders)
+        """
+        self.record = np.array(record, dtype=paramsDtype)  # Own copy of the record (0-d array)
+        self.dimsValues = list(dimsValues[:nDim])
+        self.nDim = nDim
+        self._dimsCoord = None
+        self._dimsCoordMid = None
+        self._majorAxisPoints = None
+        self._minorAxisPoints = None
+
+    def __getitem__(self, key):
+        """Access to the parameter by key (same keys as in the former dictionary)"""
+        if key in paramsDtype.fields:
+            return self.record[key].item()
+        if key == 'dimsValues':
+            return self.dimsValues
+        if key in ('dimsCoord', 'dimsCoordMid'):
+            if self._dimsCoord is None:
+                self.calc_dims_coords()
+            return self._dimsCoord if key == 'dimsCoord' else self._dimsCoordMid
+        if key in ('majorAxisPoints', 'minorAxisPoints'):
+            if self._majorAxisPoints is None:
+                self.calc_axes_points()
+            return self._majorAxisPoints if key == 'majorAxisPoints' else self._minorAxisPoints
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in paramsDtype.fields or key in self.derivedKeys
+
+    def keys(self):
+        """Function for getting all the keys of the result"""
+        return list(self.derivedKeys) + list(paramsDtype.names)
+
+    def get(self, key, default=None):
+        """Function for getting the parameter by key (default if there is no such key)"""
+        return self[key] if key in self else default
+
+    def calc_dims_coords(self):
+        """Function for calculation the coordinates of the particle dims points
+           (dimsCoord in image pixels and dimsCoordMid with 0 in the middle of the particle)"""
+        centreRadius = 5  # Radius of the central polygon
+        imgWidth = 360  # Width of the image (pix)
+
+        radius = np.asarray(self.dimsValues) * (180 - centreRadius) + centreRadius  # Slider starts not from the center!
+        array = TrigTable.get_int_vertices(radius, imgWidth/2)
+        self._dimsCoord = tuple(array)
+        self._dimsCoordMid = tuple((x - imgWidth/2, y - imgWidth/2) for (x, y) in array)
+
+    def calc_axes_points(self):
+        """Function for preparation the points of the major and minor axes"""
+        record = self.record
+        self._majorAxisPoints = ((record['major_x1'].item(), record['major_y1'].item()),
+                                 (record['major_x2'].item(), record['major_y2'].item()))
+        self._minorAxisPoints = ((record['minor_x1'].item(), record['minor_y1'].item()),
+                                 (record['minor_x2'].item(), record['minor_y2'].item()))
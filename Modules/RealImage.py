@@ -3,7 +3,7 @@
 from PIL import Image, ImageDraw, ImageEnhance
 from PIL.ImageQt import ImageQt
 from PyQt5.QtGui import QPixmap, QImage
-import math as m
+from Modules.TrigTable import TrigTable
 
 class RealImage():
     def __init__(self, N):
@@ -47,12 +47,7 @@ class RealImage():
     def generate_mask(self):
         """Method for generation the transparancy mask"""
         # Generate coordinates
-        array = []
-        for i in range(self.N):
-            angle = i * 2 * m.pi/self.N
-            x = int(round(180 + 180 * m.cos(angle)))
-            y = int(round(180 + 180 * m.sin(angle)))
-            array.append((x, y))
+        array = TrigTable.get_int_vertices([180] * self.N, 180)
         # Generate the mask of polygon shape
         self.mask = Image.new('1', (360, 360), 'black')  # Black square
         draw = ImageDraw.Draw(self.mask)
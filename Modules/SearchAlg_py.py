@@ -0,0 +1,179 @@
+#==========================================================================================
+# Base class of the search algorithms of the particle shape (PSO, CMA-ES, differential
+# evolution and Nelder-Mead simplex). The class keeps the target, the limits, the global
+# best, the convergence monitor and the searching loop with the progress callback, the
+# subclasses make the initialization, the iterations and the restarts
+#==========================================================================================
+
+from abc import ABC, abstractmethod
+import numpy as np
+from Modules.Particle import Particle
+from Modules.ParticleBackend import (new_random_state, PSO_STATUS_PRECISION, PSO_STATUS_ITER_LIMIT,
+                                     PSO_STATUS_GAVE_UP, PSO_STATUS_CANCELLED)
+
+class SearchAlg_py(ABC):
+    """Base class of the search algorithms (subclasses define the initialization, iterate,
+       restart and get_radius methods)"""
+    def __init__(self, progress_callback, init_circularity, init_convexity,
+                 init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit,
+                 usePrecisionLimit, precisionLimit, showErrorPlot, rng=None, control=None):
+        self.progress_callback = progress_callback  # Link to the main window class
+        self.init_circularity = init_circularity  # Initial (target) circularity
+        self.init_convexity = init_convexity  # Initial (target) convexity
+        self.init_elongation = init_elongation  # Initial (target) elongation
+        self.nVar = nVar  # Number of unknown (decision) variables (equal to nDim + realWidth)
+        self.varMin = varMin  # Lower bound of decision variables
+        self.varMax = varMax  # Upper bound of decision variables
+        self.useIterLimit = useIterLimit  # Flag to use iteration limit
+        self.iterLimit = iterLimit  # Maximum number of iterations
+        self.usePrecisionLimit = usePrecisionLimit  # Flag to use precise limit
+        self.precisionLimit = precisionLimit  # Minimum precise limit
+        self.showErrorPlot = showErrorPlot  # Save or not progress data for plot
+        self.rng = new_random_state(rng)  # Own random generator (seed, RandomState or None - random seed)
+        # Convergence monitor (psoControl_t or None - no monitor)
+        self.control = control  # Settings of the convergence monitor
+        self.cancel = None  # Shared cancel flag (ctypes.c_int, None - search can not be cancelled)
+        self.space = None  # Decision space (ShapeSpace, None - decision variables are the radii)
+        self.archive = None  # Archive of the evaluated shapes (ShapeArchive, None - shapes are not kept)
+        self.useMonitor = control is not None and control.window > 0  # Flag to use the monitor
+        self.history = None  # Global best costs of the last window iterations (ring buffer)
+        self.restarts = 0  # Number of the restarts made by the monitor
+        self.lastRestart = 0  # Iteration of the last restart made by the monitor
+        self.status = None  # Reason of the search finish (PSO_STATUS_...)
+        self.evaluations = 0  # Number of the cost function evaluations
+        self.doSearch = None  # Flag to run or stop the search
+        self.iteration = None  # Current search iteration
+
+        self.globalBestPosition = None  # Best position (solution)
+        self.globalBestCost = np.inf  # The least value of the cost function
+        self.arrayBestCosts = []  # Array to see the progress of searching process
+
+        self.particle = Particle()  # Construct particle for determination of its parameters
+
+    @abstractmethod
+    def initialization(self):
+        """Method for the initial population of the algorithm (defined in the subclass)"""
+
+    @abstractmethod
+    def iterate(self):
+        """Method for one iteration of the algorithm (defined in the subclass)"""
+
+    @abstractmethod
+    def restart(self):
+        """Method for the restart on the stagnation found by the monitor (defined in the subclass)"""
+
+    @abstractmethod
+    def get_radius(self):
+        """Method for the spread of the population around the global best (for the monitor)"""
+
+    def calc_costs(self, positions):
+        """Method for the cost values of the (n, nVar) array of positions (one batched evaluation,
+           the evaluated shapes are added to the archive)"""
+        dims = self.get_dims(positions)
+        params = self.particle.get_shape_cost_params_batch(dims)
+        if self.archive is not None:
+            self.archive.insert_batch(dims, params)
+        target = np.array([self.init_circularity, self.init_convexity, self.init_elongation])
+        self.evaluations += len(positions)
+        return np.sqrt(np.sum((target - params) ** 2, axis=1))
+
+    def get_dims(self, positions):
+        """Method for the radii of the positions of the decision space"""
+        return positions if self.space is None else self.space.to_dims(positions)
+
+    def calc_penalized_costs(self, positions):
+        """Method for the costs of the positions repaired into the bounds and the quadratic
+           penalty of the repair (in the units of the variables range). The global best is
+           updated by the repaired positions
+           return: array with the penalized costs"""
+        repaired = np.clip(positions, self.varMin, self.varMax)
+        costs = self.calc_costs(repaired)
+        i = np.argmin(costs)
+        self.update_global_best(costs[i], repaired[i])
+        penalty = np.sum((positions - repaired) ** 2, axis=1) / (self.varMax - self.varMin) ** 2
+        return costs + penalty
+
+    def update_global_best(self, bestCost, bestPosition):
+        """Method for update the global best"""
+        if bestCost < self.globalBestCost:
+            self.globalBestCost = float(bestCost)
+            self.globalBestPosition = bestPosition.copy()
+
+    def monitor_check(self):
+        """Method for the check of the search progress by the convergence monitor (the same
+           rules as PSOAlg_monitor_check in PSOAlgorithm.c)
+           return: 'continue', 'restart' or 'giveUp'"""
+        window = self.control.window
+        costAgo = self.history[self.iteration % window]  # Global best cost window iterations ago
+        self.history[self.iteration % window] = self.globalBestCost
+        if self.iteration - self.lastRestart < window or self.globalBestCost <= self.precisionLimit:
+            return 'continue'
+        radius = self.get_radius()
+        if (costAgo - self.globalBestCost >= self.control.minImprovement * costAgo and
+                radius >= self.control.minRadius):
+            return 'continue'  # No stagnation
+        if self.restarts < self.control.maxRestarts:
+            self.restarts += 1
+            self.lastRestart = self.iteration
+            return 'restart'
+        if not self.usePrecisionLimit:
+            return 'continue'  # Nothing to give up: search runs to the iteration limit
+        if self.useIterLimit:
+            rate = np.log(costAgo / self.globalBestCost) / window
+            if self.globalBestCost * np.exp(-rate * (self.iterLimit - self.iteration)) <= self.precisionLimit:
+                return 'continue'
+        return 'giveUp'
+
+    def randomize_positions(self, shape):
+        """Method for the random positions in the range of the decision variables"""
+        return self.rng.uniform(self.varMin, self.varMax, shape).astype('double')
+
+    def run_search(self):
+        """Method for main searching loop"""
+        # Initialization
+        self.initialization()
+
+        # Search
+        self.doSearch = True
+        self.iteration = 1
+        self.arrayBestCosts = []
+        if self.useMonitor:
+            self.history = np.full(self.control.window, self.globalBestCost)
+        while self.doSearch:
+            # One search iteration of the algorithm
+            self.iterate()
+
+            # Save the best global cost to the array
+            if self.showErrorPlot:
+                self.arrayBestCosts.append(self.globalBestCost)
+
+            # Convergence monitor: restart on the stagnation
+            action = self.monitor_check() if self.useMonitor else 'continue'
+            if action == 'restart':
+                self.restart()
+
+            if self.useIterLimit and (self.iteration >= self.iterLimit):
+                self.doSearch = False
+                self.status = PSO_STATUS_ITER_LIMIT
+            elif self.usePrecisionLimit and (self.precisionLimit >= self.globalBestCost):
+                self.doSearch = False
+                self.status = PSO_STATUS_PRECISION
+            elif action == 'giveUp':
+                self.doSearch = False
+                self.status = PSO_STATUS_GAVE_UP
+            elif self.cancel is not None and self.cancel.value:
+                self.doSearch = False
+                self.status = PSO_STATUS_CANCELLED
+
+            # Make the data and return it as a progress callback
+            progressData = {'iteration'         : self.iteration,
+                            'globalBestPosition': self.get_dims(self.globalBestPosition),
+                            'globalBestCost'    : self.globalBestCost,
+                            'arrayBestCosts'    : self.arrayBestCosts,
+                            'doSearch'          : self.doSearch,
+                            'status'            : self.status,
+                            'evaluations'       : self.evaluations}
+
+            # Send the callback
+            self.progress_callback.emit(progressData)
+            self.iteration += 1
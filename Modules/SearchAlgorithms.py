@@ -0,0 +1,102 @@
+#================================================================================
+# Registry of the search algorithms of the particle shape: PSO, CMA-ES,
+# differential evolution and Nelder-Mead simplex. The algorithm is chosen by
+# the optSettings_t structure (the same structure is passed to the compiled
+# library), the Python classes are made by make_search_alg. The algorithms
+# search the radii or the radial Fourier coefficients (nHarmonics of the
+# settings, see ShapeSpace), the found positions are the radii. The short
+# benchmark chooses the algorithm which needs the least cost evaluations to
+# reach the precision limit for the number of the particle dimensions.
+#================================================================================
+
+import numpy as np
+from Modules.Particle import Particle
+from Modules.ParticleBackend import optSettings_t, OPT_PSO, OPT_CMAES, OPT_DE, OPT_NM
+from Modules.PSOAlg_py import PSOAlg_py
+from Modules.CMAESAlg_py import CMAESAlg_py
+from Modules.DEAlg_py import DEAlg_py
+from Modules.NMAlg_py import NMAlg_py
+from Modules.ShapeSpace import ShapeSpace
+
+# Names of the search algorithms (in the order of the OPT_... constants)
+SEARCH_ALGORITHMS = {OPT_PSO: 'PSO',
+                     OPT_CMAES: 'CMA-ES',
+                     OPT_DE: 'Differential evolution',
+                     OPT_NM: 'Nelder-Mead simplex'}
+
+
+def make_search_alg(progress_callback, settings, init_circularity, init_convexity,
+                    init_elongation, nVar, varMin, varMax, useIterLimit, iterLimit,
+                    usePrecisionLimit, precisionLimit, showErrorPlot, nPop, w, wDamp, c1, c2,
+                    a, b, initPosition=None, rng=None, control=None):
+    """Function for making the Python search algorithm chosen by the settings
+       settings: optSettings_t with the search algorithm (None - PSO)
+       nVar: number of the radii (the algorithm searches the decision space of the settings)
+       nPop ... b: settings of PSO (used only by PSO)
+       initPosition: initial radii (None - random position), PSO seeds the part of the swarm around it
+       return: object of the search algorithm (SearchAlg_py subclass)"""
+    optimizer = OPT_PSO if settings is None else settings.optimizer
+    space = ShapeSpace.from_settings(settings, nVar)
+    if space is not None:
+        nVar = space.nVar
+        if initPosition is not None:
+            initPosition = space.from_dims(initPosition)
+    common = (progress_callback, init_circularity, init_convexity, init_elongation, nVar,
+              varMin, varMax, useIterLimit, iterLimit, usePrecisionLimit, precisionLimit,
+              showErrorPlot)
+    if optimizer == OPT_CMAES:
+        searchAlg = CMAESAlg_py(*common, popSize=settings.popSize, sigma0=settings.sigma0,
+                                initPosition=initPosition, rng=rng, control=control)
+    elif optimizer == OPT_DE:
+        searchAlg = DEAlg_py(*common, nPop=settings.popSize, F=settings.F, CR=settings.CR,
+                             initPosition=initPosition, rng=rng, control=control)
+    elif optimizer == OPT_NM:
+        searchAlg = NMAlg_py(*common, step=settings.step, initPosition=initPosition, rng=rng,
+                             control=control)
+    else:
+        searchAlg = PSOAlg_py(*common, nPop, w, wDamp, c1, c2, a, b, rng, control, initPosition)
+    searchAlg.space = space
+    return searchAlg
+
+
+def get_evaluations_per_iteration(settings, nVar, nPop):
+    """Function for the number of the cost evaluations in one iteration of the algorithm
+       (without the restarts and the shrinks of the simplex)
+       nVar: number of the radii (the population depends on the decision space of the settings)"""
+    optimizer = OPT_PSO if settings is None else settings.optimizer
+    space = ShapeSpace.from_settings(settings, nVar)
+    if space is not None:
+        nVar = space.nVar
+    if optimizer == OPT_CMAES:
+        return settings.popSize if settings.popSize > 0 else 4 + int(3 * np.log(nVar))
+    if optimizer == OPT_DE:
+        return max(settings.popSize if settings.popSize > 0 else 5 * nVar, 4)
+    if optimizer == OPT_NM:
+        return 4
+    return nPop
+
+
+def choose_search_algorithm(psoAlg, nVar, precisionLimit, nPop, w, wDamp, c1, c2, a, b,
+                            nTargets=8, budget=10000, seed=0, control=None, nHarmonics=0):
+    """Function for choosing the search algorithm, which needs the least cost evaluations
+       to reach the precision limit. Every algorithm (with the default settings) solves
+       the same targets made from the random shapes in the same decision space
+       psoAlg: object with run_search_batch method (PSOAlg_dll)
+       nPop ... b: settings of PSO
+       budget: maximum number of the cost evaluations for one target
+       nHarmonics: number of the radial Fourier harmonics searched (0 - radii are searched)
+       return: (optimizer, dictionary with the median number of the evaluations for every
+               optimizer, np.inf if the most of the targets are not solved)"""
+    rng = np.random.RandomState(seed)
+    targets = Particle().get_shape_cost_params_batch(rng.uniform(0.0, 1.0, (nTargets, nVar)))
+    medians = {}
+    for optimizer in SEARCH_ALGORITHMS:
+        settings = optSettings_t(optimizer, nHarmonics=nHarmonics)
+        iterLimit = max(budget // get_evaluations_per_iteration(settings, nVar, nPop), 1)
+        result = psoAlg.run_search_batch(targets, nVar, 0.0, 1.0, True, iterLimit, True,
+                                         precisionLimit, nPop, w, wDamp, c1, c2, a, b, seed=seed,
+                                         control=control, settings=settings)
+        evaluations = np.where(result['globalBestCosts'] <= precisionLimit,
+                               result['evaluations'], np.inf)
+        medians[optimizer] = float(np.median(evaluations))
+    return (min(medians, key=medians.get), medians)
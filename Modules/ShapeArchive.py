@@ -0,0 +1,111 @@
+#================================================================================
+# Archive of the evaluated particle shapes (Python counterpart of
+# shape_archive.c). Every search evaluates thousands of shapes and keeps only
+# the global best, but many of the discarded shapes are good answers for the
+# later targets drawn from the same distribution. The archive keeps the radii
+# and the circularity, convexity and elongation of the evaluated shapes in the
+# cells of the grid (cell size is usually the precision limit), so the shape
+# within the tolerance of the target is found by checking the neighbouring
+# cells only. The archive is bounded: the slots are reused as the ring buffer
+# (the oldest shape is replaced) and the number of the shapes in one cell is
+# limited. The found shape is taken out of the archive (it is used only once).
+#================================================================================
+
+import numpy as np
+
+
+class ShapeArchive():
+    """Bounded archive of the evaluated shapes indexed by the grid cells"""
+
+    def __init__(self, nDim, capacity=50000, cellSize=0.01, maxPerCell=4):
+        """Constructor of the class
+           nDim: Number of the particle dimensions (radii) of the shapes
+           capacity: Maximum number of the shapes
+           cellSize: Size of the grid cell in circularity, convexity and elongation
+           maxPerCell: Maximum number of the shapes in one cell
+        """
+        self.nDim = nDim  # Number of the particle dimensions
+        self.capacity = max(int(capacity), 1)  # Maximum number of the shapes
+        self.cellSize = cellSize if cellSize > 0.0 else 0.01  # Size of the grid cell
+        self.maxPerCell = max(int(maxPerCell), 1)  # Maximum number of the shapes in one cell
+        self.params = np.empty((self.capacity, 3))  # Circularity, convexity and elongation of the shapes
+        self.dims = np.empty((self.capacity, nDim))  # Radii of the shapes
+        self.cell = [None] * self.capacity  # Grid cell of the shape in the slot (None - empty slot)
+        self.table = {}  # Slots of the shapes of every occupied cell
+        self.cursor = 0  # Slot of the next inserted shape
+        self.count = 0  # Number of the stored shapes
+        self.hits = 0  # Number of the targets taken from the archive
+
+    def grid_cells(self, params):
+        """Function for the grid cells of the (n, 3) array of the shape parameters
+           return: (n, 3) integer array with the grid indexes"""
+        return np.maximum(np.floor(np.asarray(params) / self.cellSize), 0).astype(np.int64)
+
+    def insert_batch(self, dims, params):
+        """Function for adding the evaluated shapes to the archive. The shape is skipped if
+           its cell already has maxPerCell shapes, otherwise it replaces the shape in the oldest slot
+           dims: (n, nDim) array with the radii of the shapes
+           params: (n, 3) array with circularity, convexity and elongation of the shapes"""
+        for (shapeDims, shapeParams, cell) in zip(dims, params, map(tuple, self.grid_cells(params))):
+            if len(self.table.get(cell, ())) >= self.maxPerCell:
+                continue
+            slot = self.cursor
+            self.cursor = (self.cursor + 1) % self.capacity
+            if self.cell[slot] is not None:
+                self.remove_slot(slot)
+            self.params[slot] = shapeParams
+            self.dims[slot] = shapeDims
+            self.cell[slot] = cell
+            self.table.setdefault(cell, []).append(slot)
+            self.count += 1
+
+    def take(self, target, tolerance):
+        """Function for taking the closest shape within the tolerance of the target out of the archive
+           target: target circularity, convexity and elongation
+           tolerance: Maximum distance from the target (usually the precision limit)
+           return: (radii, distance) of the found shape or None"""
+        (slot, distance) = self.find_closest(target, tolerance)
+        if slot is None:
+            return None
+        dims = self.dims[slot].copy()
+        self.remove_slot(slot)
+        self.hits += 1
+        return (dims, distance)
+
+    def remove(self, params):
+        """Function for removing the shape with exactly the same parameters (the found result
+           of the search is not given to the next targets)
+           return: True if the shape is removed"""
+        (slot, _) = self.find_closest(params, 0.0)
+        if slot is None:
+            return False
+        self.remove_slot(slot)
+        return True
+
+    def find_closest(self, target, tolerance):
+        """Function for the slot of the closest shape within the tolerance of the target
+           (the cells within the tolerance in every parameter are checked)
+           return: (slot, distance), slot is None if there is no shape within the tolerance"""
+        if self.count == 0:
+            return (None, None)
+        target = np.asarray(target, dtype=np.float64)
+        r = int(np.ceil(tolerance / self.cellSize))
+        (c0, v0, e0) = self.grid_cells(target)
+        slots = [slot for ic in range(c0 - r, c0 + r + 1) for iv in range(v0 - r, v0 + r + 1)
+                 for ie in range(e0 - r, e0 + r + 1) for slot in self.table.get((ic, iv, ie), ())]
+        if not slots:
+            return (None, None)
+        distances = np.sqrt(np.sum((self.params[slots] - target) ** 2, axis=1))
+        i = int(np.argmin(distances))
+        if distances[i] > tolerance:
+            return (None, None)
+        return (slots[i], float(distances[i]))
+
+    def remove_slot(self, slot):
+        """Function for removing the shape of the occupied slot from its cell"""
+        slots = self.table[self.cell[slot]]
+        slots.remove(slot)
+        if not slots:
+            del self.table[self.cell[slot]]
+        self.cell[slot] = None
+        self.count -= 1
@@ -0,0 +1,300 @@
+#================================================================================
+# Precomputed atlas of the particle shapes over the grid of circularity,
+# convexity and elongation channels (the same 100 channels as in the count
+# arrays of the generator). For every occupied (circ, convex, elong) cell a
+# pool of dims vectors is solved once with the PSO search and stored on disk
+# (.npy files opened memory-mapped). During the generation a shape is taken
+# from the pool of the target cell, permuted (cyclic shift and mirror of the
+# dims do not change circularity, convexity and elongation) and optionally
+# refined by a short local search. Only the shapes which reached the precision
+# limit are stored and a shape is taken only if it is within the precision
+# limit of the target. The atlas is extended by the most probable cells of the
+# distributions only (the number of the cells solved in one run is limited),
+# the targets of the other cells are searched by the generator.
+#================================================================================
+
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+from Modules.Particle import Particle
+from Modules.ParticleBackend import new_random_state, PSO_STATUS_PRECISION
+
+# Folder with the atlas files
+ATLAS_FOLDER = './ShapeAtlas/'
+
+# Maximum number of the atlas searches in one generation run per generated particle
+ATLAS_BUILD_FRACTION = 0.25
+
+# Slots of the cells in the index which are not the pools
+CELL_MISSING = -1  # Cell is not searched
+CELL_UNSOLVED = -2  # No shape of the cell reached the precision limit
+
+
+class ShapeAtlas():
+    """Persistent memory-mapped atlas of the particle shapes (one atlas for every nDim)"""
+
+    def __init__(self, nDim, chLower, chUpper, precisionLimit, iterLimit, folder=ATLAS_FOLDER,
+                 poolSize=8, seed=None):
+        """Constructor of the class
+           nDim: Number of the particle dimensions (equal to the amount of sliders)
+           chLower, chUpper: Boundaries of the 100 circularity, convexity and elongation channels
+           precisionLimit: Precision limit of the searches and of the taken shapes
+           iterLimit: Maximum number of iterations of the searches
+           folder: Folder with the atlas files
+           poolSize: Number of the solved shapes in every cell
+           seed: Seed of the random generator (None - random seed)
+        """
+        self.nDim = nDim  # Number of the particle dimensions
+        self.chLower = np.asarray(chLower, dtype=np.float64)  # Lower boundaries of the channels
+        self.chUpper = np.asarray(chUpper, dtype=np.float64)  # Upper boundaries of the channels
+        self.precisionLimit = precisionLimit  # Precision limit of the shapes
+        self.iterLimit = iterLimit  # Maximum number of iterations of the searches
+        self.builtIterLimit = iterLimit  # Smallest iteration limit of the unsolved cells in the files
+        self.folder = folder  # Folder with the atlas files
+        self.poolSize = poolSize  # Number of the shapes in every cell
+        self.rng = new_random_state(seed)  # Generator for the choice and permutation of the shapes
+        self.index = None  # (100, 100, 100) array with the slot of every cell (or CELL_...)
+        self.dims = None  # (nSlots, poolSize, nDim) array with the dims of the shapes (NaN - not solved)
+        self.params = None  # (nSlots, poolSize, 3) array with circularity, convexity and elongation
+        self.particle = Particle()  # Particle for the calculation of the shape parameters
+        self.open()
+
+    def file_name(self, part):
+        """Function for getting the name of the atlas file (part: 'index', 'dims', 'params',
+           'channels' or 'limits')"""
+        return os.path.join(self.folder, 'atlas_{0:d}_{1}.npy'.format(self.nDim, part))
+
+    def open(self):
+        """Function for opening the atlas files (memory-mapped). The atlas is empty if there
+           are no files, the files were made for other channel boundaries or with the looser
+           precision limit. The unsolved cells are searched again with the larger iteration limit"""
+        self.index = np.full((100, 100, 100), CELL_MISSING, dtype=np.int32)
+        self.dims = np.empty((0, self.poolSize, self.nDim))
+        self.params = np.empty((0, self.poolSize, 3))
+        self.builtIterLimit = self.iterLimit
+        parts = ('index', 'dims', 'params', 'channels', 'limits')
+        if not all(os.path.isfile(self.file_name(part)) for part in parts):
+            return
+        channels = np.load(self.file_name('channels'))
+        if channels.shape != (2, 100) or not np.allclose(channels, [self.chLower, self.chUpper]):
+            return
+        (precisionLimit, iterLimit) = np.load(self.file_name('limits'))
+        if precisionLimit > self.precisionLimit:
+            return
+        dims = np.load(self.file_name('dims'), mmap_mode='r')
+        if dims.shape[1:] != (self.poolSize, self.nDim):
+            return
+        self.index = np.load(self.file_name('index'), mmap_mode='r')
+        if self.iterLimit > iterLimit:
+            self.index = np.where(self.index == CELL_UNSOLVED, CELL_MISSING, self.index).astype(np.int32)
+        else:
+            self.builtIterLimit = int(iterLimit)
+        self.dims = dims
+        self.params = np.load(self.file_name('params'), mmap_mode='r')
+
+    def close(self):
+        """Function for closing the memory-mapped files"""
+        self.index = None
+        self.dims = None
+        self.params = None
+
+    def get_channels(self, values):
+        """Function for determination of the channels of the values (the first channel with
+           chLower <= value <= chUpper as in the count arrays, -1 if value is out of channels)
+           values: array with the values
+           return: int array with the channels"""
+        values = np.asarray(values, dtype=np.float64)[..., np.newaxis]
+        inside = (values >= self.chLower) & (values <= self.chUpper)
+        return np.where(inside.any(axis=-1), inside.argmax(axis=-1), -1)
+
+    @staticmethod
+    def get_probable_cells(normCirc, normConvex, normElong, massFraction=0.9):
+        """Function for determination the most probable cells of the generator targets
+           (targets are taken independently from the three distributions, so the probability
+           of the cell is the product of the probabilities of its channels)
+           normCirc, normConvex, normElong: normalized differential distributions (100 channels)
+           massFraction: Total probability of the chosen cells
+           return: (M, 3) int array with the channels of the cells in the order of the
+                   decreasing probability"""
+        prob = [np.asarray(distr, dtype=np.float64) for distr in (normCirc, normConvex, normElong)]
+        prob = [distr / distr.sum() for distr in prob]
+        mass = np.einsum('i,j,k->ijk', *prob).ravel()
+        order = np.argsort(mass, kind='stable')[::-1]
+        order = order[mass[order] > 0]
+        n = np.searchsorted(np.cumsum(mass[order]), massFraction) + 1
+        return np.column_stack(np.unravel_index(order[:n], (100, 100, 100)))
+
+    def get_build_cells(self, normCirc, normConvex, normElong, particlesNum):
+        """Function for the cells to solve before the generation: the most probable cells
+           which are missing in the atlas, the number of the searches is limited by
+           ATLAS_BUILD_FRACTION of the generated particles (the next run adds the next cells)
+           particlesNum: Number of the generated particles
+           return: (M, 3) int array with the channels of the cells"""
+        maxCells = int(ATLAS_BUILD_FRACTION * particlesNum) // self.poolSize
+        cells = self.get_probable_cells(normCirc, normConvex, normElong)
+        return self.get_missing_cells(cells)[:maxCells]
+
+    def get_missing_cells(self, cells):
+        """Function for selection the cells which are not searched in the atlas"""
+        cells = np.asarray(cells, dtype=int).reshape(-1, 3)
+        return cells[self.index[cells[:, 0], cells[:, 1], cells[:, 2]] == CELL_MISSING]
+
+    def build(self, cells, psoAlg, searchSettings, stop_check=None, chunkSize=256,
+              progress_callback=None):
+        """Function for solving the pools of the cells which are missing in the atlas.
+           The solved cells of the atlas are kept, the new cells are added and all the files
+           are rewritten. Every shape is searched for the random target inside its cell, only
+           the shapes which reached the precision limit are stored (NaN for the others), the
+           cells without such shapes are marked as CELL_UNSOLVED.
+           cells: (M, 3) array with the channels of the cells
+           psoAlg: object with run_search_batch method (PSOAlg_dll)
+           searchSettings: dictionary with the arguments of run_search_batch except targets
+                           (precisionLimit and iterLimit of the atlas are used)
+           stop_check: function returning True to interrupt the building (solved cells are saved)
+           chunkSize: Number of the searches in one call of run_search_batch
+           progress_callback: function receiving the fraction of the solved cells (None - no progress)
+           return: number of the added cells
+        """
+        cells = self.get_missing_cells(cells)
+        if len(cells) == 0:
+            return 0
+        os.makedirs(self.folder, exist_ok=True)
+        oldCells = np.argwhere(np.asarray(self.index) >= 0)
+        nOld = len(oldCells)
+        nSlots = nOld + len(cells)
+        searchSettings = dict(searchSettings, useIterLimit=True, iterLimit=self.iterLimit,
+                              usePrecisionLimit=True, precisionLimit=self.precisionLimit)
+
+        # New files are written under temporary names and replace the old ones at the end
+        index = np.where(np.asarray(self.index) == CELL_UNSOLVED, CELL_UNSOLVED,
+                         CELL_MISSING).astype(np.int32)
+        dims = open_memmap(self.file_name('dims') + '.tmp', mode='w+', dtype=np.float64,
+                           shape=(nSlots, self.poolSize, self.nDim))
+        params = open_memmap(self.file_name('params') + '.tmp', mode='w+', dtype=np.float64,
+                             shape=(nSlots, self.poolSize, 3))
+
+        # Copy of the solved cells
+        for (slot, cell) in enumerate(oldCells):
+            oldSlot = self.index[tuple(cell)]
+            dims[slot] = self.dims[oldSlot]
+            params[slot] = self.params[oldSlot]
+            index[tuple(cell)] = slot
+
+        # Search of the new cells (chunk contains the whole pools of the cells)
+        cellsPerChunk = max(1, chunkSize // self.poolSize)
+        slot = nOld
+        nSearched = 0
+        for start in range(0, len(cells), cellsPerChunk):
+            if stop_check is not None and stop_check():
+                break
+            chunk = cells[start:start + cellsPerChunk]
+            lower = self.chLower[np.repeat(chunk, self.poolSize, axis=0)]
+            upper = self.chUpper[np.repeat(chunk, self.poolSize, axis=0)]
+            targets = lower + (upper - lower) * self.rng.uniform(0.0, 1.0, lower.shape)
+            result = psoAlg.run_search_batch(targets, **searchSettings)
+            positions = np.array(result['globalBestPositions'], dtype=np.float64)
+            shapeParams = self.particle.get_shape_cost_params_batch(positions)
+            solved = np.asarray(result['statuses']) == PSO_STATUS_PRECISION
+            positions[~solved] = np.nan
+            shapeParams[~solved] = np.nan
+            solvedCells = solved.reshape(len(chunk), self.poolSize).any(axis=1)
+            n = np.count_nonzero(solvedCells)
+            dims[slot:slot + n] = positions.reshape(len(chunk), self.poolSize, self.nDim)[solvedCells]
+            params[slot:slot + n] = shapeParams.reshape(len(chunk), self.poolSize, 3)[solvedCells]
+            (c, v, e) = chunk.T
+            index[c, v, e] = CELL_UNSOLVED
+            index[c[solvedCells], v[solvedCells], e[solvedCells]] = np.arange(slot, slot + n)
+            slot += n
+            nSearched += len(chunk)
+            if progress_callback is not None:
+                progress_callback(nSearched / len(cells))
+
+        # Save the files (unsolved slots of the interrupted building are cut off)
+        dims.flush()
+        params.flush()
+        del dims, params
+        self.close()
+        for part in ('dims', 'params'):
+            if slot < nSlots:
+                data = np.load(self.file_name(part) + '.tmp', mmap_mode='r')
+                np.save(self.file_name(part), data[:slot])
+                del data
+                os.remove(self.file_name(part) + '.tmp')
+            else:
+                os.replace(self.file_name(part) + '.tmp', self.file_name(part))
+        np.save(self.file_name('index'), index)
+        np.save(self.file_name('channels'), np.array([self.chLower, self.chUpper]))
+        np.save(self.file_name('limits'), np.array([self.precisionLimit,
+                                                    min(self.iterLimit, self.builtIterLimit)]))
+        self.open()
+        return slot - nOld
+
+    def get_shape(self, target, refineIter=0):
+        """Function for getting the shape from the atlas for the target parameters.
+           The shape is chosen randomly from the pool entries within the precision limit of
+           the target (the closest entry of the target cell is refined if there are no such
+           entries) and randomly shifted and mirrored.
+           target: circularity, convexity and elongation
+           refineIter: Number of iterations of the local refinement (0 - no refinement)
+           return: array with nDim dims or None if the cell is not in the atlas or the shape
+                   is not within the precision limit of the target
+        """
+        target = np.asarray(target, dtype=np.float64)
+        cell = self.get_channels(target)
+        if np.any(cell < 0):
+            return None
+        slot = self.index[tuple(cell)]
+        if slot < 0:
+            return None
+
+        # Choice of the shape from the solved entries of the target cell
+        params = np.asarray(self.params[slot])
+        inCell = np.flatnonzero(np.all(self.get_channels(params) == cell, axis=1))
+        if len(inCell) == 0:
+            return None
+        distances = np.sqrt(np.sum((params[inCell] - target) ** 2, axis=1))
+        precise = inCell[distances <= self.precisionLimit]
+        if len(precise) > 0:
+            k = precise[self.rng.randint(len(precise))]
+        elif refineIter > 0:
+            k = inCell[np.argmin(distances)]
+        else:
+            return None
+        dims = np.array(self.dims[slot, k])
+
+        # Random permutation (rotation by the angle step and mirror of the particle)
+        if self.rng.uniform(0.0, 1.0) < 0.5:
+            dims = dims[::-1]
+        dims = np.roll(dims, self.rng.randint(self.nDim))
+        if len(precise) == 0:
+            dims = self.refine(dims, target, refineIter)
+        if self.calc_costs(dims[np.newaxis], target)[0] > self.precisionLimit:
+            return None
+        return dims
+
+    def refine(self, dims, target, iterations, nCandidates=32, sigma=0.02):
+        """Function for the short local search around the shape (random perturbations
+           of the dims are evaluated in one batch, the step is halved if there is no improvement)
+           dims: dims of the initial shape
+           target: circularity, convexity and elongation
+           iterations: Number of the iterations
+           nCandidates: Number of the candidates in every iteration
+           sigma: Initial standard deviation of the perturbations
+           return: array with the refined dims
+        """
+        bestDims = np.asarray(dims, dtype=np.float64)
+        bestCost = self.calc_costs(bestDims[np.newaxis], target)[0]
+        for _ in range(iterations):
+            candidates = np.clip(bestDims + self.rng.normal(0.0, sigma, (nCandidates, self.nDim)), 0.0, 1.0)
+            costs = self.calc_costs(candidates, target)
+            i = np.argmin(costs)
+            if costs[i] < bestCost:
+                (bestDims, bestCost) = (candidates[i], costs[i])
+            else:
+                sigma /= 2
+        return bestDims
+
+    def calc_costs(self, dimsArray, target):
+        """Function for calculation the cost function of the search (distance to the target)"""
+        params = self.particle.get_shape_cost_params_batch(dimsArray)
+        return np.sqrt(np.sum((np.asarray(target) - params) ** 2, axis=1))
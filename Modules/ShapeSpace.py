@@ -0,0 +1,59 @@
+#================================================================================
+# Decision space of the particle shape search (Python counterpart of
+# shape_space.c). Instead of nDim radii the search can optimize a few radial
+# Fourier coefficients: r(phi) = a0 + sum_k (a_k*cos(k*phi) + b_k*sin(k*phi)) / k.
+# The mean radius a0 is the first variable, the amplitudes a_k and b_k are the
+# next variables shifted by 0.5 (all the variables are in the range [0, 1]).
+# The radii are calculated at the directions i * 2*pi/nDim and clamped to [0, 1].
+#================================================================================
+
+import numpy as np
+
+
+class ShapeSpace():
+    """Decision space of the radii (nHarmonics = 0) or of the radial Fourier coefficients"""
+    def __init__(self, nDim, nHarmonics=0):
+        """Constructor of the class (the number of the harmonics is limited by (nDim - 1) // 2,
+           the higher harmonics are not resolved by nDim radii)
+           nDim: Number of the particle dimensions (radii)
+           nHarmonics: Number of the harmonics (0 - radii are the decision variables)"""
+        self.nDim = nDim  # Number of the particle dimensions
+        self.nHarmonics = min(max(nHarmonics, 0), (nDim - 1) // 2)  # Number of the harmonics
+        self.nVar = 1 + 2 * self.nHarmonics if self.nHarmonics > 0 else nDim  # Number of the variables
+        # Scaled cos/sin of the harmonics at the dims directions (2 * nHarmonics, nDim)
+        k = np.repeat(np.arange(1, self.nHarmonics + 1), 2)[:, np.newaxis]
+        angle = k * (np.arange(nDim) * (2 * np.pi / nDim))
+        self.basis = np.where(np.arange(2 * self.nHarmonics)[:, np.newaxis] % 2 == 0,
+                              np.cos(angle), np.sin(angle)) / k
+        self.k = k[:, 0]  # Number of the harmonic of every amplitude
+
+    @classmethod
+    def from_settings(cls, settings, nDim):
+        """Function for the decision space chosen by the optSettings_t structure
+           return: ShapeSpace object or None (radii are searched)"""
+        if settings is None or settings.nHarmonics <= 0:
+            return None
+        space = cls(nDim, settings.nHarmonics)
+        return space if space.nHarmonics > 0 else None
+
+    def to_dims(self, positions):
+        """Function for expansion of the decision variables to the radii (inverse transform)
+           positions: (nVar,) or (n, nVar) array with the decision variables
+           return: (nDim,) or (n, nDim) array with the radii clamped to [0, 1]"""
+        positions = np.asarray(positions, dtype='double')
+        if self.nHarmonics == 0:
+            return positions
+        dims = positions[..., :1] + (positions[..., 1:] - 0.5) @ self.basis
+        return np.clip(dims, 0.0, 1.0)
+
+    def from_dims(self, dims):
+        """Function for the decision variables of the radii (forward transform: the first
+           harmonics of the discrete Fourier transform, clamped to [0, 1])
+           dims: (nDim,) or (n, nDim) array with the radii
+           return: (nVar,) or (n, nVar) array with the decision variables"""
+        dims = np.asarray(dims, dtype='double')
+        if self.nHarmonics == 0:
+            return dims
+        amplitudes = 2.0 * self.k ** 2 * (dims @ self.basis.T) / self.nDim + 0.5
+        positions = np.concatenate((np.mean(dims, axis=-1, keepdims=True), amplitudes), axis=-1)
+        return np.clip(positions, 0.0, 1.0)
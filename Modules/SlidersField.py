@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
-import math as m
 from PyQt5.QtGui import QColor, QPen, QBrush, QPolygon
 from PyQt5.QtCore import Qt, QPoint
 from Modules.Slider import Slider
+from Modules.TrigTable import TrigTable
 
 class SlidersField:
     """Class for the field of sliders"""
@@ -28,13 +28,13 @@ class SlidersField:
         self.xC = int(round(self.width/2))  # X of the center
         self.yC = int(round(self.width/2))  # Y of the center
         self.dBg = int(round(self.width/2))  # big radius
+        # Ends of the sliders on the small and big polygons (xC == yC)
+        smallCorners = TrigTable.get_int_vertices([self.dSm] * self.N, self.xC)
+        bigCorners = TrigTable.get_int_vertices([self.dBg] * self.N, self.xC)
         # Set of sliders
         for i in range(self.N):
-            angle = i * 2 * m.pi/self.N
-            x0 = int(round(self.xC + self.dSm * m.cos(angle)))
-            x1 = int(round(self.xC + self.dBg * m.cos(angle)))
-            y0 = int(round(self.yC + self.dSm * m.sin(angle)))
-            y1 = int(round(self.yC + self.dBg * m.sin(angle)))
+            (x0, y0) = smallCorners[i]
+            (x1, y1) = bigCorners[i]
             # Create slider
             self.sliders.append(Slider(x0, y0, x1, y1, self.values[i]))
 
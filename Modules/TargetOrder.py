@@ -0,0 +1,88 @@
+#================================================================================
+# Ordering of the target particle parameters along the 3D Hilbert curve
+# (Python counterpart of hilbert_curve.c). The targets of the block of
+# particles are drawn first and searched in the order of the curve, the
+# neighbours along the curve are close in (circularity, convexity,
+# elongation), so the shape found for one target is a good start of the
+# search for the next target. The shape of the neighbour is jittered, so the
+# seed accepted without the search is not the same shape as the neighbour.
+# The index is calculated with the transpose algorithm of J. Skilling
+# ("Programming the Hilbert curve", AIP Conf. Proc. 707, 2004).
+#================================================================================
+
+import numpy as np
+
+# Number of the bits of every coordinate of the curve
+HILBERT_BITS = 16
+
+# Jitter of the neighbour shape seeding the search (fraction of the variables range)
+ORDER_SEED_SIGMA = 0.02
+
+# Number of the targets drawn first and searched in the order of the curve
+ORDER_BLOCK_SIZE = 256
+
+
+def hilbert_index(points, lower, upper, bits=HILBERT_BITS):
+    """Function for the indexes of the 3D points along the Hilbert curve through the box
+       points: (N, 3) array with the points
+       lower, upper: Corners of the box (the points out of the box are in the edge cells)
+       bits: Number of the bits of every coordinate
+       return: (N,) integer array with the indexes of the cells of the points"""
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    lower = np.asarray(lower, dtype=np.float64)
+    span = np.asarray(upper, dtype=np.float64) - lower
+    value = np.where(span > 0.0, (points - lower) / np.where(span > 0.0, span, 1.0), 0.0)
+    cellMax = (1 << bits) - 1
+    X = np.rint(np.clip(value, 0.0, 1.0) * cellMax).astype(np.int64)
+    n = X.shape[1]
+
+    # Inverse undo of the excess work
+    Q = 1 << (bits - 1)
+    while Q > 1:
+        P = Q - 1
+        for i in range(n):
+            high = (X[:, i] & Q) != 0
+            t = (X[:, 0] ^ X[:, i]) & P
+            X[:, 0] = np.where(high, X[:, 0] ^ P, X[:, 0] ^ t)
+            X[:, i] = np.where(high, X[:, i], X[:, i] ^ t)
+        Q >>= 1
+
+    # Gray encode
+    for i in range(1, n):
+        X[:, i] ^= X[:, i - 1]
+    t = np.zeros(len(X), dtype=np.int64)
+    Q = 1 << (bits - 1)
+    while Q > 1:
+        t = np.where((X[:, n - 1] & Q) != 0, t ^ (Q - 1), t)
+        Q >>= 1
+    X ^= t[:, np.newaxis]
+
+    # Interleave the bits of the transpose (the highest bits first)
+    index = np.zeros(len(X), dtype=np.int64)
+    for bit in range(bits - 1, -1, -1):
+        for i in range(n):
+            index = (index << 1) | ((X[:, i] >> bit) & 1)
+    return index
+
+
+def hilbert_order(points):
+    """Function for ordering the 3D points along the Hilbert curve through their bounding box
+       points: (N, 3) array with the points
+       return: (N,) array with the indexes of the points in the order of the curve"""
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = hilbert_index(points, points.min(axis=0), points.max(axis=0))
+    return np.argsort(keys, kind='stable')
+
+
+def neighbour_seed(dims, rng, varMin=0.0, varMax=1.0, sigma=ORDER_SEED_SIGMA):
+    """Function for the seed of the search from the shape found for the neighbour target
+       dims: Radii of the neighbour shape
+       rng: RandomState of the jitter
+       varMin, varMax: Limits of the radii
+       sigma: Jitter of the radii (fraction of the variables range)
+       return: (nDim,) array with the jittered radii"""
+    dims = np.asarray(dims, dtype=np.float64)
+    jitter = sigma * (varMax - varMin) * rng.standard_normal(dims.shape)
+    return np.clip(dims + jitter, varMin, varMax)
@@ -0,0 +1,64 @@
+#================================================================================
+# Shared cache of the unit direction tables of the radial polygon. The vertex
+# i of the particle with nDim dimensions lies on the direction with angle
+# i * 2*pi/nDim, so cos and sin of these angles are calculated once per nDim.
+#================================================================================
+
+import numpy as np
+
+
+class TrigTable():
+    """Cache of the cos/sin tables of the radial polygon directions (keyed by nDim)"""
+
+    tables = {}  # nDim: (cosA, sinA) read-only arrays
+
+    @classmethod
+    def get(cls, nDim):
+        """Function for getting the unit direction table for the certain nDim
+           nDim: Number of the particle dimensions (equal to the amount of sliders)
+           return: tuple (cosA, sinA) of read-only arrays with nDim values
+        """
+        table = cls.tables.get(nDim)
+        if table is None:
+            angle = np.arange(nDim) * (2 * np.pi / nDim)
+            cosA = np.cos(angle)
+            sinA = np.sin(angle)
+            cosA.setflags(write=False)
+            sinA.setflags(write=False)
+            table = cls.tables[nDim] = (cosA, sinA)
+        return table
+
+    @classmethod
+    def get_rotated(cls, nDim, angle):
+        """Function for getting the unit direction table rotated by the angle
+           (one 2x2 rotation of the cached table instead of the new cos/sin calls)
+           nDim: Number of the particle dimensions (equal to the amount of sliders)
+           angle: Rotation angle (rad)
+           return: tuple (cosA, sinA) of arrays with nDim values
+        """
+        (cosA, sinA) = cls.get(nDim)
+        if angle == 0:
+            return cosA, sinA
+        (c, s) = (np.cos(angle), np.sin(angle))
+        return cosA * c - sinA * s, sinA * c + cosA * s
+
+    @classmethod
+    def get_vertices(cls, radius, centre=0.0, angle=0):
+        """Function for calculation the coordinates of the radial polygon vertices
+           radius: (nDim,) or (N, nDim) array with the distances from the centre to the vertices
+           centre: Coordinate of the centre (same for X and Y)
+           angle: Rotation angle of the polygon (rad)
+           return: tuple (X, Y) of arrays with the same shape as radius
+        """
+        radius = np.asarray(radius, dtype=np.float64)
+        (cosA, sinA) = cls.get_rotated(radius.shape[-1], angle)
+        return cosA * radius + centre, sinA * radius + centre
+
+    @classmethod
+    def get_int_vertices(cls, radius, centre=0.0, angle=0):
+        """Function for calculation the rounded coordinates of the radial polygon vertices
+           (for drawing), arguments are the same as in get_vertices
+           return: list of (x, y) tuples of int (radius has the shape (nDim,))
+        """
+        (X, Y) = cls.get_vertices(radius, centre, angle)
+        return list(zip(np.rint(X).astype(int).tolist(), np.rint(Y).astype(int).tolist()))
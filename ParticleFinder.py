@@ -9,6 +9,7 @@
 
 import sys
 import os
+import ctypes
 from PyQt5.QtWidgets import (QMainWindow, QApplication, QDesktopWidget, QAction, 
                              QLabel, QPushButton, QMessageBox, QFileDialog, 
                              QCheckBox, QPlainTextEdit)
@@ -27,8 +28,9 @@ from Modules.PSOSettingsWindow import PSOSettingsWindow
 from Modules.AdvancedQSpinBox import AdvancedQSpinBox
 from Modules.AdvancedQLineEdit import AdvancedQLineEdit
 from Modules.ImageLabel import ImageLabel
-from Modules.PSOAlg_py import PSOAlg_py  # For demonstration use
-from Modules.PSOAlg_dll import PSOAlg_dll  # For production use
+from Modules.PSOAlg_dll import PSOAlg_dll
+from Modules.ParticleBackend import optSettings_t, psoControl_t, PSO_STATUS_CANCELLED
+from Modules.PSOTuner import load_profile
 
 #from Modules.PSOAlg.PSOAlg_cy import run_search_cy
 from Modules.Worker import Worker
@@ -63,8 +65,9 @@ class ParticleFinder(QMainWindow):
         self.settingsWindow = None  # Oblect of window with algorithm settings
         
         # PSO optimization algorithm hyperparameters:
-        self.psoAlg_py = None  # Instance of the PSO algorithm class (Python code)
         self.psoAlg_dll = PSOAlg_dll()  # Instance of the PSO algorithm class (C code from dll)
+        self.searchCancel = ctypes.c_int(0)  # Shared flag to cancel the running search
+        self.progressMs = 40.0  # Minimum interval between the shape updates of the running search [ms]
         self.PSO_nVar = None  # Number of unknown (decision) variables (equal to nDim)
         self.PSO_varMin = None  # Lower bound of decision variables
         self.PSO_varMax = None  # Upper bound of decision variables
@@ -75,6 +78,8 @@ class ParticleFinder(QMainWindow):
         self.PSO_c2 = None  # Social acceleration coefficient
         self.PSO_a = None  # Additional randomization of a-th particle in swarm
         self.PSO_b = None  # Additional randomization of all particles every b-th iteration
+        self.PSO_control = psoControl_t(window=0, polishSteps=0)  # Convergence monitor (window 0 - b resets)
+        self.optSettings = optSettings_t()  # Choice and settings of the search algorithm (PSO by default)
         
         self.particleAlg = None  # Instance of the particle used in algorithm
         self.particleCalc = None  # Instance of the particle used in calculations
@@ -87,6 +92,7 @@ class ParticleFinder(QMainWindow):
         self.result_arrayBestCosts = None
         self.result_params = None
         self.result_doSearch = None
+        self.result_status = None
         
         self.init_ui()  # Initialize the user interface elements
     
@@ -418,6 +424,23 @@ class ParticleFinder(QMainWindow):
         self.PSO_c2 = 2.0
         self.PSO_a = 5
         self.PSO_b = 200
+        self.apply_PSO_profile()
+
+    def apply_PSO_profile(self):
+        """Method for putting the PSO settings from the tuned profile of the current nDim
+           (the settings are kept if there is no profile)"""
+        profile = load_profile(self.nDim)
+        if profile is None:
+            return
+        params = profile['params']
+        self.PSO_nPop = params['nPop']
+        self.PSO_w = params['w']
+        self.PSO_wDamp = params['wDamp']
+        self.PSO_c1 = params['c1']
+        self.PSO_c2 = params['c2']
+        self.PSO_a = params['a']
+        self.PSO_b = params['b']
+        self.write_to_terminal('PSO settings are loaded from the profile of {0:d} axes'.format(self.nDim))
         
     def update_initParams(self, fieldName):
         """Method for update the values in the edit fields with initial parameters"""   
@@ -530,6 +553,7 @@ class ParticleFinder(QMainWindow):
     def val_changed_spb_axesNum(self):
         self.nDim = self.spb_axesNum.value()
         self.PSO_nVar = self.nDim
+        self.apply_PSO_profile()
         self.lbl_particlePicture.set_N(self.nDim)
         # Put some default values to the edit boxes
         self.edt_realWidth.setText('?')
@@ -560,6 +584,8 @@ class ParticleFinder(QMainWindow):
         self.PSO_c2 = settingsData['PSO_c2']
         self.PSO_a = settingsData['PSO_a']
         self.PSO_b = settingsData['PSO_b']
+        self.PSO_control = settingsData['PSO_control']
+        self.optSettings = settingsData['optSettings']
     
     def find_shape_do_before_search(self):
         """Preparation method for start searching the shape"""
@@ -582,51 +608,19 @@ class ParticleFinder(QMainWindow):
         # Enable menu action to save the data
         self.saveShapeAct.setEnabled(True)
         
-        # Find shape with workers (using python or cython)
-        if self.useVisualIter or self.useLoglIter:
-            # Find the shape with python (slower, but with loging the progress)
-            worker = Worker(self.find_shape_main)
-            worker.signals.progress.connect(self.update_shape_and_parameters)
-            worker.signals.finished.connect(self.find_shape_do_after_search)
-            self.threadpool.start(worker)
-        else:
-            # Find the shape with dll (faster, but without loging the progress)
-            worker = Worker(self.find_shape_main_dll)
-            worker.signals.progress.connect(self.update_shape_and_parameters)
-            worker.signals.finished.connect(self.find_shape_do_after_search)
-            self.threadpool.start(worker)  
-    
-    def find_shape_main(self, progress_callback):
-        """Main method to find the shape of the particle with python code"""     
-        self.algStartTime = time()  # Start time
-        # Define new instance of PSO searching algorithm
-        self.psoAlg_py = PSOAlg_py(
-            progress_callback,
-            init_circularity = self.init_circularity,
-            init_convexity = self.init_convexity,
-            init_elongation = self.init_elongation,
-            nVar = self.PSO_nVar,
-            varMin = self.PSO_varMin,
-            varMax = self.PSO_varMax,
-            useIterLimit = self.useIterLimit,
-            iterLimit = self.iterLimit,
-            usePrecisionLimit = self.usePrecisionLimit,
-            precisionLimit = self.precisionLimit,
-            showErrorPlot = self.showErrorPlot,
-            nPop = self.PSO_nPop,
-            w = self.PSO_w,
-            wDamp = self.PSO_wDamp,
-            c1 = self.PSO_c1,
-            c2 = self.PSO_c2,
-            a = self.PSO_a,
-            b = self.PSO_b)    
-        
-        # Run search and recieve the results
-        self.psoAlg_py.run_search()        
+        # Find shape with worker (the progress of the search is streamed by the library)
+        self.searchCancel.value = 0
+        worker = Worker(self.find_shape_main_dll)
+        worker.signals.progress.connect(self.update_shape_and_parameters)
+        worker.signals.finished.connect(self.find_shape_do_after_search)
+        self.threadpool.start(worker)  
     
     def find_shape_main_dll(self, progress_callback):
-        """Main method to find the shape of the particle with cython code"""
+        """Main method to find the shape of the particle with the library search. The logged
+           progress is sent every iteration, the shown shape is updated not more often than
+           every progressMs milliseconds"""
         self.algStartTime = time()  # Start time
+        useProgress = self.useVisualIter or self.useLoglIter
         
         # Execute the function for the search   
         results = self.psoAlg_dll.run_search(
@@ -647,10 +641,17 @@ class ParticleFinder(QMainWindow):
             c1 = self.PSO_c1,
             c2 = self.PSO_c2,
             a = self.PSO_a,
-            b = self.PSO_b)
-        
+            b = self.PSO_b,
+            control = self.PSO_control,
+            settings = self.optSettings,
+            progress_callback = progress_callback.emit if useProgress else None,
+            cancel = self.searchCancel,
+            progressIter = 1 if self.useLoglIter else 0,
+            progressMs = self.progressMs if self.useVisualIter else 0.0)
+        
+        # Final result is sent after the progress of the search (the same queue of the signal)
         results['doSearch'] = False
-        self.update_shape_and_parameters(results)               
+        progress_callback.emit(results)
         
     def update_shape_and_parameters(self, data):
         """Method to update the shape and particle parameters
@@ -661,12 +662,13 @@ class ParticleFinder(QMainWindow):
         self.result_globalBestCost = data['globalBestCost']
         self.result_arrayBestCosts = data['arrayBestCosts']
         self.result_doSearch = data['doSearch']
+        self.result_status = data['status']
         
-        # Determine the image scale
-        self.result_params = self.particle.get_particle_parameters(1.0, self.result_dims, self.nDim)
-        areaPixels = self.result_params['areaPixels']
-        imgScale = self.init_CEDiameter * m.sqrt(m.pi / (areaPixels * 4))
-        self.result_params = self.particle.get_particle_parameters(imgScale, self.result_dims, self.nDim)
+        # Determine the image scale and rescale the pixel-space result to it
+        # (both results are memoized, the best position often stays the same between iterations)
+        pixParams = self.particle.get_pixel_space_parameters(self.result_dims, self.nDim)
+        imgScale = self.init_CEDiameter * m.sqrt(m.pi / (pixParams['areaPixels'] * 4))
+        self.result_params = self.particle.rescale_parameters(pixParams, imgScale)
 
         if self.useVisualIter or (not self.result_doSearch):
             # Draw the particle
@@ -708,7 +710,8 @@ class ParticleFinder(QMainWindow):
             self.edt_realWidth.setText('{0:.2f}'.format(self.result_params['realWidth']))
         
         if self.useLoglIter or (not self.result_doSearch):
-            text = 'Iteration: {0:d};   RMSE: {1:.6f}'.format(self.result_iteration, self.result_globalBestCost)
+            text = 'Iteration: {0:d};   RMSE: {1:.6f};   Evaluations: {2:d}'.format(self.result_iteration,
+                self.result_globalBestCost, data['evaluations'])
             self.write_to_terminal(text)
         
     def find_shape_do_after_search(self):
@@ -724,6 +727,8 @@ class ParticleFinder(QMainWindow):
         self.algTime = time() - self.algStartTime
         
         # Write to the terminal the important information
+        if self.result_status == PSO_STATUS_CANCELLED:
+            self.write_to_terminal("Searching is stopped!")
         self.write_to_terminal("Searching is finished! Total searching time: {0:.2f} [s]".format(
                 self.algTime))
         
@@ -771,7 +776,8 @@ class ParticleFinder(QMainWindow):
         self.btn_searchShape.setEnabled(flag)
     
     def stop_search(self):
-        self.psoAlg.doSearch = False
+        """Method to stop the running search (the best shape found so far is shown)"""
+        self.searchCancel.value = 1
         
     def save_particle_data(self):
         """Method for saving the particle shape in json format in txt file"""
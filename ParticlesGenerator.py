@@ -21,7 +21,9 @@ import random as rnd
 import math as m
 from openpyxl import load_workbook
 import matplotlib.pyplot as plt
-from subprocess import Popen, CREATE_NEW_CONSOLE
+from subprocess import Popen
+if os.name == 'nt':
+    from subprocess import CREATE_NEW_CONSOLE  # Parallel generation runs .bat files (Windows only)
 
 # Program modules:
 from Modules.About import About
@@ -30,6 +32,12 @@ from Modules.AdvancedQLineEdit import AdvancedQLineEdit
 from Modules.AdvancedQProgressBar import AdvancedQProgressBar
 from Modules.Particle import Particle
 from Modules.PSOAlg_dll import PSOAlg_dll
+from Modules.ParticleBackend import (new_seed, new_random_state, psoControl_t, optSettings_t,
+                                     PSO_STATUS_GAVE_UP, PSO_STATUS_ARCHIVE, PSO_STATUS_INITIAL)
+from Modules.ShapeAtlas import ShapeAtlas
+from Modules.InverseModel import InverseModel, train_inverse_model
+from Modules.TargetOrder import ORDER_BLOCK_SIZE, hilbert_order, neighbour_seed
+from Modules.PSOTuner import PSOTuner, load_profile, save_profile, predict_run_time
 from Modules.ImageLabelGenerator import ImageLabelGenerator
 from Modules.PSOSettingsWindow import PSOSettingsWindow
 from Modules.PSearchSettingsWindow import PSearchSettingsWindow
@@ -126,6 +134,21 @@ class ParticlesGenerator(QMainWindow):
         self.useParallelSearch = None  # Flag to use the parallel search
         self.deleteError = None  # Flag of error to delete the files in "data" folder
         self.numThreads = None  # Number of searching threads
+        self.useShapeAtlas = None  # Flag to take the shapes from the precomputed atlas
+        self.atlasRefineIter = None  # Number of iterations of the shape refinement (0 - no refinement)
+        self.shapeAtlas = None  # Atlas of the shapes (opened for the current nDim)
+        self.gaveUpNum = None  # Number of the targets given up by the search (unlikely to be reached)
+        self.shapeArchive = None  # Archive of the shapes evaluated by the searches of the generation
+        self.archiveHitsNum = None  # Number of the targets taken from the archive without the search
+        self.useInverseModel = None  # Flag to seed the search with the prediction of the inverse model
+        self.inverseModel = None  # Inverse model of the current nDim (None - no trained model)
+        self.modelHitsNum = None  # Number of the predictions accepted without the search
+        self.orderTargets = None  # Flag to search the block of targets in the order of the Hilbert curve
+        self.neighbourHitsNum = None  # Number of the neighbour seeds accepted without the search
+        self.PSO_profile = None  # Tuned profile of the PSO settings of the current nDim (None - no profile)
+        self.tuneTargetsNum = None  # Number of the representative targets of the PSO tuning
+        self.tuneCandidatesNum = None  # Number of the candidate PSO settings of the tuning
+        self.tuneMinSuccessRate = None  # Floor of the success rate of the tuned PSO settings
         # PSO optimization algorithm hyper parameters:
         self.psoAlg_dll = PSOAlg_dll()  # Instance of the PSO algorithm class (C code from dll)
         self.PSO_nVar = None  # Number of unknown (decision) variables (equal to nDim)
@@ -138,6 +161,8 @@ class ParticlesGenerator(QMainWindow):
         self.PSO_c2 = None  # Social acceleration coefficient
         self.PSO_a = None  # Additional randomization of a-th particle in swarm
         self.PSO_b = None  # Additional randomization of all particles every b-th iteration
+        self.PSO_control = psoControl_t()  # Convergence monitor of the search (window 0 - b resets)
+        self.optSettings = optSettings_t()  # Choice and settings of the search algorithm (PSO by default)
         # Generated particle image and properties:
         self.showGeneratedPlots = False  # Flag to show the generated distributions plots
         self.fileName = None  # Filename
@@ -146,7 +171,7 @@ class ParticlesGenerator(QMainWindow):
 
     def init_ui(self):
         """Method for the initialization of the UI"""
-        self.setFixedSize(574, 535)  # Window size
+        self.setFixedSize(574, 558)  # Window size
         self.center_window()  # Center the window on desktop
         self.setWindowIcon(QIcon('Resources/icon.png'))
         self.setWindowTitle('Particles generator tool')  # Window title
@@ -331,52 +356,75 @@ class ParticlesGenerator(QMainWindow):
         self.btn_ParallelSearchSettings.setIcon(QIcon(QPixmap('./Resources/settings.png')))
         self.btn_ParallelSearchSettings.clicked.connect(self.open_ParallelSearch_settings)
         
+        # Block with shape atlas settings
+        self.chb_useShapeAtlas = QCheckBox('Use shape atlas', self)
+        self.chb_useShapeAtlas.setGeometry(20, 309, 200, 21)
+        self.chb_useShapeAtlas.setFont(QFont('Arial', 11))
+        self.chb_useShapeAtlas.clicked.connect(self.chb_useShapeAtlas_clicked)
+        
+        # Block with inverse model settings
+        self.chb_useInverseModel = QCheckBox('Use inverse model', self)
+        self.chb_useInverseModel.setGeometry(20, 332, 200, 21)
+        self.chb_useInverseModel.setFont(QFont('Arial', 11))
+        self.chb_useInverseModel.clicked.connect(self.chb_useInverseModel_clicked)
+        
+        self.btn_trainInverseModel = QPushButton(self)
+        self.btn_trainInverseModel.setGeometry(244, 332, 21, 21)
+        self.btn_trainInverseModel.setIcon(QIcon(QPixmap('./Resources/arrow.png')))
+        self.btn_trainInverseModel.clicked.connect(self.train_inverse_model)
+        
+        # Block with ordering of the targets
+        self.chb_orderTargets = QCheckBox('Order targets', self)
+        self.chb_orderTargets.setGeometry(20, 355, 200, 21)
+        self.chb_orderTargets.setFont(QFont('Arial', 11))
+        self.chb_orderTargets.clicked.connect(self.chb_orderTargets_clicked)
+        
         """Generation information section"""
         # Block with generation start time
         self.lbl_StartDateTime = QLabel('Started date/time:', self)
         self.lbl_StartDateTime.setAlignment(Qt.AlignLeft)
-        self.lbl_StartDateTime.setGeometry(20, 355, 150, 21)
+        self.lbl_StartDateTime.setGeometry(20, 378, 150, 21)
         self.lbl_StartDateTime.setFont(QFont('Arial', 11))
         
         self.edt_startDateTime = AdvancedQLineEdit(self)
         self.edt_startDateTime.setAlignment(Qt.AlignRight)
-        self.edt_startDateTime.setGeometry(163, 355, 101, 21)
+        self.edt_startDateTime.setGeometry(163, 378, 101, 21)
         self.edt_startDateTime.setFont(QFont('Arial', 11))
         self.edt_startDateTime.set_readOnly(True)
         
         # Block with elapsed time
         self.lbl_elapsedTime = QLabel('Elapsed time:', self)
         self.lbl_elapsedTime.setAlignment(Qt.AlignLeft)
-        self.lbl_elapsedTime.setGeometry(20, 378, 150, 21)
+        self.lbl_elapsedTime.setGeometry(20, 401, 150, 21)
         self.lbl_elapsedTime.setFont(QFont('Arial', 11))
         
         self.edt_elapsedTime = AdvancedQLineEdit(self)
         self.edt_elapsedTime.setAlignment(Qt.AlignRight)
-        self.edt_elapsedTime.setGeometry(163, 378, 101, 21)
+        self.edt_elapsedTime.setGeometry(163, 401, 101, 21)
         self.edt_elapsedTime.setFont(QFont('Arial', 11))
         self.edt_elapsedTime.set_readOnly(True)
         
         # Block with time to finish
         self.lbl_timeToFinish = QLabel('Time to finish:', self)
         self.lbl_timeToFinish.setAlignment(Qt.AlignLeft)
-        self.lbl_timeToFinish.setGeometry(20, 401, 150, 21)
+        self.lbl_timeToFinish.setGeometry(20, 424, 150, 21)
         self.lbl_timeToFinish.setFont(QFont('Arial', 11))
         
         self.edt_timeToFinish = AdvancedQLineEdit(self)
         self.edt_timeToFinish.setAlignment(Qt.AlignRight)
-        self.edt_timeToFinish.setGeometry(163, 401, 101, 21)
+        self.edt_timeToFinish.setGeometry(163, 424, 101, 21)
         self.edt_timeToFinish.setFont(QFont('Arial', 11))
         self.edt_timeToFinish.set_readOnly(True)
         
         # Block with particles generated
         self.lbl_generatedParts = QLabel('Generated particles:', self)
         self.lbl_generatedParts.setAlignment(Qt.AlignLeft)
-        self.lbl_generatedParts.setGeometry(20, 424, 150, 21)
+        self.lbl_generatedParts.setGeometry(20, 447, 150, 21)
         self.lbl_generatedParts.setFont(QFont('Arial', 11))
         
         self.edt_generatedParts = AdvancedQLineEdit(self)
         self.edt_generatedParts.setAlignment(Qt.AlignRight)
-        self.edt_generatedParts.setGeometry(163, 424, 101, 21)
+        self.edt_generatedParts.setGeometry(163, 447, 101, 21)
         self.edt_generatedParts.setFont(QFont('Arial', 11))
         self.edt_generatedParts.set_readOnly(True)
         
@@ -427,25 +475,29 @@ class ParticlesGenerator(QMainWindow):
 
         # Buttons for start and stop generating the particles
         self.btn_generate = QPushButton('Generate', self)
-        self.btn_generate.setGeometry(20, 459, 80, 27)
+        self.btn_generate.setGeometry(20, 482, 80, 27)
         self.btn_generate.clicked.connect(self.prepare_for_generation)
         
         self.btn_stopGeneration = QPushButton('Stop', self)
-        self.btn_stopGeneration.setGeometry(112, 459, 70, 27)
+        self.btn_stopGeneration.setGeometry(112, 482, 70, 27)
         self.btn_stopGeneration.clicked.connect(self.stop_generation)
         
+        self.btn_tunePSO = QPushButton('Tune PSO', self)
+        self.btn_tunePSO.setGeometry(230, 482, 80, 27)
+        self.btn_tunePSO.clicked.connect(self.make_tuning_do_before)
+        
         # Timer
         self.timer = QTimer()
         self.timer.timeout.connect(self.timer_event)
 
         # Lamps indicator
         self.lbl_lamp = QLabel(self)
-        self.lbl_lamp.setGeometry(194, 459, 25, 25)
+        self.lbl_lamp.setGeometry(194, 482, 25, 25)
         self.lbl_lamp.setPixmap(QPixmap('Resources/lamp_off.png'))
         
         # Progress bar
         self.progressBar = AdvancedQProgressBar(self)
-        self.progressBar.setGeometry(20, 500, 534, 21)
+        self.progressBar.setGeometry(20, 523, 534, 21)
         
         self.put_default_parameters()
         self.show()
@@ -471,6 +523,10 @@ class ParticlesGenerator(QMainWindow):
         self.PSO_c2 = 2.0
         self.PSO_a = 5
         self.PSO_b = 200
+        self.apply_PSO_profile()
+        self.tuneTargetsNum = 64
+        self.tuneCandidatesNum = 24
+        self.tuneMinSuccessRate = 0.9
         self.iterLimit = 1000
         self.spb_iterLimit.set_value(self.iterLimit)
         self.precisionLimit = 0.01
@@ -478,10 +534,18 @@ class ParticlesGenerator(QMainWindow):
         self.useParallelSearch = False
         self.chb_useParallelSearch.setChecked(False)
         self.numThreads = 4
+        self.useShapeAtlas = False
+        self.chb_useShapeAtlas.setChecked(False)
+        self.atlasRefineIter = 10
+        self.useInverseModel = False
+        self.chb_useInverseModel.setChecked(False)
+        self.inverseModel = None
+        self.orderTargets = False
+        self.chb_orderTargets.setChecked(False)
         self.edt_startDateTime.setText('?')
         self.elapsedTime = 0
         self.edt_elapsedTime.setText('0:00:00')
-        self.edt_timeToFinish.setText('?')
+        self.update_predicted_time()
         self.generatedParts = 0
         self.edt_generatedParts.setText('{0:d}'.format(self.generatedParts))
         self.percentComplete = 0
@@ -491,6 +555,32 @@ class ParticlesGenerator(QMainWindow):
             self.paramsEdits[item].setText('?')
         self.btn_generate.setEnabled(False)
         self.btn_stopGeneration.setEnabled(False)
+        self.btn_tunePSO.setEnabled(False)
+
+    def apply_PSO_profile(self):
+        """Method for putting the PSO settings from the tuned profile of the current nDim
+           (the settings are kept if there is no profile)"""
+        self.PSO_profile = load_profile(self.nDim)
+        if self.PSO_profile is None:
+            return
+        params = self.PSO_profile['params']
+        self.PSO_nPop = params['nPop']
+        self.PSO_w = params['w']
+        self.PSO_wDamp = params['wDamp']
+        self.PSO_c1 = params['c1']
+        self.PSO_c2 = params['c2']
+        self.PSO_a = params['a']
+        self.PSO_b = params['b']
+
+    def update_predicted_time(self):
+        """Method for showing the total generation time predicted by the PSO profile
+           ('?' if there is no profile or the particles are spherical)"""
+        numThreads = self.numThreads if self.useParallelSearch else 1
+        value = predict_run_time(self.PSO_profile, self.particlesNum, numThreads)
+        if value is None or self.onlySpherical:
+            self.edt_timeToFinish.setText('?')
+        else:
+            self.edt_timeToFinish.setText(self.make_label_for_time(int(round(value))))
 
     def load_distr_data(self):
         """Method for loading the xlsx file with target parameters distributions"""
@@ -521,6 +611,7 @@ class ParticlesGenerator(QMainWindow):
                 # Finaly enable buttons for genetation
                 self.btn_generate.setEnabled(True)
                 self.btn_stopGeneration.setEnabled(True)
+                self.btn_tunePSO.setEnabled(True)
                 # Enable plotting option and do not show generated plots
                 self.showPlotsAct.setEnabled(True)
                 self.showGeneratedPlots = False
@@ -646,6 +737,12 @@ class ParticlesGenerator(QMainWindow):
                 self.lbl_particleImage.drawFlag = "None"
             self.useParallelSearch = False
             self.chb_useParallelSearch.setChecked(False)
+            self.useShapeAtlas = False
+            self.chb_useShapeAtlas.setChecked(False)
+            self.useInverseModel = False
+            self.chb_useInverseModel.setChecked(False)
+            self.orderTargets = False
+            self.chb_orderTargets.setChecked(False)
         else:
             self.onlySpherical = False
             if self.chb_showParticle.isChecked():
@@ -656,6 +753,10 @@ class ParticlesGenerator(QMainWindow):
         # Hide or show specific spin boxes, edits and buttons
         flag = not self.onlySpherical
         self.chb_useParallelSearch.setEnabled(flag)
+        self.chb_useShapeAtlas.setEnabled(flag)
+        self.chb_useInverseModel.setEnabled(flag)
+        self.btn_trainInverseModel.setEnabled(flag)
+        self.chb_orderTargets.setEnabled(flag)
         self.spb_axesNum.setEnabled(flag)
         self.btn_resetAxesNum.setEnabled(flag)
         self.btn_PSOAlgSettings.setEnabled(flag)
@@ -664,6 +765,7 @@ class ParticlesGenerator(QMainWindow):
         self.edt_precisionLimit.setEnabled(flag)
         self.btn_resetPrecisionLimit.setEnabled(flag)
         self.btn_ParallelSearchSettings.setEnabled(flag)
+        self.update_predicted_time()
         self.update()
 
     def chb_showParticle_clicked(self):
@@ -688,6 +790,10 @@ class ParticlesGenerator(QMainWindow):
             else:
                 self.lbl_particleImage.drawFlag = "None"
             self.chb_onlySpherical.setEnabled(False)
+            self.useShapeAtlas = False  # Atlas is used only by the default generation
+            self.chb_useShapeAtlas.setChecked(False)
+            self.useInverseModel = False  # Inverse model is used only by the default generation
+            self.chb_useInverseModel.setChecked(False)
         else:
             self.useParallelSearch = False
             self.chb_onlySpherical.setEnabled(True)
@@ -695,12 +801,62 @@ class ParticlesGenerator(QMainWindow):
                 self.lbl_particleImage.drawFlag = "Part"
             else:
                 self.lbl_particleImage.drawFlag = "None"
+        self.update_predicted_time()
         self.update()
 
+    def chb_useShapeAtlas_clicked(self):
+        """Method to define weather to take the shapes from the precomputed atlas or not"""
+        self.useShapeAtlas = self.chb_useShapeAtlas.isChecked()
+        if self.useShapeAtlas and self.useParallelSearch:
+            self.chb_useParallelSearch.setChecked(False)
+            self.chb_useParallelSearch_clicked()
+
+    def chb_useInverseModel_clicked(self):
+        """Method to define weather to seed the search with the prediction of the inverse model
+           or not (the model of the current nDim is loaded or trained on the generated particles)"""
+        self.useInverseModel = self.chb_useInverseModel.isChecked()
+        if self.useInverseModel:
+            self.inverseModel = InverseModel.load(self.nDim)
+            if self.inverseModel is None:
+                self.train_inverse_model()
+            if self.useInverseModel and self.useParallelSearch:
+                self.chb_useParallelSearch.setChecked(False)
+                self.chb_useParallelSearch_clicked()
+
+    def chb_orderTargets_clicked(self):
+        """Method to define weather to draw the targets of the block of particles first and
+           search them in the order of the Hilbert curve (every search starts around the shape
+           of the neighbour target, the particles are saved in the order of drawing) or not"""
+        self.orderTargets = self.chb_orderTargets.isChecked()
+
+    def train_inverse_model(self):
+        """Method for training the inverse model of the current nDim on the generated particles
+           systems (GenPartSystems folder), the model is saved and used by the generation"""
+        model = train_inverse_model(self.nDim, self.precisionLimit)
+        if model is None:
+            text = 'There are too few generated particles with {0:d} axes to train the inverse model!'.format(self.nDim)
+            self.show_error_window(text)
+            self.useInverseModel = False
+            self.chb_useInverseModel.setChecked(False)
+            return
+        model.save()
+        self.inverseModel = model
+        text = ('Inverse model is trained on {0:d} particles (median error of the prediction is {1:.4f}, '
+                '{2:.1f} % of the predictions are within the precision limit).').format(
+                model.report['nSamples'], model.report['medianCost'], 100 * model.report['acceptedRate'])
+        self.show_information_window(text)
+
     def val_changed_spb_axesNum(self):
         """Method for change spb_axesNum value"""
         self.nDim = self.spb_axesNum.value()
         self.PSO_nVar = self.nDim
+        self.apply_PSO_profile()
+        if self.useInverseModel:
+            self.inverseModel = InverseModel.load(self.nDim)
+            if self.inverseModel is None:
+                self.useInverseModel = False  # Model of the new nDim is trained by the checkbox
+                self.chb_useInverseModel.setChecked(False)
+        self.update_predicted_time()
         self.update()
     
     def update_edt_particlesNum(self):
@@ -709,6 +865,7 @@ class ParticlesGenerator(QMainWindow):
         self.partPerPicture = self.spb_partPerPicture.value()
         self.particlesNum = self.picturesNum * self.partPerPicture
         self.edt_particlesNum.setText('{0:d}'.format(self.particlesNum))    
+        self.update_predicted_time()
     
     def val_changed_spb_iterLimit(self):
         """Method for change spb_iterLimit value"""
@@ -768,10 +925,13 @@ class ParticlesGenerator(QMainWindow):
         self.PSO_c2 = settingsData['PSO_c2']
         self.PSO_a = settingsData['PSO_a']
         self.PSO_b = settingsData['PSO_b']
+        self.PSO_control = settingsData['PSO_control']
+        self.optSettings = settingsData['optSettings']
         
     def set_PSearch_settings_data(self, settingsData):
         """Method for save the PSearch settings data"""
         self.numThreads = settingsData['numThreads']
+        self.update_predicted_time()
 
     def prepare_for_generation(self):
         """Method for initial preparation for the generation process"""
@@ -842,8 +1002,44 @@ class ParticlesGenerator(QMainWindow):
                         'timeToFinish': None,  # Time to finish as formated string
                         'genParticles': None}  # Iteration number
 
+        # Open the shape atlas and solve the most probable cells which are missing in it (the
+        # atlas is saved on the disk and is extended by every run, the targets of the other
+        # cells are searched)
+        if self.useShapeAtlas and not self.onlySpherical:
+            self.shapeAtlas = ShapeAtlas(self.nDim, self.cirConEl_chLower, self.cirConEl_chUpper,
+                                         self.precisionLimit, self.iterLimit)
+            cells = self.shapeAtlas.get_build_cells(self.norm_circ_distr_diff,
+                self.norm_convex_distr_diff, self.norm_elong_distr_diff, self.particlesNum)
+            searchSettings = {'nVar': self.PSO_nVar, 'varMin': self.PSO_varMin,
+                              'varMax': self.PSO_varMax, 'useIterLimit': True,
+                              'iterLimit': self.iterLimit, 'usePrecisionLimit': True,
+                              'precisionLimit': self.precisionLimit, 'nPop': self.PSO_nPop,
+                              'w': self.PSO_w, 'wDamp': self.PSO_wDamp, 'c1': self.PSO_c1,
+                              'c2': self.PSO_c2, 'a': self.PSO_a, 'b': self.PSO_b,
+                              'control': self.PSO_control, 'settings': self.optSettings}
+            
+            def atlas_progress(fraction):
+                progressData['percentComplete'] = 100 * fraction
+                progress_callback.emit(progressData)
+            self.shapeAtlas.build(cells, self.psoAlg_dll, searchSettings,
+                                  stop_check=lambda: self.stopGeneration,
+                                  progress_callback=atlas_progress)
+        else:
+            self.shapeAtlas = None
+
+        # Archive of the evaluated shapes: the shapes discarded by the searches are the answers
+        # for the next targets from the same distributions (cell size is the precision limit)
+        if not self.onlySpherical:
+            self.shapeArchive = self.psoAlg_dll.make_archive(self.PSO_nVar, cellSize=self.precisionLimit)
+
         # Open output file to save the generated particles
         outfile = open(self.fileName, 'a')
+        self.gaveUpNum = 0
+        self.archiveHitsNum = 0
+        self.modelHitsNum = 0
+        self.neighbourHitsNum = 0
+        modelRng = new_random_state()  # Random orientation of the predicted shapes
+        seedRng = new_random_state()  # Jitter of the shapes of the neighbour targets
 
         # Main particle generation loop:
         for i in range(self.particlesNum):
@@ -866,6 +1062,16 @@ class ParticlesGenerator(QMainWindow):
             # Generation the desired parameters from the distribution:
             if self.onlySpherical:
                 self.gen_CEDiameter = self.get_value_from_distribution('CEDiam')
+            elif self.orderTargets:
+                # Targets of the block are drawn first and searched in the order of the curve,
+                # the particles are taken in the order of drawing
+                if i % ORDER_BLOCK_SIZE == 0:
+                    blockTargets = self.draw_targets(min(ORDER_BLOCK_SIZE, self.particlesNum - i))
+                    blockResults = self.search_ordered_targets(blockTargets[:, 1:], modelRng, seedRng)
+                    if self.stopGeneration:
+                        break
+                (self.target_CEDiameter, self.target_circularity, self.target_convexity,
+                 self.target_elongation) = blockTargets[i % ORDER_BLOCK_SIZE]
             else:
                 self.target_CEDiameter = self.get_value_from_distribution('CEDiam')
                 self.target_circularity = self.get_value_from_distribution('circ')
@@ -876,33 +1082,26 @@ class ParticlesGenerator(QMainWindow):
                 self.sumAreaUm2 += (m.pi * m.pow(self.gen_CEDiameter, 2)) / 4
             else:
                 # Search for the shape of particle with desired parameters:
-                # Execute the function for the search   
-                results = self.psoAlg_dll.run_search(
-                    init_circularity = self.target_circularity,
-                    init_convexity = self.target_convexity,
-                    init_elongation = self.target_elongation,
-                    nVar = self.PSO_nVar,
-                    varMin = self.PSO_varMin,
-                    varMax = self.PSO_varMax,
-                    useIterLimit = True,
-                    iterLimit = self.iterLimit,
-                    usePrecisionLimit = True,
-                    precisionLimit = self.precisionLimit,
-                    showErrorPlot = False,
-                    nPop = self.PSO_nPop,
-                    w = self.PSO_w,
-                    wDamp = self.PSO_wDamp,
-                    c1 = self.PSO_c1,
-                    c2 = self.PSO_c2,
-                    a = self.PSO_a,
-                    b = self.PSO_b)
+                if self.orderTargets:
+                    results = blockResults[i % ORDER_BLOCK_SIZE]
+                else:
+                    # Prediction of the inverse model seeds the search (None - random start)
+                    initPosition = None
+                    if self.useInverseModel and self.inverseModel is not None:
+                        initPosition = self.inverseModel.predict((self.target_circularity,
+                            self.target_convexity, self.target_elongation), modelRng)
+                    results = self.search_target_shape((self.target_circularity,
+                        self.target_convexity, self.target_elongation), initPosition)
+                    if results.get('status') == PSO_STATUS_INITIAL:
+                        self.modelHitsNum += 1
                           
-                # Determine the found particle parameters:
+                # Determine the found particle parameters: pixel-space result is rescaled to the
+                # image scale giving the target CE diameter (no second geometry pass):
                 self.gen_dims = results['globalBestPosition']
-                result_params = self.particle.get_particle_parameters(1.0, self.gen_dims, self.nDim)
-                areaPixels = result_params['areaPixels']
+                pixResult = self.particle.get_pixel_space_result([self.gen_dims])
+                areaPixels = pixResult['areaPixels'][0]
                 imgScale = self.target_CEDiameter * m.sqrt(m.pi / (areaPixels * 4))
-                result_params = self.particle.get_particle_parameters(imgScale, self.gen_dims, self.nDim)
+                result_params = pixResult.rescale(imgScale)[0]
             
                 self.gen_CEDiameter = result_params['CEDiameter']
                 self.gen_circularity = result_params['circularity']
@@ -953,11 +1152,95 @@ class ParticlesGenerator(QMainWindow):
             # Send the callback
             progress_callback.emit(progressData)
 
-        # Close the output file
+        # Close the output file and free the archive
         outfile.close()
+        self.shapeArchive = None
+
+    def draw_targets(self, n):
+        """Method for drawing the targets of n particles from the distributions (the values of
+           every particle are drawn in the same order as by the particle generation loop)
+           return: (n, 4) array with target CE diameter, circularity, convexity and elongation"""
+        return np.array([[self.get_value_from_distribution(distrName) for distrName in
+                          ('CEDiam', 'circ', 'convex', 'elong')] for _ in range(n)])
+
+    def search_ordered_targets(self, targets, modelRng, seedRng):
+        """Method for the search of the shapes of the block of targets in the order of the
+           Hilbert curve. The search of every target starts around the jittered shape of the
+           previous target along the curve, the first target is seeded by the inverse model
+           (if it is used)
+           targets: (n, 3) array with target circularity, convexity and elongation
+           modelRng: RandomState of the orientation of the predicted shapes
+           seedRng: RandomState of the jitter of the neighbour shapes
+           return: list with the search results in the order of the targets (None for the
+                   targets which are not searched because the generation was stopped)"""
+        results = [None] * len(targets)
+        previous = None  # Found shape of the previous target along the curve
+        for k in hilbert_order(targets):
+            if self.stopGeneration:
+                break
+            initPosition = None
+            if previous is not None:
+                initPosition = neighbour_seed(previous, seedRng, self.PSO_varMin, self.PSO_varMax)
+            elif self.useInverseModel and self.inverseModel is not None:
+                initPosition = self.inverseModel.predict(targets[k], modelRng)
+            results[k] = self.search_target_shape(targets[k], initPosition)
+            if results[k].get('status') == PSO_STATUS_INITIAL:
+                if previous is not None:
+                    self.neighbourHitsNum += 1
+                else:
+                    self.modelHitsNum += 1
+            previous = results[k]['globalBestPosition']
+        return results
+
+    def search_target_shape(self, target, initPosition=None):
+        """Method for the search of the shape of the target (the shape is taken from the atlas
+           if the atlas is used and has the shape within the precision limit of the target)
+           target: target circularity, convexity and elongation
+           initPosition: initial radii of the search (None - random start)
+           return: dictionary with 'globalBestPosition' and 'status' (None for the atlas shape)"""
+        (circularity, convexity, elongation) = target
+        if self.shapeAtlas is not None:
+            atlasDims = self.shapeAtlas.get_shape((circularity, convexity, elongation),
+                                                  self.atlasRefineIter)
+            if atlasDims is not None:
+                return {'globalBestPosition': atlasDims.tolist(), 'status': None}
+        results = self.psoAlg_dll.run_search(
+            init_circularity = circularity,
+            init_convexity = convexity,
+            init_elongation = elongation,
+            nVar = self.PSO_nVar,
+            varMin = self.PSO_varMin,
+            varMax = self.PSO_varMax,
+            useIterLimit = True,
+            iterLimit = self.iterLimit,
+            usePrecisionLimit = True,
+            precisionLimit = self.precisionLimit,
+            showErrorPlot = False,
+            nPop = self.PSO_nPop,
+            w = self.PSO_w,
+            wDamp = self.PSO_wDamp,
+            c1 = self.PSO_c1,
+            c2 = self.PSO_c2,
+            a = self.PSO_a,
+            b = self.PSO_b,
+            control = self.PSO_control,
+            settings = self.optSettings,
+            initPosition = initPosition,
+            archive = self.shapeArchive)
+        if results['status'] == PSO_STATUS_GAVE_UP:
+            self.gaveUpNum += 1
+        elif results['status'] == PSO_STATUS_ARCHIVE:
+            self.archiveHitsNum += 1
+        return results
         
     def update_params_default_generation(self, progressData):
         """Method to update particle shape and parameters during the generation"""
+        # Building of the shape atlas (there is no generated particle yet)
+        if progressData['genParticles'] is None:
+            self.progressBar.setValue(progressData['percentComplete'])
+            self.update()
+            return
+        
         # Update the image of last found particle
         if not self.onlySpherical:
             self.lbl_particleImage.set_dimsValues(progressData['dims'])
@@ -1009,11 +1292,75 @@ class ParticlesGenerator(QMainWindow):
             text = 'Generation has been stopped!'
         else:
             text = 'Generation of particles system is finished!'
+        if self.gaveUpNum:
+            text += '\n{0:d} targets were given up by the search (best found shapes are saved).'.format(self.gaveUpNum)
+        if self.archiveHitsNum:
+            text += '\n{0:d} targets were taken from the archive of the evaluated shapes.'.format(self.archiveHitsNum)
+        if self.modelHitsNum:
+            text += '\n{0:d} predictions of the inverse model were accepted without the search.'.format(self.modelHitsNum)
+        if self.neighbourHitsNum:
+            text += '\n{0:d} targets were solved by the shape of the neighbour target.'.format(self.neighbourHitsNum)
         self.show_information_window(text) 
         
     """========== END set of methods for default generation process ==========""" 
     
     
+    """========== START set of methods for the PSO tuning process =========="""
+    def make_tuning_do_before(self):
+        """Preparation method for start the tuning of the PSO settings for the current nDim"""
+        self.initial_distr_treatment()  # Targets are drawn from the loaded distributions
+        self.percentComplete = 0
+        self.progressBar.setValue(self.percentComplete)
+        self.enable_elements(False)
+        self.btn_stopGeneration.setEnabled(True)
+        self.stopGeneration = False
+        
+        # Make worker with multi threading
+        worker = Worker(self.make_tuning_main_process)
+        worker.signals.progress.connect(self.update_params_tuning)
+        worker.signals.result.connect(self.make_tuning_do_after)
+        self.threadpool.start(worker)
+
+    def make_tuning_main_process(self, progress_callback):
+        """Main method for the tuning of the PSO settings (mean time to the precision limit
+           is minimized on the representative targets with the success rate floor)
+           return: dictionary with the profile (None if the tuning was stopped)"""
+        tuner = PSOTuner(self.nDim, self.psoAlg_dll, self.iterLimit, self.precisionLimit,
+                         self.tuneMinSuccessRate, self.PSO_control, self.optSettings)
+        targets = tuner.sample_targets(self.norm_circ_distr_diff, self.norm_convex_distr_diff,
+            self.norm_elong_distr_diff, self.cirConEl_chLower, self.cirConEl_chUpper,
+            self.tuneTargetsNum)
+        defaults = {'nPop': self.PSO_nPop, 'w': self.PSO_w, 'wDamp': self.PSO_wDamp,
+                    'c1': self.PSO_c1, 'c2': self.PSO_c2, 'a': self.PSO_a, 'b': self.PSO_b}
+        return tuner.tune(targets, defaults, self.tuneCandidatesNum,
+                          stop_check=lambda: self.stopGeneration,
+                          progress_callback=lambda fraction: progress_callback.emit(100 * fraction))
+
+    def update_params_tuning(self, percentComplete):
+        """Method for update the progress bar during the tuning"""
+        self.progressBar.setValue(percentComplete)
+
+    def make_tuning_do_after(self, profile):
+        """Method for saving and applying the tuned profile of the PSO settings"""
+        self.enable_elements(True)
+        if profile is None:
+            self.show_information_window('Tuning of the PSO settings has been stopped!')
+            return
+        save_profile(profile)
+        self.apply_PSO_profile()
+        self.update_predicted_time()
+        params = profile['params']
+        text = ('PSO settings for {0:d} axes are tuned and saved:\n'
+                'nPop = {1:d}, w = {2:.3f}, wDamp = {3:.3f}, c1 = {4:.3f}, c2 = {5:.3f}, a = {6:d}, b = {7:d}\n'
+                'Mean search time {8:.4f} s, success rate {9:.0%}').format(self.nDim, params['nPop'],
+                params['w'], params['wDamp'], params['c1'], params['c2'], params['a'], params['b'],
+                profile['meanTime'], profile['successRate'])
+        if not profile['feasible']:
+            text += '\nNo settings reached the success rate {0:.0%}!'.format(profile['minSuccessRate'])
+        self.show_information_window(text)
+    """========== END set of methods for the PSO tuning process =========="""
+    
+    
     """========== START set of methods for parallel generation process ==========""" 
     def make_parallel_generation_do_before(self):
         """Preparation method for start parallel generation of the particles"""
@@ -1097,6 +1444,7 @@ class ParticlesGenerator(QMainWindow):
         # Make .bat files to run the generators
         if not self.deleteError:
             folder = os.getcwd() + r"\Modules\Generator_c\run"
+            seed = new_seed()  # Common seed of all the threads (every thread uses own stream)
             for i in range(1, self.numThreads + 1):
                 fileName = folder + "\Run_{0}.bat".format(i)
                 textFile = open(fileName, 'w')
@@ -1128,7 +1476,17 @@ class ParticlesGenerator(QMainWindow):
                           " {0:f}".format(self.PSO_c1) + \
                           " {0:f}".format(self.PSO_c2) + \
                           " {0:d}".format(self.PSO_a) + \
-                          " {0:d}".format(self.PSO_b)
+                          " {0:d}".format(self.PSO_b) + \
+                          " {0:d}".format(seed) + \
+                          " {0:d}".format(self.optSettings.optimizer) + \
+                          " {0:d}".format(self.optSettings.popSize) + \
+                          " {0:f}".format(self.optSettings.sigma0) + \
+                          " {0:f}".format(self.optSettings.F) + \
+                          " {0:f}".format(self.optSettings.CR) + \
+                          " {0:f}".format(self.optSettings.step) + \
+                          " {0:d}".format(self.optSettings.nHarmonics) + \
+                          " {0:d}".format(int(bool(self.orderTargets))) + \
+                          " {0:d}".format(self.PSO_control.window)
                 textFile.write(progStr)
             textFile.close()
              
@@ -1385,6 +1743,11 @@ class ParticlesGenerator(QMainWindow):
         self.edt_precisionLimit.setEnabled(flag)
         self.btn_resetPrecisionLimit.setEnabled(flag)
         self.btn_generate.setEnabled(flag)
+        self.btn_tunePSO.setEnabled(flag)
+        self.chb_useShapeAtlas.setEnabled(flag)
+        self.chb_useInverseModel.setEnabled(flag)
+        self.btn_trainInverseModel.setEnabled(flag)
+        self.chb_orderTargets.setEnabled(flag)
 
     def make_output_xlsx_file(self):
         """Method for creation and saving the output xlsx file"""
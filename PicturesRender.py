@@ -28,6 +28,7 @@ from Modules.AdvancedQSpinBox import AdvancedQSpinBox
 from Modules.AdvancedQLineEdit import AdvancedQLineEdit
 from Modules.AdvancedQProgressBar import AdvancedQProgressBar
 from Modules.Worker import Worker
+from Modules.TrigTable import TrigTable
 from Modules.EditValidateFcn import edit_str_to_value
 from Modules.PRenderSettingsWindow import ColorSettingsWindow
 
@@ -1016,19 +1017,12 @@ class PicturesRender(QMainWindow):
     
     def get_coordinates_only(self, size, dims, randAngle):  
         """Function for the calculation of shape coordinates"""  
-        dimsCoord = ()  # Coordinates ((x,y),...) of all dims points (0 in left top corner)        
         # Calculate the centre radius for new size
         centreRadius = 5 * size / 360    
-        dN = 2*m.pi / self.nDim
-        array = [0] * self.nDim
-        
-        for i in range(self.nDim):
-            radius = dims[i] * (size / 2 - centreRadius) + centreRadius  # Slider starts not from the center!
-            angle = i * dN + randAngle
-            x = int(round(m.cos(angle) * radius + size / 2))
-            y = int(round(m.sin(angle) * radius + size / 2))
-            array[i] = (x, y)
-        dimsCoord = tuple(array)
+        radius = np.asarray(dims[:self.nDim]) * (size / 2 - centreRadius) + centreRadius  # Slider starts not from the center!
+        # Coordinates ((x,y),...) of all dims points (0 in left top corner), cached directions
+        # are rotated by randAngle with one 2x2 rotation
+        dimsCoord = tuple(TrigTable.get_int_vertices(radius, size / 2, randAngle))
         return dimsCoord    
       
     def make_label_for_time(self, value):